@@ -0,0 +1 @@
+"""客户端基准测试（进程内模拟集群）"""
@@ -0,0 +1,206 @@
+"""KafkaClusterClient 基准测试
+
+在进程内模拟集群上执行客户端的主要操作，输出每个操作的耗时、请求数与峰值内存。
+
+    python -m benchmarks.bench_client                       # 默认规模
+    python -m benchmarks.bench_client --scale large         # 50k Topic / 5k 消费者组
+    python -m benchmarks.bench_client --latency-ms 2 --only get_topic_detail
+    python -m benchmarks.bench_client --json result.json    # 保存结果
+    python -m benchmarks.bench_client --baseline result.json  # 与基线对比，退化时返回 1
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from kafka_client import ClusterConnection, KafkaClusterClient
+from kafka_client.cache import MessageRangeCache
+
+from .fake_cluster import BACKEND_NAME, FakeCluster, FakeClusterConfig, install
+
+SCALES = {
+    'small': FakeClusterConfig(topics=1000, groups=200),
+    'large': FakeClusterConfig(topics=50000, groups=5000, messages_per_partition=1000000),
+}
+
+
+@dataclass
+class BenchResult:
+    name: str
+    wall_time: float
+    requests: Dict[str, int] = field(default_factory=dict)
+    peak_memory: int = 0
+
+
+@dataclass
+class BenchCase:
+    name: str
+    func: Callable[[KafkaClusterClient], object]
+    # 大规模下过慢的操作（逐个 Topic / 逐个组请求）可以单独跳过
+    slow: bool = False
+
+
+def build_cases(cluster: FakeCluster, message_limit: int) -> List[BenchCase]:
+    topic = sorted(t for t in cluster.topics if not t.startswith('__'))[0]
+    group = next(iter(cluster.committed))
+    end = cluster.config.messages_per_partition
+    first_ts, last_ts = cluster.time_range()
+    return [
+        BenchCase('get_topic_names', lambda c: c.get_topic_names()),
+        BenchCase('get_consumer_group_names', lambda c: c.get_consumer_group_names()),
+        BenchCase('get_topics', lambda c: c.get_topics(), slow=True),
+        BenchCase('get_topic_detail', lambda c: c.get_topic_detail(topic)),
+        BenchCase('get_consumer_groups', lambda c: c.get_consumer_groups(), slow=True),
+        BenchCase('get_consumer_group_detail', lambda c: c.get_consumer_group_detail(group)),
+        BenchCase('consume_messages_latest', lambda c: c.consume_messages(topic, 0, limit=message_limit)),
+        BenchCase('consume_messages_all_partitions',
+                  lambda c: c.consume_messages(topic, None, limit=message_limit, from_beginning=True)),
+        BenchCase('consume_messages_cached',
+                  lambda c: [c.consume_messages(topic, 1, offset=end // 2, limit=message_limit) for _ in range(2)]),
+        BenchCase('get_message_histogram',
+                  lambda c: c.get_message_histogram(topic, first_ts, last_ts + 1, bucket_seconds=60)),
+        BenchCase('get_message_consumption_status',
+                  lambda c: c.get_message_consumption_status(topic, 0, end // 2), slow=True),
+    ]
+
+
+def run_case(client: KafkaClusterClient, cluster: FakeCluster, case: BenchCase, repeat: int) -> BenchResult:
+    """计时轮取最小值；内存单独跑一轮，避免 tracemalloc 的开销计入耗时"""
+    best = float('inf')
+    requests = {}
+    for _ in range(repeat):
+        if client.message_cache is not None:
+            client.message_cache.clear()
+        cluster.reset_counters()
+        gc.collect()
+        started = time.perf_counter()
+        case.func(client)
+        best = min(best, time.perf_counter() - started)
+        requests = cluster.snapshot()
+
+    if client.message_cache is not None:
+        client.message_cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.func(client)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchResult(case.name, best, requests, peak)
+
+
+def compare(results: List[BenchResult], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """返回相对基线退化的描述"""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+        if result.wall_time > base['wall_time'] * (1 + tolerance) and result.wall_time - base['wall_time'] > 0.005:
+            regressions.append(f"{result.name}: 耗时 {base['wall_time']:.4f}s -> {result.wall_time:.4f}s")
+        base_requests = base['requests'].get('total', 0)
+        if result.requests.get('total', 0) > base_requests:
+            regressions.append(f"{result.name}: 请求数 {base_requests} -> {result.requests.get('total', 0)}")
+        if result.peak_memory > base['peak_memory'] * (1 + tolerance) and result.peak_memory - base['peak_memory'] > 1024 * 1024:
+            regressions.append(f"{result.name}: 峰值内存 {base['peak_memory']} -> {result.peak_memory}")
+    return regressions
+
+
+def _pad(text: str, width: int, right: bool = False) -> str:
+    """按显示宽度补齐（中文占两列）"""
+    display = sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    padding = ' ' * max(0, width - display)
+    return padding + text if right else text + padding
+
+
+def format_table(results: List[BenchResult]) -> str:
+    columns = [('操作', 34), ('耗时(s)', 12), ('请求数', 10), ('拉取字节', 14), ('Consumer', 10), ('峰值内存(KB)', 16)]
+    lines = [''.join(_pad(title, width, right=i > 0) for i, (title, width) in enumerate(columns))]
+    for r in results:
+        values = [
+            r.name, f"{r.wall_time:.4f}", str(r.requests.get('total', 0)),
+            str(r.requests.get('bytes_fetched', 0)), str(r.requests.get('consumers_created', 0)),
+            f"{r.peak_memory / 1024:.1f}",
+        ]
+        lines.append(''.join(_pad(v, width, right=i > 0) for i, (v, (_, width)) in enumerate(zip(values, columns))))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="KafkaClusterClient 基准测试")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--topics', type=int, help="覆盖 Topic 数量")
+    parser.add_argument('--groups', type=int, help="覆盖消费者组数量")
+    parser.add_argument('--partitions', type=int, help="覆盖每个 Topic 的分区数")
+    parser.add_argument('--messages-per-partition', type=int)
+    parser.add_argument('--message-size', type=int)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="每次请求的模拟延迟")
+    parser.add_argument('--limit', type=int, default=1000, help="consume_messages 拉取条数")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', action='append', help="只运行指定操作（可重复）")
+    parser.add_argument('--skip-slow', action='store_true', help="跳过逐个 Topic / 组请求的操作")
+    parser.add_argument('--no-cache', action='store_true', help="不启用消息区间缓存")
+    parser.add_argument('--json', help="把结果写入 JSON 文件")
+    parser.add_argument('--baseline', help="与基线 JSON 对比")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="允许的相对退化比例")
+    args = parser.parse_args(argv)
+
+    config = FakeClusterConfig(**asdict(SCALES[args.scale]))
+    overrides = {
+        'topics': args.topics, 'groups': args.groups, 'partitions_per_topic': args.partitions,
+        'messages_per_partition': args.messages_per_partition, 'message_size': args.message_size,
+    }
+    for name, value in overrides.items():
+        if value is not None:
+            setattr(config, name, value)
+    config.latency_ms = args.latency_ms
+
+    started = time.perf_counter()
+    cluster = FakeCluster(config)
+    install(cluster)
+    print(f"模拟集群: {config.topics} Topic x {config.partitions_per_topic} 分区, {config.groups} 消费者组, "
+          f"延迟 {config.latency_ms}ms (构建 {time.perf_counter() - started:.2f}s)")
+
+    client = KafkaClusterClient(
+        ClusterConnection(name="bench", bootstrap_servers="fake:9092", client_backend=BACKEND_NAME),
+        message_cache=None if args.no_cache else MessageRangeCache()
+    )
+    client.connect()
+
+    results = []
+    for case in build_cases(cluster, args.limit):
+        if args.only and case.name not in args.only:
+            continue
+        if args.skip_slow and case.slow:
+            continue
+        result = run_case(client, cluster, case, max(1, args.repeat))
+        results.append(result)
+        print(f"  {case.name}: {result.wall_time:.4f}s", file=sys.stderr)
+
+    print(format_table(results))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({r.name: asdict(r) for r in results}, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n性能退化:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n与基线相比无退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""进程内模拟集群
+
+实现 KafkaClusterClient 使用的 Admin / Consumer / Producer 适配器接口，
+数据按需生成（不会真的在内存中保存上亿条消息），每次请求计数并可注入固定延迟，
+用于在没有真实集群的情况下衡量客户端各操作的开销。
+"""
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from kafka_client.backends import (
+    AdminAdapter,
+    CommittedOffset,
+    ConsumerAdapter,
+    KafkaBackend,
+    ProducerAdapter,
+    TopicPartition,
+    build_message,
+    register_backend,
+)
+from kafka_client.models import BrokerInfo, ConsumerGroupInfo, ConsumerGroupMember, KafkaMessage
+
+BACKEND_NAME = "fake"
+
+# 消息时间戳起点与间隔
+_BASE_TIMESTAMP_MS = int(datetime(2024, 1, 1).timestamp() * 1000)
+_TIMESTAMP_STEP_MS = 100
+
+
+@dataclass
+class FakeClusterConfig:
+    """模拟集群规模"""
+    topics: int = 1000
+    partitions_per_topic: int = 3
+    groups: int = 200
+    topics_per_group: int = 2
+    messages_per_partition: int = 10000
+    message_size: int = 256
+    # 每次请求的模拟网络延迟（毫秒）
+    latency_ms: float = 0.0
+    brokers: int = 3
+
+
+class FakeCluster:
+    """模拟集群状态与请求统计"""
+
+    def __init__(self, config: Optional[FakeClusterConfig] = None):
+        self.config = config or FakeClusterConfig()
+        width = len(str(max(self.config.topics - 1, 1)))
+        self.topics: Dict[str, int] = {
+            f"topic-{i:0{width}d}": self.config.partitions_per_topic for i in range(self.config.topics)
+        }
+        self.topics["__consumer_offsets"] = 50
+        self._topic_names = sorted(t for t in self.topics if not t.startswith('__'))
+        self.end_offsets: Dict[TopicPartition, int] = {}
+        self.committed: Dict[str, Dict[TopicPartition, int]] = {}
+        self._init_groups()
+        self.requests: Counter = Counter()
+        self.bytes_fetched = 0
+        self.consumers_created = 0
+        self._lock = threading.Lock()
+
+    def _init_groups(self):
+        names = self._topic_names
+        for i in range(self.config.groups):
+            offsets = {}
+            for j in range(self.config.topics_per_group):
+                topic = names[(i * self.config.topics_per_group + j) % len(names)]
+                for p in range(self.topics[topic]):
+                    # 滞后量按组号变化，保证 lag 计算有非零数据
+                    offsets[TopicPartition(topic, p)] = max(0, self.end_offset(TopicPartition(topic, p)) - i % 100)
+            self.committed[f"group-{i}"] = offsets
+
+    # ---- 请求统计 ----
+
+    def request(self, api: str, count: int = 1):
+        """记录一次请求并模拟网络延迟"""
+        with self._lock:
+            self.requests[api] += count
+        if self.config.latency_ms > 0:
+            time.sleep(self.config.latency_ms / 1000)
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests.clear()
+            self.bytes_fetched = 0
+            self.consumers_created = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self.requests)
+            result['total'] = sum(self.requests.values())
+            result['bytes_fetched'] = self.bytes_fetched
+            result['consumers_created'] = self.consumers_created
+            return result
+
+    # ---- 数据 ----
+
+    def end_offset(self, tp: TopicPartition) -> int:
+        return self.end_offsets.get(tp, self.config.messages_per_partition)
+
+    def time_range(self) -> Tuple[float, float]:
+        """完整分区中消息时间戳的范围（Unix 秒）"""
+        last = self.config.messages_per_partition - 1
+        return _BASE_TIMESTAMP_MS / 1000, (_BASE_TIMESTAMP_MS + last * _TIMESTAMP_STEP_MS) / 1000
+
+    def message(self, topic: str, partition: int, offset: int) -> KafkaMessage:
+        prefix = f"{topic}:{partition}:{offset}:".encode()
+        value = prefix + b'x' * max(0, self.config.message_size - len(prefix))
+        return build_message(
+            topic, partition, offset, _BASE_TIMESTAMP_MS + offset * _TIMESTAMP_STEP_MS,
+            str(offset).encode(), value, [('source', b'bench')]
+        )
+
+
+class FakeAdmin(AdminAdapter):
+
+    def __init__(self, cluster: FakeCluster):
+        self.cluster = cluster
+
+    def list_topics(self) -> List[str]:
+        self.cluster.request('Metadata')
+        return list(self.cluster.topics)
+
+    def describe_cluster(self) -> List[BrokerInfo]:
+        self.cluster.request('DescribeCluster')
+        return [BrokerInfo(node_id=i, host=f"broker-{i}", port=9092) for i in range(self.cluster.config.brokers)]
+
+    def list_consumer_groups(self) -> List[Tuple[str, str]]:
+        self.cluster.request('ListGroups', self.cluster.config.brokers)
+        return [(group_id, "consumer") for group_id in self.cluster.committed]
+
+    def describe_consumer_groups(self, group_ids: List[str]) -> List[ConsumerGroupInfo]:
+        self.cluster.request('DescribeGroups')
+        groups = []
+        for group_id in group_ids:
+            offsets = self.cluster.committed.get(group_id, {})
+            members = [ConsumerGroupMember(
+                member_id=f"{group_id}-member-0",
+                client_id="bench",
+                client_host="/127.0.0.1",
+                assigned_partitions=[{'topic': tp.topic, 'partition': tp.partition} for tp in offsets]
+            )]
+            groups.append(ConsumerGroupInfo(
+                group_id=group_id, state="Stable", protocol_type="consumer",
+                protocol="range", coordinator=0, members=members
+            ))
+        return groups
+
+    def list_consumer_group_offsets(self, group_id: str) -> Dict[TopicPartition, CommittedOffset]:
+        self.cluster.request('OffsetFetch')
+        return {tp: CommittedOffset(offset, "") for tp, offset in self.cluster.committed.get(group_id, {}).items()}
+
+    def describe_topic_config(self, topic: str) -> Dict[str, str]:
+        self.cluster.request('DescribeConfigs')
+        return {'cleanup.policy': 'delete', 'retention.ms': '604800000'}
+
+    def create_topic(self, topic: str, num_partitions: int, replication_factor: int,
+                     config: Optional[Dict[str, str]] = None):
+        self.cluster.request('CreateTopics')
+        self.cluster.topics[topic] = num_partitions
+
+    def delete_topic(self, topic: str):
+        self.cluster.request('DeleteTopics')
+        self.cluster.topics.pop(topic, None)
+
+    def create_partitions(self, topic: str, total_count: int):
+        self.cluster.request('CreatePartitions')
+        self.cluster.topics[topic] = total_count
+
+    def close(self):
+        pass
+
+
+class FakeConsumer(ConsumerAdapter):
+
+    def __init__(self, cluster: FakeCluster, group_id: Optional[str]):
+        self.cluster = cluster
+        self.group_id = group_id
+        self._positions: Dict[TopicPartition, int] = {}
+        with cluster._lock:
+            cluster.consumers_created += 1
+
+    def partitions_for_topic(self, topic: str) -> Optional[Set[int]]:
+        self.cluster.request('Metadata')
+        count = self.cluster.topics.get(topic)
+        return set(range(count)) if count is not None else None
+
+    def topic_partitions(self) -> Dict[str, Set[int]]:
+        self.cluster.request('Metadata')
+        return {topic: set(range(count)) for topic, count in self.cluster.topics.items()}
+
+    def beginning_offsets(self, tps: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        self.cluster.request('ListOffsets')
+        return {TopicPartition(tp[0], tp[1]): 0 for tp in tps}
+
+    def end_offsets(self, tps: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        self.cluster.request('ListOffsets')
+        return {TopicPartition(tp[0], tp[1]): self.cluster.end_offset(TopicPartition(tp[0], tp[1])) for tp in tps}
+
+    def offsets_for_times(self, timestamps: Dict[TopicPartition, int]) -> Dict[TopicPartition, Optional[int]]:
+        self.cluster.request('ListOffsets')
+        result = {}
+        for tp, ts in timestamps.items():
+            tp = TopicPartition(tp[0], tp[1])
+            offset = max(0, -(-(ts - _BASE_TIMESTAMP_MS) // _TIMESTAMP_STEP_MS))
+            result[tp] = offset if offset < self.cluster.end_offset(tp) else None
+        return result
+
+    def assign(self, tps: List[TopicPartition]):
+        self._positions = {TopicPartition(tp[0], tp[1]): None for tp in tps}
+
+    def subscribe(self, topics: List[str]):
+        self.cluster.request('JoinGroup')
+        tps = []
+        for topic in topics:
+            tps.extend(TopicPartition(topic, p) for p in range(self.cluster.topics.get(topic, 0)))
+        self.assign(tps)
+
+    def assignment(self) -> Set[TopicPartition]:
+        return set(self._positions)
+
+    def seek(self, tp: TopicPartition, offset: int):
+        self._positions[TopicPartition(tp[0], tp[1])] = offset
+
+    def _resolve_position(self, tp: TopicPartition) -> int:
+        if self._positions.get(tp) is None:
+            committed = self.cluster.committed.get(self.group_id, {}).get(tp) if self.group_id else None
+            self._positions[tp] = committed if committed is not None else 0
+        return self._positions[tp]
+
+    def position(self, tp: TopicPartition) -> int:
+        return self._resolve_position(TopicPartition(tp[0], tp[1]))
+
+    def poll(self, timeout_ms: int, max_records: Optional[int] = None) -> List[KafkaMessage]:
+        self.cluster.request('Fetch')
+        remaining = max_records or 500
+        messages = []
+        for tp in list(self._positions):
+            position = self._resolve_position(tp)
+            end = min(self.cluster.end_offset(tp), position + remaining)
+            for offset in range(position, end):
+                messages.append(self.cluster.message(tp.topic, tp.partition, offset))
+            self._positions[tp] = max(position, end)
+            remaining -= end - position
+            if remaining <= 0:
+                break
+        fetched = sum(len(m.value or b'') + len(m.key or b'') for m in messages)
+        with self.cluster._lock:
+            self.cluster.bytes_fetched += fetched
+        return messages
+
+    def commit(self, offsets: Optional[Dict[TopicPartition, int]] = None):
+        self.cluster.request('OffsetCommit')
+        if not self.group_id:
+            return
+        group = self.cluster.committed.setdefault(self.group_id, {})
+        for tp, offset in (offsets or self._positions).items():
+            if offset is not None:
+                group[TopicPartition(tp[0], tp[1])] = offset
+
+    def close(self):
+        pass
+
+
+class FakeProducer(ProducerAdapter):
+
+    def __init__(self, cluster: FakeCluster):
+        self.cluster = cluster
+
+    def send(self, topic: str, value: Optional[bytes], key: Optional[bytes] = None,
+             partition: Optional[int] = None, headers: Optional[List[tuple]] = None,
+             timeout: float = 10) -> Tuple[int, int]:
+        self.cluster.request('Produce')
+        tp = TopicPartition(topic, partition or 0)
+        offset = self.cluster.end_offset(tp)
+        self.cluster.end_offsets[tp] = offset + 1
+        return tp.partition, offset
+
+    def close(self):
+        pass
+
+
+class FakeBackend(KafkaBackend):
+    """绑定到某个 FakeCluster 的后端"""
+
+    name = BACKEND_NAME
+    network = False
+
+    def __init__(self, connection, cluster: FakeCluster):
+        super().__init__(connection)
+        self.cluster = cluster
+
+    def create_admin(self) -> AdminAdapter:
+        return FakeAdmin(self.cluster)
+
+    def create_consumer(self, group_id: Optional[str] = None) -> ConsumerAdapter:
+        return FakeConsumer(self.cluster, group_id)
+
+    def create_producer(self) -> ProducerAdapter:
+        return FakeProducer(self.cluster)
+
+
+def install(cluster: FakeCluster, name: str = BACKEND_NAME):
+    """把模拟集群注册为客户端后端，连接配置中 client_backend 设为该名称即可使用"""
+    register_backend(name, lambda connection: FakeBackend(connection, cluster))
@@ -19,6 +19,11 @@ hidden_imports = [
     'kafka.protocol.message',
     'kafka.metrics',
     'kafka.metrics.stats',
+    # 客户端后端按名称延迟导入，需显式声明
+    'kafka_client.backends.kafka_python',
+    'kafka_client.backends.confluent',
+    'confluent_kafka',
+    'confluent_kafka.admin',
 ]
 
 a = Analysis(
@@ -0,0 +1,146 @@
+"""KafkaClusterClient 的 asyncio 接口
+
+底层客户端库都是阻塞的，这里把每个方法放到一个小线程池中执行，线程数默认等于连接的并发任务上限。
+协程数量与线程数无关：成千上万个请求可以同时 await，实际同时访问 Broker 的只有线程池大小个。
+
+    client = AsyncKafkaClusterClient(KafkaClusterClient(connection))
+    await client.connect()
+    details = await client.get_consumer_group_details(group_ids, limit=16)
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, Optional, TypeVar
+
+from .client import KafkaClusterClient
+from .models import ConsumerGroupInfo, KafkaMessage, TopicInfo
+
+T = TypeVar('T')
+
+# 与 KafkaClusterClient 同名的异步方法
+_MIRRORED_METHODS = (
+    'connect',
+    'disconnect',
+    'get_brokers',
+    'get_topic_names',
+    'get_consumer_group_names',
+    'get_topics',
+    'get_topic_detail',
+    'get_consumer_groups',
+    'get_consumer_group_detail',
+    'consume_messages',
+    'resolve_offset_ranges',
+    'produce_message',
+    'get_message_consumption_status',
+    'create_topic',
+    'delete_topic',
+    'create_partitions',
+    'reset_consumer_group_offsets',
+    'create_consumer_group',
+)
+
+
+async def gather_limited(aws: Iterable[Awaitable[T]], limit: int,
+                         return_exceptions: bool = False) -> List[T]:
+    """与 asyncio.gather 相同，但同时等待的协程不超过 limit 个，结果按输入顺序返回"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def bounded(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(bounded(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+class AsyncKafkaClusterClient:
+    """KafkaClusterClient 的异步封装，方法名与参数与同步版本一致"""
+
+    def __init__(self, client: KafkaClusterClient, max_workers: Optional[int] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.client = client
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers or client.max_concurrent_tasks,
+            thread_name_prefix=f"kafka-aio-{client.connection.name}"
+        )
+
+    @property
+    def connection(self):
+        return self.client.connection
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client.is_connected
+
+    async def run(self, func, *args, **kwargs) -> Any:
+        """在线程池中执行任意阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        """关闭自有线程池（不断开连接，外部传入的线程池由调用方管理）"""
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def close(self):
+        """断开连接并关闭自有线程池"""
+        await self.disconnect()
+        self.shutdown()
+
+    async def __aenter__(self) -> 'AsyncKafkaClusterClient':
+        if not self.client.is_connected:
+            await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # ---- 批量并发 ----
+
+    async def get_topic_details(self, topic_names: Iterable[str],
+                                limit: Optional[int] = None) -> Dict[str, Optional[TopicInfo]]:
+        """并发获取多个 Topic 详情，失败的 Topic 值为 None"""
+        names = list(topic_names)
+        results = await gather_limited(
+            (self.get_topic_detail(name) for name in names),
+            limit or self.client.max_concurrent_tasks, return_exceptions=True
+        )
+        return {name: None if isinstance(r, Exception) else r for name, r in zip(names, results)}
+
+    async def get_consumer_group_details(self, group_ids: Iterable[str], limit: Optional[int] = None,
+                                         with_time_lag: bool = False) -> Dict[str, Optional[ConsumerGroupInfo]]:
+        """并发获取多个消费者组详情，失败的组值为 None"""
+        ids = list(group_ids)
+        results = await gather_limited(
+            (self.get_consumer_group_detail(group_id, with_time_lag=with_time_lag) for group_id in ids),
+            limit or self.client.max_concurrent_tasks, return_exceptions=True
+        )
+        return {group_id: None if isinstance(r, Exception) else r for group_id, r in zip(ids, results)}
+
+    async def iter_message_batches(self, *args, **kwargs) -> AsyncIterator[List[KafkaMessage]]:
+        """异步版 iter_message_batches，每取一批占用一次线程池"""
+        iterator = self.client.iter_message_batches(*args, **kwargs)
+        done = object()
+        try:
+            while True:
+                batch = await self.run(next, iterator, done)
+                if batch is done:
+                    return
+                yield batch
+        finally:
+            await self.run(iterator.close)
+
+
+def _mirror(name: str):
+    method = getattr(KafkaClusterClient, name)
+
+    @functools.wraps(method)
+    async def call(self, *args, **kwargs):
+        return await self.run(getattr(self.client, name), *args, **kwargs)
+    return call
+
+
+for _name in _MIRRORED_METHODS:
+    setattr(AsyncKafkaClusterClient, _name, _mirror(_name))
+del _name
@@ -0,0 +1,207 @@
+"""消费者组 lag 告警
+
+AlertEvaluator 用定期采集的 GroupOffsetsSnapshot 增量计算规则：只有提交位点或末尾位点发生变化的分区
+才会更新所在 (规则, 组) 的值，每个组匹配哪些规则、每条规则匹配哪些 Topic 都只在第一次出现时计算，
+因此 lag 规则每次评估的开销与变化的分区数成正比，而不是规则数 × 分区数。
+time_lag 规则依赖每次采集都会更新的生产速率，每次评估都重新计算匹配的组。
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Set, Tuple
+
+from .models import AlertEvent, AlertRule, GroupOffsetsSnapshot
+
+logger = logging.getLogger(__name__)
+
+# 规则可用的指标 -> 显示名称
+ALERT_METRICS = {
+    'lag': 'Lag（条）',
+    'time_lag': '时间延迟（秒，按生产速率估算）',
+}
+
+
+class _GroupState:
+    """一个组的分区位点、匹配的规则与各规则当前的值"""
+
+    __slots__ = ('offsets', 'rules', 'time_rules', 'lag_sums', 'firing')
+
+    def __init__(self, rules: List[int], time_rules: Set[int]):
+        # (topic, partition) -> (提交位点, 末尾位点)
+        self.offsets: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        self.rules = rules
+        # metric 为 time_lag 的规则序号，速率更新后即使位点不变也要重新计算
+        self.time_rules = time_rules
+        # 规则序号 -> 匹配分区的 lag 之和（只维护 metric 为 lag 的规则）
+        self.lag_sums: Dict[int, int] = {i: 0 for i in rules}
+        # 正在告警的规则序号
+        self.firing: Set[int] = set()
+
+
+class AlertEvaluator:
+    """按规则评估各集群的位点快照，返回状态发生变化（触发 / 恢复）的告警"""
+
+    def __init__(self, rules: Optional[List[AlertRule]] = None, rate_tracker=None):
+        # 计算 time_lag 需要分区的生产速率（LagRateTracker）
+        self.rate_tracker = rate_tracker
+        self._lock = threading.Lock()
+        self.rules: List[AlertRule] = []
+        self._states: Dict[Tuple[str, str], _GroupState] = {}
+        self._topic_matches: Dict[Tuple[int, str], bool] = {}
+        self.set_rules(rules or [])
+
+    def set_rules(self, rules: List[AlertRule]):
+        """替换规则，下一次评估时重新计算全部分区（正在告警的状态丢弃，不产生恢复事件）"""
+        with self._lock:
+            self.rules = list(rules)
+            self._states.clear()
+            self._topic_matches.clear()
+
+    def firing(self) -> List[Tuple[str, str, AlertRule]]:
+        """当前正在告警的 (集群, 组, 规则)"""
+        with self._lock:
+            return [
+                (cluster, group_id, self.rules[i])
+                for (cluster, group_id), state in self._states.items() for i in sorted(state.firing)
+            ]
+
+    def remove_cluster(self, cluster: str):
+        with self._lock:
+            for key in [k for k in self._states if k[0] == cluster]:
+                del self._states[key]
+
+    def _matching_rules(self, cluster: str, group_id: str) -> List[int]:
+        return [
+            i for i, rule in enumerate(self.rules)
+            if rule.enabled and fnmatchcase(cluster, rule.cluster) and fnmatchcase(group_id, rule.group_pattern)
+        ]
+
+    def _topic_matches_rule(self, index: int, topic: str) -> bool:
+        key = (index, topic)
+        matched = self._topic_matches.get(key)
+        if matched is None:
+            matched = self._topic_matches[key] = fnmatchcase(topic, self.rules[index].topic_pattern)
+        return matched
+
+    def evaluate(self, cluster: str, snapshot: GroupOffsetsSnapshot) -> List[AlertEvent]:
+        if not self.rules:
+            return []
+        events = []
+        with self._lock:
+            for group_id, committed in snapshot.committed.items():
+                key = (cluster, group_id)
+                state = self._states.get(key)
+                if state is None:
+                    rules = self._matching_rules(cluster, group_id)
+                    time_rules = {i for i in rules if self.rules[i].metric == 'time_lag'}
+                    state = self._states[key] = _GroupState(rules, time_rules)
+                if not state.rules:
+                    continue
+                changed = self._apply_offsets(state, committed, snapshot.end_offsets)
+                if self.rate_tracker is not None:
+                    changed |= state.time_rules
+                if changed:
+                    events.extend(self._check(cluster, group_id, state, changed, snapshot.taken_at))
+            # 已删除的组：正在告警的规则直接恢复
+            for key in [k for k in self._states if k[0] == cluster
+                        and k[1] not in snapshot.committed and k[1] not in snapshot.errors]:
+                state = self._states.pop(key)
+                for i in sorted(state.firing):
+                    rule = self.rules[i]
+                    events.append(AlertEvent(rule.name, cluster, key[1], rule.metric, 0, rule.threshold,
+                                             False, snapshot.taken_at))
+        return events
+
+    def _apply_offsets(self, state: _GroupState, committed: Dict[Tuple[str, int], int],
+                       end_offsets: Dict[Tuple[str, int], int]) -> Set[int]:
+        """更新有变化的分区，返回值可能变化的规则序号"""
+        changed: Set[int] = set()
+        for tp, offset in committed.items():
+            end = end_offsets.get(tp)
+            if end is None:
+                continue
+            previous = state.offsets.get(tp)
+            if previous == (offset, end):
+                continue
+            state.offsets[tp] = (offset, end)
+            delta = max(0, end - offset) - (max(0, previous[1] - previous[0]) if previous else 0)
+            self._update_rules(state, tp[0], delta, changed)
+        for tp in [tp for tp in state.offsets if tp not in committed]:
+            offset, end = state.offsets.pop(tp)
+            self._update_rules(state, tp[0], -max(0, end - offset), changed)
+        return changed
+
+    def _update_rules(self, state: _GroupState, topic: str, delta: int, changed: Set[int]):
+        for i in state.rules:
+            if self._topic_matches_rule(i, topic):
+                if self.rules[i].metric == 'lag':
+                    state.lag_sums[i] += delta
+                changed.add(i)
+
+    def _time_lag(self, cluster: str, group_id: str, state: _GroupState, index: int) -> Optional[float]:
+        """匹配分区中最大的估算时间延迟：lag / 最近的生产速率
+
+        没有 lag 时为 0；有 lag 但还没有可用的生产速率时返回 None，不改变告警状态。
+        """
+        if self.rate_tracker is None:
+            return None
+        rate = self.rate_tracker.group_rate(cluster, group_id)
+        worst = None
+        lagging = False
+        for tp, (offset, end) in state.offsets.items():
+            lag = end - offset
+            if lag <= 0 or not self._topic_matches_rule(index, tp[0]):
+                continue
+            lagging = True
+            partition = rate.partitions.get(tp) if rate is not None else None
+            if partition is None or partition.span <= 0 or partition.produce_rate <= 0:
+                continue
+            value = lag / partition.produce_rate
+            worst = value if worst is None else max(worst, value)
+        if worst is None:
+            return None if lagging else 0.0
+        return worst
+
+    def _check(self, cluster: str, group_id: str, state: _GroupState, indexes: Set[int],
+               now: float) -> List[AlertEvent]:
+        events = []
+        for i in sorted(indexes):
+            rule = self.rules[i]
+            if rule.metric == 'lag':
+                value = state.lag_sums[i]
+            else:
+                value = self._time_lag(cluster, group_id, state, i)
+                if value is None:
+                    continue
+            if i not in state.firing and value >= rule.threshold:
+                state.firing.add(i)
+                events.append(AlertEvent(rule.name, cluster, group_id, rule.metric, value, rule.threshold, True, now))
+            elif i in state.firing and value <= rule.clear_value:
+                state.firing.discard(i)
+                events.append(AlertEvent(rule.name, cluster, group_id, rule.metric, value, rule.threshold, False, now))
+        return events
+
+
+class AlertLog:
+    """把告警事件追加写入本地文本日志"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, events: List[AlertEvent]):
+        if not events:
+            return
+        lines = [
+            f"{datetime.fromtimestamp(e.at).strftime('%Y-%m-%d %H:%M:%S')} {e.message()}\n" for e in events
+        ]
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+        except OSError as e:
+            logger.warning(f"写入告警日志失败: {e}")
@@ -0,0 +1,68 @@
+"""客户端后端
+
+后端按名称注册，底层库（kafka / confluent_kafka）只在首次创建该后端时才导入。
+"""
+
+import importlib
+from typing import Callable, Dict, List, Union
+
+from ..models import ClusterConnection
+from .base import (
+    AdminAdapter,
+    CommittedOffset,
+    ConsumerAdapter,
+    KafkaBackend,
+    ProducerAdapter,
+    TopicPartition,
+    build_message,
+)
+
+DEFAULT_BACKEND = "kafka-python"
+
+# 名称 -> "模块:类名"（延迟导入）或工厂函数
+_BACKENDS: Dict[str, Union[str, Callable[[ClusterConnection], KafkaBackend]]] = {
+    "kafka-python": "kafka_client.backends.kafka_python:KafkaPythonBackend",
+    "confluent-kafka": "kafka_client.backends.confluent:ConfluentBackend",
+}
+
+
+def register_backend(name: str, factory: Callable[[ClusterConnection], KafkaBackend]):
+    """注册自定义后端"""
+    _BACKENDS[name] = factory
+
+
+def available_backends() -> List[str]:
+    """已注册的后端名称"""
+    return list(_BACKENDS)
+
+
+def create_backend(connection: ClusterConnection) -> KafkaBackend:
+    """按连接配置创建后端实例"""
+    name = connection.client_backend or DEFAULT_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"未知的客户端后端: {name}")
+
+    factory = _BACKENDS[name]
+    if isinstance(factory, str):
+        module_name, class_name = factory.split(":")
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            raise RuntimeError(f"无法加载 {name} 后端，请确认已安装对应依赖: {e}") from e
+        factory = getattr(module, class_name)
+    return factory(connection)
+
+
+__all__ = [
+    'DEFAULT_BACKEND',
+    'AdminAdapter',
+    'CommittedOffset',
+    'ConsumerAdapter',
+    'KafkaBackend',
+    'ProducerAdapter',
+    'TopicPartition',
+    'build_message',
+    'available_backends',
+    'create_backend',
+    'register_backend',
+]
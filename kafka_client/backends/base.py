@@ -0,0 +1,195 @@
+"""客户端后端接口定义
+
+KafkaClusterClient 只依赖这里定义的 Admin / Consumer / Producer 适配器接口，
+各后端负责把底层库的返回值转换为统一的数据模型，保证上层拿到的对象完全一致。
+"""
+
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models import BrokerInfo, ClusterConnection, ConsumerGroupInfo, KafkaMessage
+
+
+# 与 kafka.structs.TopicPartition 字段一致，二者可以互相作为字典键使用
+TopicPartition = namedtuple("TopicPartition", ["topic", "partition"])
+
+# 消费者组在某个分区上提交的位点；未提交时 offset 为 -1
+CommittedOffset = namedtuple("CommittedOffset", ["offset", "metadata"])
+
+
+def build_message(
+    topic: str,
+    partition: int,
+    offset: int,
+    timestamp_ms: Optional[int],
+    key: Optional[bytes],
+    value: Optional[bytes],
+    headers: Optional[Iterable[tuple]],
+) -> KafkaMessage:
+    """把底层记录转换为 KafkaMessage（各后端共用，保证时间戳/headers 处理一致）"""
+    timestamp = None
+    if timestamp_ms and timestamp_ms > 0:
+        timestamp = datetime.fromtimestamp(timestamp_ms / 1000)
+    return KafkaMessage(
+        topic=topic,
+        partition=partition,
+        offset=offset,
+        timestamp=timestamp,
+        key=key,
+        value=value,
+        headers=list(headers) if headers else []
+    )
+
+
+class AdminAdapter(ABC):
+    """集群管理接口"""
+
+    # 是否可以被多个线程同时调用；否则客户端会把请求串行化
+    thread_safe = False
+
+    @abstractmethod
+    def list_topics(self) -> List[str]:
+        """全部 Topic 名称（含内部 Topic）"""
+
+    @abstractmethod
+    def describe_cluster(self) -> List[BrokerInfo]:
+        """Broker 列表"""
+
+    @abstractmethod
+    def list_consumer_groups(self) -> List[Tuple[str, str]]:
+        """(group_id, protocol_type) 列表"""
+
+    @abstractmethod
+    def describe_consumer_groups(self, group_ids: List[str]) -> List[ConsumerGroupInfo]:
+        """消费者组描述（包含成员，不包含 offsets）"""
+
+    @abstractmethod
+    def list_consumer_group_offsets(self, group_id: str) -> Dict[TopicPartition, CommittedOffset]:
+        """消费者组已提交的位点"""
+
+    @abstractmethod
+    def describe_topic_config(self, topic: str) -> Dict[str, str]:
+        """Topic 配置项"""
+
+    @abstractmethod
+    def create_topic(
+        self,
+        topic: str,
+        num_partitions: int,
+        replication_factor: int,
+        config: Optional[Dict[str, str]] = None
+    ):
+        """创建 Topic"""
+
+    @abstractmethod
+    def delete_topic(self, topic: str):
+        """删除 Topic"""
+
+    @abstractmethod
+    def create_partitions(self, topic: str, total_count: int):
+        """调整 Topic 分区总数"""
+
+    @abstractmethod
+    def close(self):
+        """释放连接"""
+
+
+class ConsumerAdapter(ABC):
+    """消费者接口（语义对齐 kafka-python 的 KafkaConsumer）"""
+
+    @abstractmethod
+    def partitions_for_topic(self, topic: str) -> Optional[Set[int]]:
+        """Topic 的分区 ID 集合，Topic 不存在时返回 None"""
+
+    @abstractmethod
+    def topic_partitions(self) -> Dict[str, Set[int]]:
+        """所有 Topic 的分区 ID 集合（一次元数据请求）"""
+
+    @abstractmethod
+    def beginning_offsets(self, tps: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        """分区起始 offset"""
+
+    @abstractmethod
+    def end_offsets(self, tps: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        """分区结束 offset（下一条消息的位置）"""
+
+    @abstractmethod
+    def offsets_for_times(self, timestamps: Dict[TopicPartition, int]) -> Dict[TopicPartition, Optional[int]]:
+        """查找时间戳(ms)之后的第一条消息 offset，不存在时为 None"""
+
+    @abstractmethod
+    def assign(self, tps: List[TopicPartition]):
+        """手动分配分区"""
+
+    @abstractmethod
+    def subscribe(self, topics: List[str]):
+        """订阅 Topic"""
+
+    @abstractmethod
+    def assignment(self) -> Set[TopicPartition]:
+        """当前分配到的分区"""
+
+    @abstractmethod
+    def seek(self, tp: TopicPartition, offset: int):
+        """调整分区的拉取位置"""
+
+    @abstractmethod
+    def position(self, tp: TopicPartition) -> Optional[int]:
+        """分区下一次拉取的 offset，尚未确定（未拉取也未 seek）时返回 None"""
+
+    @abstractmethod
+    def poll(self, timeout_ms: int, max_records: Optional[int] = None) -> List[KafkaMessage]:
+        """拉取一批消息"""
+
+    @abstractmethod
+    def commit(self, offsets: Optional[Dict[TopicPartition, int]] = None):
+        """同步提交位点；offsets 为空时提交当前拉取位置"""
+
+    @abstractmethod
+    def close(self):
+        """关闭消费者"""
+
+
+class ProducerAdapter(ABC):
+    """生产者接口"""
+
+    @abstractmethod
+    def send(
+        self,
+        topic: str,
+        value: Optional[bytes],
+        key: Optional[bytes] = None,
+        partition: Optional[int] = None,
+        headers: Optional[List[tuple]] = None,
+        timeout: float = 10
+    ) -> Tuple[int, int]:
+        """同步发送一条消息，返回 (partition, offset)"""
+
+    @abstractmethod
+    def close(self):
+        """关闭生产者"""
+
+
+class KafkaBackend(ABC):
+    """后端工厂：按连接配置创建 Admin / Consumer / Producer"""
+
+    name = ""
+    # 是否通过网络连接 bootstrap server（连接前需要探测）
+    network = True
+
+    def __init__(self, connection: ClusterConnection):
+        self.connection = connection
+
+    @abstractmethod
+    def create_admin(self) -> AdminAdapter:
+        """创建管理客户端"""
+
+    @abstractmethod
+    def create_consumer(self, group_id: Optional[str] = None) -> ConsumerAdapter:
+        """创建消费者（不自动提交，无位点时从 earliest 开始）"""
+
+    @abstractmethod
+    def create_producer(self) -> ProducerAdapter:
+        """创建生产者"""
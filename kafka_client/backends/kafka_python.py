@@ -0,0 +1,260 @@
+"""kafka-python 后端"""
+
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from kafka import KafkaAdminClient, KafkaConsumer, KafkaProducer
+from kafka.admin import ConfigResource, ConfigResourceType, NewTopic
+from kafka.admin.new_partitions import NewPartitions
+from kafka.structs import OffsetAndMetadata
+from kafka.structs import TopicPartition as KafkaTopicPartition
+
+from ..models import BrokerInfo, ConsumerGroupInfo, ConsumerGroupMember, KafkaMessage
+from .base import (
+    AdminAdapter,
+    CommittedOffset,
+    ConsumerAdapter,
+    KafkaBackend,
+    ProducerAdapter,
+    TopicPartition,
+    build_message,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _to_kafka_tp(tp) -> KafkaTopicPartition:
+    return KafkaTopicPartition(tp[0], tp[1])
+
+
+def _from_kafka_tp(tp) -> TopicPartition:
+    return TopicPartition(tp.topic, tp.partition)
+
+
+class KafkaPythonAdmin(AdminAdapter):
+    """KafkaAdminClient 适配器"""
+
+    def __init__(self, config: dict):
+        self._admin = KafkaAdminClient(**config)
+
+    def list_topics(self) -> List[str]:
+        return list(self._admin.list_topics())
+
+    def describe_cluster(self) -> List[BrokerInfo]:
+        cluster_metadata = self._admin.describe_cluster()
+        return [
+            BrokerInfo(
+                node_id=broker['node_id'],
+                host=broker['host'],
+                port=broker['port'],
+                rack=broker.get('rack')
+            )
+            for broker in cluster_metadata.get('brokers', [])
+        ]
+
+    def list_consumer_groups(self) -> List[Tuple[str, str]]:
+        return [(group_id, protocol_type or "") for group_id, protocol_type in self._admin.list_consumer_groups()]
+
+    def describe_consumer_groups(self, group_ids: List[str]) -> List[ConsumerGroupInfo]:
+        groups = []
+        for desc in self._admin.describe_consumer_groups(group_ids):
+            members = []
+            # 成员列表可能在不同属性中
+            for member in getattr(desc, 'members', []):
+                assigned = []
+                member_assignment = getattr(member, 'member_assignment', None)
+                if member_assignment:
+                    try:
+                        if hasattr(member_assignment, 'assignment'):
+                            for topic, partitions in member_assignment.assignment:
+                                for p in partitions:
+                                    assigned.append({'topic': topic, 'partition': p})
+                    except Exception:
+                        pass
+
+                members.append(ConsumerGroupMember(
+                    member_id=getattr(member, 'member_id', ''),
+                    client_id=getattr(member, 'client_id', ''),
+                    client_host=getattr(member, 'client_host', ''),
+                    assigned_partitions=assigned
+                ))
+
+            # 安全获取属性，不同版本的 kafka-python 属性名可能不同
+            coordinator = getattr(desc, 'coordinator', None)
+            coordinator_id = getattr(coordinator, 'node_id', None) if coordinator else None
+
+            groups.append(ConsumerGroupInfo(
+                group_id=getattr(desc, 'group', ''),
+                state=getattr(desc, 'state', 'Unknown'),
+                protocol_type=getattr(desc, 'protocol_type', ''),
+                protocol=getattr(desc, 'protocol', ''),
+                coordinator=coordinator_id,
+                members=members
+            ))
+        return groups
+
+    def list_consumer_group_offsets(self, group_id: str) -> Dict[TopicPartition, CommittedOffset]:
+        offset_data = self._admin.list_consumer_group_offsets(group_id)
+        return {
+            _from_kafka_tp(tp): CommittedOffset(meta.offset, meta.metadata or "")
+            for tp, meta in offset_data.items()
+        }
+
+    def describe_topic_config(self, topic: str) -> Dict[str, str]:
+        config = {}
+        resource = ConfigResource(ConfigResourceType.TOPIC, topic)
+        result = self._admin.describe_configs([resource])
+        if isinstance(result, dict):
+            # 新版本返回 {resource: future}
+            for future in result.values():
+                for entry in future.result():
+                    config[entry.name] = entry.value
+        else:
+            # 2.x 返回 DescribeConfigsResponse 列表
+            for response in result:
+                for res in response.resources:
+                    for entry in res[4]:
+                        config[entry[0]] = entry[1]
+        return config
+
+    def create_topic(
+        self,
+        topic: str,
+        num_partitions: int,
+        replication_factor: int,
+        config: Optional[Dict[str, str]] = None
+    ):
+        self._admin.create_topics([NewTopic(
+            name=topic,
+            num_partitions=num_partitions,
+            replication_factor=replication_factor,
+            topic_configs=config
+        )])
+
+    def delete_topic(self, topic: str):
+        self._admin.delete_topics([topic])
+
+    def create_partitions(self, topic: str, total_count: int):
+        self._admin.create_partitions(
+            {topic: NewPartitions(total_count=total_count, new_assignments=None)}
+        )
+
+    def close(self):
+        self._admin.close()
+
+
+class KafkaPythonConsumer(ConsumerAdapter):
+    """KafkaConsumer 适配器"""
+
+    def __init__(self, config: dict):
+        self._consumer = KafkaConsumer(**config)
+
+    def partitions_for_topic(self, topic: str) -> Optional[Set[int]]:
+        return self._consumer.partitions_for_topic(topic)
+
+    def topic_partitions(self) -> Dict[str, Set[int]]:
+        # topics() 总是重新拉取全部元数据，分区随后从同一份元数据缓存中读取
+        cluster = self._consumer._client.cluster
+        return {topic: cluster.partitions_for_topic(topic) or set() for topic in self._consumer.topics()}
+
+    def beginning_offsets(self, tps: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        offsets = self._consumer.beginning_offsets([_to_kafka_tp(tp) for tp in tps])
+        return {_from_kafka_tp(tp): offset for tp, offset in offsets.items()}
+
+    def end_offsets(self, tps: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        offsets = self._consumer.end_offsets([_to_kafka_tp(tp) for tp in tps])
+        return {_from_kafka_tp(tp): offset for tp, offset in offsets.items()}
+
+    def offsets_for_times(self, timestamps: Dict[TopicPartition, int]) -> Dict[TopicPartition, Optional[int]]:
+        result = self._consumer.offsets_for_times({_to_kafka_tp(tp): ts for tp, ts in timestamps.items()})
+        return {
+            _from_kafka_tp(tp): (found.offset if found is not None else None)
+            for tp, found in result.items()
+        }
+
+    def assign(self, tps: List[TopicPartition]):
+        self._consumer.assign([_to_kafka_tp(tp) for tp in tps])
+
+    def subscribe(self, topics: List[str]):
+        self._consumer.subscribe(topics)
+
+    def assignment(self) -> Set[TopicPartition]:
+        return {_from_kafka_tp(tp) for tp in self._consumer.assignment()}
+
+    def seek(self, tp: TopicPartition, offset: int):
+        self._consumer.seek(_to_kafka_tp(tp), offset)
+
+    def position(self, tp: TopicPartition) -> Optional[int]:
+        return self._consumer.position(_to_kafka_tp(tp))
+
+    def poll(self, timeout_ms: int, max_records: Optional[int] = None) -> List[KafkaMessage]:
+        raw_messages = self._consumer.poll(timeout_ms=timeout_ms, max_records=max_records)
+        messages = []
+        for msg_list in raw_messages.values():
+            for msg in msg_list:
+                messages.append(build_message(
+                    msg.topic, msg.partition, msg.offset,
+                    msg.timestamp, msg.key, msg.value, msg.headers
+                ))
+        return messages
+
+    def commit(self, offsets: Optional[Dict[TopicPartition, int]] = None):
+        if offsets is None:
+            self._consumer.commit()
+        else:
+            self._consumer.commit({
+                _to_kafka_tp(tp): OffsetAndMetadata(offset, "")
+                for tp, offset in offsets.items()
+            })
+
+    def close(self):
+        self._consumer.close()
+
+
+class KafkaPythonProducer(ProducerAdapter):
+    """KafkaProducer 适配器"""
+
+    def __init__(self, config: dict):
+        self._producer = KafkaProducer(**config)
+
+    def send(
+        self,
+        topic: str,
+        value: Optional[bytes],
+        key: Optional[bytes] = None,
+        partition: Optional[int] = None,
+        headers: Optional[List[tuple]] = None,
+        timeout: float = 10
+    ) -> Tuple[int, int]:
+        future = self._producer.send(
+            topic=topic,
+            value=value,
+            key=key,
+            partition=partition,
+            headers=headers
+        )
+        record_metadata = future.get(timeout=timeout)
+        return record_metadata.partition, record_metadata.offset
+
+    def close(self):
+        self._producer.close()
+
+
+class KafkaPythonBackend(KafkaBackend):
+    """基于 kafka-python 的纯 Python 实现"""
+
+    name = "kafka-python"
+
+    def create_admin(self) -> AdminAdapter:
+        return KafkaPythonAdmin(self.connection.get_kafka_config())
+
+    def create_consumer(self, group_id: Optional[str] = None) -> ConsumerAdapter:
+        config = self.connection.get_kafka_config()
+        config['enable_auto_commit'] = False
+        config['auto_offset_reset'] = 'earliest'
+        if group_id:
+            config['group_id'] = group_id
+        return KafkaPythonConsumer(config)
+
+    def create_producer(self) -> ProducerAdapter:
+        return KafkaPythonProducer(self.connection.get_kafka_config())
@@ -0,0 +1,460 @@
+"""已拉取消息的 offset 区间缓存
+
+按 (集群, Topic, 分区) 记录已经完整拉取过的 [start, end) 区间及其中的消息。
+同一窗口再次浏览时直接从缓存返回，部分重叠时只拉取缺失的部分。
+内存按 LRU 淘汰；可选写入磁盘（每个区间一个段文件），内存淘汰后仍可从磁盘恢复。
+
+Kafka 中已写入的 offset 不会改变，只有 Topic 被删除重建或分区被截断时缓存才会失效，
+调用方在拉取前用分区当前的起止 offset 调用 validate() 即可发现这种情况；
+重建后又写过缓存末尾的分区无法从 offset 看出，validate() 会把最早一条缓存消息与重新读取的同一 offset 比较。
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .models import KafkaMessage
+from .segment import SegmentReader, SegmentWriter
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, int]
+
+# 每条消息除 key/value/headers 外的估算开销（对象、datetime 等）
+_MESSAGE_OVERHEAD = 200
+
+
+def estimate_message_size(msg: KafkaMessage) -> int:
+    """消息占用内存的估算值"""
+    size = _MESSAGE_OVERHEAD + len(msg.key or b'') + len(msg.value or b'')
+    for name, value in msg.headers:
+        size += len(name) + len(value or b'')
+    return size
+
+
+def _same_record(cached: KafkaMessage, fresh: Optional[KafkaMessage]) -> bool:
+    """重新读取的消息与缓存中的是否为同一条（Topic 重建后同一 offset 上是另一条消息）"""
+    return (
+        fresh is not None and fresh.offset == cached.offset
+        and fresh.timestamp == cached.timestamp
+        and fresh.key == cached.key and fresh.value == cached.value
+    )
+
+
+@dataclass
+class _CachedRange:
+    start: int
+    end: int
+    messages: List[KafkaMessage]
+    offsets: List[int] = field(default_factory=list)
+    size: int = 0
+
+    def __post_init__(self):
+        self.offsets = [m.offset for m in self.messages]
+        self.size = sum(estimate_message_size(m) for m in self.messages)
+
+    def slice(self, start: int, end: int) -> List[KafkaMessage]:
+        return self.messages[bisect_left(self.offsets, start):bisect_left(self.offsets, end)]
+
+
+class MessageRangeCache:
+    """线程安全的消息区间缓存
+
+    _lock 只保护内存中的区间，磁盘读写在 _disk_lock 下进行，两把锁不会嵌套持有，
+    读写段文件时不会阻塞其他分区的内存查询。
+    同一分区在 verify_interval 秒内只重新读取一次消息校验日志是否被重建，连续翻页不会每次多一个请求。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        verify_interval: float = 10.0,
+    ):
+        self.max_bytes = max_bytes
+        self._disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.verify_interval = verify_interval
+        self._entries: "OrderedDict[CacheKey, List[_CachedRange]]" = OrderedDict()
+        # 最近一次 validate 时分区的 (起点, 末尾)，载入磁盘段时跳过超出范围的段
+        self._bounds: Dict[CacheKey, Tuple[int, int]] = {}
+        # 最近一次重新读取消息校验分区的时间（time.monotonic）
+        self._verified: Dict[CacheKey, float] = {}
+        self._bytes = 0
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self.hit_messages = 0
+        self.fetched_messages = 0
+        self.last_access = time.monotonic()
+
+    @property
+    def disk_dir(self) -> Optional[str]:
+        """磁盘缓存目录，为 None 时只缓存在内存中"""
+        return self._disk_dir
+
+    @disk_dir.setter
+    def disk_dir(self, value: Optional[str]):
+        with self._disk_lock:
+            self._disk_dir = value
+            self._disk_bytes = None
+
+    # ---- 查询 / 写入 ----
+
+    def get(self, scope: str, topic: str, partition: int, start: int, end: int
+            ) -> Tuple[List[KafkaMessage], List[Tuple[int, int]]]:
+        """返回 ([start, end) 内已缓存的消息, 缺失的区间列表)"""
+        key = (scope, topic, partition)
+        with self._lock:
+            self.last_access = time.monotonic()
+            messages, missing = self._lookup(key, start, end)
+            bounds = self._bounds.get(key)
+        if missing and self.disk_dir:
+            loaded = self._load_from_disk(key, missing, bounds)
+            if loaded:
+                with self._lock:
+                    for r in loaded:
+                        self._insert(key, r)
+                    self._evict()
+                    messages, missing = self._lookup(key, start, end)
+        with self._lock:
+            self.hit_messages += len(messages)
+        return messages, missing
+
+    def put(self, scope: str, topic: str, partition: int, start: int, end: int,
+            messages: List[KafkaMessage]):
+        """记录 [start, end) 已完整拉取，messages 为其中的全部消息"""
+        if start >= end:
+            return
+        key = (scope, topic, partition)
+        messages = sorted(messages, key=lambda m: m.offset)
+        with self._lock:
+            self.last_access = time.monotonic()
+            self.fetched_messages += len(messages)
+            self._insert(key, _CachedRange(start, end, messages))
+            self._evict()
+        if self.disk_dir:
+            self._write_to_disk(key, start, end, messages)
+
+    def validate(self, scope: str, topic: str, partition: int, low: int, high: int,
+                 read_record: Optional[Callable[[int], Optional[KafkaMessage]]] = None):
+        """用分区当前的起止 offset 校验缓存（内存与磁盘）
+
+        缓存区间超出分区末尾说明 Topic 被重建或截断，整个分区失效；
+        已经低于分区起点（被保留策略清理）的区间不会再被请求，直接释放。
+        给出 read_record(offset) 时，用它重新读取最早一条仍在范围内的缓存消息，
+        内容或时间戳不同说明 Topic 已被重建（末尾已超过缓存区间），整个分区失效。
+        """
+        key = (scope, topic, partition)
+        reference = None
+        with self._lock:
+            ranges = self._entries.get(key)
+            if ranges and ranges[-1].end > high:
+                logger.info(f"{topic}-{partition} 的缓存已失效（分区末尾 {high} 小于缓存区间）")
+                self._drop(key)
+            elif ranges:
+                kept = [r for r in ranges if r.end > low]
+                if len(kept) != len(ranges):
+                    self._bytes -= sum(r.size for r in ranges if r.end <= low)
+                    self._entries[key] = kept
+            self._bounds[key] = (low, high)
+            verify = (
+                read_record is not None
+                and time.monotonic() - self._verified.get(key, float('-inf')) >= self.verify_interval
+            )
+            if verify:
+                reference = self._memory_reference(key, low, high)
+        if self.disk_dir:
+            self._validate_disk(key, low, high)
+            if verify and reference is None:
+                reference = self._disk_reference(key, low, high)
+        if not verify:
+            return
+        if reference is not None and not _same_record(reference, read_record(reference.offset)):
+            logger.info(f"{topic}-{partition} 的缓存已失效（offset {reference.offset} 上的消息已改变，Topic 可能被重建）")
+            with self._lock:
+                self._drop(key)
+            with self._disk_lock:
+                if self.disk_dir:
+                    self._remove_path(self._key_dir(key))
+            return
+        with self._lock:
+            self._verified[key] = time.monotonic()
+
+    def invalidate(self, scope: str, topic: Optional[str] = None):
+        """清除集群（或某个 Topic）的缓存"""
+        with self._lock:
+            keys = set(self._entries) | set(self._bounds)
+            for key in [k for k in keys if k[0] == scope and (topic is None or k[1] == topic)]:
+                self._drop(key)
+        with self._disk_lock:
+            if self.disk_dir and os.path.isdir(self.disk_dir):
+                # 磁盘目录名是哈希，无法按前缀匹配，读取目录内的标记文件判断归属
+                for name in os.listdir(self.disk_dir):
+                    owner = self._read_owner(os.path.join(self.disk_dir, name))
+                    if owner and owner[0] == scope and (topic is None or owner[1] == topic):
+                        self._remove_path(os.path.join(self.disk_dir, name))
+
+    def clear(self):
+        """清空全部缓存（含磁盘）"""
+        with self._lock:
+            self._entries.clear()
+            self._bounds.clear()
+            self._verified.clear()
+            self._bytes = 0
+        with self._disk_lock:
+            if self.disk_dir and os.path.isdir(self.disk_dir):
+                shutil.rmtree(self.disk_dir, ignore_errors=True)
+            self._disk_bytes = 0
+
+    def evict_bytes(self, amount: int) -> int:
+        """按 LRU 从内存中释放至少 amount 字节（磁盘上的副本保留），返回实际释放的字节数"""
+        with self._lock:
+            before = self._bytes
+            target = max(0, self._bytes - amount)
+            while self._bytes > target and self._entries:
+                _, ranges = self._entries.popitem(last=False)
+                self._bytes -= sum(r.size for r in ranges)
+            return before - self._bytes
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'partitions': len(self._entries),
+                'ranges': sum(len(r) for r in self._entries.values()),
+                'bytes': self._bytes,
+                'disk_bytes': self._disk_bytes or 0,
+                'hit_messages': self.hit_messages,
+                'fetched_messages': self.fetched_messages,
+            }
+
+    # ---- 内存（调用方持有 _lock） ----
+
+    def _lookup(self, key: CacheKey, start: int, end: int):
+        ranges = self._entries.get(key)
+        if not ranges:
+            return [], [(start, end)]
+        self._entries.move_to_end(key)
+        messages: List[KafkaMessage] = []
+        missing: List[Tuple[int, int]] = []
+        cursor = start
+        for r in ranges:
+            if r.end <= cursor:
+                continue
+            if r.start >= end:
+                break
+            if r.start > cursor:
+                missing.append((cursor, r.start))
+            messages.extend(r.slice(max(cursor, r.start), min(end, r.end)))
+            cursor = r.end
+            if cursor >= end:
+                break
+        if cursor < end:
+            missing.append((cursor, end))
+        return messages, missing
+
+    def _insert(self, key: CacheKey, new: _CachedRange):
+        ranges = self._entries.setdefault(key, [])
+        self._entries.move_to_end(key)
+        # 合并所有与新区间重叠或相邻的区间
+        merged_start, merged_end = new.start, new.end
+        by_offset = {m.offset: m for m in new.messages}
+        kept = []
+        for r in ranges:
+            if r.end < new.start or r.start > new.end:
+                kept.append(r)
+                continue
+            merged_start = min(merged_start, r.start)
+            merged_end = max(merged_end, r.end)
+            for m in r.messages:
+                by_offset.setdefault(m.offset, m)
+            self._bytes -= r.size
+        merged = _CachedRange(merged_start, merged_end, [by_offset[o] for o in sorted(by_offset)])
+        kept.append(merged)
+        kept.sort(key=lambda r: r.start)
+        self._entries[key] = kept
+        self._bytes += merged.size
+
+    def _drop(self, key: CacheKey):
+        """释放内存中的区间并忘记分区的起止范围，磁盘上的段由 _validate_disk / invalidate 删除"""
+        ranges = self._entries.pop(key, None)
+        if ranges:
+            self._bytes -= sum(r.size for r in ranges)
+        self._bounds.pop(key, None)
+        self._verified.pop(key, None)
+
+    def _memory_reference(self, key: CacheKey, low: int, high: int) -> Optional[KafkaMessage]:
+        """内存中 offset 在 [low, high) 内最早的一条缓存消息"""
+        for r in self._entries.get(key, []):
+            for m in r.slice(low, high)[:1]:
+                return m
+        return None
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, ranges = self._entries.popitem(last=False)
+            self._bytes -= sum(r.size for r in ranges)
+            logger.debug(f"淘汰消息缓存: {key[1]}-{key[2]}")
+
+    # ---- 磁盘（调用方不持有 _lock） ----
+
+    def _key_dir(self, key: CacheKey) -> str:
+        digest = hashlib.sha1(f"{key[0]}\0{key[1]}\0{key[2]}".encode('utf-8')).hexdigest()[:20]
+        return os.path.join(self.disk_dir, digest)
+
+    @staticmethod
+    def _read_owner(path: str) -> Optional[Tuple[str, str]]:
+        try:
+            with open(os.path.join(path, 'owner'), 'r', encoding='utf-8') as f:
+                scope, topic = f.read().split('\0')[:2]
+            return scope, topic
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _segments(directory: str) -> List[Tuple[int, int, str]]:
+        """目录中的段文件 (start, end, 路径)"""
+        segments = []
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return segments
+        for name in names:
+            if not name.endswith('.kseg'):
+                continue
+            try:
+                start, end = (int(x) for x in name[:-len('.kseg')].split('-'))
+            except ValueError:
+                continue
+            segments.append((start, end, os.path.join(directory, name)))
+        return segments
+
+    def _disk_usage(self) -> int:
+        """在持有 _disk_lock 时调用"""
+        if self._disk_bytes is None:
+            total = 0
+            if os.path.isdir(self.disk_dir):
+                for root, _, files in os.walk(self.disk_dir):
+                    total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+            self._disk_bytes = total
+        return self._disk_bytes
+
+    def _write_to_disk(self, key: CacheKey, start: int, end: int, messages: List[KafkaMessage]):
+        with self._disk_lock:
+            if not self.disk_dir:
+                return
+            directory = self._key_dir(key)
+            path = os.path.join(directory, f"{start:020d}-{end:020d}.kseg")
+            try:
+                os.makedirs(directory, exist_ok=True)
+                owner = os.path.join(directory, 'owner')
+                if not os.path.exists(owner):
+                    with open(owner, 'w', encoding='utf-8') as f:
+                        f.write(f"{key[0]}\0{key[1]}\0{key[2]}")
+                tmp_path = path + '.tmp'
+                with SegmentWriter(tmp_path, key[1]) as writer:
+                    writer.write(messages)
+                os.replace(tmp_path, path)
+                self._disk_usage()
+                self._disk_bytes += os.path.getsize(path)
+            except OSError as e:
+                logger.warning(f"写入磁盘缓存失败: {e}")
+                return
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """在持有 _disk_lock 时调用"""
+        if self._disk_usage() <= self.max_disk_bytes:
+            return
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith('.kseg'):
+                    path = os.path.join(root, name)
+                    files.append((os.path.getmtime(path), path))
+        for _, path in sorted(files):
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._disk_bytes -= size
+            except OSError:
+                pass
+
+    def _validate_disk(self, key: CacheKey, low: int, high: int):
+        """删除分区的过期段：有段超出分区末尾时删除整个分区目录，低于分区起点的段逐个删除"""
+        with self._disk_lock:
+            if not self.disk_dir:
+                return
+            directory = self._key_dir(key)
+            segments = self._segments(directory)
+            if any(end > high for _, end, _ in segments):
+                logger.info(f"{key[1]}-{key[2]} 的磁盘缓存已失效（分区末尾 {high} 小于缓存区间）")
+                self._remove_path(directory)
+                return
+            for _, end, path in segments:
+                if end <= low:
+                    self._remove_path(path)
+
+    def _disk_reference(self, key: CacheKey, low: int, high: int) -> Optional[KafkaMessage]:
+        """磁盘段中 offset 在 [low, high) 内最早的一条缓存消息"""
+        with self._disk_lock:
+            if not self.disk_dir:
+                return None
+            for start, end, path in sorted(self._segments(self._key_dir(key))):
+                if end <= low or start >= high:
+                    continue
+                try:
+                    with SegmentReader(path) as reader:
+                        if key[2] not in reader.partitions:
+                            continue
+                        messages = reader.read_messages(key[2], start_offset=low, limit=1)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"读取磁盘缓存失败，已删除: {e}")
+                    self._remove_path(path)
+                    continue
+                if messages and messages[0].offset < high:
+                    return messages[0]
+        return None
+
+    def _load_from_disk(self, key: CacheKey, missing: List[Tuple[int, int]],
+                        bounds: Optional[Tuple[int, int]]) -> List[_CachedRange]:
+        """读取与缺失区间重叠、且在分区当前起止范围内的磁盘段"""
+        loaded = []
+        with self._disk_lock:
+            if not self.disk_dir:
+                return loaded
+            for start, end, path in self._segments(self._key_dir(key)):
+                if bounds is not None and (end > bounds[1] or end <= bounds[0]):
+                    continue
+                if not any(start < gap_end and end > gap_start for gap_start, gap_end in missing):
+                    continue
+                try:
+                    with SegmentReader(path) as reader:
+                        messages = reader.read_messages(key[2], limit=reader.record_count) if reader.partitions else []
+                except (OSError, ValueError) as e:
+                    logger.warning(f"读取磁盘缓存失败，已删除: {e}")
+                    self._remove_path(path)
+                    continue
+                loaded.append(_CachedRange(start, end, messages))
+        return loaded
+
+    def _remove_path(self, path: str):
+        """在持有 _disk_lock 时调用"""
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._disk_bytes = None
@@ -0,0 +1,490 @@
+"""命令行工具（不依赖 Qt，适合脚本与定时任务）
+
+使用 config/connections.json 中保存的连接，输出 JSON 或 NDJSON（每行一条记录）：
+
+    python -m kafka_client connections
+    python -m kafka_client -c prod topics
+    python -m kafka_client -c prod describe topic orders
+    python -m kafka_client -c prod lag --min-lag 1000 -o ndjson
+    python -m kafka_client -c prod consume orders --limit 100 --from-beginning
+    echo '{"id": 1}' | python -m kafka_client -c prod produce orders --key 1
+    python -m kafka_client -c prod export orders orders.jsonl.gz --compression gzip
+    python -m kafka_client -c prod reset my-group --to latest --topic orders
+    python -m kafka_client -c prod histogram orders --hours 24 --bucket 3600
+    python -m kafka_client serve-metrics --port 9308 --interval 30
+
+只配置了一个连接时可省略 -c；--bootstrap-servers 可临时连接未保存的集群。
+serve-metrics 未指定 -c 时导出所有保存的连接。
+"""
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+from typing import Any, Iterable, List, Optional
+
+from .client import KafkaClusterClient
+from .config import connections_path, load_connections
+from .models import ClusterConnection
+
+logger = logging.getLogger(__name__)
+
+
+class CliError(Exception):
+    """参数或配置错误，输出信息后以状态码 1 退出"""
+
+
+def _to_json(value: Any) -> Any:
+    if is_dataclass(value):
+        return _to_json(asdict(value))
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+def _emit(records: Iterable[Any], fmt: str, out=None):
+    """json 输出一个数组，ndjson 每行一条记录"""
+    out = out or sys.stdout
+    if fmt == 'ndjson':
+        for record in records:
+            out.write(json.dumps(_to_json(record), ensure_ascii=False) + '\n')
+    else:
+        json.dump(_to_json(list(records)), out, ensure_ascii=False, indent=2)
+        out.write('\n')
+
+
+def _emit_one(record: Any, fmt: str):
+    if fmt == 'ndjson':
+        _emit([record], fmt)
+    else:
+        json.dump(_to_json(record), sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+
+
+def _resolve_connection(args) -> ClusterConnection:
+    if args.bootstrap_servers:
+        return ClusterConnection(
+            name=args.connection or args.bootstrap_servers,
+            bootstrap_servers=args.bootstrap_servers,
+            client_backend=args.backend or "kafka-python",
+        )
+    connections = load_connections(args.config)
+    if not connections:
+        raise CliError(f"没有可用的连接配置: {args.config or connections_path()}")
+    if args.connection is None:
+        if len(connections) > 1:
+            names = ", ".join(c.name for c in connections)
+            raise CliError(f"存在多个连接，请用 -c 指定: {names}")
+        conn = connections[0]
+    else:
+        conn = next((c for c in connections if c.name == args.connection), None)
+        if conn is None:
+            raise CliError(f"未找到连接: {args.connection}")
+    if args.backend:
+        conn.client_backend = args.backend
+    return conn
+
+
+def _connect(args) -> KafkaClusterClient:
+    client = KafkaClusterClient(_resolve_connection(args))
+    client.connect()
+    return client
+
+
+def _parse_time(text: Optional[str]) -> Optional[datetime]:
+    if text is None:
+        return None
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise CliError(f"无法解析时间（应为 ISO 格式，如 2024-01-31T08:00:00）: {text}")
+
+
+# ---- 子命令 ----
+
+def cmd_serve_metrics(args):
+    """以 Prometheus 格式导出各集群的消费者组 lag，直到 Ctrl+C"""
+    from .exporter import LagExporter, make_server
+    from .lag import OffsetSampler
+
+    if args.interval <= 0:
+        raise CliError("--interval 必须大于 0")
+    if args.connection or args.bootstrap_servers:
+        connections = [_resolve_connection(args)]
+    else:
+        connections = load_connections(args.config)
+        if not connections:
+            raise CliError(f"没有可用的连接配置: {args.config or connections_path()}")
+        if args.backend:
+            for conn in connections:
+                conn.client_backend = args.backend
+
+    sampler = OffsetSampler(interval=args.interval)
+    exporter = LagExporter(sampler)
+    sampler.add_listener(exporter.record)
+    try:
+        server = make_server(exporter, args.host, args.port)
+    except OSError as e:
+        raise CliError(f"无法监听 {args.host}:{args.port}: {e}")
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"正在导出 {len(connections)} 个集群的 lag: http://{args.host}:{args.port}/metrics", file=sys.stderr)
+
+    clients = {conn.name: KafkaClusterClient(conn) for conn in connections}
+    stop = threading.Event()
+    sampler.start()
+    try:
+        # 连接失败的集群每个采集间隔重试一次，其余集群照常导出
+        while not stop.is_set():
+            for name, client in clients.items():
+                if client.is_connected:
+                    continue
+                try:
+                    client.connect()
+                except Exception as e:
+                    logger.warning(f"连接集群 {name} 失败，稍后重试: {e}")
+                    continue
+                sampler.set_client(name, client)
+            stop.wait(max(args.interval, 5))
+    finally:
+        sampler.stop()
+        server.shutdown()
+        for client in clients.values():
+            if client.is_connected:
+                client.disconnect()
+
+
+def cmd_connections(args):
+    connections = load_connections(args.config)
+    _emit(({
+        'name': c.name,
+        'bootstrap_servers': c.bootstrap_servers,
+        'security_protocol': c.security_protocol,
+        'client_backend': c.client_backend,
+    } for c in connections), args.output)
+
+
+def cmd_topics(client: KafkaClusterClient, args):
+    _emit(({'topic': name} for name in client.get_topic_names(include_internal=args.internal)), args.output)
+
+
+def cmd_groups(client: KafkaClusterClient, args):
+    _emit(({'group': group_id, 'protocol_type': protocol}
+           for group_id, protocol in client.get_consumer_group_names()), args.output)
+
+
+def cmd_describe(client: KafkaClusterClient, args):
+    if args.kind == 'topic':
+        topic = client.get_topic_detail(args.name)
+        if topic is None:
+            raise CliError(f"Topic 不存在: {args.name}")
+        record = _to_json(topic)
+        record['total_messages'] = topic.total_messages
+    elif args.kind == 'group':
+        group = client.get_consumer_group_detail(args.name, with_time_lag=args.time_lag)
+        if group is None:
+            raise CliError(f"消费者组不存在: {args.name}")
+        record = _to_json(group)
+        record['total_lag'] = group.total_lag
+        if args.time_lag:
+            record['max_time_lag'] = group.max_time_lag
+    else:
+        record = {'brokers': _to_json(client.get_brokers())}
+    _emit_one(record, args.output)
+
+
+def cmd_lag(client: KafkaClusterClient, args):
+    """lag 来自一次批量快照；只有 --time-lag 需要读取消息时间戳，才逐组获取详情"""
+    snapshot = client.get_group_offsets_snapshot(args.group, describe=True)
+    group_ids = args.group or sorted(set(snapshot.committed) | set(snapshot.errors))
+    errors = dict(snapshot.errors)
+
+    details = {}
+    if args.time_lag:
+        candidates = [group_id for group_id in group_ids
+                      if group_id not in errors and snapshot.group_lag(group_id) >= args.min_lag]
+
+        def fetch(group_id):
+            try:
+                return client.get_consumer_group_detail(group_id, with_time_lag=True), None
+            except Exception as e:
+                return None, str(e)
+
+        with ThreadPoolExecutor(max_workers=client.max_concurrent_tasks) as executor:
+            for group_id, (group, error) in zip(candidates, executor.map(fetch, candidates)):
+                if group is None:
+                    errors[group_id] = error or "获取消费者组详情失败"
+                else:
+                    details[group_id] = group
+
+    def records():
+        for group_id in group_ids:
+            if group_id in errors:
+                # 获取失败的组照常输出，不能当作没有 lag
+                logger.warning(f"获取消费者组 {group_id} 失败: {errors[group_id]}")
+                yield {'group': group_id, 'error': errors[group_id]}
+                continue
+            if args.time_lag:
+                group = details.get(group_id)
+                if group is None or group.total_lag < args.min_lag:
+                    continue
+                if args.partitions:
+                    for o in group.offsets:
+                        yield {'group': group_id, 'state': group.state, 'topic': o.topic, 'partition': o.partition,
+                               'current_offset': o.current_offset, 'end_offset': o.end_offset, 'lag': o.lag,
+                               'time_lag': o.time_lag}
+                else:
+                    yield {'group': group_id, 'state': group.state, 'members': group.member_count,
+                           'partitions': len(group.offsets), 'lag': group.total_lag,
+                           'time_lag': group.max_time_lag}
+                continue
+            lags = snapshot.partition_lags(group_id)
+            total_lag = sum(lags.values())
+            if total_lag < args.min_lag:
+                continue
+            state = snapshot.states.get(group_id)
+            if args.partitions:
+                committed = snapshot.committed.get(group_id, {})
+                for tp in sorted(lags):
+                    yield {'group': group_id, 'state': state, 'topic': tp.topic, 'partition': tp.partition,
+                           'current_offset': committed[tp], 'end_offset': snapshot.end_offsets[tp], 'lag': lags[tp]}
+            else:
+                yield {'group': group_id, 'state': state, 'members': snapshot.member_counts.get(group_id),
+                       'partitions': len(lags), 'lag': total_lag}
+
+    _emit(records(), args.output)
+
+
+def cmd_consume(client: KafkaClusterClient, args):
+    from .export import message_to_dict
+    messages = client.consume_messages(
+        args.topic, partition=args.partition, offset=args.offset, limit=args.limit,
+        timeout_ms=args.timeout_ms, from_beginning=args.from_beginning, group_id=args.group
+    )
+    # 命令行输出始终按 offset 正序
+    messages.sort(key=lambda m: (m.partition, m.offset))
+    _emit((message_to_dict(m) for m in messages), args.output)
+
+
+def cmd_produce(client: KafkaClusterClient, args):
+    headers = []
+    for header in args.header or []:
+        name, sep, value = header.partition('=')
+        if not sep:
+            raise CliError(f"Header 格式应为 name=value: {header}")
+        headers.append((name, value.encode('utf-8')))
+    key = args.key.encode('utf-8') if args.key is not None else None
+    if args.value is not None:
+        values = [args.value]
+    else:
+        # 从标准输入读取，每行一条消息
+        values = (line.rstrip('\n') for line in sys.stdin)
+    count = 0
+    for value in values:
+        client.produce_message(args.topic, value.encode('utf-8'), key=key,
+                               partition=args.partition, headers=headers or None)
+        count += 1
+    _emit_one({'topic': args.topic, 'produced': count}, args.output)
+
+
+def cmd_export(client: KafkaClusterClient, args):
+    from .export import MessageExporter
+    exporter = MessageExporter(
+        client, args.topic, args.path, fmt=args.format, compression=args.compression,
+        partitions=args.partition, start_offset=args.start_offset, end_offset=args.end_offset,
+        start_time=_parse_time(args.start_time), end_time=_parse_time(args.end_time),
+        resume=not args.restart,
+    )
+    progress = exporter.run()
+    _emit_one({
+        'path': progress.path or args.path, 'messages': progress.messages,
+        'bytes': progress.bytes_written, 'seconds': round(progress.elapsed, 3),
+        'completed': progress.completed,
+        'incomplete': progress.incomplete,
+    }, args.output)
+    if progress.incomplete:
+        partitions = ", ".join(map(str, sorted(progress.incomplete)))
+        raise CliError(f"导出未完成，分区 {partitions} 没有读到区间末尾（已保留断点，再次执行可继续）")
+
+
+def cmd_histogram(client: KafkaClusterClient, args):
+    end = _parse_time(args.end_time)
+    end_ts = end.timestamp() if end else time.time()
+    start = _parse_time(args.start_time)
+    start_ts = start.timestamp() if start else end_ts - args.hours * 3600
+    histogram = client.get_message_histogram(args.topic, start_ts, end_ts, args.bucket)
+    if histogram is None:
+        raise CliError(f"Topic 不存在: {args.topic}")
+    _emit(({'start': datetime.fromtimestamp(ts).isoformat(), 'count': count}
+           for ts, count in histogram.buckets), args.output)
+
+
+def cmd_reset(client: KafkaClusterClient, args):
+    group = client.get_consumer_group_detail(args.group)
+    partitions = [(o.topic, o.partition) for o in group.offsets] if group else []
+    if args.topic:
+        partitions = [(t, p) for t, p in partitions if t in args.topic]
+        # 组在该 Topic 上还没有提交过位点时，重置全部分区
+        for topic in args.topic:
+            if not any(t == topic for t, _ in partitions):
+                detail = client.get_topic_detail(topic)
+                if detail is None:
+                    raise CliError(f"Topic 不存在: {topic}")
+                partitions.extend((topic, p.partition_id) for p in detail.partitions)
+    if not partitions:
+        raise CliError(f"消费者组 {args.group} 没有可重置的分区，请用 --topic 指定")
+    client.reset_consumer_group_offsets(args.group, partitions, args.to)
+    _emit_one({'group': args.group, 'target': args.to, 'partitions': len(partitions)}, args.output)
+
+
+COMMANDS = {
+    'topics': cmd_topics,
+    'groups': cmd_groups,
+    'describe': cmd_describe,
+    'lag': cmd_lag,
+    'consume': cmd_consume,
+    'produce': cmd_produce,
+    'export': cmd_export,
+    'histogram': cmd_histogram,
+    'reset': cmd_reset,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from .export import COMPRESSIONS, EXPORT_FORMATS
+
+    def add_common(target, defaults: bool):
+        # 通用参数既可以写在子命令前也可以写在子命令后
+        default = (lambda value: value) if defaults else (lambda value: argparse.SUPPRESS)
+        target.add_argument('-c', '--connection', default=default(None),
+                            help="连接名称（connections.json 中的 name）")
+        target.add_argument('--config', default=default(None), help="连接配置文件路径")
+        target.add_argument('--bootstrap-servers', default=default(None), help="不使用保存的连接，直接连接指定集群")
+        target.add_argument('--backend', default=default(None), help="覆盖连接的客户端后端")
+        target.add_argument('-o', '--output', choices=['json', 'ndjson'], default=default('json'))
+        target.add_argument('-v', '--verbose', action='store_true', default=default(False), help="输出客户端日志")
+
+    parser = argparse.ArgumentParser(prog="python -m kafka_client", description="Kafka Explorer 命令行工具")
+    add_common(parser, True)
+    common = argparse.ArgumentParser(add_help=False)
+    add_common(common, False)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name: str, help: str) -> argparse.ArgumentParser:
+        return sub.add_parser(name, help=help, parents=[common])
+
+    add_command('connections', "列出保存的连接")
+
+    p = add_command('topics', "列出 Topic")
+    p.add_argument('--internal', action='store_true', help="包含内部 Topic")
+
+    add_command('groups', "列出消费者组")
+
+    p = add_command('describe', "查看 Topic / 消费者组 / Broker 详情")
+    p.add_argument('kind', choices=['topic', 'group', 'cluster'])
+    p.add_argument('name', nargs='?')
+    p.add_argument('--time-lag', action='store_true', help="计算消费者组各分区的时间延迟（秒）")
+
+    p = add_command('lag', "消费者组 lag")
+    p.add_argument('-g', '--group', action='append', help="只查看指定组（可重复）")
+    p.add_argument('--min-lag', type=int, default=0, help="只输出总 lag 不小于该值的组")
+    p.add_argument('--partitions', action='store_true', help="按分区输出")
+    p.add_argument('--time-lag', action='store_true', help="计算时间延迟（秒，组级别取各分区最大值）")
+
+    p = add_command('consume', "读取消息")
+    p.add_argument('topic')
+    p.add_argument('-p', '--partition', type=int)
+    p.add_argument('--offset', type=int)
+    p.add_argument('-n', '--limit', type=int, default=100)
+    p.add_argument('--from-beginning', action='store_true')
+    p.add_argument('-g', '--group', help="使用消费者组的提交位点（不提交）")
+    p.add_argument('--timeout-ms', type=int, default=5000)
+
+    p = add_command('produce', "发送消息（未指定 --value 时从标准输入逐行读取）")
+    p.add_argument('topic')
+    p.add_argument('--value')
+    p.add_argument('--key')
+    p.add_argument('-p', '--partition', type=int)
+    p.add_argument('-H', '--header', action='append', help="name=value（可重复）")
+
+    p = add_command('export', "导出消息到文件")
+    p.add_argument('topic')
+    p.add_argument('path')
+    p.add_argument('--format', choices=list(EXPORT_FORMATS), default='jsonl')
+    p.add_argument('--compression', choices=list(COMPRESSIONS), default='none')
+    p.add_argument('-p', '--partition', type=int, action='append', help="只导出指定分区（可重复）")
+    p.add_argument('--start-offset', type=int)
+    p.add_argument('--end-offset', type=int)
+    p.add_argument('--start-time', help="ISO 时间")
+    p.add_argument('--end-time', help="ISO 时间")
+    p.add_argument('--restart', action='store_true', help="忽略上次的导出进度")
+
+    p = add_command('histogram', "按时间桶统计消息数（按桶边界查询 offset，不读取消息）")
+    p.add_argument('topic')
+    p.add_argument('--hours', type=float, default=24, help="统计最近多少小时（未指定 --start-time 时）")
+    p.add_argument('--start-time', help="ISO 时间")
+    p.add_argument('--end-time', help="ISO 时间，默认为当前时间")
+    p.add_argument('--bucket', type=int, default=3600, help="桶宽（秒），按本地时间对齐")
+
+    p = add_command('reset', "重置消费者组位点")
+    p.add_argument('group')
+    p.add_argument('--to', choices=['earliest', 'latest'], required=True)
+    p.add_argument('-t', '--topic', action='append', help="只重置指定 Topic（可重复）")
+
+    p = add_command('serve-metrics', "以 Prometheus / OpenMetrics 格式提供 /metrics（消费者组 lag）")
+    p.add_argument('--host', default='127.0.0.1', help="监听地址（默认只允许本机访问）")
+    p.add_argument('--port', type=int, default=9308)
+    p.add_argument('--interval', type=float, default=30.0, help="采集间隔（秒），抓取只返回最近一次采集的结果")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr,
+    )
+    if not args.verbose:
+        # 连接失败等错误由命令行统一输出到 stderr，不再重复记录日志
+        logging.getLogger('kafka_client.client').setLevel(logging.CRITICAL)
+    if args.command == 'describe' and args.kind != 'cluster' and not args.name:
+        print(f"错误: describe {args.kind} 需要名称", file=sys.stderr)
+        return 2
+
+    client = None
+    try:
+        if args.command == 'connections':
+            cmd_connections(args)
+            return 0
+        if args.command == 'serve-metrics':
+            cmd_serve_metrics(args)
+            return 0
+        client = _connect(args)
+        COMMANDS[args.command](client, args)
+        return 0
+    except CliError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # 输出被 head 等命令提前关闭
+        return 0
+    except Exception as e:
+        logger.debug("命令执行失败", exc_info=True)
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if client is not None:
+            client.disconnect()
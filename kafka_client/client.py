@@ -1,24 +1,33 @@
 """Kafka客户端封装"""
 
 import logging
-from typing import List, Optional, Dict, Any, Callable, Tuple
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Callable, Iterator, Tuple
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 import threading
+import time
 
-from kafka import KafkaConsumer, KafkaProducer, KafkaAdminClient
-from kafka.admin import NewTopic, ConfigResource, ConfigResourceType
-from kafka.admin.new_partitions import NewPartitions
-from kafka.errors import KafkaError
-from kafka.structs import TopicPartition
-
+from .backends import (
+    AdminAdapter,
+    ConsumerAdapter,
+    ProducerAdapter,
+    TopicPartition,
+    create_backend,
+)
+from .cache import MessageRangeCache
+from .metrics import METRICS, InstrumentedBackend, MetricsRegistry, instrument_client_methods
+from .probe import ProbeReport, probe_bootstrap
 from .models import (
     ClusterConnection,
     TopicInfo,
     PartitionInfo,
     ConsumerGroupInfo,
-    ConsumerGroupMember,
     ConsumerGroupOffset,
+    GroupOffsetsSnapshot,
+    TopicOffsetsSnapshot,
+    MessageHistogram,
     KafkaMessage,
     BrokerInfo
 )
@@ -26,28 +35,177 @@ from .models import (
 logger = logging.getLogger(__name__)
 
 
+class IncompleteReadError(RuntimeError):
+    """流式读取结束时有分区没有读到区间末尾（Broker 不可达或区间内的数据已被清理）"""
+
+    def __init__(self, topic: str, positions: Dict[int, int]):
+        # partition -> 停止时的位置
+        self.topic = topic
+        self.positions = positions
+        detail = ", ".join(f"{p}@{offset}" for p, offset in sorted(positions.items()))
+        super().__init__(f"{topic} 有 {len(positions)} 个分区未读完: {detail}")
+
+
+class TaskSlotTimeout(RuntimeError):
+    """等待任务名额超时（并发任务过多），不应被当作普通的查询失败吞掉"""
+
+
+class _TaskSlots:
+    """限制同时执行的任务数（上限可在运行时调整）"""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = None):
+        """占用一个名额，timeout 秒内没有空闲名额时抛出 RuntimeError"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.active < self.limit, timeout):
+                raise TaskSlotTimeout(
+                    f"并发任务过多：{self.limit} 个任务正在执行，等待 {timeout:g} 秒仍没有空闲名额，"
+                    f"请等待其他任务结束或调高连接的并发任务上限"
+                )
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def set_limit(self, limit: int):
+        with self._cond:
+            self.limit = max(1, limit)
+            self._cond.notify_all()
+
+
+class _SerializedAdmin:
+    """非线程安全的 Admin 客户端代理：共享同一组连接，请求逐个发送"""
+
+    def __init__(self, admin: AdminAdapter):
+        self._admin = admin
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._admin, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+class _TaskConsumer:
+    """占用一个任务名额的 Consumer，close 时归还名额"""
+
+    def __init__(self, consumer: ConsumerAdapter, slots: _TaskSlots):
+        self._consumer = consumer
+        self._slots = slots
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._consumer, name)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._consumer.close()
+        finally:
+            self._slots.release()
+
+
+@instrument_client_methods
 class KafkaClusterClient:
     """Kafka集群客户端封装"""
     
-    def __init__(self, connection: ClusterConnection):
+    # 消息时间戳缓存的最大条目数
+    TIMESTAMP_CACHE_SIZE = 100000
+    # 批量采集时每次 DescribeGroups 请求包含的组数
+    DESCRIBE_BATCH = 100
+    # 消息数按时间分布统计的最大桶数
+    HISTOGRAM_MAX_BUCKETS = 2000
+    # 等待任务名额的最长时间（秒），与客户端库的默认请求超时一致
+    TASK_SLOT_TIMEOUT = 30.0
+    
+    def __init__(
+        self,
+        connection: ClusterConnection,
+        message_cache: Optional[MessageRangeCache] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
         self.connection = connection
-        self._admin_client: Optional[KafkaAdminClient] = None
-        self._consumer: Optional[KafkaConsumer] = None
-        self._producer: Optional[KafkaProducer] = None
+        # 已拉取消息的区间缓存，可在多个集群客户端之间共享
+        self.message_cache = message_cache
+        # 公共方法与 Broker 请求的耗时/计数，默认记录到进程内的全局注册表
+        self.metrics = metrics or METRICS
+        # 底层库由后端决定（kafka-python / confluent-kafka），上层只使用统一的适配器接口
+        self._backend = InstrumentedBackend(create_backend(connection), self.metrics, connection.name)
+        self._admin_client: Optional[AdminAdapter] = None
+        self._producer: Optional[ProducerAdapter] = None
         self._connected = False
-        self._lock = threading.Lock()
+        # 保护连接状态与共享的 Admin / Producer 的创建和关闭
+        self._lock = threading.RLock()
+        # 每个任务独占一个 Consumer，同时存在的 Consumer 数量受连接配置限制
+        self._task_slots = _TaskSlots(connection.max_concurrent_tasks)
+        # 最近一次 connect() 的探测报告
+        self.probe_report: Optional[ProbeReport] = None
+        # (topic, partition, offset) -> 消息时间戳，用于计算时间延迟
+        self._timestamp_cache: OrderedDict = OrderedDict()
+        self._timestamp_lock = threading.Lock()
         
     @property
     def is_connected(self) -> bool:
         return self._connected
     
-    def connect(self) -> bool:
-        """建立连接"""
+    @property
+    def backend_name(self) -> str:
+        return self._backend.name
+    
+    @property
+    def cache_scope(self) -> str:
+        """消息缓存中区分集群的键"""
+        return f"{self.connection.name}|{self.connection.bootstrap_servers}"
+    
+    @property
+    def max_concurrent_tasks(self) -> int:
+        return self._task_slots.limit
+
+    @max_concurrent_tasks.setter
+    def max_concurrent_tasks(self, limit: int):
+        self._task_slots.set_limit(limit)
+
+    def connect(self, wait_all_probes: bool = False) -> bool:
+        """建立连接
+
+        先并行探测所有 bootstrap server，全部不可达时立即失败；否则只用响应最快的一个建立客户端。
+        wait_all_probes 为 True 时等待所有 server 探测完成（用于连接测试展示）。
+        """
         try:
-            config = self.connection.get_kafka_config()
-            self._admin_client = KafkaAdminClient(**config)
-            self._connected = True
-            logger.info(f"成功连接到Kafka集群: {self.connection.name}")
+            report = ProbeReport()
+            if self._backend.network:
+                report = probe_bootstrap(self.connection, wait_all=wait_all_probes)
+                fastest = report.fastest
+                if fastest is None:
+                    self.probe_report = report
+                    raise RuntimeError(f"无法连接到任何 Bootstrap Server:\n{report.summary()}")
+                if fastest.server != self.connection.bootstrap_servers:
+                    probed = replace(self.connection, bootstrap_servers=fastest.server)
+                    self._backend = InstrumentedBackend(create_backend(probed), self.metrics, self.connection.name)
+            started = time.perf_counter()
+            admin = self._backend.create_admin()
+            if not admin.thread_safe:
+                admin = _SerializedAdmin(admin)
+            report.brokers = len(admin.describe_cluster())
+            report.metadata = time.perf_counter() - started
+            with self._lock:
+                self._admin_client = admin
+                self.probe_report = report
+                self._connected = True
+            logger.info(f"成功连接到Kafka集群: {self.connection.name} ({self._backend.name})")
             return True
         except Exception as e:
             logger.error(f"连接Kafka失败: {e}")
@@ -56,53 +214,48 @@ class KafkaClusterClient:
     
     def disconnect(self):
         """断开连接"""
-        try:
-            if self._admin_client:
-                self._admin_client.close()
-            if self._consumer:
-                self._consumer.close()
-            if self._producer:
-                self._producer.close()
-        except Exception as e:
-            logger.error(f"断开连接时出错: {e}")
-        finally:
+        with self._lock:
+            admin, producer = self._admin_client, self._producer
             self._admin_client = None
-            self._consumer = None
             self._producer = None
             self._connected = False
+        try:
+            if admin:
+                admin.close()
+            if producer:
+                producer.close()
+        except Exception as e:
+            logger.error(f"断开连接时出错: {e}")
+    
+    def _get_consumer(self, group_id: str = None) -> ConsumerAdapter:
+        """获取Consumer实例（每个任务单独创建，超出并发上限时最多等待 TASK_SLOT_TIMEOUT 秒）"""
+        self._task_slots.acquire(self.TASK_SLOT_TIMEOUT)
+        try:
+            consumer = self._backend.create_consumer(group_id=group_id)
+        except Exception:
+            self._task_slots.release()
+            raise
+        return _TaskConsumer(consumer, self._task_slots)
     
-    def _get_consumer(self, group_id: str = None) -> KafkaConsumer:
-        """获取Consumer实例"""
-        config = self.connection.get_kafka_config()
-        config['enable_auto_commit'] = False
-        config['auto_offset_reset'] = 'earliest'
-        if group_id:
-            config['group_id'] = group_id
-        return KafkaConsumer(**config)
+    def create_consumer(self) -> ConsumerAdapter:
+        """创建不占用任务名额的匿名 Consumer，供后台采集长期持有（调用方负责 close）"""
+        if not self._admin_client:
+            raise RuntimeError("未连接到Kafka集群")
+        return self._backend.create_consumer()
     
-    def _get_producer(self) -> KafkaProducer:
-        """获取Producer实例"""
-        if not self._producer:
-            config = self.connection.get_kafka_config()
-            self._producer = KafkaProducer(**config)
-        return self._producer
+    def _get_producer(self) -> ProducerAdapter:
+        """获取Producer实例（两个后端的 Producer 都是线程安全的，所有任务共享一个）"""
+        with self._lock:
+            if not self._producer:
+                self._producer = self._backend.create_producer()
+            return self._producer
     
     def get_brokers(self) -> List[BrokerInfo]:
         """获取Broker列表"""
         if not self._admin_client:
             raise RuntimeError("未连接到Kafka集群")
         
-        brokers = []
-        cluster_metadata = self._admin_client.describe_cluster()
-        
-        for broker in cluster_metadata.get('brokers', []):
-            brokers.append(BrokerInfo(
-                node_id=broker['node_id'],
-                host=broker['host'],
-                port=broker['port'],
-                rack=broker.get('rack')
-            ))
-        
+        brokers = self._admin_client.describe_cluster()
         return sorted(brokers, key=lambda x: x.node_id)
     
     def get_topic_names(self, include_internal: bool = False) -> List[str]:
@@ -125,12 +278,7 @@ class KafkaClusterClient:
         if not self._admin_client:
             raise RuntimeError("未连接到Kafka集群")
         
-        groups = []
-        group_list = self._admin_client.list_consumer_groups()
-        
-        for group_id, protocol_type in group_list:
-            groups.append((group_id, protocol_type or ""))
-        
+        groups = self._admin_client.list_consumer_groups()
         return sorted(groups, key=lambda x: x[0])
     
     def get_topics(self, include_internal: bool = False) -> List[TopicInfo]:
@@ -208,12 +356,7 @@ class KafkaClusterClient:
             # 获取Topic配置
             config = {}
             try:
-                resource = ConfigResource(ConfigResourceType.TOPIC, topic_name)
-                configs = self._admin_client.describe_configs([resource])
-                for res, future in configs.items():
-                    config_entries = future.result()
-                    for entry in config_entries:
-                        config[entry.name] = entry.value
+                config = self._admin_client.describe_topic_config(topic_name)
             except Exception as e:
                 logger.warning(f"获取Topic配置失败: {e}")
             
@@ -239,6 +382,8 @@ class KafkaClusterClient:
                 group_info = self.get_consumer_group_detail(group_id)
                 if group_info:
                     groups.append(group_info)
+            except TaskSlotTimeout:
+                raise
             except Exception as e:
                 logger.warning(f"获取消费者组 {group_id} 信息失败: {e}")
                 groups.append(ConsumerGroupInfo(
@@ -250,92 +395,312 @@ class KafkaClusterClient:
         
         return sorted(groups, key=lambda x: x.group_id)
     
-    def get_consumer_group_detail(self, group_id: str) -> Optional[ConsumerGroupInfo]:
-        """获取消费者组详细信息"""
+    def get_consumer_group_detail(self, group_id: str, with_time_lag: bool = False) -> Optional[ConsumerGroupInfo]:
+        """获取消费者组详细信息
+
+        with_time_lag 为 True 时额外计算每个有 lag 的分区的时间延迟（见 _record_timestamps）。
+        """
         if not self._admin_client:
             raise RuntimeError("未连接到Kafka集群")
         
         try:
-            # 获取组描述
+            # 获取组描述（成员信息由后端统一转换）
             descriptions = self._admin_client.describe_consumer_groups([group_id])
             if not descriptions:
                 return None
             
-            desc = descriptions[0]
-            
-            # 调试：打印可用属性
-            logger.debug(f"GroupInformation attributes: {dir(desc)}")
+            group = descriptions[0]
             
-            members = []
-            # 成员列表可能在不同属性中
-            member_list = getattr(desc, 'members', [])
-            for member in member_list:
-                assigned = []
-                member_assignment = getattr(member, 'member_assignment', None)
-                if member_assignment:
-                    try:
-                        if hasattr(member_assignment, 'assignment'):
-                            for topic, partitions in member_assignment.assignment:
-                                for p in partitions:
-                                    assigned.append({'topic': topic, 'partition': p})
-                    except:
-                        pass
-                
-                members.append(ConsumerGroupMember(
-                    member_id=getattr(member, 'member_id', ''),
-                    client_id=getattr(member, 'client_id', ''),
-                    client_host=getattr(member, 'client_host', ''),
-                    assigned_partitions=assigned
-                ))
-            
-            # 获取offset信息
+            # 获取offset信息（名额不足时直接抛出，不能当作没有 lag）
             offsets = []
+            consumer = self._get_consumer()
             try:
                 offset_data = self._admin_client.list_consumer_group_offsets(group_id)
-                consumer = self._get_consumer()
-                try:
-                    for tp, offset_meta in offset_data.items():
-                        # 获取开始和结束 offset
-                        beginning_offsets = consumer.beginning_offsets([tp])
-                        end_offsets = consumer.end_offsets([tp])
-                        
-                        start_offset = beginning_offsets.get(tp, 0)
-                        end_offset = end_offsets.get(tp, 0)
-                        current_offset = offset_meta.offset if offset_meta.offset >= 0 else 0
-                        
-                        offsets.append(ConsumerGroupOffset(
-                            topic=tp.topic,
-                            partition=tp.partition,
-                            current_offset=current_offset,
-                            end_offset=end_offset,
-                            lag=max(0, end_offset - current_offset),
-                            start_offset=start_offset,
-                            metadata=offset_meta.metadata or ""
-                        ))
-                finally:
-                    consumer.close()
+                # 所有分区的起止 offset 各一次批量请求
+                tps = list(offset_data)
+                beginning_offsets = consumer.beginning_offsets(tps) if tps else {}
+                end_offsets = consumer.end_offsets(tps) if tps else {}
+                for tp, offset_meta in offset_data.items():
+                    start_offset = beginning_offsets.get(tp, 0)
+                    end_offset = end_offsets.get(tp, 0)
+                    current_offset = offset_meta.offset if offset_meta.offset >= 0 else 0
+                    
+                    offsets.append(ConsumerGroupOffset(
+                        topic=tp.topic,
+                        partition=tp.partition,
+                        current_offset=current_offset,
+                        end_offset=end_offset,
+                        lag=max(0, end_offset - current_offset),
+                        start_offset=start_offset,
+                        metadata=offset_meta.metadata or ""
+                    ))
+                if with_time_lag:
+                    self._fill_time_lags(consumer, offsets)
             except Exception as e:
                 logger.warning(f"获取消费者组offset失败: {e}")
+            finally:
+                consumer.close()
             
-            # 安全获取属性，不同版本的 kafka-python 属性名可能不同
-            coordinator = getattr(desc, 'coordinator', None)
-            coordinator_id = None
-            if coordinator:
-                coordinator_id = getattr(coordinator, 'node_id', None)
-            
-            return ConsumerGroupInfo(
-                group_id=getattr(desc, 'group', group_id),  # 回退到传入的参数
-                state=getattr(desc, 'state', 'Unknown'),
-                protocol_type=getattr(desc, 'protocol_type', ''),
-                protocol=getattr(desc, 'protocol', ''),
-                coordinator=coordinator_id,
-                members=members,
-                offsets=sorted(offsets, key=lambda x: (x.topic, x.partition))
-            )
+            group.group_id = group.group_id or group_id  # 回退到传入的参数
+            group.offsets = sorted(offsets, key=lambda x: (x.topic, x.partition))
+            return group
+        except TaskSlotTimeout:
+            raise
         except Exception as e:
             logger.error(f"获取消费者组详情失败: {e}", exc_info=True)
             return None
     
+    def _fill_time_lags(self, consumer: ConsumerAdapter, offsets: List[ConsumerGroupOffset]):
+        """计算时间延迟：最新一条消息与提交位点处（下一条待消费）消息的时间戳之差"""
+        wanted = []
+        for o in offsets:
+            if o.lag <= 0:
+                o.time_lag = 0.0
+            elif o.start_offset <= o.current_offset < o.end_offset:
+                tp = TopicPartition(o.topic, o.partition)
+                wanted.append((tp, o.current_offset))
+                wanted.append((tp, o.end_offset - 1))
+        if not wanted:
+            return
+        timestamps = self._record_timestamps(consumer, wanted)
+        for o in offsets:
+            if o.lag <= 0:
+                continue
+            tp = TopicPartition(o.topic, o.partition)
+            committed_ts = timestamps.get((tp, o.current_offset))
+            latest_ts = timestamps.get((tp, o.end_offset - 1))
+            if committed_ts is not None and latest_ts is not None:
+                o.time_lag = max(0.0, latest_ts - committed_ts)
+    
+    def _record_timestamps(
+        self,
+        consumer: ConsumerAdapter,
+        wanted: List[Tuple[TopicPartition, int]],
+        timeout_ms: int = 3000,
+    ) -> Dict[Tuple[TopicPartition, int], float]:
+        """批量读取指定 offset 处消息的时间戳（秒）
+
+        消息写入后时间戳不变，结果按 (集群, 分区, offset) 缓存，offset 不变时不会重复读取。
+        未命中的 offset 分轮读取，每轮把各分区 seek 到一个目标 offset 后一起 poll，
+        每个分区只需要读到目标位置的第一条消息。offset 处的消息已被压缩删除时取其后第一条。
+        """
+        result = {}
+        pending: Dict[TopicPartition, List[int]] = {}
+        with self._timestamp_lock:
+            for tp, offset in wanted:
+                key = (tp.topic, tp.partition, offset)
+                if key in self._timestamp_cache:
+                    self._timestamp_cache.move_to_end(key)
+                    result[(tp, offset)] = self._timestamp_cache[key]
+                else:
+                    pending.setdefault(tp, []).append(offset)
+        
+        while pending:
+            # 本轮每个分区取一个目标 offset
+            targets = {tp: offsets.pop() for tp, offsets in pending.items()}
+            pending = {tp: offsets for tp, offsets in pending.items() if offsets}
+            for tp, offset, timestamp in self._read_first_records(consumer, targets, timeout_ms):
+                result[(tp, offset)] = timestamp
+                with self._timestamp_lock:
+                    self._timestamp_cache[(tp.topic, tp.partition, offset)] = timestamp
+                    if len(self._timestamp_cache) > self.TIMESTAMP_CACHE_SIZE:
+                        self._timestamp_cache.popitem(last=False)
+        return result
+    
+    @staticmethod
+    def _read_first_records(
+        consumer: ConsumerAdapter,
+        targets: Dict[TopicPartition, int],
+        timeout_ms: int,
+    ) -> Iterator[Tuple[TopicPartition, int, float]]:
+        """各分区从目标 offset 开始读到第一条消息，产出 (分区, 目标 offset, 时间戳)"""
+        consumer.assign(list(targets))
+        for tp, offset in targets.items():
+            consumer.seek(tp, offset)
+        remaining = dict(targets)
+        empty_polls = 0
+        while remaining:
+            polled = consumer.poll(timeout_ms=timeout_ms, max_records=max(len(remaining), 1) * 4)
+            done = []
+            for m in polled:
+                tp = TopicPartition(m.topic, m.partition)
+                offset = remaining.get(tp)
+                if offset is not None and m.offset >= offset and tp not in done:
+                    done.append(tp)
+                    if m.timestamp is not None:
+                        yield tp, offset, m.timestamp.timestamp()
+            if not polled:
+                empty_polls += 1
+                if empty_polls >= 2:
+                    logger.warning(f"读取 {len(remaining)} 个分区的消息时间戳超时")
+                    return
+                continue
+            if done:
+                for tp in done:
+                    del remaining[tp]
+                if remaining:
+                    # 只保留未读到的分区，避免已完成的分区继续占用拉取配额
+                    positions = {tp: consumer.position(tp) for tp in remaining}
+                    consumer.assign(list(remaining))
+                    for tp, position in positions.items():
+                        consumer.seek(tp, position if position is not None else remaining[tp])
+    
+    def get_group_offsets_snapshot(self, group_ids: Optional[List[str]] = None,
+                                   describe: bool = False) -> GroupOffsetsSnapshot:
+        """批量采集所有（或指定）消费者组的提交位点，以及这些分区的末尾位点
+
+        每个组一次 OffsetFetch；所有分区的末尾位点合并成一次 end_offsets 调用（客户端库按 Broker 拆分请求）。
+        describe 为 True 时同时获取各组的状态与成员数，每 DESCRIBE_BATCH 个组一次 DescribeGroups。
+        """
+        if not self._admin_client:
+            raise RuntimeError("未连接到Kafka集群")
+        
+        if group_ids is None:
+            group_ids = [group_id for group_id, _ in self._admin_client.list_consumer_groups()]
+        snapshot = GroupOffsetsSnapshot(taken_at=time.time())
+        
+        def fetch(group_id):
+            try:
+                return group_id, self._admin_client.list_consumer_group_offsets(group_id), None
+            except Exception as e:
+                return group_id, None, str(e)
+        
+        def describe_batch(batch):
+            try:
+                return self._admin_client.describe_consumer_groups(batch)
+            except Exception as e:
+                logger.warning(f"获取 {len(batch)} 个消费者组的状态失败: {e}")
+                return []
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_tasks) as executor:
+            if describe:
+                batches = [group_ids[i:i + self.DESCRIBE_BATCH] for i in range(0, len(group_ids), self.DESCRIBE_BATCH)]
+                described = executor.map(describe_batch, batches)
+            for group_id, offsets, error in executor.map(fetch, group_ids):
+                if error is not None:
+                    snapshot.errors[group_id] = error
+                    continue
+                snapshot.committed[group_id] = {
+                    TopicPartition(tp.topic, tp.partition): max(0, meta.offset)
+                    for tp, meta in offsets.items()
+                }
+            if describe:
+                for groups in described:
+                    for group in groups:
+                        snapshot.states[group.group_id] = group.state
+                        snapshot.member_counts[group.group_id] = group.member_count
+        
+        tps = {tp for offsets in snapshot.committed.values() for tp in offsets}
+        if tps:
+            consumer = self._get_consumer()
+            try:
+                snapshot.end_offsets = dict(consumer.end_offsets(sorted(tps)))
+            finally:
+                consumer.close()
+        return snapshot
+    
+    def get_topic_end_offsets(self, topics: Optional[List[str]] = None,
+                              consumer: Optional[ConsumerAdapter] = None) -> TopicOffsetsSnapshot:
+        """批量采集所有（或指定）Topic 各分区的末尾位点，未指定 Topic 时不包含内部 Topic
+
+        分区列表来自一次元数据请求；所有分区合并成一次 end_offsets 调用（客户端库按 Leader Broker 拆分请求）。
+        定期采集时传入 create_consumer() 创建的 consumer 复用连接，此时不会关闭它。
+        """
+        if not self._admin_client:
+            raise RuntimeError("未连接到Kafka集群")
+        
+        owned = consumer is None
+        if owned:
+            consumer = self._get_consumer()
+        try:
+            partitions = consumer.topic_partitions()
+            if topics is None:
+                topics = [topic for topic in partitions if not topic.startswith('__')]
+            tps = [
+                TopicPartition(topic, partition)
+                for topic in topics for partition in sorted(partitions.get(topic, ()))
+            ]
+            taken_at = time.time()
+            end_offsets = dict(consumer.end_offsets(tps)) if tps else {}
+        finally:
+            if owned:
+                consumer.close()
+        return TopicOffsetsSnapshot(taken_at=taken_at, end_offsets=end_offsets)
+    
+    def get_message_histogram(self, topic: str, start: float, end: Optional[float] = None,
+                              bucket_seconds: int = 3600) -> Optional[MessageHistogram]:
+        """按时间桶统计 Topic 在 [start, end) 内的消息数（不读取消息），Topic 不存在时返回 None
+
+        桶按 bucket_seconds 对齐到本地时间。每个桶边界调用一次 offsets_for_times（所有分区合并在一个请求中，
+        客户端库按 Leader Broker 拆分），相邻边界的 offset 之差即为桶内的消息数，请求数只与桶数有关。
+        按消息时间戳定位，生产者写入乱序时间戳时结果是近似值；事务标记也计入消息数。
+        """
+        if not self._admin_client:
+            raise RuntimeError("未连接到Kafka集群")
+        
+        now = time.time()
+        end = min(end if end is not None else now, now)
+        if bucket_seconds <= 0 or end <= start:
+            raise ValueError("时间范围或桶宽无效")
+        # 桶边界按本地时区对齐（按天统计时从本地零点开始）
+        utc_offset = time.localtime(start).tm_gmtoff
+        first = int((start + utc_offset) // bucket_seconds * bucket_seconds - utc_offset)
+        boundaries = [float(ts) for ts in range(first, int(end), bucket_seconds)] or [float(first)]
+        if boundaries[-1] < end:
+            boundaries.append(end)
+        if len(boundaries) - 1 > self.HISTOGRAM_MAX_BUCKETS:
+            raise ValueError(f"桶数超过上限 {self.HISTOGRAM_MAX_BUCKETS}，请缩小时间范围或增大桶宽")
+        
+        consumer = self._get_consumer()
+        try:
+            partition_ids = consumer.partitions_for_topic(topic)
+            if partition_ids is None:
+                return None
+            tps = [TopicPartition(topic, p) for p in sorted(partition_ids)]
+            end_offsets = consumer.end_offsets(tps) if tps else {}
+        finally:
+            consumer.close()
+        
+        # 统计截止到当前时刻时，最后一个边界直接使用末尾位点
+        lookups = boundaries[:-1] if end >= now else boundaries
+        
+        def lookup(chunk: List[float]) -> List[int]:
+            consumer = self._get_consumer()
+            try:
+                totals = []
+                for ts in chunk:
+                    found = consumer.offsets_for_times({tp: int(ts * 1000) for tp in tps})
+                    total = 0
+                    for tp in tps:
+                        # 边界之后没有消息的分区取末尾位点；采集末尾位点之后写入的消息不计入
+                        end_offset = end_offsets.get(tp, 0)
+                        offset = found.get(tp)
+                        total += end_offset if offset is None else min(offset, end_offset)
+                    totals.append(total)
+                return totals
+            finally:
+                consumer.close()
+        
+        totals: List[int] = []
+        if tps and lookups:
+            workers = max(1, min(self.max_concurrent_tasks, len(lookups)))
+            size = -(-len(lookups) // workers)
+            chunks = [lookups[i:i + size] for i in range(0, len(lookups), size)]
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                for chunk_totals in executor.map(lookup, chunks):
+                    totals.extend(chunk_totals)
+        if len(totals) < len(boundaries):
+            totals += [sum(end_offsets.values())] * (len(boundaries) - len(totals))
+        
+        return MessageHistogram(
+            topic=topic,
+            bucket_seconds=bucket_seconds,
+            buckets=[
+                (boundaries[i], max(0, totals[i + 1] - totals[i])) for i in range(len(boundaries) - 1)
+            ],
+            requests=len(lookups) if tps else 0,
+        )
+    
     def consume_messages(
         self,
         topic: str,
@@ -348,73 +713,236 @@ class KafkaClusterClient:
         group_id: Optional[str] = None,
     ) -> List[KafkaMessage]:
         """消费消息。group_id 不为空时使用该消费者组的提交位点作为起始位置（不 seek）。"""
-        messages = []
+        if group_id is None:
+            messages = self._consume_window(topic, partition, offset, limit, timeout_ms, from_beginning)
+            self._sort_messages(messages, sort_field, from_beginning)
+            return messages[:limit]
+        
         consumer = self._get_consumer(group_id=group_id)
         
         try:
             if partition is not None:
-                tp = TopicPartition(topic, partition)
-                consumer.assign([tp])
-                if group_id is None:
-                    if offset is not None:
-                        consumer.seek(tp, offset)
-                    elif from_beginning:
-                        beginning_offsets = consumer.beginning_offsets([tp])
-                        consumer.seek(tp, beginning_offsets.get(tp, 0))
-                    else:
-                        end_offsets = consumer.end_offsets([tp])
-                        end_offset = end_offsets.get(tp, 0)
-                        consumer.seek(tp, max(0, end_offset - limit))
+                consumer.assign([TopicPartition(topic, partition)])
             else:
                 consumer.subscribe([topic])
+                # 第一次 poll 完成加入消费者组与分区分配
                 consumer.poll(timeout_ms=1000)
-                assigned = consumer.assignment()
-                if group_id is None and assigned:
-                    for tp in assigned:
-                        if from_beginning:
-                            beginning_offsets = consumer.beginning_offsets([tp])
-                            consumer.seek(tp, beginning_offsets.get(tp, 0))
-                        else:
-                            end_offsets = consumer.end_offsets([tp])
-                            end_offset = end_offsets.get(tp, 0)
-                            consumer.seek(tp, max(0, end_offset - (limit // len(assigned))))
-            
-            raw_messages = consumer.poll(timeout_ms=timeout_ms, max_records=limit)
-            
-            for tp, msg_list in raw_messages.items():
-                for msg in msg_list:
-                    timestamp = None
-                    if msg.timestamp and msg.timestamp > 0:
-                        timestamp = datetime.fromtimestamp(msg.timestamp / 1000)
-                    
-                    messages.append(KafkaMessage(
-                        topic=msg.topic,
-                        partition=msg.partition,
-                        offset=msg.offset,
-                        timestamp=timestamp,
-                        key=msg.key,
-                        value=msg.value,
-                        headers=list(msg.headers) if msg.headers else []
-                    ))
-            
-            # 排序：from_beginning时正序，否则倒序
-            if sort_field == "timestamp":
-                # 按时间戳排序
-                def sort_key(m):
-                    if m.timestamp:
-                        return m.timestamp
-                    from datetime import datetime
-                    return datetime.min if from_beginning else datetime.max
-                messages.sort(key=sort_key, reverse=not from_beginning)
-            else:
-                # 按 offset 排序
-                messages.sort(key=lambda x: x.offset, reverse=not from_beginning)
             
+            messages = consumer.poll(timeout_ms=timeout_ms, max_records=limit)
+            self._sort_messages(messages, sort_field, from_beginning)
         finally:
             consumer.close()
         
         return messages[:limit]
     
+    @staticmethod
+    def _sort_messages(messages: List[KafkaMessage], sort_field: str, from_beginning: bool):
+        """排序：from_beginning时正序，否则倒序"""
+        if sort_field == "timestamp":
+            # 按时间戳排序
+            def sort_key(m):
+                if m.timestamp:
+                    return m.timestamp
+                return datetime.min if from_beginning else datetime.max
+            messages.sort(key=sort_key, reverse=not from_beginning)
+        else:
+            # 按 offset 排序
+            messages.sort(key=lambda x: x.offset, reverse=not from_beginning)
+    
+    def _consume_window(
+        self,
+        topic: str,
+        partition: Optional[int],
+        offset: Optional[int],
+        limit: int,
+        timeout_ms: int,
+        from_beginning: bool,
+    ) -> List[KafkaMessage]:
+        """按 offset 窗口拉取（不使用消费者组）
+        
+        每个分区的窗口为 [起点, 起点 + 每分区条数)：指定 offset 时从 offset 开始，
+        from_beginning 时从分区起点开始，否则为分区末尾的最后若干条。
+        窗口确定后可以命中消息缓存，只拉取缓存中缺失的部分。
+        """
+        consumer = self._get_consumer()
+        try:
+            if partition is not None:
+                partitions = [partition]
+            else:
+                partition_ids = consumer.partitions_for_topic(topic)
+                if not partition_ids:
+                    return []
+                partitions = sorted(partition_ids)
+            tps = [TopicPartition(topic, p) for p in partitions]
+            beginning = consumer.beginning_offsets(tps)
+            end = consumer.end_offsets(tps)
+            per_partition = max(1, -(-limit // len(tps)))
+            
+            messages = []
+            for tp in tps:
+                low, high = beginning.get(tp, 0), end.get(tp, 0)
+                if offset is not None:
+                    start = max(low, offset)
+                elif from_beginning:
+                    start = low
+                else:
+                    start = max(low, high - per_partition)
+                stop = min(high, start + per_partition)
+                if start >= stop:
+                    continue
+                
+                if self.message_cache is None:
+                    messages.extend(self._read_range(consumer, tp, start, stop, timeout_ms)[0])
+                    continue
+                
+                self.message_cache.validate(
+                    self.cache_scope, topic, tp.partition, low, high,
+                    lambda record_offset: self._read_record(consumer, tp, record_offset, timeout_ms)
+                )
+                cached, missing = self.message_cache.get(self.cache_scope, topic, tp.partition, start, stop)
+                messages.extend(cached)
+                for gap_start, gap_end in missing:
+                    fetched, reached = self._read_range(consumer, tp, gap_start, gap_end, timeout_ms)
+                    messages.extend(fetched)
+                    # 只缓存确实读到的部分，超时未读完的区间下次重新拉取
+                    self.message_cache.put(self.cache_scope, topic, tp.partition, gap_start, reached, fetched)
+            return messages
+        finally:
+            consumer.close()
+    
+    def _read_record(self, consumer: ConsumerAdapter, tp: TopicPartition, offset: int,
+                     timeout_ms: int) -> Optional[KafkaMessage]:
+        """重新读取分区中 offset 处的一条消息（校验缓存用），读不到时为 None"""
+        messages, _ = self._read_range(consumer, tp, offset, offset + 1, timeout_ms)
+        return messages[0] if messages else None
+    
+    def _read_range(
+        self,
+        consumer: ConsumerAdapter,
+        tp: TopicPartition,
+        start: int,
+        end: int,
+        timeout_ms: int,
+    ) -> Tuple[List[KafkaMessage], int]:
+        """读取单个分区 [start, end) 内的消息，返回 (消息, 实际读到的位置)"""
+        consumer.assign([tp])
+        consumer.seek(tp, start)
+        messages = []
+        while True:
+            polled = consumer.poll(timeout_ms=timeout_ms, max_records=min(500, end - start))
+            messages.extend(m for m in polled if m.offset < end)
+            position = consumer.position(tp)
+            if position is None:
+                position = messages[-1].offset + 1 if messages else start
+            if position >= end or any(m.offset >= end for m in polled):
+                return messages, end
+            if not polled:
+                # 超时仍无消息，返回已读到的部分
+                return messages, max(start, position)
+
+    def resolve_offset_ranges(
+        self,
+        topic: str,
+        partitions: Optional[List[int]] = None,
+        start_offset: Optional[int] = None,
+        end_offset: Optional[int] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> Dict[int, Tuple[int, int]]:
+        """把 offset / 时间范围解析为每个分区的 [start, end) offset 区间
+
+        offset 与时间条件同时给出时取交集，结果会被裁剪到分区当前的起止 offset 之内。
+        """
+        consumer = self._get_consumer()
+        try:
+            if partitions is None:
+                partition_ids = consumer.partitions_for_topic(topic)
+                if partition_ids is None:
+                    raise ValueError(f"Topic 不存在: {topic}")
+                partitions = sorted(partition_ids)
+            tps = [TopicPartition(topic, p) for p in partitions]
+            beginning = consumer.beginning_offsets(tps)
+            end = consumer.end_offsets(tps)
+
+            starts = {tp: beginning.get(tp, 0) for tp in tps}
+            ends = {tp: end.get(tp, 0) for tp in tps}
+            if start_offset is not None:
+                starts = {tp: max(off, start_offset) for tp, off in starts.items()}
+            if end_offset is not None:
+                ends = {tp: min(off, end_offset) for tp, off in ends.items()}
+            if start_time is not None:
+                found = consumer.offsets_for_times({tp: int(start_time.timestamp() * 1000) for tp in tps})
+                for tp in tps:
+                    # 没有更晚的消息时，起点就是分区末尾
+                    starts[tp] = max(starts[tp], ends[tp] if found.get(tp) is None else found[tp])
+            if end_time is not None:
+                found = consumer.offsets_for_times({tp: int(end_time.timestamp() * 1000) for tp in tps})
+                for tp in tps:
+                    if found.get(tp) is not None:
+                        ends[tp] = min(ends[tp], found[tp])
+
+            return {tp.partition: (starts[tp], max(starts[tp], ends[tp])) for tp in tps}
+        finally:
+            consumer.close()
+
+    def iter_message_batches(
+        self,
+        topic: str,
+        ranges: Dict[int, Tuple[int, int]],
+        batch_size: int = 500,
+        timeout_ms: int = 5000,
+        stop_event: Optional[threading.Event] = None,
+        skip_unfinished: bool = True,
+    ) -> Iterator[List[KafkaMessage]]:
+        """按分区顺序流式读取 [start, end) 区间内的消息，每次产出一批
+
+        只持有一个 Consumer 和一批消息，内存占用与区间大小无关。
+        某个分区连续超时仍读不到区间末尾时跳过该分区继续读其余分区，全部读完后抛出 IncompleteReadError；
+        skip_unfinished 为 False 时（调用方要求各分区的消息连续）在该分区停止，后面的分区也计入未读完。
+        被 stop_event 中断时直接结束，不抛出异常。
+        """
+        unfinished: Dict[int, int] = {}
+        consumer = self._get_consumer()
+        try:
+            for partition in sorted(ranges):
+                start, end = ranges[partition]
+                if start >= end:
+                    continue
+                tp = TopicPartition(topic, partition)
+                consumer.assign([tp])
+                consumer.seek(tp, start)
+
+                empty_polls = 0
+                read_to = start
+                while True:
+                    if stop_event is not None and stop_event.is_set():
+                        return
+                    messages = consumer.poll(timeout_ms=timeout_ms, max_records=batch_size)
+                    batch = [m for m in messages if m.offset < end]
+                    if batch:
+                        read_to = batch[-1].offset + 1
+                        yield batch
+                    position = consumer.position(tp)
+                    if position is None:
+                        position = read_to
+                    if len(batch) < len(messages) or position >= end:
+                        break
+                    empty_polls = 0 if messages else empty_polls + 1
+                    if empty_polls >= 3:
+                        # 连续超时仍无消息（Broker 不可达或区间内数据已被清理）
+                        logger.warning(f"{topic}-{partition} 在 offset {position} 处无更多消息，未读到 {end}")
+                        unfinished[partition] = position
+                        break
+                if unfinished and not skip_unfinished:
+                    for later in sorted(ranges):
+                        if later > partition and ranges[later][0] < ranges[later][1]:
+                            unfinished[later] = ranges[later][0]
+                    break
+        finally:
+            consumer.close()
+        if unfinished:
+            raise IncompleteReadError(topic, unfinished)
+
     def produce_message(
         self,
         topic: str,
@@ -427,17 +955,16 @@ class KafkaClusterClient:
         try:
             producer = self._get_producer()
             
-            future = producer.send(
+            # 等待发送完成
+            sent_partition, sent_offset = producer.send(
                 topic=topic,
                 value=value,
                 key=key,
                 partition=partition,
-                headers=headers
+                headers=headers,
+                timeout=10
             )
-            
-            # 等待发送完成
-            record_metadata = future.get(timeout=10)
-            logger.info(f"消息发送成功: {topic}-{record_metadata.partition}@{record_metadata.offset}")
+            logger.info(f"消息发送成功: {topic}-{sent_partition}@{sent_offset}")
             return True
         except Exception as e:
             logger.error(f"消息发送失败: {e}")
@@ -466,7 +993,6 @@ class KafkaClusterClient:
                     offset_data = self._admin_client.list_consumer_group_offsets(group_id)
                     
                     # 检查是否订阅了该 topic/partition
-                    from kafka.structs import TopicPartition
                     tp = TopicPartition(topic, partition)
                     
                     if tp in offset_data:
@@ -498,13 +1024,12 @@ class KafkaClusterClient:
             raise RuntimeError("未连接到Kafka集群")
         
         try:
-            new_topic = NewTopic(
-                name=topic_name,
+            self._admin_client.create_topic(
+                topic_name,
                 num_partitions=num_partitions,
                 replication_factor=replication_factor,
-                topic_configs=config
+                config=config
             )
-            self._admin_client.create_topics([new_topic])
             logger.info(f"Topic创建成功: {topic_name}")
             return True
         except Exception as e:
@@ -517,7 +1042,9 @@ class KafkaClusterClient:
             raise RuntimeError("未连接到Kafka集群")
         
         try:
-            self._admin_client.delete_topics([topic_name])
+            self._admin_client.delete_topic(topic_name)
+            if self.message_cache is not None:
+                self.message_cache.invalidate(self.cache_scope, topic_name)
             logger.info(f"Topic删除成功: {topic_name}")
             return True
         except Exception as e:
@@ -529,9 +1056,7 @@ class KafkaClusterClient:
         if not self._admin_client:
             raise RuntimeError("未连接到Kafka集群")
         try:
-            self._admin_client.create_partitions(
-                {topic_name: NewPartitions(total_count=new_total_count, new_assignments=None)}
-            )
+            self._admin_client.create_partitions(topic_name, new_total_count)
             logger.info(f"Topic '{topic_name}' 分区数已调整为 {new_total_count}")
             return True
         except Exception as e:
@@ -557,9 +1082,7 @@ class KafkaClusterClient:
                 offsets = consumer.beginning_offsets(tps)
             else:
                 offsets = consumer.end_offsets(tps)
-            for tp in tps:
-                consumer.seek(tp, offsets.get(tp, 0))
-            consumer.commit()
+            consumer.commit({tp: offsets.get(tp, 0) for tp in tps})
             logger.info(f"消费者组 '{group_id}' 已重置 {len(tps)} 个分区到 {target}")
             return True
         finally:
@@ -587,9 +1110,7 @@ class KafkaClusterClient:
                 offsets = consumer.beginning_offsets(assigned)
             else:
                 offsets = consumer.end_offsets(assigned)
-            for tp in assigned:
-                consumer.seek(tp, offsets.get(tp, 0))
-            consumer.commit()
+            consumer.commit({tp: offsets.get(tp, 0) for tp in assigned})
             logger.info(f"消费者组 '{group_id}' 已创建，订阅 {len(topic_names)} 个 Topic，初始消费点: {target}")
             return True
         finally:
@@ -0,0 +1,62 @@
+"""程序目录与连接配置文件（界面与命令行共用，不依赖 Qt）"""
+
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .models import AlertRule, ClusterConnection
+
+
+def get_app_dir() -> Path:
+    """获取应用程序目录（支持打包后的exe和直接运行）"""
+    if getattr(sys, 'frozen', False):
+        # 打包成 exe 后
+        return Path(sys.executable).parent
+    else:
+        # 直接运行 Python 脚本
+        return Path(__file__).parent.parent
+
+
+def connections_path() -> Path:
+    """连接配置文件 config/connections.json"""
+    return get_app_dir() / "config" / "connections.json"
+
+
+def load_connections(path: Optional[Path] = None) -> List[ClusterConnection]:
+    """读取连接配置，文件不存在时返回空列表"""
+    path = Path(path) if path else connections_path()
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [ClusterConnection.from_dict(data) for data in json.load(f)]
+
+
+def save_connections(connections: List[ClusterConnection], path: Optional[Path] = None):
+    """写入连接配置"""
+    path = Path(path) if path else connections_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([conn.to_dict() for conn in connections], f, indent=2, ensure_ascii=False)
+
+
+def alerts_path() -> Path:
+    """告警规则文件 config/alerts.json"""
+    return get_app_dir() / "config" / "alerts.json"
+
+
+def load_alert_rules(path: Optional[Path] = None) -> List[AlertRule]:
+    """读取告警规则，文件不存在时返回空列表"""
+    path = Path(path) if path else alerts_path()
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [AlertRule.from_dict(data) for data in json.load(f)]
+
+
+def save_alert_rules(rules: List[AlertRule], path: Optional[Path] = None):
+    """写入告警规则"""
+    path = Path(path) if path else alerts_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([rule.to_dict() for rule in rules], f, indent=2, ensure_ascii=False)
@@ -0,0 +1,369 @@
+"""消息导出
+
+按分区顺序把 offset / 时间范围内的消息流式写入文件（JSONL / CSV / 二进制），
+内存中只保留一个固定大小的写缓冲区。每次刷盘后记录进度文件，中断后可从上次写入的位置继续。
+segment 格式为带索引的段文件（见 segment.py），可在消息浏览器中离线打开。
+"""
+
+import base64
+import csv
+import gzip
+import io
+import json
+import logging
+import lzma
+import mmap
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .client import IncompleteReadError
+from .models import KafkaMessage
+from .segment import SegmentBuilder, frame_message
+
+logger = logging.getLogger(__name__)
+
+# 格式 -> 默认扩展名
+EXPORT_FORMATS = {
+    'jsonl': '.jsonl',
+    'csv': '.csv',
+    'binary': '.bin',
+    'segment': '.kseg',
+}
+
+# 压缩方式 -> 追加的扩展名。每次刷盘写入一个独立的压缩块（gzip member / xz stream），
+# 标准工具可直接解压整个文件，且断点续传时可以按块边界截断
+COMPRESSIONS = {
+    'none': '',
+    'gzip': '.gz',
+    'lzma': '.xz',
+}
+
+CSV_COLUMNS = ['topic', 'partition', 'offset', 'timestamp', 'key', 'value', 'headers']
+
+def format_bytes(size: float) -> str:
+    """格式化字节数"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def _text_field(data: Optional[bytes]) -> Tuple[Optional[str], bool]:
+    """bytes -> (文本, 是否为 base64)；非 UTF-8 内容使用 base64"""
+    if data is None:
+        return None, False
+    try:
+        return data.decode('utf-8'), False
+    except UnicodeDecodeError:
+        return base64.b64encode(data).decode('ascii'), True
+
+
+def _headers_json(headers: List[tuple]) -> list:
+    result = []
+    for name, value in headers:
+        text, is_b64 = _text_field(value)
+        result.append([name, text] if not is_b64 else [name, {'base64': text}])
+    return result
+
+
+def message_to_dict(msg: KafkaMessage) -> dict:
+    """JSONL 导出使用的记录结构"""
+    key, key_b64 = _text_field(msg.key)
+    value, value_b64 = _text_field(msg.value)
+    record = {
+        'topic': msg.topic,
+        'partition': msg.partition,
+        'offset': msg.offset,
+        'timestamp': int(msg.timestamp.timestamp() * 1000) if msg.timestamp else None,
+        'key': key,
+        'value': value,
+        'headers': _headers_json(msg.headers),
+    }
+    if key_b64:
+        record['key_base64'] = True
+    if value_b64:
+        record['value_base64'] = True
+    return record
+
+
+def _encode_jsonl(messages: List[KafkaMessage]) -> bytes:
+    lines = [json.dumps(message_to_dict(m), ensure_ascii=False) for m in messages]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _encode_csv(messages: List[KafkaMessage]) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for msg in messages:
+        key, _ = _text_field(msg.key)
+        value, _ = _text_field(msg.value)
+        writer.writerow([
+            msg.topic, msg.partition, msg.offset, msg.timestamp_str,
+            key if key is not None else '', value if value is not None else '',
+            json.dumps(_headers_json(msg.headers), ensure_ascii=False) if msg.headers else ''
+        ])
+    return out.getvalue().encode('utf-8')
+
+
+def _encode_binary(messages: List[KafkaMessage]) -> bytes:
+    return b''.join(frame_message(m) for m in messages)
+
+
+_ENCODERS: Dict[str, Callable[[List[KafkaMessage]], bytes]] = {
+    'jsonl': _encode_jsonl,
+    'csv': _encode_csv,
+    'binary': _encode_binary,
+}
+
+
+@dataclass
+class ExportProgress:
+    """导出进度"""
+    messages: int = 0
+    total_messages: int = 0
+    bytes_written: int = 0
+    elapsed: float = 0.0
+    partition: Optional[int] = None
+    offset: Optional[int] = None
+    completed: bool = False
+    # 没有读到区间末尾的分区 -> 停止时的位置（非空时 completed 为 False，保留断点）
+    incomplete: Dict[int, int] = field(default_factory=dict)
+    path: str = ""
+    # 本次运行写入的字节数（断点续传时不含之前写入的部分），用于计算速率
+    session_bytes: int = 0
+    positions: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.session_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class MessageExporter:
+    """流式消息导出器"""
+
+    def __init__(
+        self,
+        client,
+        topic: str,
+        path: str,
+        fmt: str = 'jsonl',
+        compression: str = 'none',
+        partitions: Optional[List[int]] = None,
+        start_offset: Optional[int] = None,
+        end_offset: Optional[int] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        resume: bool = True,
+        buffer_size: int = 4 * 1024 * 1024,
+        batch_size: int = 500,
+        progress_callback: Optional[Callable[[ExportProgress], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {fmt}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+        if fmt == 'segment' and compression != 'none':
+            raise ValueError("段文件需要随机访问，不支持压缩")
+        self.client = client
+        self.topic = topic
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self.partitions = partitions
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.start_time = start_time
+        self.end_time = end_time
+        self.resume = resume
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+        self.stop_event = stop_event or threading.Event()
+
+    @property
+    def checkpoint_path(self) -> str:
+        return self.path + '.progress.json'
+
+    def _load_checkpoint(self) -> Optional[dict]:
+        if not self.resume or not os.path.exists(self.checkpoint_path) or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取导出进度失败，将重新导出: {e}")
+            return None
+        if (checkpoint.get('topic') != self.topic
+                or checkpoint.get('format') != self.fmt
+                or checkpoint.get('compression') != self.compression
+                or checkpoint.get('request') != self._request()):
+            logger.warning("导出进度与当前导出参数不一致，将重新导出")
+            return None
+        return checkpoint
+
+    def _request(self) -> dict:
+        """本次导出请求的分区与范围（写入断点，续传时必须一致）"""
+        return {
+            'partitions': sorted(self.partitions) if self.partitions is not None else None,
+            'start_offset': self.start_offset,
+            'end_offset': self.end_offset,
+            'start_time': self.start_time.timestamp() if self.start_time is not None else None,
+            'end_time': self.end_time.timestamp() if self.end_time is not None else None,
+        }
+
+    def _save_checkpoint(self, ranges: Dict[int, Tuple[int, int]], positions: Dict[int, int],
+                         file_size: int, messages: int):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'topic': self.topic,
+                'format': self.fmt,
+                'compression': self.compression,
+                'request': self._request(),
+                'ranges': {str(p): list(r) for p, r in ranges.items()},
+                'positions': {str(p): o for p, o in positions.items()},
+                'file_size': file_size,
+                'messages': messages,
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == 'gzip':
+            return gzip.compress(data, compresslevel=6)
+        if self.compression == 'lzma':
+            return lzma.compress(data)
+        return data
+
+    def run(self) -> ExportProgress:
+        """执行导出，返回最终进度
+
+        被 stop_event 中断或有分区没有读到区间末尾（progress.incomplete）时 completed 为 False，断点保留，可以续传。
+        """
+        checkpoint = self._load_checkpoint()
+        if checkpoint:
+            ranges = {int(p): tuple(r) for p, r in checkpoint['ranges'].items()}
+            positions = {int(p): o for p, o in checkpoint['positions'].items()}
+            file_size = checkpoint['file_size']
+            written_messages = checkpoint.get('messages', 0)
+            logger.info(f"从上次进度继续导出 {self.topic}: 已写入 {written_messages} 条")
+        else:
+            ranges = self.client.resolve_offset_ranges(
+                self.topic, self.partitions,
+                start_offset=self.start_offset, end_offset=self.end_offset,
+                start_time=self.start_time, end_time=self.end_time
+            )
+            positions = {p: start for p, (start, _) in ranges.items()}
+            file_size = 0
+            written_messages = 0
+
+        progress = ExportProgress(
+            messages=written_messages,
+            total_messages=sum(end - start for start, end in ranges.values()),
+            bytes_written=file_size,
+            path=self.path,
+            positions=positions
+        )
+        started = time.monotonic()
+        remaining = {p: (positions[p], end) for p, (_, end) in ranges.items() if positions[p] < end}
+
+        buffer = bytearray()
+        pending_positions: Dict[int, int] = {}
+        pending_messages = 0
+
+        with open(self.path, 'r+b' if checkpoint else 'wb') as f:
+            # 截断到最后一次确认写入的位置，丢弃中断时可能残留的半截数据
+            f.truncate(file_size)
+            f.seek(file_size)
+            if not checkpoint and self.fmt == 'csv':
+                header = io.StringIO()
+                csv.writer(header).writerow(CSV_COLUMNS)
+                buffer += header.getvalue().encode('utf-8')
+
+            segment = None
+            if self.fmt == 'segment':
+                segment = SegmentBuilder(self.topic)
+                if not checkpoint:
+                    buffer += segment.header
+                elif file_size > len(segment.header):
+                    # 续传时从已写入的记录重建索引
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        segment.scan(mm, len(segment.header), file_size)
+
+            def flush():
+                nonlocal buffer, pending_messages
+                if buffer:
+                    data = self._compress(bytes(buffer))
+                    f.write(data)
+                    f.flush()
+                    progress.bytes_written += len(data)
+                    progress.session_bytes += len(data)
+                    buffer = bytearray()
+                positions.update(pending_positions)
+                pending_positions.clear()
+                progress.messages += pending_messages
+                pending_messages = 0
+                progress.elapsed = time.monotonic() - started
+                self._save_checkpoint(ranges, positions, progress.bytes_written, progress.messages)
+                if self.progress_callback:
+                    self.progress_callback(progress)
+
+            if segment is not None:
+                def encode(batch):
+                    return segment.encode(batch, progress.bytes_written + len(buffer))
+            else:
+                encode = _ENCODERS[self.fmt]
+            try:
+                # 段文件中同一分区的记录必须连续，某个分区读不完时不能先写后面的分区
+                for batch in self.client.iter_message_batches(
+                    self.topic, remaining, batch_size=self.batch_size, stop_event=self.stop_event,
+                    skip_unfinished=segment is None
+                ):
+                    buffer += encode(batch)
+                    last = batch[-1]
+                    pending_positions[last.partition] = last.offset + 1
+                    pending_messages += len(batch)
+                    progress.partition = last.partition
+                    progress.offset = last.offset
+                    if len(buffer) >= self.buffer_size:
+                        flush()
+            except IncompleteReadError as e:
+                progress.incomplete = dict(e.positions)
+            if not self.stop_event.is_set():
+                # 读到区间末尾的分区（末尾可能是事务标记或被压缩掉的 offset，最后一条消息之后仍有空位）
+                for p, (_, end) in remaining.items():
+                    if p not in progress.incomplete:
+                        pending_positions[p] = end
+            flush()
+            finished = all(positions[p] >= end for p, (_, end) in ranges.items())
+
+            if segment is not None and finished:
+                trailer = segment.trailer(progress.bytes_written)
+                f.write(trailer)
+                progress.bytes_written += len(trailer)
+                progress.session_bytes += len(trailer)
+
+        progress.elapsed = time.monotonic() - started
+        if finished:
+            progress.completed = True
+            try:
+                os.remove(self.checkpoint_path)
+            except OSError:
+                pass
+            logger.info(
+                f"导出完成: {self.topic} -> {self.path}, {progress.messages} 条, "
+                f"{format_bytes(progress.bytes_written)}"
+            )
+        elif progress.incomplete:
+            logger.warning(
+                f"导出未完成: {self.topic}, 已写入 {progress.messages} 条，"
+                f"分区 {sorted(progress.incomplete)} 未读到区间末尾，已保留断点"
+            )
+        else:
+            logger.info(f"导出已中断: {self.topic}, 已写入 {progress.messages} 条")
+        return progress
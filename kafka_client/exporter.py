@@ -0,0 +1,165 @@
+"""消费者组 lag 的 Prometheus / OpenMetrics 导出
+
+LagExporter 作为 OffsetSampler 的监听器，在采集线程中把每个集群的最新快照渲染成文本并缓存；
+/metrics 请求只返回缓存的内容，抓取的开销与集群规模无关，也不会访问 Broker。
+
+    python -m kafka_client serve-metrics --port 9308 --interval 30
+"""
+
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .models import GroupOffsetsSnapshot
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# 指标名 -> (类型, 说明)，按此顺序输出
+METRICS = {
+    'kafka_consumergroup_lag': ('gauge', "消费者组在分区上的 lag（末尾位点 - 提交位点）"),
+    'kafka_consumergroup_current_offset': ('gauge', "消费者组在分区上的提交位点"),
+    'kafka_consumergroup_lag_sum': ('gauge', "消费者组所有分区的 lag 之和"),
+    'kafka_consumergroup_members': ('gauge', "消费者组成员数"),
+    'kafka_consumergroup_state': ('gauge', "消费者组状态（当前状态为 1）"),
+    'kafka_topic_partition_end_offset': ('gauge', "分区的末尾位点"),
+    'kafka_exporter_group_errors': ('gauge', "最近一次采集中获取位点失败的组数"),
+    'kafka_exporter_snapshot_timestamp_seconds': ('gauge', "最近一次成功采集的时间"),
+    'kafka_exporter_snapshot_duration_seconds': ('gauge', "最近一次采集的耗时"),
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def render_snapshot(cluster: str, snapshot: GroupOffsetsSnapshot,
+                    duration: Optional[float] = None) -> Dict[str, List[str]]:
+    """把一个集群的快照渲染为 指标名 -> 样本行"""
+    lines: Dict[str, List[str]] = {name: [] for name in METRICS}
+    for group_id in sorted(snapshot.committed):
+        offsets = snapshot.committed[group_id]
+        total = 0
+        for (topic, partition), committed in sorted(offsets.items()):
+            labels = _labels(cluster=cluster, group=group_id, topic=topic, partition=partition)
+            lines['kafka_consumergroup_current_offset'].append(
+                f"kafka_consumergroup_current_offset{labels} {committed}"
+            )
+            end = snapshot.end_offsets.get((topic, partition))
+            if end is None:
+                continue
+            lag = max(0, end - committed)
+            total += lag
+            lines['kafka_consumergroup_lag'].append(f"kafka_consumergroup_lag{labels} {lag}")
+        group_labels = _labels(cluster=cluster, group=group_id)
+        lines['kafka_consumergroup_lag_sum'].append(f"kafka_consumergroup_lag_sum{group_labels} {total}")
+        if group_id in snapshot.member_counts:
+            lines['kafka_consumergroup_members'].append(
+                f"kafka_consumergroup_members{group_labels} {snapshot.member_counts[group_id]}"
+            )
+        if group_id in snapshot.states:
+            labels = _labels(cluster=cluster, group=group_id, state=snapshot.states[group_id])
+            lines['kafka_consumergroup_state'].append(f"kafka_consumergroup_state{labels} 1")
+    for (topic, partition), end in sorted(snapshot.end_offsets.items()):
+        labels = _labels(cluster=cluster, topic=topic, partition=partition)
+        lines['kafka_topic_partition_end_offset'].append(f"kafka_topic_partition_end_offset{labels} {end}")
+    cluster_labels = _labels(cluster=cluster)
+    lines['kafka_exporter_group_errors'].append(f"kafka_exporter_group_errors{cluster_labels} {len(snapshot.errors)}")
+    lines['kafka_exporter_snapshot_timestamp_seconds'].append(
+        f"kafka_exporter_snapshot_timestamp_seconds{cluster_labels} {snapshot.taken_at:.3f}"
+    )
+    if duration is not None:
+        lines['kafka_exporter_snapshot_duration_seconds'].append(
+            f"kafka_exporter_snapshot_duration_seconds{cluster_labels} {duration:.3f}"
+        )
+    return lines
+
+
+class LagExporter:
+    """缓存各集群最新快照渲染出的指标文本（可直接作为 OffsetSampler 的监听器）"""
+
+    def __init__(self, sampler=None):
+        # 提供 OffsetSampler 时输出每次采集的耗时
+        self.sampler = sampler
+        self._lock = threading.Lock()
+        self._clusters: Dict[str, Dict[str, List[str]]] = {}
+        self._body = b""
+        self._updated_at = 0.0
+        self._rebuild()
+
+    def record(self, cluster: str, snapshot: GroupOffsetsSnapshot):
+        duration = self.sampler.last_duration.get(cluster) if self.sampler is not None else None
+        lines = render_snapshot(cluster, snapshot, duration)
+        with self._lock:
+            self._clusters[cluster] = lines
+            self._rebuild()
+
+    def remove_cluster(self, cluster: str):
+        with self._lock:
+            if self._clusters.pop(cluster, None) is not None:
+                self._rebuild()
+
+    def _rebuild(self):
+        """在持有锁时调用：按指标合并各集群的样本行，生成完整的响应"""
+        parts = []
+        for name, (kind, help_text) in METRICS.items():
+            parts.append(f"# HELP {name} {help_text}")
+            parts.append(f"# TYPE {name} {kind}")
+            for cluster in sorted(self._clusters):
+                parts.extend(self._clusters[cluster][name])
+        self._body = ("\n".join(parts) + "\n").encode('utf-8')
+        self._updated_at = time.time()
+
+    def body(self, openmetrics: bool = False) -> Tuple[bytes, str]:
+        """(响应内容, Content-Type)"""
+        with self._lock:
+            body = self._body
+        if openmetrics:
+            return body + b"# EOF\n", OPENMETRICS_CONTENT_TYPE
+        return body, PROMETHEUS_CONTENT_TYPE
+
+    @property
+    def clusters(self) -> List[str]:
+        with self._lock:
+            return sorted(self._clusters)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    exporter: LagExporter = None
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+            body, content_type = self.exporter.body(openmetrics)
+        elif path == '/':
+            clusters = ", ".join(self.exporter.clusters) or "（尚未完成采集）"
+            body = f"Kafka Explorer lag exporter\n/metrics\n集群: {clusters}\n".encode('utf-8')
+            content_type = "text/plain; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def make_server(exporter: LagExporter, host: str = '127.0.0.1', port: int = 9308) -> ThreadingHTTPServer:
+    """创建提供 /metrics 的 HTTP 服务（调用方负责 serve_forever / shutdown）"""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'exporter': exporter})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,240 @@
+"""消费者组位点的定期批量采集
+
+OffsetSampler 在后台线程中按固定间隔对每个已连接的集群采集一次 GroupOffsetsSnapshot，
+再把快照交给注册的监听器（lag 历史存储、LagRateTracker 等），监听器在采集线程中执行，应尽快返回。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .client import KafkaClusterClient
+from .models import GroupLagRate, GroupOffsetsSnapshot, LagRate
+
+logger = logging.getLogger(__name__)
+
+# 监听器: (集群名称, 快照)
+SnapshotListener = Callable[[str, GroupOffsetsSnapshot], None]
+
+
+class OffsetSampler:
+    """按间隔采集各集群的消费者组位点快照"""
+
+    # 日志中采集内容的名称
+    target = "消费者组位点"
+
+    def __init__(self, interval: float = 30.0, describe: bool = True):
+        self.interval = interval
+        # 同时采集各组的状态与成员数（总览面板使用）
+        self.describe = describe
+        self._clients: Dict[str, KafkaClusterClient] = {}
+        self._listeners: List[SnapshotListener] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 集群 -> 最近一次采集耗时（秒）
+        self.last_duration: Dict[str, float] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_client(self, name: str, client: KafkaClusterClient, sample: bool = True):
+        """加入采集；sample 为 False 表示调用方刚采集过（如连接时预热），等下一轮再采集"""
+        with self._lock:
+            self._clients[name] = client
+        if sample:
+            # 新连接的集群立即采集一次
+            self._wakeup.set()
+
+    def remove_client(self, name: str):
+        with self._lock:
+            self._clients.pop(name, None)
+            self.last_duration.pop(name, None)
+
+    def add_listener(self, listener: SnapshotListener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: SnapshotListener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def start(self):
+        if self.running or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="offset-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def sample_now(self):
+        """不等间隔到期，立即开始下一轮采集"""
+        self._wakeup.set()
+
+    def sample_cluster(self, name: str, client: KafkaClusterClient) -> Optional[GroupOffsetsSnapshot]:
+        """采集一个集群并通知监听器，失败时返回 None"""
+        started = time.perf_counter()
+        try:
+            snapshot = self._collect(name, client)
+        except Exception as e:
+            logger.warning(f"采集集群 {name} 的{self.target}失败: {e}")
+            return None
+        self.last_duration[name] = time.perf_counter() - started
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(name, snapshot)
+            except Exception:
+                logger.exception(f"处理集群 {name} 的{self.target}快照失败")
+        return snapshot
+
+    def _collect(self, name: str, client: KafkaClusterClient):
+        """采集一个集群（子类改为采集其他快照）"""
+        return client.get_group_offsets_snapshot(describe=self.describe)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            started = time.monotonic()
+            with self._lock:
+                clients = list(self._clients.items())
+            for name, client in clients:
+                if self._stop.is_set():
+                    return
+                if client.is_connected:
+                    self.sample_cluster(name, client)
+            # 间隔从本轮开始计算，采集耗时不会让周期越拉越长
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                self._wakeup.wait(remaining)
+
+
+class LagRateTracker:
+    """由定期快照滚动计算各分区 / 各组的生产与消费速率（可直接作为 OffsetSampler 的监听器）
+
+    每个分区保留窗口内的 (时间, 提交位点, 末尾位点) 样本，速率取窗口首尾两个样本之差，
+    每次快照只追加一个样本并丢弃过期样本。
+    """
+
+    def __init__(self, window: float = 300.0):
+        self.window = window
+        self._lock = threading.Lock()
+        # (集群, 组) -> (topic, partition) -> 样本
+        self._samples: Dict[Tuple[str, str], Dict[Tuple[str, int], Deque[Tuple[float, int, int]]]] = {}
+        self._rates: Dict[Tuple[str, str], GroupLagRate] = {}
+
+    def record(self, cluster: str, snapshot: GroupOffsetsSnapshot):
+        now = snapshot.taken_at
+        with self._lock:
+            for group_id, offsets in snapshot.committed.items():
+                key = (cluster, group_id)
+                series = self._samples.setdefault(key, {})
+                for tp in [tp for tp in series if tp not in offsets]:
+                    del series[tp]
+                partitions: Dict[Tuple[str, int], LagRate] = {}
+                for tp, committed in offsets.items():
+                    end = snapshot.end_offsets.get(tp)
+                    if end is None:
+                        continue
+                    samples = series.setdefault(tp, deque())
+                    # 重置了消费点或 Topic 被重建时位点会回退，之前的样本不再可比
+                    if samples and (committed < samples[-1][1] or end < samples[-1][2]):
+                        samples.clear()
+                    samples.append((now, committed, end))
+                    while len(samples) > 2 and samples[1][0] <= now - self.window:
+                        samples.popleft()
+                    partitions[tp] = self._partition_rate(samples)
+                self._rates[key] = GroupLagRate(
+                    lag=sum(r.lag for r in partitions.values()),
+                    produce_rate=sum(r.produce_rate for r in partitions.values()),
+                    consume_rate=sum(r.consume_rate for r in partitions.values()),
+                    span=max((r.span for r in partitions.values()), default=0.0),
+                    partitions=partitions,
+                )
+            # 已删除的组（采集失败的组保留之前的数据）
+            for key in [k for k in self._samples if k[0] == cluster
+                        and k[1] not in snapshot.committed and k[1] not in snapshot.errors]:
+                del self._samples[key]
+                self._rates.pop(key, None)
+
+    @staticmethod
+    def _partition_rate(samples: Deque[Tuple[float, int, int]]) -> LagRate:
+        last_ts, committed, end = samples[-1]
+        first_ts, first_committed, first_end = samples[0]
+        span = last_ts - first_ts
+        if span <= 0:
+            return LagRate(lag=max(0, end - committed), produce_rate=0.0, consume_rate=0.0, span=0.0)
+        return LagRate(
+            lag=max(0, end - committed),
+            produce_rate=(end - first_end) / span,
+            consume_rate=(committed - first_committed) / span,
+            span=span,
+        )
+
+    def group_rate(self, cluster: str, group_id: str) -> Optional[GroupLagRate]:
+        """组的最新速率，还没有两次采集时 span 为 0"""
+        with self._lock:
+            return self._rates.get((cluster, group_id))
+
+    def rates(self, cluster: str) -> Dict[str, GroupLagRate]:
+        with self._lock:
+            return {group_id: rate for (name, group_id), rate in self._rates.items() if name == cluster}
+
+    def remove_cluster(self, cluster: str):
+        with self._lock:
+            for key in [k for k in self._samples if k[0] == cluster]:
+                del self._samples[key]
+                self._rates.pop(key, None)
+
+
+def format_rate(rate: float) -> str:
+    """格式化速率（条/秒）"""
+    return f"{rate:,.1f}" if abs(rate) < 100 else f"{rate:,.0f}"
+
+
+def format_duration(seconds: float) -> str:
+    """格式化时长"""
+    if seconds < 10:
+        return f"{seconds:.1f} 秒"
+    if seconds < 60:
+        return f"{seconds:.0f} 秒"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} 分钟"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} 小时"
+    return f"{seconds / 86400:.1f} 天"
+
+
+def format_eta(rate: LagRate) -> str:
+    """追平 lag 的预计时间"""
+    eta = rate.eta_seconds
+    if eta is None:
+        return "追不上"
+    if eta == 0:
+        return "已追平"
+    return format_duration(eta)
+
+
+def describe_rate(rate: LagRate) -> str:
+    """一句话描述速率与追平时间，如：消费 X 条/秒，生产 Y 条/秒，预计 Z 后追平"""
+    if rate.span <= 0:
+        return "正在采集速率..."
+    text = f"消费 {format_rate(rate.consume_rate)} 条/秒，生产 {format_rate(rate.produce_rate)} 条/秒，"
+    eta = rate.eta_seconds
+    if eta is None:
+        return text + "按当前速率无法追平"
+    if eta == 0:
+        return text + "已追平"
+    return text + f"预计 {format_duration(eta)}后追平"
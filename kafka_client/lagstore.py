@@ -0,0 +1,258 @@
+"""消费者组 lag 历史（SQLite 时序存储）
+
+每个 (集群, 组, Topic, 分区) 是一条序列，按三级精度保存提交位点与末尾位点：
+    points_raw   采样原始精度（秒）
+    points_1m    每分钟最后一个样本
+    points_1h    每小时最后一个样本
+位点是单调递增的计数器，降采样只需保留桶内最后一个样本，任意两点之间的 lag 与速率仍然准确。
+各级按保留时间清理；数据库超出磁盘预算时，从最粗的一级开始删除最旧的数据，尽量保留最近的细节。
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .models import GroupOffsetsSnapshot
+
+logger = logging.getLogger(__name__)
+
+# (表名, 桶宽秒数, 保留秒数)
+TIERS = (
+    ('points_raw', 1, 6 * 3600),
+    ('points_1m', 60, 3 * 86400),
+    ('points_1h', 3600, 60 * 86400),
+)
+
+# 查询返回的最大点数，超过时在查询中按时间桶降采样
+MAX_POINTS = 2000
+
+# 两次降采样 / 清理之间的最短间隔（秒）
+MAINTAIN_INTERVAL = 60
+
+
+class LagPoint(NamedTuple):
+    """某一时刻的位点（多个分区时为总和）"""
+    ts: int
+    committed: int
+    end_offset: int
+    lag: int
+
+
+class LagHistoryStore:
+    """lag 历史存储，线程安全（每个线程使用独立的 SQLite 连接）"""
+
+    def __init__(self, path: str, budget_bytes: int = 512 * 1024 * 1024, tiers=TIERS):
+        self.path = path
+        self.budget_bytes = budget_bytes
+        self.tiers = tiers
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str, int], int] = {}
+        self._last_maintain = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_db()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # 只在新建数据库时生效，且必须早于切换 WAL 与建表；之后删除数据可用 incremental_vacuum 归还磁盘空间
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                " id INTEGER PRIMARY KEY, cluster TEXT NOT NULL, grp TEXT NOT NULL,"
+                " topic TEXT NOT NULL, partition INTEGER NOT NULL,"
+                " UNIQUE (cluster, grp, topic, partition))"
+            )
+            for table, _, _ in self.tiers:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    " series INTEGER NOT NULL, ts INTEGER NOT NULL,"
+                    " committed INTEGER NOT NULL, end_offset INTEGER NOT NULL,"
+                    " PRIMARY KEY (series, ts)) WITHOUT ROWID"
+                )
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_ts ON {table} (ts)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---- 写入 ----
+
+    def _series_ids(self, conn: sqlite3.Connection, keys: List[Tuple[str, str, str, int]]) -> Dict:
+        missing = [key for key in keys if key not in self._series]
+        if missing:
+            conn.executemany(
+                "INSERT OR IGNORE INTO series (cluster, grp, topic, partition) VALUES (?, ?, ?, ?)", missing
+            )
+            for key in missing:
+                row = conn.execute(
+                    "SELECT id FROM series WHERE cluster = ? AND grp = ? AND topic = ? AND partition = ?", key
+                ).fetchone()
+                self._series[key] = row[0]
+        return self._series
+
+    def record(self, cluster: str, snapshot: GroupOffsetsSnapshot):
+        """写入一次快照（可直接作为 OffsetSampler 的监听器）"""
+        ts = int(snapshot.taken_at)
+        samples = []
+        for group_id, offsets in snapshot.committed.items():
+            for tp, committed in offsets.items():
+                end = snapshot.end_offsets.get(tp)
+                if end is not None:
+                    samples.append(((cluster, group_id, tp[0], tp[1]), committed, end))
+        if not samples:
+            return
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                ids = self._series_ids(conn, [key for key, _, _ in samples])
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.tiers[0][0]} (series, ts, committed, end_offset) VALUES (?, ?, ?, ?)",
+                    [(ids[key], ts, committed, end) for key, committed, end in samples]
+                )
+            if time.time() - self._last_maintain >= MAINTAIN_INTERVAL:
+                self._maintain(conn)
+
+    # ---- 降采样与清理 ----
+
+    def maintain(self):
+        """降采样、按保留时间清理并检查磁盘预算"""
+        with self._write_lock:
+            self._maintain(self._conn())
+
+    def _maintain(self, conn: sqlite3.Connection):
+        now = int(time.time())
+        self._last_maintain = now
+        with conn:
+            for (src, _, _), (dst, bucket, _) in zip(self.tiers, self.tiers[1:]):
+                self._rollup(conn, src, dst, bucket, now)
+            for table, _, retention in self.tiers:
+                conn.execute(f"DELETE FROM {table} WHERE ts < ?", (now - retention,))
+        pruned = self._enforce_budget(conn)
+        if pruned:
+            self._drop_empty_series(conn)
+        conn.execute("PRAGMA incremental_vacuum")
+
+    def _rollup(self, conn: sqlite3.Connection, src: str, dst: str, bucket: int, now: int):
+        """把 src 中已完整结束的桶汇总到 dst（每个桶保留最后一个样本）"""
+        key = f"rollup:{dst}"
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        end = now // bucket * bucket
+        if row and end <= row[0]:
+            return
+        # 从上次结束的前一个桶开始，容纳稍晚写入的样本
+        start = row[0] - bucket if row else 0
+        # SQLite 中与 MAX() 同时选择的裸列取自最大值所在的行，即桶内最后一个样本
+        conn.execute(
+            f"INSERT OR REPLACE INTO {dst} (series, ts, committed, end_offset) "
+            f"SELECT series, bucket, committed, end_offset FROM ("
+            f" SELECT series, ts / {bucket} * {bucket} AS bucket, committed, end_offset, MAX(ts)"
+            f" FROM {src} WHERE ts >= ? AND ts < ? GROUP BY series, ts / {bucket})",
+            (start, end)
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, end))
+
+    def used_bytes(self) -> int:
+        conn = self._conn()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def _enforce_budget(self, conn: sqlite3.Connection) -> bool:
+        """超出预算时从最粗的一级开始（其中是最旧的数据），每次删除该级最旧的 1/10 时间范围"""
+        if self.budget_bytes <= 0:
+            return False
+        pruned = False
+        for table, bucket, _ in reversed(self.tiers):
+            while self.used_bytes() > self.budget_bytes:
+                low, high = conn.execute(f"SELECT MIN(ts), MAX(ts) FROM {table}").fetchone()
+                if low is None:
+                    break
+                cutoff = low + max(bucket, (high - low) // 10)
+                with conn:
+                    conn.execute(f"DELETE FROM {table} WHERE ts < ?", (cutoff,))
+                pruned = True
+                if cutoff > high:
+                    break
+            else:
+                break
+        if pruned:
+            logger.info(f"lag 历史超出磁盘预算，已清理旧数据，当前 {self.used_bytes() // 1024} KB")
+        return pruned
+
+    def _drop_empty_series(self, conn: sqlite3.Connection):
+        tables = " UNION ".join(f"SELECT series FROM {table}" for table, _, _ in self.tiers)
+        with conn:
+            conn.execute(f"DELETE FROM series WHERE id NOT IN ({tables})")
+        self._series.clear()
+
+    # ---- 查询 ----
+
+    def _segments(self, conn: sqlite3.Connection, start: int, end: int, now: int) -> List[Tuple[str, int, int]]:
+        """覆盖 [start, end] 的 (表, 起, 止) 列表：保留时间覆盖 start 的最细一级，
+        其中尚未汇总的最近一段由更细的级别补齐"""
+        index = next((i for i, (_, _, retention) in enumerate(self.tiers) if start >= now - retention),
+                     len(self.tiers) - 1)
+        segments = []
+        for i in range(index, 0, -1):
+            table = self.tiers[i][0]
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"rollup:{table}",)).fetchone()
+            watermark = min(row[0] if row else start, end + 1)
+            if watermark > start:
+                segments.append((table, start, watermark - 1))
+                start = watermark
+        segments.append((self.tiers[0][0], start, end))
+        return segments
+
+    def history(self, cluster: str, group_id: str, start: float, end: Optional[float] = None,
+                topic: Optional[str] = None, partition: Optional[int] = None) -> List[LagPoint]:
+        """查询一个组（或其中一个 Topic / 分区）在 [start, end] 内的位点与 lag，最多返回约 MAX_POINTS 个点"""
+        now = int(time.time())
+        start, end = int(start), int(end if end is not None else now)
+        conn = self._conn()
+        conditions = ["s.cluster = ?", "s.grp = ?"]
+        params: list = [cluster, group_id]
+        if topic is not None:
+            conditions.append("s.topic = ?")
+            params.append(topic)
+        if partition is not None:
+            conditions.append("s.partition = ?")
+            params.append(partition)
+        union, union_params = [], []
+        for table, low, high in self._segments(conn, start, end, now):
+            union.append(f"SELECT series, ts, committed, end_offset FROM {table} WHERE ts BETWEEN ? AND ?")
+            union_params += [low, high]
+        # 与降采样相同：每个桶内取各序列最后一个样本
+        step = max(1, -(-(end - start) // MAX_POINTS))
+        rows = conn.execute(
+            f"SELECT bucket, SUM(committed), SUM(end_offset), SUM(MAX(end_offset - committed, 0)) FROM ("
+            f" SELECT p.series, p.ts / {step} * {step} AS bucket, p.committed, p.end_offset, MAX(p.ts)"
+            f" FROM ({' UNION ALL '.join(union)}) p JOIN series s ON s.id = p.series"
+            f" WHERE {' AND '.join(conditions)} GROUP BY p.series, p.ts / {step})"
+            f" GROUP BY bucket ORDER BY bucket",
+            union_params + params
+        ).fetchall()
+        return [LagPoint(*row) for row in rows]
+
+    def groups(self, cluster: str) -> List[str]:
+        """有历史数据的组"""
+        rows = self._conn().execute(
+            "SELECT DISTINCT grp FROM series WHERE cluster = ? ORDER BY grp", (cluster,)
+        ).fetchall()
+        return [row[0] for row in rows]
@@ -0,0 +1,285 @@
+"""客户端指标
+
+记录 KafkaClusterClient 公共方法与底层 Broker 请求的耗时直方图、调用次数、错误数、
+拉取字节数与创建的 Consumer 数量，可导出为 JSON 快照或 Prometheus 文本格式。
+每次记录只有两次 perf_counter 和一次加锁的计数更新，可以常开。
+"""
+
+import functools
+import inspect
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+# 直方图桶上界（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_HELP = {
+    'kafka_client_call_seconds': "KafkaClusterClient 公共方法耗时",
+    'kafka_client_call_errors_total': "KafkaClusterClient 公共方法抛出异常的次数",
+    'kafka_client_request_seconds': "发往 Broker 的请求耗时（按适配器方法统计）",
+    'kafka_client_request_errors_total': "失败的 Broker 请求次数",
+    'kafka_client_fetched_bytes_total': "拉取的消息字节数（key + value）",
+    'kafka_client_fetched_messages_total': "拉取的消息条数",
+    'kafka_client_consumers_created_total': "创建的 Consumer 数量",
+    'kafka_explorer_ui_event_loop_lag_seconds': "界面事件循环延迟",
+    'kafka_explorer_ui_stalls_total': "界面卡顿次数",
+}
+
+
+def _labels(**kwargs) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+
+
+class Histogram:
+    """固定分桶的耗时直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """按桶内线性插值估算分位数"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+
+class MetricsRegistry:
+    """线程安全的指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.enabled = True
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        self.inc_key((name, _labels(**labels)), amount)
+
+    def observe(self, name: str, seconds: float, **labels):
+        self.observe_key((name, _labels(**labels)), seconds)
+
+    def inc_key(self, key: Tuple[str, Labels], amount: float = 1):
+        """按预先构造的 (名称, 标签) 键计数，热路径上避免重复构造标签"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe_key(self, key: Tuple[str, Labels], seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def counter_value(self, name: str, **labels) -> float:
+        """计数器合计（只按给出的标签过滤）"""
+        wanted = set(_labels(**labels))
+        with self._lock:
+            return sum(v for (n, l), v in self._counters.items() if n == name and wanted <= set(l))
+
+    def snapshot(self) -> dict:
+        """可 JSON 序列化的快照"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = []
+            for (name, labels), h in sorted(self._histograms.items(), key=lambda item: item[0]):
+                histograms.append({
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': h.count,
+                    'sum': h.sum,
+                    'max': h.max,
+                    'p50': h.quantile(0.5),
+                    'p95': h.quantile(0.95),
+                    'p99': h.quantile(0.99),
+                    'buckets': {str(b): c for b, c in zip(list(h.buckets) + ['+Inf'], h.counts)},
+                })
+        return {'timestamp': time.time(), 'counters': counters, 'histograms': histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        def fmt_labels(labels, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                ((key, h.buckets, list(h.counts), h.count, h.sum) for key, h in self._histograms.items()),
+                key=lambda item: item[0]
+            )
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{fmt_labels(labels)} {value:g}")
+        for (name, labels), buckets, counts, count, total in histograms:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += n
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                lines.append(f"{name}_bucket{fmt_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{name}_sum{fmt_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{fmt_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# 进程内默认注册表
+METRICS = MetricsRegistry()
+
+
+def instrument_client_methods(cls):
+    """类装饰器：为所有公共方法记录耗时与异常（生成器按完整迭代计时）"""
+    for attr, func in list(vars(cls).items()):
+        if attr.startswith('_') or not inspect.isfunction(func):
+            continue
+        setattr(cls, attr, _timed_method(func))
+    return cls
+
+
+def _timed_method(func):
+    method = func.__name__
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(self, *args, **kwargs):
+            registry = getattr(self, 'metrics', METRICS)
+            cluster = self.connection.name
+            started = time.perf_counter()
+            try:
+                yield from func(self, *args, **kwargs)
+            except Exception:
+                registry.inc('kafka_client_call_errors_total', cluster=cluster, method=method)
+                raise
+            finally:
+                registry.observe('kafka_client_call_seconds', time.perf_counter() - started,
+                                 cluster=cluster, method=method)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        registry = getattr(self, 'metrics', METRICS)
+        started = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        except Exception:
+            registry.inc('kafka_client_call_errors_total', cluster=self.connection.name, method=method)
+            raise
+        finally:
+            registry.observe('kafka_client_call_seconds', time.perf_counter() - started,
+                             cluster=self.connection.name, method=method)
+    return wrapper
+
+
+class _InstrumentedAdapter:
+    """适配器代理：每个方法调用视为一次 Broker 请求并计时"""
+
+    # 不访问 Broker 的本地方法
+    _LOCAL_METHODS = frozenset({'assign', 'seek', 'assignment', 'close'})
+
+    def __init__(self, adapter, registry: MetricsRegistry, cluster: str, kind: str):
+        self._adapter = adapter
+        self._registry = registry
+        self._cluster = cluster
+        self._kind = kind
+
+    def __getattr__(self, name):
+        attr = getattr(self._adapter, name)
+        if not callable(attr) or name.startswith('_') or name in self._LOCAL_METHODS:
+            return attr
+        registry = self._registry
+        labels = _labels(cluster=self._cluster, api=f"{self._kind}.{name}")
+        seconds_key = ('kafka_client_request_seconds', labels)
+        errors_key = ('kafka_client_request_errors_total', labels)
+        messages_key = ('kafka_client_fetched_messages_total', _labels(cluster=self._cluster))
+        bytes_key = ('kafka_client_fetched_bytes_total', _labels(cluster=self._cluster))
+        is_poll = name == 'poll'
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                registry.inc_key(errors_key)
+                raise
+            finally:
+                registry.observe_key(seconds_key, time.perf_counter() - started)
+            if is_poll and result:
+                registry.inc_key(messages_key, len(result))
+                registry.inc_key(bytes_key, sum(len(m.key or b'') + len(m.value or b'') for m in result))
+            return result
+
+        # 缓存包装后的方法，后续访问不再经过 __getattr__
+        self.__dict__[name] = call
+        return call
+
+
+class InstrumentedBackend:
+    """后端代理：创建的 Admin / Consumer / Producer 均带计时"""
+
+    def __init__(self, backend, registry: MetricsRegistry, cluster: str):
+        self._backend = backend
+        self._registry = registry
+        self._cluster = cluster
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+    def create_admin(self):
+        return _InstrumentedAdapter(self._backend.create_admin(), self._registry, self._cluster, 'admin')
+
+    def create_consumer(self, group_id: Optional[str] = None):
+        consumer = self._backend.create_consumer(group_id=group_id)
+        self._registry.inc('kafka_client_consumers_created_total', cluster=self._cluster)
+        return _InstrumentedAdapter(consumer, self._registry, self._cluster, 'consumer')
+
+    def create_producer(self):
+        return _InstrumentedAdapter(self._backend.create_producer(), self._registry, self._cluster, 'producer')
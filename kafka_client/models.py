@@ -1,7 +1,7 @@
 """数据模型定义"""
 
-from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from dataclasses import dataclass, field, fields, asdict
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 import json
 
@@ -21,6 +21,12 @@ class ClusterConnection:
     # Kerberos (GSSAPI) 配置
     sasl_kerberos_service_name: Optional[str] = None
     sasl_kerberos_domain_name: Optional[str] = None
+    # 客户端后端: kafka-python / confluent-kafka
+    client_backend: str = "kafka-python"
+    # 启动时在后台自动连接并预加载列表
+    auto_connect: bool = False
+    # 同时执行的后台任务（各自持有一个 Consumer）上限
+    max_concurrent_tasks: int = 4
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -34,7 +40,10 @@ class ClusterConnection:
             'ssl_certfile': self.ssl_certfile,
             'ssl_keyfile': self.ssl_keyfile,
             'sasl_kerberos_service_name': self.sasl_kerberos_service_name,
-            'sasl_kerberos_domain_name': self.sasl_kerberos_domain_name
+            'sasl_kerberos_domain_name': self.sasl_kerberos_domain_name,
+            'client_backend': self.client_backend,
+            'auto_connect': self.auto_connect,
+            'max_concurrent_tasks': self.max_concurrent_tasks
         }
     
     @classmethod
@@ -44,7 +53,8 @@ class ClusterConnection:
             'name', 'bootstrap_servers', 'security_protocol', 
             'sasl_mechanism', 'sasl_username', 'sasl_password',
             'ssl_cafile', 'ssl_certfile', 'ssl_keyfile',
-            'sasl_kerberos_service_name', 'sasl_kerberos_domain_name'
+            'sasl_kerberos_service_name', 'sasl_kerberos_domain_name',
+            'client_backend', 'auto_connect', 'max_concurrent_tasks'
         }
         filtered_data = {k: v for k, v in data.items() if k in valid_fields}
         return cls(**filtered_data)
@@ -80,6 +90,34 @@ class ClusterConnection:
             config['ssl_keyfile'] = self.ssl_keyfile
             
         return config
+    
+    def get_confluent_config(self) -> Dict[str, Any]:
+        """获取confluent-kafka (librdkafka) 客户端配置"""
+        config = {
+            'bootstrap.servers': self.bootstrap_servers,
+            'security.protocol': self.security_protocol,
+        }
+        
+        if self.sasl_mechanism:
+            config['sasl.mechanism'] = self.sasl_mechanism
+            
+            if self.sasl_mechanism == 'GSSAPI':
+                if self.sasl_kerberos_service_name:
+                    config['sasl.kerberos.service.name'] = self.sasl_kerberos_service_name
+            else:
+                if self.sasl_username:
+                    config['sasl.username'] = self.sasl_username
+                if self.sasl_password:
+                    config['sasl.password'] = self.sasl_password
+        
+        if self.ssl_cafile:
+            config['ssl.ca.location'] = self.ssl_cafile
+        if self.ssl_certfile:
+            config['ssl.certificate.location'] = self.ssl_certfile
+        if self.ssl_keyfile:
+            config['ssl.key.location'] = self.ssl_keyfile
+            
+        return config
 
 
 @dataclass
@@ -139,6 +177,8 @@ class ConsumerGroupOffset:
     lag: int
     start_offset: int = 0
     metadata: str = ""
+    # 时间延迟（秒）：最新一条消息与提交位点处消息的时间戳之差，未计算或无法获取时为 None
+    time_lag: Optional[float] = None
 
 
 @dataclass
@@ -159,6 +199,147 @@ class ConsumerGroupInfo:
     @property
     def member_count(self) -> int:
         return len(self.members)
+    
+    @property
+    def max_time_lag(self) -> Optional[float]:
+        """各分区中最大的时间延迟（秒），都未计算时为 None"""
+        lags = [o.time_lag for o in self.offsets if o.time_lag is not None]
+        return max(lags) if lags else None
+
+
+@dataclass
+class GroupOffsetsSnapshot:
+    """一次批量采集的消费者组提交位点与相关分区的末尾位点"""
+    taken_at: float  # Unix 时间（秒）
+    # group_id -> (topic, partition) -> 提交位点（没有提交时为 0）
+    committed: Dict[str, Dict[Tuple[str, int], int]] = field(default_factory=dict)
+    # (topic, partition) -> 末尾位点
+    end_offsets: Dict[Tuple[str, int], int] = field(default_factory=dict)
+    # 采集失败的组 -> 错误信息
+    errors: Dict[str, str] = field(default_factory=dict)
+    # group_id -> 状态 / 成员数（采集时 describe=True 才有）
+    states: Dict[str, str] = field(default_factory=dict)
+    member_counts: Dict[str, int] = field(default_factory=dict)
+
+    def partition_lags(self, group_id: str) -> Dict[Tuple[str, int], int]:
+        return {
+            tp: max(0, self.end_offsets[tp] - offset)
+            for tp, offset in self.committed.get(group_id, {}).items()
+            if tp in self.end_offsets
+        }
+
+    def group_lag(self, group_id: str) -> int:
+        return sum(self.partition_lags(group_id).values())
+
+
+@dataclass
+class TopicOffsetsSnapshot:
+    """一次批量采集的 Topic 分区末尾位点"""
+    taken_at: float  # Unix 时间（秒）
+    # (topic, partition) -> 末尾位点
+    end_offsets: Dict[Tuple[str, int], int] = field(default_factory=dict)
+
+
+@dataclass
+class TopicThroughput:
+    """Topic 的生产速率（条/秒）"""
+    rate: float
+    span: float  # 计算速率的时间跨度（秒），0 表示还没有两次采集
+    # partition -> 速率
+    partitions: Dict[int, float] = field(default_factory=dict)
+    # 最近各次采集之间的速率 (Unix 时间, 条/秒)，用于绘制趋势
+    history: List[Tuple[float, float]] = field(default_factory=list)
+
+
+@dataclass
+class MessageHistogram:
+    """按时间桶统计的 Topic 消息数"""
+    topic: str
+    bucket_seconds: int
+    # (桶起始 Unix 时间, 消息数)，最后一个桶截止到统计时刻，可能不完整
+    buckets: List[Tuple[float, int]] = field(default_factory=list)
+    requests: int = 0  # offsets_for_times 调用次数
+
+    @property
+    def total(self) -> int:
+        return sum(count for _, count in self.buckets)
+
+
+@dataclass
+class LagRate:
+    """一段时间内的生产 / 消费速率（条/秒）与最新的 lag"""
+    lag: int
+    produce_rate: float
+    consume_rate: float
+    span: float  # 计算速率所用的时间跨度（秒）
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """按当前速率追平 lag 的预计秒数，消费不快于生产时为 None（追不上）"""
+        if self.lag <= 0:
+            return 0.0
+        net = self.consume_rate - self.produce_rate
+        if net <= 0:
+            return None
+        return self.lag / net
+
+
+@dataclass
+class GroupLagRate(LagRate):
+    """消费者组的速率（各分区之和）"""
+    # (topic, partition) -> 分区速率
+    partitions: Dict[Tuple[str, int], LagRate] = field(default_factory=dict)
+
+
+@dataclass
+class AlertRule:
+    """lag 告警规则
+
+    group_pattern / topic_pattern / cluster 为通配符（fnmatch），精确名称也可以直接使用。
+    每个匹配的组单独计算：lag 为匹配 Topic 各分区之和，time_lag 为其中最大的估算时间延迟（秒）。
+    值达到 threshold 时触发，降到 clear_threshold 以下才恢复（默认为阈值的 80%），避免在阈值附近反复告警。
+    """
+    name: str
+    threshold: float
+    metric: str = "lag"  # lag / time_lag
+    group_pattern: str = "*"
+    topic_pattern: str = "*"
+    cluster: str = "*"
+    clear_threshold: Optional[float] = None
+    enabled: bool = True
+
+    @property
+    def clear_value(self) -> float:
+        return self.clear_threshold if self.clear_threshold is not None else self.threshold * 0.8
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AlertRule':
+        valid_fields = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in valid_fields})
+
+
+@dataclass
+class AlertEvent:
+    """告警触发或恢复"""
+    rule: str
+    cluster: str
+    group_id: str
+    metric: str
+    value: float
+    threshold: float
+    firing: bool  # False 表示恢复
+    at: float  # Unix 时间（秒）
+
+    def message(self) -> str:
+        value = f"{self.value:,.0f}" if self.metric == "lag" else f"{self.value:,.0f} 秒"
+        threshold = f"{self.threshold:,.0f}" if self.metric == "lag" else f"{self.threshold:,.0f} 秒"
+        metric = " lag " if self.metric == "lag" else "时间延迟"
+        if self.firing:
+            return f"[告警] {self.cluster} / {self.group_id} 的{metric}为 {value}，超过阈值 {threshold}（规则: {self.rule}）"
+        return f"[恢复] {self.cluster} / {self.group_id} 的{metric}已降到 {value}（规则: {self.rule}）"
 
 
 @dataclass
@@ -0,0 +1,229 @@
+"""Bootstrap Server 连通性探测
+
+连接前并行探测所有 bootstrap_servers，每个阶段（DNS、TCP、TLS、SASL）使用较短的超时，
+全部不可达时立即失败，可达时选择响应最快的一个作为实际的 bootstrap server。
+SASL 阶段直接发送 SaslHandshake（PLAIN 时再发送 SaslAuthenticate）请求，不依赖客户端库。
+"""
+
+import socket
+import ssl
+import struct
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .models import ClusterConnection
+
+# 单个阶段的超时（秒）
+PROBE_TIMEOUT = 3.0
+
+PHASES = ('dns', 'tcp', 'tls', 'sasl')
+PHASE_LABELS = {'dns': 'DNS', 'tcp': 'TCP', 'tls': 'TLS', 'sasl': 'SASL', 'metadata': 'Metadata'}
+
+_CLIENT_ID = b'kafka-explorer-probe'
+_SASL_HANDSHAKE = 17
+_SASL_AUTHENTICATE = 36
+
+
+@dataclass
+class ServerProbe:
+    """单个 bootstrap server 的探测结果，各阶段耗时为秒，未执行的阶段为 None"""
+    server: str
+    address: str = ""
+    dns: Optional[float] = None
+    tcp: Optional[float] = None
+    tls: Optional[float] = None
+    sasl: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def total(self) -> float:
+        return sum(getattr(self, phase) or 0.0 for phase in PHASES)
+
+
+@dataclass
+class ProbeReport:
+    """一次连接的探测报告"""
+    servers: List[ServerProbe] = field(default_factory=list)
+    # 选中的 bootstrap server 上建立客户端并获取元数据的耗时
+    metadata: Optional[float] = None
+    brokers: int = 0
+
+    @property
+    def fastest(self) -> Optional[ServerProbe]:
+        reachable = [s for s in self.servers if s.ok]
+        return min(reachable, key=lambda s: s.total) if reachable else None
+
+    def phases(self) -> List[Tuple[str, Optional[float]]]:
+        """选中 server 的各阶段耗时，包括 metadata"""
+        fastest = self.fastest
+        rows = [(PHASE_LABELS[p], getattr(fastest, p) if fastest else None) for p in PHASES]
+        rows.append((PHASE_LABELS['metadata'], self.metadata))
+        return rows
+
+    def summary(self) -> str:
+        lines = []
+        for probe in self.servers:
+            if probe.ok:
+                timings = ", ".join(
+                    f"{PHASE_LABELS[p]} {getattr(probe, p) * 1000:.0f}ms"
+                    for p in PHASES if getattr(probe, p) is not None
+                )
+                lines.append(f"{probe.server}: {timings}")
+            else:
+                lines.append(f"{probe.server}: {probe.error}")
+        return "\n".join(lines)
+
+
+def split_servers(bootstrap_servers: str) -> List[str]:
+    return [s.strip() for s in bootstrap_servers.split(',') if s.strip()]
+
+
+def _parse_server(server: str) -> Tuple[str, int]:
+    # 支持 host:port、[ipv6]:port，缺省端口 9092
+    if server.startswith('['):
+        host, _, rest = server[1:].partition(']')
+        port = rest.lstrip(':')
+    elif server.count(':') == 1:
+        host, port = server.split(':')
+    else:
+        host, port = server, ''
+    return host, int(port) if port else 9092
+
+
+def _ssl_context(connection: ClusterConnection) -> ssl.SSLContext:
+    context = ssl.create_default_context(cafile=connection.ssl_cafile or None)
+    if connection.ssl_certfile:
+        context.load_cert_chain(connection.ssl_certfile, connection.ssl_keyfile or None)
+    return context
+
+
+def _encode_string(value: bytes) -> bytes:
+    return struct.pack('>h', len(value)) + value
+
+
+def _request(sock, api_key: int, api_version: int, correlation_id: int, body: bytes) -> bytes:
+    """发送一个请求头 v1 的请求并读取响应体（不含 correlation id）"""
+    header = struct.pack('>hhi', api_key, api_version, correlation_id) + _encode_string(_CLIENT_ID)
+    payload = header + body
+    sock.sendall(struct.pack('>i', len(payload)) + payload)
+    size = struct.unpack('>i', _recv_exact(sock, 4))[0]
+    response = _recv_exact(sock, size)
+    if struct.unpack('>i', response[:4])[0] != correlation_id:
+        raise RuntimeError("响应的 correlation id 不匹配")
+    return response[4:]
+
+
+def _recv_exact(sock, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("连接被对端关闭")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _sasl(sock, connection: ClusterConnection):
+    mechanism = connection.sasl_mechanism or 'PLAIN'
+    body = _request(sock, _SASL_HANDSHAKE, 1, 1, _encode_string(mechanism.encode()))
+    error_code, count = struct.unpack('>hi', body[:6])
+    if error_code:
+        offset, enabled = 6, []
+        for _ in range(max(count, 0)):
+            length = struct.unpack('>h', body[offset:offset + 2])[0]
+            enabled.append(body[offset + 2:offset + 2 + length].decode())
+            offset += 2 + length
+        raise RuntimeError(f"Broker 未启用 SASL 机制 {mechanism}（支持: {', '.join(enabled) or '无'}）")
+    # SCRAM / GSSAPI 需要多轮交互，交给客户端库完成，这里只确认机制可用
+    if mechanism != 'PLAIN':
+        return
+    token = b'\0' + (connection.sasl_username or '').encode() + b'\0' + (connection.sasl_password or '').encode()
+    body = _request(sock, _SASL_AUTHENTICATE, 0, 2, struct.pack('>i', len(token)) + token)
+    error_code, length = struct.unpack('>hh', body[:4])
+    if error_code:
+        message = body[4:4 + length].decode(errors='replace') if length > 0 else f"错误码 {error_code}"
+        raise RuntimeError(f"SASL 认证失败: {message}")
+
+
+def probe_server(server: str, connection: ClusterConnection, timeout: float = PROBE_TIMEOUT) -> ServerProbe:
+    """依次探测 DNS、TCP、TLS、SASL，出错时记录在 error 中"""
+    result = ServerProbe(server=server)
+    protocol = connection.security_protocol.upper()
+    phase = 'dns'
+    sock = None
+    try:
+        host, port = _parse_server(server)
+
+        started = time.perf_counter()
+        family, socktype, proto, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+        result.dns = time.perf_counter() - started
+        result.address = f"{address[0]}:{address[1]}"
+
+        phase = 'tcp'
+        started = time.perf_counter()
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(timeout)
+        sock.connect(address)
+        result.tcp = time.perf_counter() - started
+
+        if protocol in ('SSL', 'SASL_SSL'):
+            phase = 'tls'
+            started = time.perf_counter()
+            sock = _ssl_context(connection).wrap_socket(sock, server_hostname=host)
+            result.tls = time.perf_counter() - started
+
+        if protocol.startswith('SASL'):
+            phase = 'sasl'
+            started = time.perf_counter()
+            _sasl(sock, connection)
+            result.sasl = time.perf_counter() - started
+    except socket.timeout:
+        result.error = f"{PHASE_LABELS[phase]} 超时（{timeout:g}s）"
+    except Exception as e:
+        result.error = f"{PHASE_LABELS[phase]} 失败: {e}"
+    finally:
+        if sock is not None:
+            sock.close()
+    return result
+
+
+def probe_bootstrap(connection: ClusterConnection, timeout: float = PROBE_TIMEOUT,
+                    wait_all: bool = True) -> ProbeReport:
+    """并行探测所有 bootstrap server
+
+    wait_all 为 False 时，第一个探测成功的 server 返回后立即结束（其余未完成的不计入报告）。
+    """
+    servers = split_servers(connection.bootstrap_servers)
+    report = ProbeReport()
+    if not servers:
+        return report
+    # getaddrinfo 没有超时参数，探测线程设为不等待，卡住的 DNS 查询不会拖慢调用方
+    executor = ThreadPoolExecutor(max_workers=len(servers), thread_name_prefix="kafka-probe")
+    try:
+        pending = {executor.submit(probe_server, server, connection, timeout) for server in servers}
+        deadline = time.monotonic() + timeout * len(PHASES)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                report.servers.append(future.result())
+            if not wait_all and report.fastest is not None:
+                break
+        if wait_all:
+            finished = {probe.server for probe in report.servers}
+            report.servers.extend(
+                ServerProbe(server=s, error="探测超时") for s in servers if s not in finished
+            )
+    finally:
+        executor.shutdown(wait=False)
+    # 保持配置中的顺序，便于展示
+    report.servers.sort(key=lambda probe: servers.index(probe.server))
+    return report
@@ -0,0 +1,380 @@
+"""带索引的二进制消息段文件
+
+离线排查时把 Topic 的一段消息导出一次，之后可以反复打开浏览，不再访问生产集群。
+
+文件结构::
+
+    头部      MAGIC(8) | topic 长度(u16) | topic(utf-8)
+    记录区    [长度(u32) | 记录] ...       同一分区的记录连续且 offset 递增
+    稀疏索引  [partition, offset, 最大时间戳, 文件位置] ...
+    分区表    [partition, 起止 offset, 条数, 记录区范围, 索引范围] ...
+    尾部      索引位置 | 索引条数 | 分区表位置 | 分区数 | FOOTER_MAGIC(8)
+
+索引中的时间戳是分区内截至该记录的最大时间戳（与 Kafka 的时间索引一致），
+因此即使时间戳不严格递增也可以二分查找。读取时通过 mmap 直接在索引上二分，
+打开文件只需读取尾部和分区表，与文件大小无关。
+"""
+
+import mmap
+import struct
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import KafkaMessage
+
+MAGIC = b'KXSEG\x00\x01\x00'
+FOOTER_MAGIC = b'KXIDX\x00\x01\x00'
+
+# 每个分区每隔多少字节记录一条稀疏索引
+DEFAULT_INDEX_INTERVAL = 64 * 1024
+
+# 记录: partition, offset, timestamp_ms(-1 表示无), key 长度(-1 表示 None)
+_RECORD_HEAD = struct.Struct('>iqqi')
+_LENGTH = struct.Struct('>i')
+_HEADER_COUNT = struct.Struct('>H')
+_FRAME = struct.Struct('>I')
+_TOPIC_LENGTH = struct.Struct('>H')
+_INDEX_ENTRY = struct.Struct('>iqqq')
+_PARTITION_ENTRY = struct.Struct('>iqqqqqqq')
+_FOOTER = struct.Struct('>qqqq8s')
+
+
+def _timestamp_ms(msg: KafkaMessage) -> int:
+    return int(msg.timestamp.timestamp() * 1000) if msg.timestamp else -1
+
+
+def pack_message(msg: KafkaMessage) -> bytes:
+    """编码一条消息（不含长度前缀）"""
+    parts = [_RECORD_HEAD.pack(
+        msg.partition, msg.offset, _timestamp_ms(msg),
+        -1 if msg.key is None else len(msg.key)
+    )]
+    if msg.key is not None:
+        parts.append(msg.key)
+    parts.append(_LENGTH.pack(-1 if msg.value is None else len(msg.value)))
+    if msg.value is not None:
+        parts.append(msg.value)
+    parts.append(_HEADER_COUNT.pack(len(msg.headers)))
+    for name, value in msg.headers:
+        name_bytes = name.encode('utf-8') if isinstance(name, str) else bytes(name)
+        parts.append(_HEADER_COUNT.pack(len(name_bytes)))
+        parts.append(name_bytes)
+        parts.append(_LENGTH.pack(-1 if value is None else len(value)))
+        if value is not None:
+            parts.append(value)
+    return b''.join(parts)
+
+
+def unpack_message(topic: str, buf, pos: int = 0) -> KafkaMessage:
+    """从 buf[pos:] 解码一条消息（buf 可以是 bytes / memoryview / mmap）"""
+    partition, offset, timestamp_ms, key_len = _RECORD_HEAD.unpack_from(buf, pos)
+    pos += _RECORD_HEAD.size
+    key = None
+    if key_len >= 0:
+        key = bytes(buf[pos:pos + key_len])
+        pos += key_len
+    (value_len,) = _LENGTH.unpack_from(buf, pos)
+    pos += _LENGTH.size
+    value = None
+    if value_len >= 0:
+        value = bytes(buf[pos:pos + value_len])
+        pos += value_len
+    (header_count,) = _HEADER_COUNT.unpack_from(buf, pos)
+    pos += _HEADER_COUNT.size
+    headers = []
+    for _ in range(header_count):
+        (name_len,) = _HEADER_COUNT.unpack_from(buf, pos)
+        pos += _HEADER_COUNT.size
+        name = bytes(buf[pos:pos + name_len]).decode('utf-8', errors='replace')
+        pos += name_len
+        (header_len,) = _LENGTH.unpack_from(buf, pos)
+        pos += _LENGTH.size
+        header_value = None
+        if header_len >= 0:
+            header_value = bytes(buf[pos:pos + header_len])
+            pos += header_len
+        headers.append((name, header_value))
+    return KafkaMessage(
+        topic=topic,
+        partition=partition,
+        offset=offset,
+        timestamp=datetime.fromtimestamp(timestamp_ms / 1000) if timestamp_ms >= 0 else None,
+        key=key,
+        value=value,
+        headers=headers
+    )
+
+
+def frame_message(msg: KafkaMessage) -> bytes:
+    """带 4 字节长度前缀的二进制记录"""
+    body = pack_message(msg)
+    return _FRAME.pack(len(body)) + body
+
+
+def segment_header(topic: str) -> bytes:
+    topic_bytes = topic.encode('utf-8')
+    return MAGIC + _TOPIC_LENGTH.pack(len(topic_bytes)) + topic_bytes
+
+
+@dataclass
+class SegmentPartition:
+    """段文件中一个分区的概要"""
+    partition: int
+    first_offset: int
+    last_offset: int
+    count: int
+    start_pos: int
+    end_pos: int
+    index_first: int
+    index_count: int
+
+
+class SegmentBuilder:
+    """记录编码 + 索引构建
+
+    调用方负责把 encode() 返回的字节写到 position 指定的位置，全部写完后追加 trailer()。
+    导出器借此把段文件和其他格式一样走缓冲写入与断点续传。
+    """
+
+    def __init__(self, topic: str, index_interval: int = DEFAULT_INDEX_INTERVAL):
+        self.topic = topic
+        self.index_interval = index_interval
+        self._index: List[Tuple[int, int, int, int]] = []
+        self._partitions: Dict[int, SegmentPartition] = {}
+        self._current: Optional[SegmentPartition] = None
+        self._max_timestamp = -1
+        self._last_indexed_pos = 0
+
+    @property
+    def header(self) -> bytes:
+        return segment_header(self.topic)
+
+    def _track(self, partition: int, offset: int, timestamp_ms: int, position: int, size: int):
+        current = self._current
+        if current is None or current.partition != partition:
+            if partition in self._partitions:
+                raise ValueError(f"段文件要求同一分区的消息连续写入: 分区 {partition}")
+            current = SegmentPartition(
+                partition=partition, first_offset=offset, last_offset=offset, count=0,
+                start_pos=position, end_pos=position, index_first=len(self._index), index_count=0
+            )
+            self._partitions[partition] = current
+            self._current = current
+            self._max_timestamp = -1
+            self._last_indexed_pos = None
+        elif offset <= current.last_offset:
+            raise ValueError(f"段文件要求 offset 递增: 分区 {partition} offset {offset}")
+
+        self._max_timestamp = max(self._max_timestamp, timestamp_ms)
+        if self._last_indexed_pos is None or position - self._last_indexed_pos >= self.index_interval:
+            self._index.append((partition, offset, self._max_timestamp, position))
+            current.index_count += 1
+            self._last_indexed_pos = position
+        current.last_offset = offset
+        current.count += 1
+        current.end_pos = position + size
+
+    def encode(self, messages: Iterable[KafkaMessage], position: int) -> bytes:
+        """编码一批消息，position 为这批数据在文件中的起始位置"""
+        parts = []
+        for msg in messages:
+            record = frame_message(msg)
+            self._track(msg.partition, msg.offset, _timestamp_ms(msg), position, len(record))
+            parts.append(record)
+            position += len(record)
+        return b''.join(parts)
+
+    def scan(self, buf, start: int, end: int):
+        """从已写入的记录区重建索引状态（断点续传时使用）"""
+        pos = start
+        while pos < end:
+            (length,) = _FRAME.unpack_from(buf, pos)
+            partition, offset, timestamp_ms, _ = _RECORD_HEAD.unpack_from(buf, pos + _FRAME.size)
+            self._track(partition, offset, timestamp_ms, pos, _FRAME.size + length)
+            pos += _FRAME.size + length
+
+    def trailer(self, position: int) -> bytes:
+        """索引 + 分区表 + 尾部，position 为记录区结束位置"""
+        index_bytes = b''.join(_INDEX_ENTRY.pack(*entry) for entry in self._index)
+        table_pos = position + len(index_bytes)
+        table_bytes = b''.join(
+            _PARTITION_ENTRY.pack(
+                p.partition, p.first_offset, p.last_offset, p.count,
+                p.start_pos, p.end_pos, p.index_first, p.index_count
+            )
+            for p in self._partitions.values()
+        )
+        footer = _FOOTER.pack(position, len(self._index), table_pos, len(self._partitions), FOOTER_MAGIC)
+        return index_bytes + table_bytes + footer
+
+
+class SegmentWriter:
+    """直接写段文件"""
+
+    def __init__(self, path: str, topic: str, index_interval: int = DEFAULT_INDEX_INTERVAL):
+        self._builder = SegmentBuilder(topic, index_interval)
+        self._file = open(path, 'wb')
+        self._file.write(self._builder.header)
+
+    def write(self, messages: Iterable[KafkaMessage]):
+        self._file.write(self._builder.encode(messages, self._file.tell()))
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write(self._builder.trailer(self._file.tell()))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SegmentReader:
+    """通过 mmap 随机访问段文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("不是有效的段文件: 文件为空")
+        try:
+            self._load()
+        except Exception:
+            self.close()
+            raise
+
+    def _load(self):
+        mm = self._mm
+        if len(mm) < len(MAGIC) + _FOOTER.size or mm[:len(MAGIC)] != MAGIC:
+            raise ValueError("不是有效的段文件")
+        (topic_len,) = _TOPIC_LENGTH.unpack_from(mm, len(MAGIC))
+        topic_start = len(MAGIC) + _TOPIC_LENGTH.size
+        self.topic = bytes(mm[topic_start:topic_start + topic_len]).decode('utf-8')
+
+        index_pos, index_count, table_pos, table_count, footer_magic = _FOOTER.unpack_from(
+            mm, len(mm) - _FOOTER.size
+        )
+        if footer_magic != FOOTER_MAGIC:
+            raise ValueError("段文件不完整（导出尚未完成）")
+        self._index_pos = index_pos
+        self._index_count = index_count
+        self.partitions: Dict[int, SegmentPartition] = {}
+        for i in range(table_count):
+            entry = SegmentPartition(*_PARTITION_ENTRY.unpack_from(mm, table_pos + i * _PARTITION_ENTRY.size))
+            self.partitions[entry.partition] = entry
+
+    @property
+    def record_count(self) -> int:
+        return sum(p.count for p in self.partitions.values())
+
+    @property
+    def size(self) -> int:
+        return len(self._mm)
+
+    def _index_entry(self, i: int) -> Tuple[int, int, int, int]:
+        return _INDEX_ENTRY.unpack_from(self._mm, self._index_pos + i * _INDEX_ENTRY.size)
+
+    def _bisect_index(self, part: SegmentPartition, field: int, target: int) -> int:
+        """返回分区索引中 entry[field] < target 的最后一条的文件位置，不存在时返回分区起点"""
+        lo, hi = part.index_first, part.index_first + part.index_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._index_entry(mid)[field] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == part.index_first:
+            return part.start_pos
+        return self._index_entry(lo - 1)[3]
+
+    def _record_head(self, pos: int) -> Tuple[int, int, int, int]:
+        """(记录总长度, partition, offset, timestamp_ms)"""
+        (length,) = _FRAME.unpack_from(self._mm, pos)
+        partition, offset, timestamp_ms, _ = _RECORD_HEAD.unpack_from(self._mm, pos + _FRAME.size)
+        return _FRAME.size + length, partition, offset, timestamp_ms
+
+    def find_offset(self, partition: int, offset: int) -> int:
+        """分区中第一条 offset >= 目标的记录位置"""
+        part = self.partitions[partition]
+        pos = self._bisect_index(part, 1, offset)
+        while pos < part.end_pos:
+            size, _, record_offset, _ = self._record_head(pos)
+            if record_offset >= offset:
+                break
+            pos += size
+        return pos
+
+    def find_time(self, partition: int, timestamp: datetime) -> int:
+        """分区中第一条时间戳 >= 目标的记录位置"""
+        target = int(timestamp.timestamp() * 1000)
+        part = self.partitions[partition]
+        pos = self._bisect_index(part, 2, target)
+        while pos < part.end_pos:
+            size, _, _, timestamp_ms = self._record_head(pos)
+            if timestamp_ms >= target:
+                break
+            pos += size
+        return pos
+
+    def read_from(self, partition: int, pos: int, limit: int) -> List[KafkaMessage]:
+        """从 pos 开始读取分区内最多 limit 条消息"""
+        end = self.partitions[partition].end_pos
+        messages = []
+        while pos < end and len(messages) < limit:
+            (length,) = _FRAME.unpack_from(self._mm, pos)
+            messages.append(unpack_message(self.topic, self._mm, pos + _FRAME.size))
+            pos += _FRAME.size + length
+        return messages
+
+    def read_messages(
+        self,
+        partition: int = -1,
+        start_offset: Optional[int] = None,
+        start_time: Optional[datetime] = None,
+        limit: int = 100,
+        latest: bool = False
+    ) -> List[KafkaMessage]:
+        """读取消息
+
+        partition 为 -1 表示全部分区；latest 为 True 时读取每个分区最后 limit 条。
+        多个分区按时间定位或读取最新消息时结果按时间排序，否则按分区、offset 排序。
+        """
+        partitions = sorted(self.partitions) if partition < 0 else [partition]
+        messages = []
+        for p in partitions:
+            part = self.partitions.get(p)
+            if part is None:
+                continue
+            if start_time is not None:
+                pos = self.find_time(p, start_time)
+            elif start_offset is not None:
+                pos = self.find_offset(p, start_offset)
+            elif latest:
+                # 稀疏索引只能定位到 offset，压缩过的 Topic 中实际条数可能少于 limit
+                pos = self.find_offset(p, max(part.first_offset, part.last_offset - limit + 1))
+            else:
+                pos = part.start_pos
+            messages.extend(self.read_from(p, pos, limit))
+        if len(partitions) > 1 and (start_time is not None or latest):
+            messages.sort(key=lambda m: (m.timestamp or datetime.min, m.partition, m.offset))
+        return messages[-limit:] if latest else messages[:limit]
+
+    def close(self):
+        mm = getattr(self, '_mm', None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,194 @@
+"""Topic 生产速率（由定期采集的末尾位点之差计算）
+
+TopicOffsetSampler 为每个集群长期持有一个 Consumer，每次采集只发送一次元数据请求和一次批量的 end_offsets
+（按 Leader Broker 拆分），ThroughputTracker 由相邻快照滚动计算各分区 / 各 Topic 的生产速率，并保留最近若干次的速率用于绘制趋势。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from .backends import ConsumerAdapter
+from .client import KafkaClusterClient
+from .lag import OffsetSampler
+from .models import TopicOffsetsSnapshot, TopicThroughput
+
+logger = logging.getLogger(__name__)
+
+# 每个 Topic 保留的趋势点数
+HISTORY_POINTS = 60
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+class TopicOffsetSampler(OffsetSampler):
+    """按间隔采集各集群 Topic 的末尾位点（监听器收到 TopicOffsetsSnapshot）"""
+
+    target = "Topic 末尾位点"
+
+    def __init__(self, interval: float = 15.0):
+        super().__init__(interval)
+        # 集群 -> 只采集这些 Topic，未设置或为 None 时采集全部
+        self._topics: Dict[str, Optional[List[str]]] = {}
+        # 集群 -> (创建时的客户端, 采集用的 Consumer)，只在采集线程中使用
+        self._consumers: Dict[str, Tuple[KafkaClusterClient, ConsumerAdapter]] = {}
+        # 已移除集群的 Consumer，可能仍在使用，由采集线程或 stop() 关闭
+        self._retired: List[ConsumerAdapter] = []
+
+    def set_topics(self, name: str, topics: Optional[Iterable[str]]):
+        with self._lock:
+            self._topics[name] = sorted(topics) if topics is not None else None
+        self._wakeup.set()
+
+    def remove_client(self, name: str):
+        super().remove_client(name)
+        with self._lock:
+            self._topics.pop(name, None)
+            entry = self._consumers.pop(name, None)
+            if entry is not None:
+                self._retired.append(entry[1])
+
+    def stop(self, timeout: float = 5.0):
+        super().stop(timeout)
+        with self._lock:
+            consumers = [consumer for _, consumer in self._consumers.values()] + self._retired
+            self._consumers.clear()
+            self._retired = []
+        for consumer in consumers:
+            self._close(consumer)
+
+    def sample_cluster(self, name: str, client: KafkaClusterClient) -> Optional[TopicOffsetsSnapshot]:
+        """采集一个集群的 Topic 末尾位点并通知监听器，失败时返回 None"""
+        return super().sample_cluster(name, client)
+
+    def _collect(self, name: str, client: KafkaClusterClient) -> TopicOffsetsSnapshot:
+        with self._lock:
+            topics = self._topics.get(name)
+            retired, self._retired = self._retired, []
+            entry = self._consumers.get(name)
+        for consumer in retired:
+            self._close(consumer)
+        if topics is not None and not topics:
+            return TopicOffsetsSnapshot(taken_at=time.time())
+        if entry is not None and entry[0] is not client:
+            # 重新连接后换了客户端
+            self._close(entry[1])
+            entry = None
+        if entry is None:
+            entry = (client, client.create_consumer())
+            with self._lock:
+                if name in self._clients:
+                    self._consumers[name] = entry
+                else:
+                    # 采集期间集群已被移除，用完即关闭
+                    self._retired.append(entry[1])
+        try:
+            return client.get_topic_end_offsets(topics, consumer=entry[1])
+        except Exception:
+            # 连接可能已失效，下次采集重新创建
+            with self._lock:
+                if self._consumers.get(name) is entry:
+                    del self._consumers[name]
+            self._close(entry[1])
+            raise
+
+    @staticmethod
+    def _close(consumer: ConsumerAdapter):
+        try:
+            consumer.close()
+        except Exception as e:
+            logger.debug(f"关闭采集用的 Consumer 失败: {e}")
+
+
+class ThroughputTracker:
+    """由定期快照滚动计算各 Topic 的生产速率（可直接作为 TopicOffsetSampler 的监听器）
+
+    每个分区只保留少量 (时间, 末尾位点) 样本：与倒数第二个样本间隔不足 window / 4 的新样本覆盖最后一个，
+    速率取窗口首尾两个样本之差；趋势为相邻两次采集之间的速率。
+    """
+
+    def __init__(self, window: float = 300.0, history_points: int = HISTORY_POINTS):
+        self.window = window
+        self.history_points = history_points
+        self._lock = threading.Lock()
+        # (集群, topic) -> partition -> 样本
+        self._samples: Dict[Tuple[str, str], Dict[int, Deque[Tuple[float, int]]]] = {}
+        self._history: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = {}
+        self._rates: Dict[Tuple[str, str], TopicThroughput] = {}
+
+    def record(self, cluster: str, snapshot: TopicOffsetsSnapshot):
+        now = snapshot.taken_at
+        by_topic: Dict[str, Dict[int, int]] = {}
+        for (topic, partition), end in snapshot.end_offsets.items():
+            by_topic.setdefault(topic, {})[partition] = end
+        spacing = self.window / 4
+        with self._lock:
+            for topic, ends in by_topic.items():
+                key = (cluster, topic)
+                series = self._samples.setdefault(key, {})
+                for partition in [p for p in series if p not in ends]:
+                    del series[partition]
+                partitions: Dict[int, float] = {}
+                produced, previous, span, reset = 0, None, 0.0, False
+                for partition, end in ends.items():
+                    samples = series.setdefault(partition, deque())
+                    # Topic 被删除重建时位点会回退，之前的样本不再可比
+                    if samples and end < samples[-1][1]:
+                        samples.clear()
+                        reset = True
+                    if samples:
+                        produced += end - samples[-1][1]
+                        previous = samples[-1][0] if previous is None else max(previous, samples[-1][0])
+                    if len(samples) >= 2 and now - samples[-2][0] < spacing:
+                        samples[-1] = (now, end)
+                    else:
+                        samples.append((now, end))
+                    while len(samples) > 2 and samples[1][0] <= now - self.window:
+                        samples.popleft()
+                    first_ts, first_end = samples[0]
+                    partitions[partition] = (end - first_end) / (now - first_ts) if now > first_ts else 0.0
+                    span = max(span, now - first_ts)
+                history = self._history.setdefault(key, deque(maxlen=self.history_points))
+                if reset:
+                    history.clear()
+                    previous = None
+                if previous is not None and now > previous:
+                    history.append((now, produced / (now - previous)))
+                self._rates[key] = TopicThroughput(
+                    rate=sum(partitions.values()), span=span, partitions=partitions, history=list(history)
+                )
+            # 已删除或不再采集的 Topic
+            for key in [k for k in self._samples if k[0] == cluster and k[1] not in by_topic]:
+                del self._samples[key]
+                self._history.pop(key, None)
+                self._rates.pop(key, None)
+
+    def topic_rate(self, cluster: str, topic: str) -> Optional[TopicThroughput]:
+        """Topic 的最新速率，还没有两次采集时 span 为 0"""
+        with self._lock:
+            return self._rates.get((cluster, topic))
+
+    def rates(self, cluster: str) -> Dict[str, TopicThroughput]:
+        with self._lock:
+            return {topic: rate for (name, topic), rate in self._rates.items() if name == cluster}
+
+    def remove_cluster(self, cluster: str):
+        with self._lock:
+            for key in [k for k in self._samples if k[0] == cluster]:
+                del self._samples[key]
+                self._history.pop(key, None)
+                self._rates.pop(key, None)
+
+
+def sparkline(values: Iterable[float], width: int = 0) -> str:
+    """用方块字符绘制的迷你趋势图，width 大于 0 时只取最后 width 个值"""
+    values = list(values)
+    if width > 0:
+        values = values[-width:]
+    top = max(values, default=0)
+    if top <= 0:
+        return SPARK_CHARS[0] * len(values)
+    last = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[max(0, min(last, round(v / top * last)))] for v in values)
@@ -4,6 +4,7 @@ Kafka Explorer - 轻量级 Kafka 集群管理工具
 
 使用方法:
     python main.py
+    python main.py --startup-timing    # 在日志中输出启动各阶段耗时
 
 功能:
     - 连接管理: 支持多个 Kafka 集群连接配置
@@ -13,13 +14,13 @@ Kafka Explorer - 轻量级 Kafka 集群管理工具
     - 消息发送: 向指定 Topic 发送消息
 """
 
+import time
+
+_PROCESS_STARTED = time.perf_counter()
+
+import os
 import sys
 import logging
-from pathlib import Path
-
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont
 
 # 配置日志
 logging.basicConfig(
@@ -29,6 +30,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class StartupTimer:
+    """启动耗时分段统计"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.last = started
+        self.stages = []
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = [f"  {stage}: {seconds * 1000:.1f}ms" for stage, seconds in self.stages]
+        logger.info(f"启动耗时 {(self.last - self.started) * 1000:.1f}ms\n" + "\n".join(lines))
+
+
 def setup_high_dpi():
     """设置高DPI支持"""
     # PyQt6 默认启用高DPI支持
@@ -37,34 +56,48 @@ def setup_high_dpi():
 
 def main():
     """主函数"""
+    timing = '--startup-timing' in sys.argv or os.environ.get('KAFKA_EXPLORER_STARTUP_TIMING') == '1'
+    argv = [arg for arg in sys.argv if arg != '--startup-timing']
+    timer = StartupTimer(_PROCESS_STARTED) if timing else None
+
+    def mark(stage: str):
+        if timer is not None:
+            timer.mark(stage)
+
+    mark("Python 启动")
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QFont
+    mark("导入 PyQt6")
+
     setup_high_dpi()
-    
+
     # 创建应用
-    app = QApplication(sys.argv)
+    app = QApplication(argv)
     app.setApplicationName("Kafka Explorer")
     app.setApplicationVersion("1.0.0")
     app.setOrganizationName("KafkaExplorer")
-    
-    # 设置应用图标
-    from resources import create_kafka_icon
-    app.setWindowIcon(create_kafka_icon())
-    
+
+    # 设置应用图标（使用预渲染的 PNG）
+    from resources import create_app_icon
+    app.setWindowIcon(create_app_icon())
+
     # 设置默认字体
     font = QFont("Segoe UI", 10)
     app.setFont(font)
-    
-    # 导入并创建主窗口
+    mark("创建应用")
+
+    # 导入并创建主窗口（kafka 客户端库在首次连接时才导入）
     from ui import MainWindow
-    
-    window = MainWindow()
+    mark("导入界面模块")
+
+    window = MainWindow(startup_timer=timer)
     window.show()
-    
+
     logger.info("Kafka Explorer 已启动")
-    
+
     # 运行应用
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
     main()
-
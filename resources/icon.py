@@ -1,19 +1,30 @@
 """生成应用图标"""
 
+import os
+
 from PyQt6.QtGui import QPixmap, QPainter, QColor, QFont, QIcon, QRadialGradient, QBrush
-from PyQt6.QtCore import Qt, QPointF
+from PyQt6.QtCore import Qt, QPointF, QSize
+
+ICON_SIZES = [16, 32, 48, 64, 128, 256]
 
 
 def create_app_icon() -> QIcon:
-    """创建应用图标"""
-    return create_kafka_icon()
+    """创建应用图标：优先加载预渲染的 icon_<尺寸>.png，缺失时再用 QPainter 绘制"""
+    icon = QIcon()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for size in ICON_SIZES:
+        path = os.path.join(directory, f"icon_{size}.png")
+        if not os.path.exists(path):
+            return create_kafka_icon()
+        icon.addFile(path, QSize(size, size))
+    return icon
 
 
 def create_kafka_icon() -> QIcon:
     """创建 Kafka Explorer 风格图标 - 蓝紫渐变球体 + K字母"""
     icon = QIcon()
     
-    for size in [16, 32, 48, 64, 128, 256]:
+    for size in ICON_SIZES:
         pixmap = QPixmap(size, size)
         pixmap.fill(Qt.GlobalColor.transparent)
         
@@ -0,0 +1,24 @@
+"""测试共用的模拟集群"""
+
+import pytest
+
+from benchmarks.fake_cluster import BACKEND_NAME, FakeCluster, FakeClusterConfig, install
+from kafka_client import ClusterConnection, KafkaClusterClient
+
+
+@pytest.fixture
+def fake_cluster():
+    cluster = FakeCluster(FakeClusterConfig(
+        topics=3, partitions_per_topic=3, groups=4, topics_per_group=1, messages_per_partition=1000, message_size=64
+    ))
+    install(cluster)
+    return cluster
+
+
+@pytest.fixture
+def fake_client(fake_cluster):
+    client = KafkaClusterClient(ClusterConnection(name="fake", bootstrap_servers="fake:9092",
+                                                  client_backend=BACKEND_NAME))
+    client.connect()
+    yield client
+    client.disconnect()
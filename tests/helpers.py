@@ -0,0 +1,24 @@
+"""测试用的消息构造"""
+
+from datetime import datetime, timedelta
+from typing import List
+
+from kafka_client.models import KafkaMessage
+
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def make_messages(start: int, end: int, partition: int = 0, topic: str = "t") -> List[KafkaMessage]:
+    """[start, end) 内每个 offset 一条消息，时间戳间隔 1 秒"""
+    return [
+        KafkaMessage(
+            topic=topic,
+            partition=partition,
+            offset=offset,
+            timestamp=BASE_TIME + timedelta(seconds=offset),
+            key=str(offset).encode(),
+            value=f"value-{partition}-{offset}".encode(),
+            headers=[('source', b'test')],
+        )
+        for offset in range(start, end)
+    ]
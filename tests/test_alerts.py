@@ -0,0 +1,70 @@
+from kafka_client.alerts import AlertEvaluator
+from kafka_client.lag import LagRateTracker
+from kafka_client.models import AlertRule, GroupOffsetsSnapshot
+
+
+def snapshot(taken_at, committed, end, group_id="g"):
+    """单分区 ('t', 0) 的快照"""
+    return GroupOffsetsSnapshot(taken_at=taken_at, committed={group_id: {('t', 0): committed}},
+                                end_offsets={('t', 0): end})
+
+
+def states(events):
+    return [(e.rule, e.group_id, e.firing) for e in events]
+
+
+def test_lag_rule_fires_and_clears_with_hysteresis():
+    evaluator = AlertEvaluator([AlertRule("backlog", threshold=100, clear_threshold=50)])
+
+    assert evaluator.evaluate("c", snapshot(0, 0, 99)) == []
+    assert states(evaluator.evaluate("c", snapshot(1, 0, 150))) == [("backlog", "g", True)]
+    # 低于阈值但高于恢复值时保持告警
+    assert evaluator.evaluate("c", snapshot(2, 80, 150)) == []
+    assert len(evaluator.firing()) == 1
+    events = evaluator.evaluate("c", snapshot(3, 110, 150))
+    assert states(events) == [("backlog", "g", False)]
+    assert events[0].value == 40
+    assert evaluator.firing() == []
+
+
+def test_rule_patterns_limit_groups_and_topics():
+    evaluator = AlertEvaluator([AlertRule("orders", threshold=10, group_pattern="orders-*", topic_pattern="o*")])
+    snap = GroupOffsetsSnapshot(
+        taken_at=0,
+        committed={'orders-1': {('orders', 0): 0, ('audit', 0): 0}, 'billing': {('orders', 0): 0}},
+        end_offsets={('orders', 0): 5, ('audit', 0): 100},
+    )
+    assert evaluator.evaluate("c", snap) == []
+
+    snap.end_offsets[('orders', 0)] = 20
+    assert states(evaluator.evaluate("c", snap)) == [("orders", "orders-1", True)]
+
+
+def test_deleted_group_clears_firing_alert():
+    evaluator = AlertEvaluator([AlertRule("backlog", threshold=10)])
+    evaluator.evaluate("c", snapshot(0, 0, 100))
+
+    events = evaluator.evaluate("c", GroupOffsetsSnapshot(taken_at=1))
+
+    assert states(events) == [("backlog", "g", False)]
+
+
+def test_time_lag_waits_for_rate_and_follows_rate_changes():
+    rates = LagRateTracker()
+    evaluator = AlertEvaluator([AlertRule("slow", threshold=60, metric='time_lag')], rate_tracker=rates)
+
+    def tick(taken_at, committed, end):
+        snap = snapshot(taken_at, committed, end)
+        rates.record("c", snap)
+        return evaluator.evaluate("c", snap)
+
+    # 有 lag 但还没有生产速率：不改变状态
+    assert tick(0, 0, 1000) == []
+    # 生产 1 条/秒，lag 1100 条约 1100 秒
+    events = tick(100, 0, 1100)
+    assert states(events) == [("slow", "g", True)]
+    assert events[0].value == 1100
+    # 位点不变但速率更新后重新计算，没有可用速率时保持告警
+    assert tick(200, 0, 1100) == []
+    assert len(evaluator.firing()) == 1
+    assert states(tick(300, 1100, 1100)) == [("slow", "g", False)]
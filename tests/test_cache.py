@@ -0,0 +1,147 @@
+import os
+from dataclasses import replace
+from datetime import timedelta
+
+from kafka_client.cache import MessageRangeCache
+
+from .helpers import make_messages
+
+SCOPE = "cluster|broker:9092"
+
+
+def offsets(messages):
+    return [m.offset for m in messages]
+
+
+def test_partial_hit_returns_gaps_and_ranges_merge():
+    cache = MessageRangeCache()
+    cache.put(SCOPE, "t", 0, 0, 10, make_messages(0, 10))
+    cache.put(SCOPE, "t", 0, 20, 30, make_messages(20, 30))
+
+    messages, missing = cache.get(SCOPE, "t", 0, 5, 35)
+    assert offsets(messages) == list(range(5, 10)) + list(range(20, 30))
+    assert missing == [(10, 20), (30, 35)]
+
+    # 填上空洞后相邻区间合并为一个
+    cache.put(SCOPE, "t", 0, 10, 20, make_messages(10, 20))
+    assert cache.stats()['ranges'] == 1
+    messages, missing = cache.get(SCOPE, "t", 0, 0, 30)
+    assert offsets(messages) == list(range(30))
+    assert missing == []
+
+
+def test_validate_drops_partition_when_topic_recreated():
+    cache = MessageRangeCache()
+    cache.put(SCOPE, "t", 0, 0, 100, make_messages(0, 100))
+
+    cache.validate(SCOPE, "t", 0, 0, 50)
+
+    assert cache.get(SCOPE, "t", 0, 0, 50) == ([], [(0, 50)])
+    assert cache.stats()['bytes'] == 0
+
+
+def test_validate_releases_ranges_below_low_watermark():
+    cache = MessageRangeCache()
+    cache.put(SCOPE, "t", 0, 0, 10, make_messages(0, 10))
+    cache.put(SCOPE, "t", 0, 20, 30, make_messages(20, 30))
+
+    cache.validate(SCOPE, "t", 0, 15, 30)
+
+    assert cache.stats()['ranges'] == 1
+    messages, missing = cache.get(SCOPE, "t", 0, 20, 30)
+    assert offsets(messages) == list(range(20, 30))
+    assert missing == []
+
+
+def test_disk_segments_survive_memory_eviction(tmp_path):
+    disk_dir = str(tmp_path / "cache")
+    cache = MessageRangeCache(disk_dir=disk_dir)
+    cache.validate(SCOPE, "t", 0, 0, 100)
+    cache.put(SCOPE, "t", 0, 0, 50, make_messages(0, 50))
+
+    restarted = MessageRangeCache(disk_dir=disk_dir)
+    restarted.validate(SCOPE, "t", 0, 0, 100)
+    messages, missing = restarted.get(SCOPE, "t", 0, 0, 100)
+
+    assert messages == make_messages(0, 50)
+    assert missing == [(50, 100)]
+
+
+def test_stale_disk_segments_are_not_served(tmp_path):
+    disk_dir = str(tmp_path / "cache")
+    cache = MessageRangeCache(disk_dir=disk_dir)
+    cache.put(SCOPE, "t", 0, 0, 50, make_messages(0, 50))
+
+    # Topic 被删除重建，分区末尾回到 10
+    restarted = MessageRangeCache(disk_dir=disk_dir)
+    restarted.validate(SCOPE, "t", 0, 0, 10)
+
+    assert restarted.get(SCOPE, "t", 0, 0, 10) == ([], [(0, 10)])
+    assert os.listdir(disk_dir) == []
+
+
+def test_invalidate_removes_memory_and_disk(tmp_path):
+    disk_dir = str(tmp_path / "cache")
+    cache = MessageRangeCache(disk_dir=disk_dir)
+    cache.put(SCOPE, "t", 0, 0, 10, make_messages(0, 10))
+    cache.put(SCOPE, "other", 0, 0, 10, make_messages(0, 10, topic="other"))
+
+    cache.invalidate(SCOPE, "t")
+
+    assert cache.get(SCOPE, "t", 0, 0, 10) == ([], [(0, 10)])
+    assert offsets(cache.get(SCOPE, "other", 0, 0, 10)[0]) == list(range(10))
+    assert len(os.listdir(disk_dir)) == 1
+
+
+def test_validate_drops_recreated_topic_that_grew_past_cache(tmp_path):
+    disk_dir = str(tmp_path / "cache")
+    cache = MessageRangeCache(disk_dir=disk_dir)
+    cache.put(SCOPE, "t", 0, 0, 10, make_messages(0, 10))
+
+    # Topic 被删除重建后又写入了 50 条，末尾已经超过缓存区间，只有消息内容不同
+    recreated = [replace(m, timestamp=m.timestamp + timedelta(days=1)) for m in make_messages(0, 50)]
+    reads = []
+
+    def read_record(offset):
+        reads.append(offset)
+        return recreated[offset]
+
+    cache.validate(SCOPE, "t", 0, 0, 50, read_record)
+
+    assert reads == [0]
+    assert cache.get(SCOPE, "t", 0, 0, 10) == ([], [(0, 10)])
+    assert os.listdir(disk_dir) == []
+
+
+def test_validate_keeps_same_log_and_rechecks_after_interval(tmp_path):
+    disk_dir = str(tmp_path / "cache")
+    cache = MessageRangeCache(disk_dir=disk_dir, verify_interval=60)
+    cache.put(SCOPE, "t", 0, 0, 10, make_messages(0, 10))
+    log = make_messages(0, 50)
+    reads = []
+
+    def read_record(offset):
+        reads.append(offset)
+        return log[offset]
+
+    cache.validate(SCOPE, "t", 0, 0, 50, read_record)
+    cache.validate(SCOPE, "t", 0, 0, 50, read_record)
+    assert reads == [0]
+    assert offsets(cache.get(SCOPE, "t", 0, 0, 10)[0]) == list(range(10))
+
+    # 内存淘汰后从磁盘段取校验消息，已被保留策略清理的 offset 不再参与比较
+    restarted = MessageRangeCache(disk_dir=disk_dir)
+    restarted.validate(SCOPE, "t", 0, 3, 50, read_record)
+    assert reads == [0, 3]
+    assert offsets(restarted.get(SCOPE, "t", 0, 3, 10)[0]) == list(range(3, 10))
+
+
+def test_invalidate_forgets_partition_bounds():
+    cache = MessageRangeCache()
+    cache.validate(SCOPE, "t", 0, 0, 10)
+    cache.validate(SCOPE, "other", 0, 0, 10)
+    cache.put(SCOPE, "t", 0, 0, 10, make_messages(0, 10))
+
+    cache.invalidate(SCOPE, "t")
+
+    assert list(cache._bounds) == [(SCOPE, "other", 0)]
@@ -0,0 +1,44 @@
+import json
+
+from kafka_client.cli import build_parser, cmd_lag
+
+
+def run_lag(client, capsys, *argv):
+    cmd_lag(client, build_parser().parse_args(['lag', *argv]))
+    return json.loads(capsys.readouterr().out)
+
+
+def test_lag_uses_snapshot_and_reports_failed_groups(fake_client, monkeypatch, capsys):
+    admin = fake_client._admin_client
+    list_offsets = admin.list_consumer_group_offsets
+
+    def failing_list_offsets(group_id):
+        if group_id == "group-2":
+            raise RuntimeError("coordinator not available")
+        return list_offsets(group_id)
+
+    def no_detail(*args, **kwargs):
+        raise AssertionError("没有 --time-lag 时不应逐组获取详情")
+
+    monkeypatch.setattr(admin, 'list_consumer_group_offsets', failing_list_offsets)
+    monkeypatch.setattr(fake_client, 'get_consumer_group_detail', no_detail)
+
+    records = run_lag(fake_client, capsys, '--min-lag', '1')
+
+    assert records == [
+        {'group': 'group-1', 'state': 'Stable', 'members': 1, 'partitions': 3, 'lag': 3},
+        {'group': 'group-2', 'error': 'coordinator not available'},
+        {'group': 'group-3', 'state': 'Stable', 'members': 1, 'partitions': 3, 'lag': 9},
+    ]
+
+    partitions = run_lag(fake_client, capsys, '-g', 'group-3', '--partitions')
+    assert [r['lag'] for r in partitions] == [3, 3, 3]
+    assert all(r['end_offset'] - r['current_offset'] == 3 for r in partitions)
+
+
+def test_lag_with_time_lag_fetches_details(fake_client, capsys):
+    records = run_lag(fake_client, capsys, '-g', 'group-0', '-g', 'group-1', '--min-lag', '1', '--time-lag')
+
+    assert [r['group'] for r in records] == ['group-1']
+    assert records[0]['lag'] == 3
+    assert records[0]['time_lag'] is not None
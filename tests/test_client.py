@@ -0,0 +1,25 @@
+import pytest
+
+from kafka_client.client import TaskSlotTimeout
+
+
+def test_group_detail_reports_lag(fake_client):
+    group = fake_client.get_consumer_group_detail("group-1")
+
+    assert len(group.offsets) == 3
+    assert group.total_lag == 3
+
+
+def test_group_detail_raises_when_no_task_slot(fake_client, monkeypatch):
+    monkeypatch.setattr(fake_client, 'TASK_SLOT_TIMEOUT', 0.2)
+    fake_client.max_concurrent_tasks = 1
+    held = fake_client._get_consumer()
+    try:
+        # 名额耗尽不能被当作没有 lag 的正常组返回
+        with pytest.raises(TaskSlotTimeout):
+            fake_client.get_consumer_group_detail("group-1")
+        with pytest.raises(TaskSlotTimeout):
+            fake_client.get_consumer_groups()
+    finally:
+        held.close()
+    assert fake_client.get_consumer_group_detail("group-1").total_lag == 3
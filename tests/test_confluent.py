@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("confluent_kafka")
+
+from confluent_kafka import OFFSET_BEGINNING, OFFSET_END, KafkaError, KafkaException  # noqa: E402
+
+from kafka_client.backends import TopicPartition  # noqa: E402
+from kafka_client.backends import confluent  # noqa: E402
+from kafka_client.backends.confluent import ConfluentConsumer  # noqa: E402
+
+
+class MockConsumer:
+    """记录调用的 confluent_kafka.Consumer 替身"""
+
+    def __init__(self, config):
+        self.calls = []
+        self.watermarks = {}
+        self.fetch_positions = {}
+        self.reject_seek = False
+        self.errors = {}
+
+    def offsets_for_times(self, partitions, timeout=None):
+        self.calls.append(('offsets_for_times', [(tp.topic, tp.partition, tp.offset) for tp in partitions]))
+        result = []
+        for tp in partitions:
+            low, high = self.watermarks[(tp.topic, tp.partition)]
+            offset = low if tp.offset == OFFSET_BEGINNING else high
+            result.append(SimpleNamespace(topic=tp.topic, partition=tp.partition, offset=offset,
+                                          error=self.errors.get((tp.topic, tp.partition))))
+        return result
+
+    def assign(self, partitions):
+        self.calls.append(('assign', [(tp.topic, tp.partition, tp.offset) for tp in partitions]))
+
+    def seek(self, tp):
+        self.calls.append(('seek', (tp.topic, tp.partition, tp.offset)))
+        if self.reject_seek:
+            raise KafkaException(KafkaError(KafkaError._STATE))
+
+    def position(self, partitions):
+        return [
+            SimpleNamespace(topic=tp.topic, partition=tp.partition,
+                            offset=self.fetch_positions.get((tp.topic, tp.partition), -1001))
+            for tp in partitions
+        ]
+
+
+@pytest.fixture
+def consumer(monkeypatch):
+    monkeypatch.setattr(confluent, 'Consumer', MockConsumer)
+    return ConfluentConsumer({}, anonymous=True)
+
+
+def test_offsets_use_one_request_with_sentinels(consumer):
+    mock = consumer._consumer
+    mock.watermarks = {('t', 0): (5, 50), ('t', 1): (0, 7)}
+    tps = [TopicPartition('t', 0), TopicPartition('t', 1)]
+
+    assert consumer.beginning_offsets(tps) == {tps[0]: 5, tps[1]: 0}
+    assert consumer.end_offsets(tps) == {tps[0]: 50, tps[1]: 7}
+    assert consumer.end_offsets([]) == {}
+    assert mock.calls == [
+        ('offsets_for_times', [('t', 0, OFFSET_BEGINNING), ('t', 1, OFFSET_BEGINNING)]),
+        ('offsets_for_times', [('t', 0, OFFSET_END), ('t', 1, OFFSET_END)]),
+    ]
+
+
+def test_offset_errors_are_raised(consumer):
+    mock = consumer._consumer
+    mock.watermarks = {('t', 0): (0, 10)}
+    mock.errors[('t', 0)] = KafkaError(KafkaError.UNKNOWN_TOPIC_OR_PART)
+
+    with pytest.raises(KafkaException):
+        consumer.end_offsets([TopicPartition('t', 0)])
+
+
+def test_seek_moves_only_one_partition(consumer):
+    mock = consumer._consumer
+    consumer.assign([TopicPartition('t', 0), TopicPartition('t', 1)])
+    mock.calls.clear()
+
+    consumer.seek(TopicPartition('t', 1), 42)
+
+    assert mock.calls == [('seek', ('t', 1, 42))]
+
+
+def test_seek_falls_back_to_assign_before_fetching(consumer):
+    mock = consumer._consumer
+    consumer.assign([TopicPartition('t', 0), TopicPartition('t', 1)])
+    consumer.seek(TopicPartition('t', 0), 3)
+    mock.calls.clear()
+    mock.reject_seek = True
+
+    consumer.seek(TopicPartition('t', 1), 42)
+
+    # 重新 assign 时保留其他分区已 seek 的位置
+    assert mock.calls == [('seek', ('t', 1, 42)), ('assign', [('t', 0, 3), ('t', 1, 42)])]
+
+
+def test_position_prefers_fetch_position_then_seek_position(consumer):
+    mock = consumer._consumer
+    consumer.assign([TopicPartition('t', 0), TopicPartition('t', 1)])
+    consumer.seek(TopicPartition('t', 0), 10)
+
+    assert consumer.position(TopicPartition('t', 0)) == 10
+    assert consumer.position(TopicPartition('t', 1)) is None
+    assert consumer.position(TopicPartition('t', 9)) is None
+
+    mock.fetch_positions[('t', 0)] = 25
+    assert consumer.position(TopicPartition('t', 0)) == 25
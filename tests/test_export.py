@@ -0,0 +1,94 @@
+import json
+import os
+
+from benchmarks.fake_cluster import TopicPartition
+from kafka_client.export import MessageExporter
+from kafka_client.segment import SegmentReader
+
+TOPIC = "topic-0"
+
+
+def read_offsets(path):
+    with open(path, encoding='utf-8') as f:
+        return sorted((r['partition'], r['offset']) for r in map(json.loads, f))
+
+
+def test_export_writes_every_message_and_removes_checkpoint(fake_client, tmp_path):
+    path = str(tmp_path / "out.jsonl")
+
+    progress = MessageExporter(fake_client, TOPIC, path).run()
+
+    assert progress.completed
+    assert progress.messages == 3000
+    assert read_offsets(path) == [(p, o) for p in range(3) for o in range(1000)]
+    assert not os.path.exists(path + '.progress.json')
+
+
+def test_stopped_export_resumes_without_duplicates(fake_client, tmp_path):
+    path = str(tmp_path / "out.jsonl")
+
+    def stop_midway(progress):
+        if progress.messages >= 1200:
+            exporter.stop_event.set()
+
+    exporter = MessageExporter(fake_client, TOPIC, path, batch_size=100, buffer_size=1024,
+                               progress_callback=stop_midway)
+    first = exporter.run()
+    assert not first.completed
+    assert os.path.exists(exporter.checkpoint_path)
+
+    resumed = MessageExporter(fake_client, TOPIC, path).run()
+
+    assert resumed.completed
+    assert resumed.messages == 3000
+    assert read_offsets(path) == [(p, o) for p in range(3) for o in range(1000)]
+    assert not os.path.exists(path + '.progress.json')
+
+
+
+def test_checkpoint_for_another_range_is_not_resumed(fake_client, tmp_path):
+    path = str(tmp_path / "out.jsonl")
+
+    def stop_midway(progress):
+        if progress.messages >= 300:
+            exporter.stop_event.set()
+
+    exporter = MessageExporter(fake_client, TOPIC, path, partitions=[0], start_offset=100, batch_size=100,
+                               buffer_size=1024, progress_callback=stop_midway)
+    assert not exporter.run().completed
+
+    # 同一路径换了分区与起始位置：丢弃旧断点重新导出
+    progress = MessageExporter(fake_client, TOPIC, path, partitions=[1, 2], start_offset=900).run()
+
+    assert progress.completed
+    assert progress.messages == 200
+    assert read_offsets(path) == [(p, o) for p in (1, 2) for o in range(900, 1000)]
+
+def test_unreadable_partition_keeps_checkpoint(fake_client, fake_cluster, tmp_path, monkeypatch):
+    path = str(tmp_path / "out.kseg")
+    exporter = MessageExporter(fake_client, TOPIC, path, fmt='segment')
+    ranges = fake_client.resolve_offset_ranges(TOPIC)
+    monkeypatch.setattr(fake_client, 'resolve_offset_ranges', lambda *args, **kwargs: ranges)
+    read = fake_client.iter_message_batches
+    monkeypatch.setattr(fake_client, 'iter_message_batches',
+                        lambda *args, **kwargs: read(*args, **dict(kwargs, timeout_ms=1)))
+    # 区间确定后分区 1 的数据只剩 400 条（Broker 不可达或已被清理）
+    fake_cluster.end_offsets[TopicPartition(TOPIC, 1)] = 400
+
+    progress = exporter.run()
+
+    # 段文件中各分区的记录必须连续，分区 2 也留到续传时再读
+    assert not progress.completed
+    assert progress.incomplete == {1: 400, 2: 0}
+    assert progress.messages == 1400
+    assert os.path.exists(exporter.checkpoint_path)
+
+    # 数据恢复后续传完成，段文件带完整的索引
+    del fake_cluster.end_offsets[TopicPartition(TOPIC, 1)]
+    progress = MessageExporter(fake_client, TOPIC, path, fmt='segment').run()
+
+    assert progress.completed
+    assert not os.path.exists(exporter.checkpoint_path)
+    with SegmentReader(path) as reader:
+        assert reader.record_count == 3000
+        assert reader.partitions[1].last_offset == 999
@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+TOPIC = "topic-0"
+
+
+def local_offset(ts):
+    return time.localtime(ts).tm_gmtoff
+
+
+def test_buckets_align_to_local_time_and_count_messages(fake_client, fake_cluster):
+    first, last = fake_cluster.time_range()
+    # 1000 条消息间隔 100ms，覆盖约 100 秒；从中间开始统计，按 30 秒分桶
+    start = first + 12.5
+
+    histogram = fake_client.get_message_histogram(TOPIC, start, last + 1, bucket_seconds=30)
+
+    starts = [ts for ts, _ in histogram.buckets]
+    assert starts[0] <= start < starts[0] + 30
+    assert all((ts + local_offset(ts)) % 30 == 0 for ts in starts)
+    assert all(b - a == 30 for a, b in zip(starts, starts[1:-1]))
+    # 首个桶从对齐的边界开始计数，包含边界之前的消息
+    expected = 3 * (1000 - int((starts[0] - first) * 10))
+    assert histogram.total == expected
+    assert histogram.requests == len(histogram.buckets) + 1
+
+
+def test_histogram_rejects_invalid_ranges(fake_client):
+    with pytest.raises(ValueError):
+        fake_client.get_message_histogram(TOPIC, 100, 50)
+    with pytest.raises(ValueError):
+        fake_client.get_message_histogram(TOPIC, 0, 10 ** 8, bucket_seconds=60)
+
+
+def test_unknown_topic_returns_none(fake_client):
+    assert fake_client.get_message_histogram("missing", 0, 100) is None
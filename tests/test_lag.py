@@ -0,0 +1,40 @@
+import pytest
+
+from kafka_client.lag import LagRateTracker
+from kafka_client.models import GroupOffsetsSnapshot
+
+
+def snapshot(taken_at, committed, end):
+    return GroupOffsetsSnapshot(taken_at=taken_at, committed={'g': {('t', 0): committed, ('t', 1): committed}},
+                                end_offsets={('t', 0): end, ('t', 1): end})
+
+
+def test_rates_and_eta():
+    tracker = LagRateTracker(window=300)
+    tracker.record("c", snapshot(0, 0, 1000))
+    assert tracker.group_rate("c", "g").span == 0
+
+    tracker.record("c", snapshot(100, 500, 1500))
+    rate = tracker.group_rate("c", "g")
+
+    assert rate.span == 100
+    assert rate.lag == 2000
+    assert rate.produce_rate == pytest.approx(10.0)
+    assert rate.consume_rate == pytest.approx(10.0)
+    # 消费不快于生产时追不上
+    assert rate.eta_seconds is None
+
+    tracker.record("c", snapshot(200, 1400, 1600))
+    rate = tracker.group_rate("c", "g")
+    # 窗口首尾：生产 (1600-1000)/200，消费 1400/200
+    assert rate.produce_rate == pytest.approx(6.0)
+    assert rate.consume_rate == pytest.approx(14.0)
+    assert rate.eta_seconds == pytest.approx(400 / 8.0)
+
+
+def test_offset_reset_restarts_rate_window():
+    tracker = LagRateTracker()
+    tracker.record("c", snapshot(0, 500, 1000))
+    tracker.record("c", snapshot(100, 0, 1000))
+
+    assert tracker.group_rate("c", "g").span == 0
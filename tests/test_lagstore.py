@@ -0,0 +1,34 @@
+import time
+
+from kafka_client.lagstore import LagHistoryStore
+from kafka_client.models import GroupOffsetsSnapshot
+
+
+def snapshot(taken_at, committed, end):
+    return GroupOffsetsSnapshot(taken_at=taken_at, committed={'g': {('t', 0): committed, ('t', 1): committed}},
+                                end_offsets={('t', 0): end, ('t', 1): end})
+
+
+def test_rollup_keeps_last_sample_per_bucket(tmp_path):
+    store = LagHistoryStore(str(tmp_path / "lag.sqlite3"), budget_bytes=0)
+    # 两个已结束的整分钟，每分钟 3 个样本
+    base = (int(time.time()) // 60 - 3) * 60
+    # 写入回溯的样本前不让 record() 自动降采样
+    store._last_maintain = time.time()
+    try:
+        for minute in range(2):
+            for second in (0, 20, 40):
+                ts = base + minute * 60 + second
+                store.record("c", snapshot(ts, ts - base, ts - base + 10))
+        store.maintain()
+
+        rows = store._conn().execute(
+            "SELECT ts, committed, end_offset FROM points_1m ORDER BY series, ts"
+        ).fetchall()
+        assert rows == [(base, 40, 50), (base + 60, 100, 110)] * 2
+
+        points = store.history("c", "g", base, base + 119)
+        assert [(p.ts, p.lag) for p in points][-1] == (base + 100, 20)
+        assert store.groups("c") == ["g"]
+    finally:
+        store.close()
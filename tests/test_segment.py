@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from kafka_client.models import KafkaMessage
+from kafka_client.segment import SegmentReader, SegmentWriter
+
+from .helpers import BASE_TIME, make_messages
+
+
+def write_segment(path, messages, index_interval=256):
+    with SegmentWriter(str(path), "t", index_interval=index_interval) as writer:
+        writer.write(messages)
+
+
+def test_round_trip_preserves_fields(tmp_path):
+    messages = make_messages(0, 50) + make_messages(10, 30, partition=2)
+    messages.append(KafkaMessage(topic="t", partition=2, offset=30, timestamp=None, key=None, value=None,
+                                 headers=[('empty', None), ('bin', b'\x00\xff')]))
+    path = tmp_path / "t.kseg"
+    write_segment(path, messages)
+
+    with SegmentReader(str(path)) as reader:
+        assert reader.topic == "t"
+        assert reader.record_count == len(messages)
+        assert sorted(reader.partitions) == [0, 2]
+        assert reader.partitions[2].first_offset == 10
+        assert reader.partitions[2].last_offset == 30
+        loaded = reader.read_messages(limit=len(messages))
+
+    assert loaded == messages
+
+
+def test_find_by_offset_and_time(tmp_path):
+    path = tmp_path / "t.kseg"
+    write_segment(path, make_messages(100, 2100))
+
+    with SegmentReader(str(path)) as reader:
+        by_offset = reader.read_messages(0, start_offset=1500, limit=3)
+        by_time = reader.read_messages(0, start_time=BASE_TIME + timedelta(seconds=1234.5), limit=1)
+        latest = reader.read_messages(0, latest=True, limit=5)
+
+    assert [m.offset for m in by_offset] == [1500, 1501, 1502]
+    assert [m.offset for m in by_time] == [1235]
+    assert [m.offset for m in latest] == [2095, 2096, 2097, 2098, 2099]
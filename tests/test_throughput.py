@@ -0,0 +1,49 @@
+import pytest
+
+from kafka_client.models import TopicOffsetsSnapshot
+from kafka_client.throughput import ThroughputTracker, TopicOffsetSampler, sparkline
+
+
+def test_sampler_reuses_one_consumer_and_one_metadata_request(fake_client, fake_cluster):
+    sampler = TopicOffsetSampler()
+    sampler.set_client("fake", fake_client)
+    fake_cluster.reset_counters()
+
+    for _ in range(3):
+        snapshot = sampler.sample_cluster("fake", fake_client)
+
+    assert len(snapshot.end_offsets) == 9
+    assert fake_cluster.consumers_created == 1
+    assert fake_cluster.requests['Metadata'] == 3
+    assert fake_client._task_slots.active == 0
+
+    sampler.set_topics("fake", ["topic-1"])
+    assert {topic for topic, _ in sampler.sample_cluster("fake", fake_client).end_offsets} == {"topic-1"}
+    sampler.remove_client("fake")
+    sampler.stop()
+
+
+def test_tracker_rates_and_reset():
+    tracker = ThroughputTracker(window=300)
+
+    def record(taken_at, end):
+        tracker.record("c", TopicOffsetsSnapshot(taken_at=taken_at, end_offsets={('t', 0): end, ('t', 1): end}))
+
+    record(0, 0)
+    record(60, 600)
+    record(120, 1800)
+    rate = tracker.topic_rate("c", "t")
+    assert rate.rate == pytest.approx(2 * 1800 / 120)
+    assert [r for _, r in rate.history] == pytest.approx([20.0, 40.0])
+
+    # Topic 重建后位点回退，速率与趋势重新开始
+    record(180, 10)
+    rate = tracker.topic_rate("c", "t")
+    assert rate.span == 0
+    assert rate.history == []
+
+
+def test_sparkline_scales_to_maximum():
+    assert sparkline([0, 1, 2, 4]) == "▁▃▅█"
+    assert sparkline([0, 0]) == "▁▁"
+    assert sparkline(range(10), width=3) == "▆▇█"
@@ -0,0 +1,90 @@
+"""在 Qt 界面中运行协程
+
+asyncio 事件循环运行在一个后台线程中，界面通过 AsyncRunner.submit 提交协程，
+完成回调经由信号回到主线程执行。适合需要并发成百上千个请求的场景（如批量获取消费者组详情），
+只占用一个事件循环线程加上各集群 AsyncKafkaClusterClient 的小线程池。
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Coroutine, Dict, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from kafka_client.aio import AsyncKafkaClusterClient
+from kafka_client.client import KafkaClusterClient
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRunner(QObject):
+    """后台 asyncio 事件循环"""
+
+    # (回调, 参数)，在主线程中调用
+    _deliver = pyqtSignal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._clients: Dict[int, AsyncKafkaClusterClient] = {}
+        self._deliver.connect(lambda callback, value: callback(value))
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def start(self):
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="qt-asyncio", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        loop, self._loop = self._loop, None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=2)
+        for client in self._clients.values():
+            client.shutdown()
+        self._clients.clear()
+        loop.close()
+
+    def client_for(self, client: KafkaClusterClient) -> AsyncKafkaClusterClient:
+        """同一个同步客户端复用同一个异步封装（和它的线程池）"""
+        key = id(client)
+        wrapper = self._clients.get(key)
+        if wrapper is None or wrapper.client is not client:
+            wrapper = AsyncKafkaClusterClient(client)
+            self._clients[key] = wrapper
+        return wrapper
+
+    def forget(self, client: KafkaClusterClient):
+        """客户端断开后释放对应的线程池"""
+        wrapper = self._clients.pop(id(client), None)
+        if wrapper is not None:
+            wrapper.shutdown()
+
+    def submit(self, coro: Coroutine, on_finished: Optional[Callable] = None,
+               on_error: Optional[Callable[[str], None]] = None) -> Future:
+        """提交协程，回调在主线程中调用（on_error 收到异常信息字符串，与 WorkerThread 一致）"""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+        def done(f: Future):
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is not None:
+                logger.error(f"异步任务失败: {error}", exc_info=error)
+                if on_error is not None:
+                    self._deliver.emit(on_error, str(error))
+            elif on_finished is not None:
+                self._deliver.emit(on_finished, f.result())
+
+        future.add_done_callback(done)
+        return future
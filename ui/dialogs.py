@@ -8,12 +8,18 @@ from PyQt6.QtWidgets import (
     QLineEdit, QComboBox, QPushButton, QLabel, QSpinBox,
     QTextEdit, QGroupBox, QMessageBox, QCheckBox,
     QDialogButtonBox, QTabWidget, QWidget, QFileDialog,
-    QRadioButton, QListWidget, QAbstractItemView,
+    QRadioButton, QListWidget, QAbstractItemView, QDateTimeEdit,
+    QTableWidget, QTableWidgetItem, QHeaderView, QSplitter,
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QDateTime, QTimer, QSettings
 from PyQt6.QtGui import QFont
 
-from kafka_client.models import ClusterConnection
+from kafka_client.alerts import ALERT_METRICS
+from kafka_client.models import AlertRule, ClusterConnection
+from kafka_client.export import EXPORT_FORMATS, COMPRESSIONS, format_bytes
+from kafka_client.metrics import METRICS, MetricsRegistry
+
+from .memory import process_memory
 
 
 class ConnectionDialog(QDialog):
@@ -59,6 +65,22 @@ class ConnectionDialog(QDialog):
         self.servers_edit.setPlaceholderText("例如: localhost:9092,localhost:9093")
         basic_layout.addRow("Bootstrap Servers:", self.servers_edit)
         
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItem("kafka-python", "kafka-python")
+        self.backend_combo.addItem("confluent-kafka (librdkafka)", "confluent-kafka")
+        self.backend_combo.setToolTip("confluent-kafka 使用原生 librdkafka，大批量浏览/导出时吞吐更高")
+        basic_layout.addRow("客户端后端:", self.backend_combo)
+
+        self.max_tasks_spin = QSpinBox()
+        self.max_tasks_spin.setRange(1, 64)
+        self.max_tasks_spin.setValue(4)
+        self.max_tasks_spin.setToolTip("同时加载 Topic / 消费者组 / 消息的后台任务上限，每个任务使用一个独立的 Consumer")
+        basic_layout.addRow("并发任务数:", self.max_tasks_spin)
+        
+        self.auto_connect_check = QCheckBox("启动时在后台自动连接")
+        self.auto_connect_check.setToolTip("程序启动后并行连接所有勾选的集群并预加载 Topic / 消费者组列表")
+        basic_layout.addRow("", self.auto_connect_check)
+        
         tab_widget.addTab(basic_tab, "基本配置")
         
         # 安全配置标签页
@@ -222,6 +244,11 @@ class ConnectionDialog(QDialog):
         """加载连接配置"""
         self.name_edit.setText(conn.name)
         self.servers_edit.setText(conn.bootstrap_servers)
+        backend_index = self.backend_combo.findData(conn.client_backend)
+        if backend_index >= 0:
+            self.backend_combo.setCurrentIndex(backend_index)
+        self.auto_connect_check.setChecked(conn.auto_connect)
+        self.max_tasks_spin.setValue(conn.max_concurrent_tasks)
         self.protocol_combo.setCurrentText(conn.security_protocol)
         
         if conn.sasl_mechanism:
@@ -262,21 +289,39 @@ class ConnectionDialog(QDialog):
             sasl_kerberos_domain_name=self.kerberos_domain_edit.text().strip() or None if is_sasl and is_gssapi else None,
             ssl_cafile=self.ssl_ca_edit.text().strip() if "SSL" in protocol else None,
             ssl_certfile=self.ssl_cert_edit.text().strip() if "SSL" in protocol else None,
-            ssl_keyfile=self.ssl_key_edit.text().strip() if "SSL" in protocol else None
+            ssl_keyfile=self.ssl_key_edit.text().strip() if "SSL" in protocol else None,
+            client_backend=self.backend_combo.currentData(),
+            auto_connect=self.auto_connect_check.isChecked(),
+            max_concurrent_tasks=self.max_tasks_spin.value()
         )
     
     def test_connection(self):
         """测试连接"""
+        from PyQt6.QtWidgets import QApplication
+        from kafka_client import KafkaClusterClient
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
         try:
-            conn = self.get_connection()
-            from kafka_client import KafkaClusterClient
-            client = KafkaClusterClient(conn)
-            client.connect()
+            client = KafkaClusterClient(self.get_connection())
+            client.connect(wait_all_probes=True)
             client.disconnect()
-            
-            QMessageBox.information(self, "成功", "连接测试成功！")
         except Exception as e:
+            QApplication.restoreOverrideCursor()
             QMessageBox.critical(self, "错误", f"连接测试失败:\n{str(e)}")
+            return
+        QApplication.restoreOverrideCursor()
+
+        report = client.probe_report
+        text = "连接测试成功！"
+        if report.fastest:
+            text += f"\n使用最快的 Bootstrap Server: {report.fastest.server}（{report.brokers} 个 Broker）"
+        box = QMessageBox(QMessageBox.Icon.Information, "成功", text, parent=self)
+        box.setInformativeText("\n".join(
+            f"{label}: {'-' if seconds is None else f'{seconds * 1000:.1f}ms'}"
+            for label, seconds in report.phases()
+        ))
+        if report.servers:
+            box.setDetailedText(report.summary())
+        box.exec()
     
     def save_connection(self):
         """保存连接"""
@@ -635,6 +680,172 @@ class ConsumeMessagesDialog(QDialog):
         return text
 
 
+class ExportMessagesDialog(QDialog):
+    """导出消息对话框"""
+
+    def __init__(self, parent=None, topic: str = "", partition: int = -1):
+        super().__init__(parent)
+        self.topic = topic
+        self.partition = partition
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setWindowTitle("导出消息")
+        self.setMinimumWidth(480)
+        self.setModal(True)
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(16)
+        layout.setContentsMargins(24, 24, 24, 24)
+
+        title = QLabel(f"导出 {self.topic}")
+        title.setProperty("heading", True)
+        layout.addWidget(title)
+
+        form = QFormLayout()
+        form.setSpacing(12)
+
+        self.partition_spin = QSpinBox()
+        self.partition_spin.setRange(-1, 10000)
+        self.partition_spin.setSpecialValueText("全部")
+        self.partition_spin.setValue(self.partition)
+        form.addRow("分区:", self.partition_spin)
+
+        self.range_combo = QComboBox()
+        self.range_combo.addItem("全部消息", "all")
+        self.range_combo.addItem("Offset 范围", "offset")
+        self.range_combo.addItem("时间范围", "time")
+        self.range_combo.currentIndexChanged.connect(self.on_range_changed)
+        form.addRow("范围:", self.range_combo)
+
+        self.start_offset_spin = QSpinBox()
+        self.start_offset_spin.setRange(0, 2**31 - 1)
+        form.addRow("起始 Offset:", self.start_offset_spin)
+        self.end_offset_spin = QSpinBox()
+        self.end_offset_spin.setRange(0, 2**31 - 1)
+        self.end_offset_spin.setValue(2**31 - 1)
+        self.end_offset_spin.setToolTip("不包含该 Offset，超过分区末尾时以末尾为准")
+        form.addRow("结束 Offset:", self.end_offset_spin)
+
+        now = QDateTime.currentDateTime()
+        self.start_time_edit = QDateTimeEdit(now.addDays(-1))
+        self.start_time_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.start_time_edit.setCalendarPopup(True)
+        form.addRow("开始时间:", self.start_time_edit)
+        self.end_time_edit = QDateTimeEdit(now)
+        self.end_time_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.end_time_edit.setCalendarPopup(True)
+        form.addRow("结束时间:", self.end_time_edit)
+
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("JSON Lines (.jsonl)", "jsonl")
+        self.format_combo.addItem("CSV (.csv)", "csv")
+        self.format_combo.addItem("原始二进制 (.bin)", "binary")
+        self.format_combo.addItem("索引段文件 (.kseg，可离线浏览)", "segment")
+        self.format_combo.currentIndexChanged.connect(self.on_format_changed)
+        self.format_combo.currentIndexChanged.connect(self.update_path_suffix)
+        form.addRow("格式:", self.format_combo)
+
+        self.compression_combo = QComboBox()
+        self.compression_combo.addItem("不压缩", "none")
+        self.compression_combo.addItem("gzip", "gzip")
+        self.compression_combo.addItem("lzma (xz)", "lzma")
+        self.compression_combo.currentIndexChanged.connect(self.update_path_suffix)
+        form.addRow("压缩:", self.compression_combo)
+
+        path_layout = QHBoxLayout()
+        self.path_edit = QLineEdit()
+        self.path_edit.setText(self.topic + EXPORT_FORMATS['jsonl'])
+        path_layout.addWidget(self.path_edit)
+        browse_btn = QPushButton("浏览...")
+        browse_btn.setProperty("secondary", True)
+        browse_btn.clicked.connect(self.browse_path)
+        path_layout.addWidget(browse_btn)
+        form.addRow("保存到:", path_layout)
+
+        self.resume_check = QCheckBox("文件存在未完成的导出时从中断处继续")
+        self.resume_check.setChecked(True)
+        form.addRow("", self.resume_check)
+
+        layout.addLayout(form)
+        self.on_range_changed()
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        cancel_btn = QPushButton("取消")
+        cancel_btn.setProperty("secondary", True)
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+        ok_btn = QPushButton("开始导出")
+        ok_btn.clicked.connect(self._on_ok)
+        btn_layout.addWidget(ok_btn)
+        layout.addLayout(btn_layout)
+
+    def on_range_changed(self):
+        mode = self.range_combo.currentData()
+        for widget in (self.start_offset_spin, self.end_offset_spin):
+            widget.setEnabled(mode == "offset")
+        for widget in (self.start_time_edit, self.end_time_edit):
+            widget.setEnabled(mode == "time")
+
+    def on_format_changed(self):
+        # 段文件通过 mmap 随机访问，不能压缩
+        is_segment = self.format_combo.currentData() == "segment"
+        if is_segment:
+            self.compression_combo.setCurrentIndex(0)
+        self.compression_combo.setEnabled(not is_segment)
+
+    def _suffix(self) -> str:
+        return EXPORT_FORMATS[self.format_combo.currentData()] + COMPRESSIONS[self.compression_combo.currentData()]
+
+    def update_path_suffix(self):
+        """切换格式/压缩时同步文件扩展名"""
+        path = self.path_edit.text().strip()
+        suffixes = {f + c for f in EXPORT_FORMATS.values() for c in COMPRESSIONS.values()}
+        for suffix in sorted(suffixes, key=len, reverse=True):
+            if path.endswith(suffix):
+                path = path[:-len(suffix)]
+                break
+        self.path_edit.setText((path or self.topic) + self._suffix())
+
+    def browse_path(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出到", self.path_edit.text(), "所有文件 (*)")
+        if path:
+            self.path_edit.setText(path)
+
+    def _on_ok(self):
+        if not self.path_edit.text().strip():
+            QMessageBox.warning(self, "警告", "请选择保存路径")
+            return
+        mode = self.range_combo.currentData()
+        if mode == "offset" and self.start_offset_spin.value() >= self.end_offset_spin.value():
+            QMessageBox.warning(self, "警告", "结束 Offset 必须大于起始 Offset")
+            return
+        if mode == "time" and self.start_time_edit.dateTime() >= self.end_time_edit.dateTime():
+            QMessageBox.warning(self, "警告", "结束时间必须晚于开始时间")
+            return
+        self.accept()
+
+    def get_export_options(self) -> dict:
+        """MessageExporter 的参数"""
+        mode = self.range_combo.currentData()
+        partition = self.partition_spin.value()
+        options = {
+            'path': self.path_edit.text().strip(),
+            'fmt': self.format_combo.currentData(),
+            'compression': self.compression_combo.currentData(),
+            'partitions': None if partition < 0 else [partition],
+            'resume': self.resume_check.isChecked(),
+        }
+        if mode == "offset":
+            options['start_offset'] = self.start_offset_spin.value()
+            options['end_offset'] = self.end_offset_spin.value()
+        elif mode == "time":
+            options['start_time'] = self.start_time_edit.dateTime().toPyDateTime()
+            options['end_time'] = self.end_time_edit.dateTime().toPyDateTime()
+        return options
+
+
 class MessageProducerDialog(QDialog):
     """消息发送对话框"""
     
@@ -943,3 +1154,623 @@ class MessageDetailDialog(QDialog):
         )
         self.accept()
 
+
+class DiagnosticsDialog(QDialog):
+    """诊断信息对话框（非模态，打开期间自动刷新）"""
+
+    REFRESH_INTERVAL_MS = 2000
+
+    def __init__(self, parent=None, registry: MetricsRegistry = None, watchdog=None, profiler=None, memory=None):
+        super().__init__(parent)
+        self.registry = registry or METRICS
+        self.watchdog = watchdog
+        self.profiler = profiler
+        self.memory = memory
+        self.stall_events = []
+        self.profile_results = []
+        self.setup_ui()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def setup_ui(self):
+        self.setWindowTitle("诊断信息")
+        self.setMinimumSize(900, 560)
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(16, 16, 16, 16)
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self._create_metrics_tab(), "📊 指标")
+        if self.watchdog is not None:
+            self.tabs.addTab(self._create_stalls_tab(), "🐢 界面卡顿")
+        if self.profiler is not None:
+            self.tabs.addTab(self._create_profiler_tab(), "🔬 性能分析")
+        if self.memory is not None:
+            self.tabs.addTab(self._create_memory_tab(), "🧠 内存")
+        layout.addWidget(self.tabs)
+
+        btn_layout = QHBoxLayout()
+        self.auto_refresh_check = QCheckBox("自动刷新")
+        self.auto_refresh_check.setChecked(True)
+        self.auto_refresh_check.toggled.connect(self.on_auto_refresh_toggled)
+        btn_layout.addWidget(self.auto_refresh_check)
+        btn_layout.addStretch()
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.setProperty("secondary", True)
+        refresh_btn.clicked.connect(self.refresh)
+        btn_layout.addWidget(refresh_btn)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+    def _create_metrics_tab(self) -> QWidget:
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 8, 0, 0)
+
+        self.metrics_summary_label = QLabel("")
+        self.metrics_summary_label.setObjectName("statsCardTitle")
+        layout.addWidget(self.metrics_summary_label)
+
+        self.metrics_table = QTableWidget()
+        self.metrics_table.setColumnCount(10)
+        self.metrics_table.setHorizontalHeaderLabels([
+            "类型", "集群", "名称", "次数", "错误", "平均(ms)", "P50(ms)", "P95(ms)", "P99(ms)", "最大(ms)"
+        ])
+        self.metrics_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.metrics_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.metrics_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.metrics_table.setSortingEnabled(True)
+        self.metrics_table.verticalHeader().setVisible(False)
+        layout.addWidget(self.metrics_table)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        reset_btn = QPushButton("清零")
+        reset_btn.setProperty("secondary", True)
+        reset_btn.clicked.connect(self.reset_metrics)
+        btn_layout.addWidget(reset_btn)
+        json_btn = QPushButton("导出 JSON")
+        json_btn.setProperty("secondary", True)
+        json_btn.clicked.connect(lambda: self.export_metrics("json"))
+        btn_layout.addWidget(json_btn)
+        prom_btn = QPushButton("导出 Prometheus")
+        prom_btn.setProperty("secondary", True)
+        prom_btn.clicked.connect(lambda: self.export_metrics("prometheus"))
+        btn_layout.addWidget(prom_btn)
+        layout.addLayout(btn_layout)
+        return widget
+
+    def _create_stalls_tab(self) -> QWidget:
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 8, 0, 0)
+
+        self.latency_label = QLabel("")
+        self.latency_label.setObjectName("statsCardTitle")
+        layout.addWidget(self.latency_label)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.stalls_table = QTableWidget()
+        self.stalls_table.setColumnCount(3)
+        self.stalls_table.setHorizontalHeaderLabels(["时间", "时长(ms)", "位置"])
+        self.stalls_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.stalls_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.stalls_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.stalls_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.stalls_table.verticalHeader().setVisible(False)
+        self.stalls_table.currentCellChanged.connect(self.on_stall_selected)
+        splitter.addWidget(self.stalls_table)
+
+        self.stack_edit = QTextEdit()
+        self.stack_edit.setReadOnly(True)
+        self.stack_edit.setFont(QFont("Consolas", 9))
+        self.stack_edit.setPlaceholderText("选择一次卡顿查看主线程调用栈")
+        splitter.addWidget(self.stack_edit)
+        layout.addWidget(splitter)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        clear_btn = QPushButton("清空")
+        clear_btn.setProperty("secondary", True)
+        clear_btn.clicked.connect(self.clear_stalls)
+        btn_layout.addWidget(clear_btn)
+        layout.addLayout(btn_layout)
+        return widget
+
+    def _create_profiler_tab(self) -> QWidget:
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 8, 0, 0)
+
+        arm_layout = QHBoxLayout()
+        arm_layout.addWidget(QLabel("分析接下来的"))
+        self.profile_count_spin = QSpinBox()
+        self.profile_count_spin.setRange(1, 100)
+        arm_layout.addWidget(self.profile_count_spin)
+        arm_layout.addWidget(QLabel("个后台任务"))
+        arm_btn = QPushButton("开始")
+        arm_btn.clicked.connect(lambda: self.arm_profiler(self.profile_count_spin.value()))
+        arm_layout.addWidget(arm_btn)
+        cancel_btn = QPushButton("取消")
+        cancel_btn.setProperty("secondary", True)
+        cancel_btn.clicked.connect(lambda: self.arm_profiler(0))
+        arm_layout.addWidget(cancel_btn)
+        self.profiler_status_label = QLabel("")
+        self.profiler_status_label.setObjectName("statsCardTitle")
+        arm_layout.addWidget(self.profiler_status_label)
+        arm_layout.addStretch()
+        layout.addLayout(arm_layout)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.profiles_table = QTableWidget()
+        self.profiles_table.setColumnCount(4)
+        self.profiles_table.setHorizontalHeaderLabels(["时间", "操作", "耗时(ms)", "采样数"])
+        self.profiles_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.profiles_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.profiles_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.profiles_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.profiles_table.verticalHeader().setVisible(False)
+        self.profiles_table.currentCellChanged.connect(self.on_profile_selected)
+        splitter.addWidget(self.profiles_table)
+
+        self.functions_table = QTableWidget()
+        self.functions_table.setColumnCount(4)
+        self.functions_table.setHorizontalHeaderLabels(["函数", "调用次数", "自身(ms)", "累计(ms)"])
+        self.functions_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.functions_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.functions_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.functions_table.setSortingEnabled(True)
+        self.functions_table.verticalHeader().setVisible(False)
+        splitter.addWidget(self.functions_table)
+        layout.addWidget(splitter)
+
+        self.profile_path_label = QLabel("")
+        self.profile_path_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.profile_path_label)
+        return widget
+
+    def _create_memory_tab(self) -> QWidget:
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 8, 0, 0)
+
+        self.memory_summary_label = QLabel("")
+        self.memory_summary_label.setObjectName("statsCardTitle")
+        layout.addWidget(self.memory_summary_label)
+
+        budget_layout = QHBoxLayout()
+        budget_layout.addWidget(QLabel("内存预算:"))
+        self.budget_spin = QSpinBox()
+        self.budget_spin.setRange(0, 1024 * 1024)
+        self.budget_spin.setSuffix(" MB")
+        self.budget_spin.setSpecialValueText("不限制")
+        self.budget_spin.setValue(self.memory.budget_bytes // (1024 * 1024))
+        budget_layout.addWidget(self.budget_spin)
+        apply_btn = QPushButton("应用")
+        apply_btn.setProperty("secondary", True)
+        apply_btn.clicked.connect(self.apply_memory_budget)
+        budget_layout.addWidget(apply_btn)
+        enforce_btn = QPushButton("立即回收")
+        enforce_btn.setProperty("secondary", True)
+        enforce_btn.clicked.connect(self.enforce_memory_budget)
+        budget_layout.addWidget(enforce_btn)
+        budget_layout.addStretch()
+        layout.addLayout(budget_layout)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.memory_table = QTableWidget()
+        self.memory_table.setColumnCount(5)
+        self.memory_table.setHorizontalHeaderLabels(["来源", "类别", "估算内存", "条目数", "可回收"])
+        self.memory_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.memory_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.memory_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.memory_table.verticalHeader().setVisible(False)
+        splitter.addWidget(self.memory_table)
+
+        trace_widget = QWidget()
+        trace_layout = QVBoxLayout(trace_widget)
+        trace_layout.setContentsMargins(0, 0, 0, 0)
+        trace_btn_layout = QHBoxLayout()
+        self.trace_btn = QPushButton("开始跟踪分配")
+        self.trace_btn.setProperty("secondary", True)
+        self.trace_btn.clicked.connect(self.toggle_memory_tracing)
+        trace_btn_layout.addWidget(self.trace_btn)
+        self.snapshot_btn = QPushButton("快照对比")
+        self.snapshot_btn.setProperty("secondary", True)
+        self.snapshot_btn.clicked.connect(self.take_memory_snapshot)
+        trace_btn_layout.addWidget(self.snapshot_btn)
+        self.trace_label = QLabel("")
+        trace_btn_layout.addWidget(self.trace_label)
+        trace_btn_layout.addStretch()
+        trace_layout.addLayout(trace_btn_layout)
+
+        self.snapshot_table = QTableWidget()
+        self.snapshot_table.setColumnCount(5)
+        self.snapshot_table.setHorizontalHeaderLabels(["代码位置", "变化", "当前大小", "对象数变化", "对象数"])
+        self.snapshot_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.snapshot_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.snapshot_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.snapshot_table.verticalHeader().setVisible(False)
+        trace_layout.addWidget(self.snapshot_table)
+        splitter.addWidget(trace_widget)
+        layout.addWidget(splitter)
+        return widget
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        if self.auto_refresh_check.isChecked():
+            self.refresh_timer.start(self.REFRESH_INTERVAL_MS)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def on_auto_refresh_toggled(self, checked: bool):
+        if checked:
+            self.refresh_timer.start(self.REFRESH_INTERVAL_MS)
+        else:
+            self.refresh_timer.stop()
+
+    def refresh(self):
+        self.refresh_metrics()
+        if self.watchdog is not None:
+            self.refresh_stalls()
+        if self.profiler is not None:
+            self.refresh_profiles()
+        if self.memory is not None:
+            self.refresh_memory()
+
+    def refresh_metrics(self):
+        snapshot = self.registry.snapshot()
+        errors = {}
+        totals = {}
+        for counter in snapshot['counters']:
+            labels = counter['labels']
+            if counter['name'] in ('kafka_client_call_errors_total', 'kafka_client_request_errors_total'):
+                errors[(labels.get('cluster'), labels.get('method') or labels.get('api'))] = counter['value']
+            else:
+                totals[counter['name']] = totals.get(counter['name'], 0) + counter['value']
+
+        histograms = [h for h in snapshot['histograms'] if h['name'].startswith('kafka_client_')]
+        self.metrics_table.setSortingEnabled(False)
+        self.metrics_table.setRowCount(len(histograms))
+        for row, h in enumerate(histograms):
+            labels = h['labels']
+            name = labels.get('method') or labels.get('api', '')
+            kind = "调用" if h['name'] == 'kafka_client_call_seconds' else "请求"
+            values = [
+                kind, labels.get('cluster', ''), name, h['count'],
+                int(errors.get((labels.get('cluster'), name), 0)),
+                h['sum'] / h['count'] * 1000 if h['count'] else 0,
+                h['p50'] * 1000, h['p95'] * 1000, h['p99'] * 1000, h['max'] * 1000,
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    item.setData(Qt.ItemDataRole.DisplayRole, round(value, 2))
+                else:
+                    item.setData(Qt.ItemDataRole.DisplayRole, value)
+                self.metrics_table.setItem(row, col, item)
+        self.metrics_table.setSortingEnabled(True)
+
+        self.metrics_summary_label.setText(
+            f"拉取消息 {int(totals.get('kafka_client_fetched_messages_total', 0)):,} 条 / "
+            f"{format_bytes(totals.get('kafka_client_fetched_bytes_total', 0))} | "
+            f"创建 Consumer {int(totals.get('kafka_client_consumers_created_total', 0)):,} 个"
+        )
+
+    def reset_metrics(self):
+        self.registry.reset()
+        self.refresh_metrics()
+
+    def refresh_stalls(self):
+        stats = self.watchdog.latency_stats()
+        self.latency_label.setText(
+            f"事件循环延迟: 当前 {stats['last_ms']:.1f}ms / 平均 {stats['avg_ms']:.1f}ms / "
+            f"最大 {stats['max_ms']:.1f}ms | 卡顿阈值 {self.watchdog.threshold * 1000:.0f}ms"
+        )
+        events = self.watchdog.recent_events()
+        if len(events) == len(self.stall_events) and events[-1:] == self.stall_events[-1:]:
+            return
+        # 最新的排在最前
+        self.stall_events = list(reversed(events))
+        self.stalls_table.setRowCount(len(self.stall_events))
+        for row, stall in enumerate(self.stall_events):
+            self.stalls_table.setItem(row, 0, QTableWidgetItem(stall.started_at.strftime("%H:%M:%S.%f")[:-3]))
+            duration_item = QTableWidgetItem()
+            duration_item.setData(Qt.ItemDataRole.DisplayRole, round(stall.duration * 1000))
+            self.stalls_table.setItem(row, 1, duration_item)
+            self.stalls_table.setItem(row, 2, QTableWidgetItem(stall.location))
+
+    def on_stall_selected(self, row: int, *_):
+        if 0 <= row < len(self.stall_events):
+            self.stack_edit.setPlainText(self.stall_events[row].format_stack())
+        else:
+            self.stack_edit.clear()
+
+    def refresh_memory(self):
+        usages = self.memory.report()
+        self.memory_table.setRowCount(len(usages))
+        for row, usage in enumerate(usages):
+            values = [
+                usage.name, usage.category,
+                format_bytes(usage.bytes) if usage.bytes >= 0 else "-",
+                f"{usage.items:,}", "是" if usage.evictable else "",
+            ]
+            for col, value in enumerate(values):
+                self.memory_table.setItem(row, col, QTableWidgetItem(value))
+
+        process = process_memory()
+        accounted = sum(u.bytes for u in usages if u.bytes > 0)
+        budget = self.memory.budget_bytes
+        text = f"已统计 {format_bytes(accounted)}"
+        if budget:
+            text += f" / 预算 {format_bytes(budget)}"
+        if process['rss']:
+            text += f" | 进程常驻 {format_bytes(process['rss'])}"
+        if process['peak']:
+            text += f"（峰值 {format_bytes(process['peak'])}）"
+        self.memory_summary_label.setText(text)
+
+        tracing = self.memory.tracing
+        self.trace_btn.setText("停止跟踪分配" if tracing else "开始跟踪分配")
+        self.snapshot_btn.setEnabled(tracing)
+        if tracing:
+            current, peak = self.memory.traced_memory()
+            self.trace_label.setText(f"已跟踪 {format_bytes(current)}（峰值 {format_bytes(peak)}）")
+        else:
+            self.trace_label.setText("跟踪会明显拖慢程序，定位完成后请停止")
+
+    def apply_memory_budget(self):
+        self.memory.budget_bytes = self.budget_spin.value() * 1024 * 1024
+        settings = QSettings("KafkaExplorer", "KafkaExplorer")
+        settings.setValue("memory/budget_mb", self.budget_spin.value())
+        self.enforce_memory_budget()
+
+    def enforce_memory_budget(self):
+        freed = self.memory.enforce()
+        self.refresh_memory()
+        if freed:
+            self.trace_label.setText(f"已释放 {format_bytes(freed)}")
+
+    def toggle_memory_tracing(self):
+        if self.memory.tracing:
+            self.memory.stop_tracing()
+            self.snapshot_table.setRowCount(0)
+        else:
+            self.memory.start_tracing()
+        self.refresh_memory()
+
+    def take_memory_snapshot(self):
+        """与上一次快照对比，首次显示当前分配最多的代码行"""
+        try:
+            rows = self.memory.snapshot_diff()
+        except RuntimeError as e:
+            QMessageBox.warning(self, "警告", str(e))
+            return
+        self.snapshot_table.setRowCount(len(rows))
+        for r, stat in enumerate(rows):
+            sign = "+" if stat['size_diff'] > 0 else ("-" if stat['size_diff'] < 0 else "")
+            values = [
+                stat['location'], f"{sign}{format_bytes(abs(stat['size_diff']))}", format_bytes(stat['size']),
+                f"{stat['count_diff']:+,}", f"{stat['count']:,}",
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == 0:
+                    item.setToolTip(stat['path'])
+                self.snapshot_table.setItem(r, col, item)
+
+    def arm_profiler(self, count: int):
+        self.profiler.arm(count)
+        self.refresh_profiles()
+
+    def refresh_profiles(self):
+        remaining = self.profiler.remaining
+        self.profiler_status_label.setText(f"等待 {remaining} 个任务" if remaining else "")
+        results = self.profiler.recent_results()
+        if len(results) == len(self.profile_results) and results[-1:] == self.profile_results[-1:]:
+            return
+        self.profile_results = list(reversed(results))
+        self.profiles_table.setRowCount(len(self.profile_results))
+        for row, result in enumerate(self.profile_results):
+            name = result.name if not result.error else f"{result.name}（失败）"
+            self.profiles_table.setItem(row, 0, QTableWidgetItem(result.started_at.strftime("%H:%M:%S")))
+            self.profiles_table.setItem(row, 1, QTableWidgetItem(name))
+            for col, value in ((2, round(result.duration * 1000, 1)), (3, result.samples)):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                self.profiles_table.setItem(row, col, item)
+
+    def on_profile_selected(self, row: int, *_):
+        self.functions_table.setSortingEnabled(False)
+        if not 0 <= row < len(self.profile_results):
+            self.functions_table.setRowCount(0)
+            self.profile_path_label.clear()
+            return
+        result = self.profile_results[row]
+        try:
+            functions = result.top_functions()
+        except OSError as e:
+            functions = []
+            self.profile_path_label.setText(f"读取失败: {e}")
+        else:
+            self.profile_path_label.setText(f"{result.pstats_path}\n{result.collapsed_path}")
+        self.functions_table.setRowCount(len(functions))
+        for r, func in enumerate(functions):
+            values = [func['function'], func['calls'], round(func['tottime'] * 1000, 2), round(func['cumtime'] * 1000, 2)]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                self.functions_table.setItem(r, col, item)
+        self.functions_table.sortItems(2, Qt.SortOrder.DescendingOrder)
+        self.functions_table.setSortingEnabled(True)
+
+    def clear_stalls(self):
+        self.watchdog.clear()
+        self.stall_events = []
+        self.stalls_table.setRowCount(0)
+        self.stack_edit.clear()
+        self.refresh_stalls()
+
+    def export_metrics(self, fmt: str):
+        """导出指标快照"""
+        if fmt == "json":
+            path, _ = QFileDialog.getSaveFileName(self, "导出指标", "metrics.json", "JSON (*.json)")
+            content = self.registry.to_json()
+        else:
+            path, _ = QFileDialog.getSaveFileName(self, "导出指标", "metrics.prom", "Prometheus (*.prom *.txt)")
+            content = self.registry.to_prometheus()
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"导出失败:\n{e}")
+
+
+class AlertRulesDialog(QDialog):
+    """lag 告警规则编辑对话框"""
+
+    COLUMNS = ["启用", "名称", "集群", "消费者组", "Topic", "指标", "阈值", "恢复阈值"]
+
+    def __init__(self, parent=None, rules: Optional[list] = None, firing: Optional[list] = None):
+        super().__init__(parent)
+        self.rules = []
+        self.setup_ui()
+        for rule in rules or []:
+            self.add_rule(rule)
+        self.load_firing(firing or [])
+
+    def setup_ui(self):
+        self.setWindowTitle("告警规则")
+        self.setMinimumSize(860, 480)
+        self.setModal(True)
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(16, 16, 16, 16)
+
+        tip = QLabel(
+            "集群 / 消费者组 / Topic 支持通配符（如 order-*）。每个匹配的组单独计算：Lag 为匹配分区之和，"
+            "时间延迟为其中最大的估算值。恢复阈值留空时为阈值的 80%。"
+        )
+        tip.setWordWrap(True)
+        layout.addWidget(tip)
+
+        self.tabs = QTabWidget()
+
+        rules_widget = QWidget()
+        rules_layout = QVBoxLayout(rules_widget)
+        rules_layout.setContentsMargins(0, 8, 0, 0)
+        self.rules_table = QTableWidget(0, len(self.COLUMNS))
+        self.rules_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.rules_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.rules_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.rules_table.verticalHeader().setVisible(False)
+        self.rules_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        rules_layout.addWidget(self.rules_table)
+
+        rule_btn_layout = QHBoxLayout()
+        add_btn = QPushButton("添加")
+        add_btn.setProperty("secondary", True)
+        add_btn.clicked.connect(lambda: self.add_rule())
+        rule_btn_layout.addWidget(add_btn)
+        remove_btn = QPushButton("删除")
+        remove_btn.setProperty("secondary", True)
+        remove_btn.clicked.connect(self.remove_selected)
+        rule_btn_layout.addWidget(remove_btn)
+        rule_btn_layout.addStretch()
+        rules_layout.addLayout(rule_btn_layout)
+        self.tabs.addTab(rules_widget, "📏 规则")
+
+        self.firing_table = QTableWidget(0, 3)
+        self.firing_table.setHorizontalHeaderLabels(["集群", "消费者组", "规则"])
+        self.firing_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.firing_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.firing_table.verticalHeader().setVisible(False)
+        self.tabs.addTab(self.firing_table, "🔔 当前告警")
+        layout.addWidget(self.tabs)
+
+        button_box = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Save | QDialogButtonBox.StandardButton.Cancel
+        )
+        button_box.accepted.connect(self.save_rules)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def add_rule(self, rule: Optional[AlertRule] = None):
+        rule = rule or AlertRule(name=f"规则 {self.rules_table.rowCount() + 1}", threshold=10000)
+        row = self.rules_table.rowCount()
+        self.rules_table.insertRow(row)
+
+        enabled_item = QTableWidgetItem()
+        enabled_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
+        enabled_item.setCheckState(Qt.CheckState.Checked if rule.enabled else Qt.CheckState.Unchecked)
+        self.rules_table.setItem(row, 0, enabled_item)
+        clear = "" if rule.clear_threshold is None else f"{rule.clear_threshold:g}"
+        for col, text in ((1, rule.name), (2, rule.cluster), (3, rule.group_pattern),
+                          (4, rule.topic_pattern), (6, f"{rule.threshold:g}"), (7, clear)):
+            self.rules_table.setItem(row, col, QTableWidgetItem(text))
+
+        metric_combo = QComboBox()
+        for key, label in ALERT_METRICS.items():
+            metric_combo.addItem(label, key)
+        metric_combo.setCurrentIndex(max(0, metric_combo.findData(rule.metric)))
+        self.rules_table.setCellWidget(row, 5, metric_combo)
+
+    def remove_selected(self):
+        rows = sorted({index.row() for index in self.rules_table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.rules_table.removeRow(row)
+
+    def load_firing(self, firing: list):
+        """firing: [(集群, 组, AlertRule)]"""
+        self.firing_table.setRowCount(len(firing))
+        for row, (cluster, group_id, rule) in enumerate(firing):
+            for col, text in enumerate((cluster, group_id, rule.name)):
+                self.firing_table.setItem(row, col, QTableWidgetItem(text))
+        self.tabs.setTabText(1, f"🔔 当前告警 ({len(firing)})")
+
+    def _text(self, row: int, col: int) -> str:
+        item = self.rules_table.item(row, col)
+        return item.text().strip() if item else ""
+
+    def save_rules(self):
+        """校验并保存"""
+        rules = []
+        for row in range(self.rules_table.rowCount()):
+            name = self._text(row, 1)
+            if not name:
+                QMessageBox.warning(self, "警告", f"第 {row + 1} 条规则缺少名称")
+                return
+            try:
+                threshold = float(self._text(row, 6))
+                clear = self._text(row, 7)
+                clear_threshold = float(clear) if clear else None
+            except ValueError:
+                QMessageBox.warning(self, "警告", f"{name}: 阈值必须是数字")
+                return
+            if clear_threshold is not None and clear_threshold > threshold:
+                QMessageBox.warning(self, "警告", f"{name}: 恢复阈值不能大于阈值")
+                return
+            rules.append(AlertRule(
+                name=name,
+                threshold=threshold,
+                metric=self.rules_table.cellWidget(row, 5).currentData(),
+                group_pattern=self._text(row, 3) or "*",
+                topic_pattern=self._text(row, 4) or "*",
+                cluster=self._text(row, 2) or "*",
+                clear_threshold=clear_threshold,
+                enabled=self.rules_table.item(row, 0).checkState() == Qt.CheckState.Checked,
+            ))
+        self.rules = rules
+        self.accept()
+
+    def get_rules(self) -> list:
+        return self.rules
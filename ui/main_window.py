@@ -1,21 +1,16 @@
 """主窗口"""
 
+import bisect
+import hashlib
 import json
 import os
 import sys
 import logging
+import threading
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List
-
-
-def get_app_dir() -> Path:
-    """获取应用程序目录（支持打包后的exe和直接运行）"""
-    if getattr(sys, 'frozen', False):
-        # 打包成 exe 后
-        return Path(sys.executable).parent
-    else:
-        # 直接运行 Python 脚本
-        return Path(__file__).parent.parent
+from typing import Optional, Dict, List, Set, Tuple
 
 
 def get_resources_dir() -> Path:
@@ -29,24 +24,40 @@ from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QSplitter, QTreeWidget, QTreeWidgetItem, QStackedWidget,
     QToolBar, QStatusBar, QMessageBox, QMenu, QApplication,
-    QLabel, QProgressDialog, QLineEdit
+    QLabel, QProgressDialog, QLineEdit, QDialog, QPushButton, QSystemTrayIcon
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSettings, QSize
-from PyQt6.QtGui import QAction, QIcon, QFont
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSettings, QSize, QTimer
+from PyQt6.QtGui import QAction, QIcon, QFont, QColor, QBrush
 
 from kafka_client import KafkaClusterClient, ClusterConnection
-from kafka_client.models import TopicInfo, ConsumerGroupInfo, KafkaMessage
+from kafka_client.models import (
+    TopicInfo, ConsumerGroupInfo, KafkaMessage, GroupLagRate, GroupOffsetsSnapshot, TopicOffsetsSnapshot,
+    TopicThroughput
+)
+from kafka_client.alerts import AlertEvaluator, AlertLog
+from kafka_client.export import MessageExporter, ExportProgress, format_bytes
+from kafka_client.cache import MessageRangeCache
+from kafka_client.config import (
+    get_app_dir, connections_path, load_connections, save_connections, load_alert_rules, save_alert_rules
+)
+from kafka_client.lag import OffsetSampler, LagRateTracker, describe_rate, format_eta, format_rate
+from kafka_client.lagstore import LagHistoryStore
+from kafka_client.throughput import TopicOffsetSampler, ThroughputTracker, sparkline
 
 from .dialogs import (
     ConnectionDialog, CreateTopicDialog, AddPartitionsDialog,
     ResetOffsetDialog, CreateConsumerGroupDialog, ConsumeMessagesDialog,
-    MessageProducerDialog,
+    MessageProducerDialog, ExportMessagesDialog, DiagnosticsDialog, AlertRulesDialog,
 )
 from .panels import (
     TopicDetailPanel, ConsumerGroupPanel, MessageBrowserPanel,
-    WelcomePanel, LoadingOverlay
+    WelcomePanel, LoadingOverlay, LagDashboardPanel
 )
 from .styles import THEMES
+from .watchdog import UIWatchdog, StallEvent
+from .profiler import TASK_PROFILER
+from .memory import MemoryAccountant
+from .aio import AsyncRunner
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +66,7 @@ class WorkerThread(QThread):
     """后台工作线程"""
     finished = pyqtSignal(object)
     error = pyqtSignal(str)
+    progress = pyqtSignal(object)
     
     def __init__(self, func, *args, **kwargs):
         super().__init__()
@@ -65,7 +77,10 @@ class WorkerThread(QThread):
     
     def run(self):
         try:
-            result = self.func(*self.args, **self.kwargs)
+            if TASK_PROFILER.take():
+                result = TASK_PROFILER.run(self.func, *self.args, **self.kwargs)
+            else:
+                result = self.func(*self.args, **self.kwargs)
             if not self._stop_requested:
                 self.finished.emit(result)
         except Exception as e:
@@ -84,11 +99,28 @@ class WorkerThread(QThread):
 class MainWindow(QMainWindow):
     """主窗口"""
     
-    def __init__(self):
+    # 后台采集线程算出新的速率后通知主线程（参数为集群名称）
+    lag_rates_updated = pyqtSignal(str)
+    # 告警触发或恢复（参数为 AlertEvent 列表）
+    alerts_changed = pyqtSignal(list)
+    # 后台采集算出新的 Topic 生产速率（参数为集群名称）
+    throughput_updated = pyqtSignal(str)
+    
+    def __init__(self, startup_timer=None):
         super().__init__()
+        # 启动耗时统计（main.py 的 StartupTimer），为 None 时不记录
+        self.startup_timer = startup_timer
+        self._startup_finished = False
         
         self.connections: Dict[str, ClusterConnection] = {}
         self.clients: Dict[str, KafkaClusterClient] = {}
+        # 正在连接中的集群，避免重复发起连接
+        self.connecting: Set[str] = set()
+        # 后台并行连接：排队中的集群与正在连接的集群
+        self.connect_queue: List[str] = []
+        self.background_connects: Set[str] = set()
+        # 导航树索引：(连接, "topic"/"group") -> (有序名称列表, 名称 -> 树节点)
+        self.tree_index: Dict[Tuple[str, str], Tuple[List[str], Dict[str, QTreeWidgetItem]]] = {}
         self.current_client: Optional[KafkaClusterClient] = None
         self.current_connection_name: Optional[str] = None
         
@@ -97,30 +129,109 @@ class MainWindow(QMainWindow):
         
         self.settings = QSettings("KafkaExplorer", "KafkaExplorer")
         # 配置文件放在程序运行目录
-        self.config_path = get_app_dir() / "config" / "connections.json"
+        self.config_path = connections_path()
+        
+        # 所有集群共享的消息区间缓存，可选持久化到程序目录
+        self.message_cache = MessageRangeCache(disk_dir=self._message_cache_dir())
+        self.diagnostics_dialog: Optional[DiagnosticsDialog] = None
+        
+        # 界面卡顿监控，阈值可在配置中调整
+        self.watchdog = UIWatchdog(self, threshold_ms=int(self.settings.value("diagnostics/stall_threshold_ms", 250)))
+        self.watchdog.stall_detected.connect(self.on_ui_stall)
+        TASK_PROFILER.output_dir = str(get_app_dir() / "profiles")
+        
+        # 内存预算（MB，0 表示不限制）
+        self.memory = MemoryAccountant(int(self.settings.value("memory/budget_mb", 1024)) * 1024 * 1024)
+        
+        # 批量并发请求使用的 asyncio 事件循环，首次使用时启动
+        self.async_runner = AsyncRunner(self)
+        
+        # 消费者组位点定期采集（间隔秒数，0 表示关闭），写入 lag 历史并计算消费 / 生产速率
+        self.offset_sampler = OffsetSampler(interval=float(self.settings.value("lag/sample_interval_s", 30)))
+        self.lag_history: Optional[LagHistoryStore] = None
+        self.lag_rates = LagRateTracker()
+        # 集群 -> 最近一次位点快照（Lag 总览使用）
+        self.latest_snapshots: Dict[str, GroupOffsetsSnapshot] = {}
+        self.offset_sampler.add_listener(self._on_offsets_sampled)
+        self.lag_rates_updated.connect(self.on_lag_rates_updated)
+        
+        # lag 告警（在采集线程中随每次快照增量评估）
+        try:
+            alert_rules = load_alert_rules()
+        except Exception as e:
+            logger.warning(f"读取告警规则失败: {e}")
+            alert_rules = []
+        self.alerts = AlertEvaluator(alert_rules, rate_tracker=self.lag_rates)
+        self.alert_log = AlertLog(str(get_app_dir() / "logs" / "alerts.log"))
+        self.alerts_changed.connect(self.on_alerts_changed)
+        
+        # Topic 生产速率（定期批量采集末尾位点，间隔秒数，0 表示关闭）；可只采集打开过详情的 Topic
+        self.throughput_sampler = TopicOffsetSampler(
+            interval=float(self.settings.value("throughput/sample_interval_s", 15))
+        )
+        self.throughput = ThroughputTracker()
+        self.watched_topics: Dict[str, Set[str]] = {}
+        self.throughput_sampler.add_listener(self._on_topic_offsets_sampled)
+        self.throughput_updated.connect(self.on_throughput_updated)
         
         self.setup_ui()
-        self.load_connections()
         self.restore_state()
+        self._mark_startup("主窗口界面")
+    
+    def _mark_startup(self, stage: str):
+        if self.startup_timer is not None:
+            self.startup_timer.mark(stage)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._startup_finished:
+            self._startup_finished = True
+            # 窗口先显示出来，连接列表与后台监控在首帧之后再初始化
+            QTimer.singleShot(0, self.finish_startup)
+    
+    def finish_startup(self):
+        """首帧之后的初始化"""
+        self._mark_startup("首帧")
+        self.load_connections()
+        self.register_memory_sources()
+        self.watchdog.start()
+        self.start_lag_history()
+        self.throughput_sampler.start()
+        self._mark_startup("加载连接")
+        self.auto_connect_clusters()
+        if self.startup_timer is not None:
+            self.startup_timer.report()
     
     def setup_ui(self):
         """设置UI"""
         self.setWindowTitle("Kafka Explorer")
         self.setMinimumSize(1200, 800)
         
-        # 设置应用图标
-        from resources import create_kafka_icon
-        self.setWindowIcon(create_kafka_icon())
+        # 设置应用图标（main.py 已为应用设置过时直接复用）
+        app_icon = QApplication.windowIcon()
+        if app_icon.isNull():
+            from resources import create_app_icon
+            app_icon = create_app_icon()
+        self.setWindowIcon(app_icon)
+        
+        # 托盘图标用于弹出告警通知，系统不支持托盘时只在状态栏提示
+        self.tray_icon: Optional[QSystemTrayIcon] = None
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray_icon = QSystemTrayIcon(app_icon, self)
+            self.tray_icon.setToolTip("Kafka Explorer")
+            self.tray_icon.show()
         
         # 应用主题
         self.current_theme = self.settings.value("theme", "dark")
         self.apply_theme(self.current_theme)
+        self._mark_startup("样式表")
         
         # 创建菜单栏
         self.create_menus()
         
         # 创建工具栏
         self.create_toolbar()
+        self._mark_startup("菜单与工具栏")
         
         # 创建主布局
         central_widget = QWidget()
@@ -175,26 +286,11 @@ class MainWindow(QMainWindow):
         self.welcome_panel.add_connection_clicked.connect(self.add_connection)
         self.content_stack.addWidget(self.welcome_panel)
         
-        # Topic详情面板
-        self.topic_panel = TopicDetailPanel()
-        self.topic_panel.refresh_btn.clicked.connect(self.refresh_current_topic)
-        self.topic_panel.message_browse_requested.connect(self.browse_topic_messages)
-        self.topic_panel.send_message_requested.connect(self.show_producer_dialog)
-        self.topic_panel.add_partitions_requested.connect(self.on_add_partitions_from_panel)
-        self.content_stack.addWidget(self.topic_panel)
-        
-        # Consumer Group面板
-        self.consumer_panel = ConsumerGroupPanel()
-        self.consumer_panel.refresh_btn.clicked.connect(self.refresh_current_group)
-        self.consumer_panel.reset_offsets_requested.connect(self.on_reset_offsets_requested)
-        self.content_stack.addWidget(self.consumer_panel)
-        
-        # 消息浏览器面板
-        self.message_panel = MessageBrowserPanel()
-        self.message_panel.refresh_requested.connect(self.fetch_messages)
-        self.message_panel.resend_message_requested.connect(self.resend_message)
-        self.message_panel.check_consumption_requested.connect(self.check_message_consumption)
-        self.content_stack.addWidget(self.message_panel)
+        # Topic / Consumer Group / 消息浏览器面板在首次使用时才创建，见 topic_panel 等属性
+        self._topic_panel: Optional[TopicDetailPanel] = None
+        self._consumer_panel: Optional[ConsumerGroupPanel] = None
+        self._message_panel: Optional[MessageBrowserPanel] = None
+        self._dashboard_panel: Optional[LagDashboardPanel] = None
         
         splitter.addWidget(right_container)
         splitter.setSizes([300, 900])
@@ -212,6 +308,68 @@ class MainWindow(QMainWindow):
         self.connection_label = QLabel("未连接")
         self.connection_label.setStyleSheet("color: #9ca3af; padding: 0 16px;")
         self.status_bar.addPermanentWidget(self.connection_label)
+        
+        # 状态栏告警数量（点击打开告警规则）
+        self.alert_button = QPushButton()
+        self.alert_button.setFlat(True)
+        self.alert_button.setStyleSheet("color: #ef4444; padding: 0 8px;")
+        self.alert_button.clicked.connect(self.show_alert_rules_dialog)
+        self.alert_button.setVisible(False)
+        self.status_bar.addPermanentWidget(self.alert_button)
+    
+    @property
+    def topic_panel(self) -> TopicDetailPanel:
+        """Topic详情面板"""
+        if self._topic_panel is None:
+            self._topic_panel = TopicDetailPanel()
+            self._topic_panel.refresh_btn.clicked.connect(self.refresh_current_topic)
+            self._topic_panel.message_browse_requested.connect(self.browse_topic_messages)
+            self._topic_panel.send_message_requested.connect(self.show_producer_dialog)
+            self._topic_panel.add_partitions_requested.connect(self.on_add_partitions_from_panel)
+            self._topic_panel.histogram_requested.connect(self.load_topic_histogram)
+            self.content_stack.addWidget(self._topic_panel)
+        return self._topic_panel
+    
+    @property
+    def consumer_panel(self) -> ConsumerGroupPanel:
+        """Consumer Group面板"""
+        if self._consumer_panel is None:
+            self._consumer_panel = ConsumerGroupPanel()
+            self._consumer_panel.refresh_btn.clicked.connect(self.refresh_current_group)
+            self._consumer_panel.reset_offsets_requested.connect(self.on_reset_offsets_requested)
+            self._consumer_panel.history_requested.connect(self.load_group_history)
+            self._consumer_panel.time_lag_check.setChecked(self.settings.value("lag/time_lag", False, type=bool))
+            self._consumer_panel.time_lag_check.toggled.connect(self.on_time_lag_toggled)
+            self._consumer_panel.sample_interval = self.offset_sampler.interval
+            self.content_stack.addWidget(self._consumer_panel)
+        return self._consumer_panel
+    
+    @property
+    def message_panel(self) -> MessageBrowserPanel:
+        """消息浏览器面板"""
+        if self._message_panel is None:
+            self._message_panel = MessageBrowserPanel()
+            self._message_panel.refresh_requested.connect(self.fetch_messages)
+            self._message_panel.resend_message_requested.connect(self.resend_message)
+            self._message_panel.check_consumption_requested.connect(self.check_message_consumption)
+            self._message_panel.export_requested.connect(
+                lambda topic, partition: self.export_topic_messages(self.current_connection_name, topic, partition)
+            )
+            self.content_stack.addWidget(self._message_panel)
+        return self._message_panel
+    
+    @property
+    def dashboard_panel(self) -> LagDashboardPanel:
+        """消费者组 Lag 总览面板"""
+        if self._dashboard_panel is None:
+            self._dashboard_panel = LagDashboardPanel()
+            self._dashboard_panel.refresh_requested.connect(self.refresh_lag_dashboard)
+            self._dashboard_panel.time_lag_requested.connect(self.compute_dashboard_time_lags)
+            self._dashboard_panel.group_activated.connect(
+                lambda group_id: self.show_consumer_group_detail(self._dashboard_panel.cluster, group_id)
+            )
+            self.content_stack.addWidget(self._dashboard_panel)
+        return self._dashboard_panel
     
     def create_menus(self):
         """创建菜单"""
@@ -225,6 +383,10 @@ class MainWindow(QMainWindow):
         add_conn_action.triggered.connect(self.add_connection)
         file_menu.addAction(add_conn_action)
         
+        connect_all_action = QAction("后台连接全部集群", self)
+        connect_all_action.triggered.connect(lambda: self.connect_in_background(list(self.connections)))
+        file_menu.addAction(connect_all_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction("退出(&X)", self)
@@ -270,6 +432,50 @@ class MainWindow(QMainWindow):
         producer_action.triggered.connect(self.show_producer_dialog)
         tools_menu.addAction(producer_action)
         
+        dashboard_action = QAction("消费者组 Lag 总览(&L)", self)
+        dashboard_action.setShortcut("Ctrl+L")
+        dashboard_action.triggered.connect(lambda: self.show_lag_dashboard(self.current_connection_name))
+        tools_menu.addAction(dashboard_action)
+        
+        alert_rules_action = QAction("告警规则(&A)...", self)
+        alert_rules_action.triggered.connect(self.show_alert_rules_dialog)
+        tools_menu.addAction(alert_rules_action)
+        
+        tools_menu.addSeparator()
+        
+        open_segment_action = QAction("打开消息段文件(&O)...", self)
+        open_segment_action.triggered.connect(self.open_segment_file)
+        tools_menu.addAction(open_segment_action)
+        
+        tools_menu.addSeparator()
+        
+        self.disk_cache_action = QAction("消息缓存写入磁盘", self)
+        self.disk_cache_action.setCheckable(True)
+        self.disk_cache_action.setChecked(self.message_cache.disk_dir is not None)
+        self.disk_cache_action.toggled.connect(self.toggle_disk_cache)
+        tools_menu.addAction(self.disk_cache_action)
+        
+        self.all_topics_throughput_action = QAction("采集所有 Topic 的生产速率", self)
+        self.all_topics_throughput_action.setCheckable(True)
+        self.all_topics_throughput_action.setChecked(self.settings.value("throughput/all_topics", True, type=bool))
+        self.all_topics_throughput_action.toggled.connect(self.toggle_all_topics_throughput)
+        tools_menu.addAction(self.all_topics_throughput_action)
+        
+        clear_cache_action = QAction("清空消息缓存", self)
+        clear_cache_action.triggered.connect(self.clear_message_cache)
+        tools_menu.addAction(clear_cache_action)
+        
+        tools_menu.addSeparator()
+        
+        diagnostics_action = QAction("诊断信息(&D)...", self)
+        diagnostics_action.setShortcut("Ctrl+Shift+D")
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        tools_menu.addAction(diagnostics_action)
+        
+        profile_action = QAction("性能分析下一个后台任务", self)
+        profile_action.triggered.connect(self.profile_next_task)
+        tools_menu.addAction(profile_action)
+        
         # 帮助菜单
         help_menu = menubar.addMenu("帮助(&H)")
         
@@ -284,24 +490,17 @@ class MainWindow(QMainWindow):
     
     def load_connections(self):
         """从配置文件加载连接"""
-        if self.config_path.exists():
-            try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for conn_data in data:
-                        conn = ClusterConnection.from_dict(conn_data)
-                        self.connections[conn.name] = conn
-                        self.add_connection_to_tree(conn)
-            except Exception as e:
-                logger.error(f"加载连接配置失败: {e}")
+        try:
+            for conn in load_connections(self.config_path):
+                self.connections[conn.name] = conn
+                self.add_connection_to_tree(conn)
+        except Exception as e:
+            logger.error(f"加载连接配置失败: {e}")
     
     def save_connections(self):
         """保存连接到配置文件"""
-        self.config_path.parent.mkdir(parents=True, exist_ok=True)
         try:
-            data = [conn.to_dict() for conn in self.connections.values()]
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            save_connections(list(self.connections.values()), self.config_path)
         except Exception as e:
             logger.error(f"保存连接配置失败: {e}")
     
@@ -344,9 +543,12 @@ class MainWindow(QMainWindow):
             if new_conn.name != name:
                 del self.connections[name]
                 if name in self.clients:
-                    self.clients[name].disconnect()
-                    del self.clients[name]
-            
+                    self._forget_cluster(name)
+                self.delete_tree_snapshot(name)
+            elif name in self.clients:
+                # 并发上限无需重连即可生效
+                self.clients[name].max_concurrent_tasks = new_conn.max_concurrent_tasks
+
             self.connections[new_conn.name] = new_conn
             self.save_connections()
             self.refresh_tree()
@@ -361,11 +563,11 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             if name in self.clients:
-                self.clients[name].disconnect()
-                del self.clients[name]
+                self._forget_cluster(name)
             
             if name in self.connections:
                 del self.connections[name]
+            self.delete_tree_snapshot(name)
             
             self.save_connections()
             self.refresh_tree()
@@ -378,40 +580,52 @@ class MainWindow(QMainWindow):
         if name in self.clients and self.clients[name].is_connected:
             return
         
+        if name in self.connecting:
+            self.status_bar.showMessage(f"正在连接 {name}...", 3000)
+            return
+        # 排队等待后台连接的集群改为立即连接
+        if name in self.connect_queue:
+            self.connect_queue.remove(name)
+        
         conn = self.connections[name]
-        client = KafkaClusterClient(conn)
+        client = KafkaClusterClient(conn, message_cache=self.message_cache)
+        self.connecting.add(name)
         
-        self.loading_overlay.show_loading(f"正在连接到 {name}...")
+        # 先展示上次保存的列表，连接成功后在后台刷新
+        if self.render_tree_snapshot(name):
+            self.status_bar.showMessage(f"正在连接到 {name}...（显示上次的列表）")
+        else:
+            self.loading_overlay.show_loading(f"正在连接到 {name}...")
         
         def do_connect():
             client.connect()
             return client
         
         def on_finished(client):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            self.connecting.discard(name)
             self.on_connected(name, client)
         
         def on_error(error):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            self.connecting.discard(name)
             self.on_connect_error(name, error)
         
-        self.worker = WorkerThread(do_connect)
-        self.worker.finished.connect(on_finished)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        worker = WorkerThread(do_connect)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
     
     def on_connected(self, name: str, client: KafkaClusterClient):
         """连接成功回调"""
         self.loading_overlay.hide_loading()
         self.clients[name] = client
-        self.current_client = client
-        self.current_connection_name = name
-        
-        self.connection_label.setText(f"✅ 已连接: {name}")
-        self.connection_label.setStyleSheet("color: #4caf50; padding: 0 16px; font-weight: 500;")
+        self.offset_sampler.set_client(name, client)
+        self._start_throughput(name, client)
+        self.set_current_connection(name)
         self.status_bar.showMessage(f"已连接到 {name}", 3000)
         
         # 更新树状态显示为已连接
@@ -420,100 +634,408 @@ class MainWindow(QMainWindow):
         # 加载Topics和Consumer Groups
         self.load_cluster_data(name)
     
+    def set_current_connection(self, name: str):
+        """切换当前操作的集群"""
+        self.current_client = self.clients[name]
+        self.current_connection_name = name
+        self.connection_label.setText(f"✅ 已连接: {name}")
+        self.connection_label.setStyleSheet("color: #4caf50; padding: 0 16px; font-weight: 500;")
+    
     def on_connect_error(self, name: str, error: str):
         """连接失败回调"""
         self.loading_overlay.hide_loading()
-        # 确保线程已清理
-        if self.worker in self.active_threads:
-            self.active_threads.remove(self.worker)
-        if self.worker.isRunning():
-            self.worker.wait(1000)  # 等待线程结束
         QMessageBox.critical(self, "连接失败", f"无法连接到 {name}:\n{error}")
     
+    # ---- 后台并行连接 ----
+    
+    def auto_connect_clusters(self):
+        """启动时在后台连接勾选了自动连接的集群"""
+        names = [name for name, conn in self.connections.items() if conn.auto_connect]
+        if names:
+            self.connect_in_background(names)
+    
+    def connect_in_background(self, names: List[str]):
+        """并行连接多个集群并预加载 Topic / 消费者组列表与消费者组位点快照，并发数由 connect/max_parallel 配置（默认 4）"""
+        for name in names:
+            if (name in self.connections and name not in self.connect_queue and name not in self.connecting
+                    and not (name in self.clients and self.clients[name].is_connected)):
+                self.connect_queue.append(name)
+                self.render_tree_snapshot(name)
+        self._pump_connect_queue()
+    
+    def _pump_connect_queue(self):
+        limit = max(1, int(self.settings.value("connect/max_parallel", 4)))
+        while self.connect_queue and len(self.background_connects) < limit:
+            self._start_background_connect(self.connect_queue.pop(0))
+        if self.connect_queue or self.background_connects:
+            self.status_bar.showMessage(
+                f"后台连接中: {len(self.background_connects)} 个进行中，{len(self.connect_queue)} 个排队"
+            )
+    
+    def _start_background_connect(self, name: str):
+        conn = self.connections[name]
+        self.connecting.add(name)
+        self.background_connects.add(name)
+        
+        warm = self.offset_sampler.running
+        
+        def do_connect():
+            # 连接和加载列表都在后台线程中完成，界面只负责应用结果
+            client = KafkaClusterClient(conn, message_cache=self.message_cache)
+            client.connect()
+            topic_names, group_names = client.get_topic_names(), client.get_consumer_group_names()
+            if warm:
+                # 预热消费者组位点快照（经采集监听器更新总览、速率与告警），
+                # 不必在采集线程中排队等其他集群，切换到该集群的 Lag 总览时已有数据
+                self.offset_sampler.sample_cluster(name, client)
+            return client, topic_names, group_names
+        
+        def finish():
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            self.connecting.discard(name)
+            self.background_connects.discard(name)
+            self._pump_connect_queue()
+        
+        def on_finished(result):
+            finish()
+            client, topic_names, group_names = result
+            if name not in self.connections:
+                client.disconnect()
+                # 预热时已记录的快照状态
+                self.lag_rates.remove_cluster(name)
+                self.latest_snapshots.pop(name, None)
+                self.alerts.remove_cluster(name)
+                self._update_alert_button()
+                return
+            self.clients[name] = client
+            self.offset_sampler.set_client(name, client, sample=not warm)
+            self._start_throughput(name, client)
+            if self.current_client is None:
+                self.set_current_connection(name)
+            self.update_connection_tree_status(name, connected=True)
+            cluster_item = self.find_cluster_item(name)
+            if cluster_item is not None:
+                self.store_names(cluster_item, name, topic_names, group_names)
+            if not self.connect_queue and not self.background_connects:
+                self.status_bar.showMessage("后台连接完成", 3000)
+        
+        def on_error(error):
+            finish()
+            logger.warning(f"后台连接 {name} 失败: {error}")
+            cluster_item = self.find_cluster_item(name)
+            if cluster_item is not None:
+                cluster_item.setText(0, f"⚠️ {name}")
+                cluster_item.setToolTip(0, f"连接失败: {error}")
+        
+        worker = WorkerThread(do_connect)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
+    
     def load_cluster_data(self, name: str):
         """加载集群数据"""
         if name not in self.clients:
             return
         
-        client = self.clients[name]
-        
-        # 找到对应的树节点
+        cluster_item = self.find_cluster_item(name)
+        if cluster_item is not None:
+            self.update_cluster_tree(cluster_item, self.clients[name])
+    
+    def find_cluster_item(self, name: str) -> Optional[QTreeWidgetItem]:
+        """查找连接对应的顶层树节点"""
         for i in range(self.nav_tree.topLevelItemCount()):
             item = self.nav_tree.topLevelItem(i)
             data = item.data(0, Qt.ItemDataRole.UserRole)
             if data and data.get("name") == name:
-                self.update_cluster_tree(item, client)
-                break
+                return item
+        return None
     
-    def update_cluster_tree(self, cluster_item: QTreeWidgetItem, client: KafkaClusterClient):
-        """更新集群树节点（轻量级，只加载名称列表）"""
-        # 清空现有子节点
-        for i in range(cluster_item.childCount() - 1, -1, -1):
-            cluster_item.removeChild(cluster_item.child(i))
-        
+    def update_cluster_tree(self, cluster_item: QTreeWidgetItem, client: KafkaClusterClient,
+                            topics: bool = True, groups: bool = True):
+        """更新集群树节点（轻量级，只加载名称列表，只增删有变化的节点）
+
+        topics / groups 为 False 时不刷新对应的列表。
+        """
         name = cluster_item.data(0, Qt.ItemDataRole.UserRole).get("name")
+        # 首次加载（连接时）展开节点，之后的刷新保持用户的展开状态
+        first_load = topics and groups
         
         def load_names():
             # 只加载名称，不加载详细数据
-            topic_names = client.get_topic_names()
-            group_names = client.get_consumer_group_names()
+            topic_names = client.get_topic_names() if topics else None
+            group_names = client.get_consumer_group_names() if groups else None
             return topic_names, group_names
         
-        self.loading_overlay.show_loading("正在加载列表...")
+        # 已有列表（含快照）时在后台刷新，不遮挡界面
+        has_items = any(cluster_item.child(i).childCount() for i in range(cluster_item.childCount()))
+        if has_items:
+            self.status_bar.showMessage("正在刷新列表...")
+        else:
+            self.loading_overlay.show_loading("正在加载列表...")
         
         def on_finished(result):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
-            self.on_names_loaded(cluster_item, name, result)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            self.on_names_loaded(cluster_item, name, result, expand=first_load)
         
         def on_error(e):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.on_data_load_error(e)
         
-        self.worker = WorkerThread(load_names)
-        self.worker.finished.connect(on_finished)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        worker = WorkerThread(load_names)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
     
-    def on_names_loaded(self, cluster_item: QTreeWidgetItem, name: str, result):
-        """名称列表加载完成"""
+    def on_names_loaded(self, cluster_item: QTreeWidgetItem, name: str, result, expand: bool = True):
+        """名称列表加载完成（未刷新的一项为 None）"""
         self.loading_overlay.hide_loading()
         topic_names, group_names = result
         
+        added, removed = self.store_names(cluster_item, name, topic_names, group_names)
+        self.status_bar.showMessage(f"列表已更新（新增 {added}，移除 {removed}）", 3000)
+        
+        if expand:
+            cluster_item.setExpanded(True)
+            self._tree_folder(cluster_item, "topics_folder").setExpanded(True)  # 展开 Topics，便于看到 Topic 列表（如增加分区后）
+    
+    def store_names(self, cluster_item: QTreeWidgetItem, name: str, topic_names: Optional[List[str]],
+                    group_names: Optional[List[tuple]]) -> Tuple[int, int]:
+        """把名称列表应用到树中，有变化时更新快照"""
+        added, removed = self.apply_names_to_tree(cluster_item, name, topic_names, group_names)
+        snapshot = self.load_tree_snapshot(name)
+        if topic_names is not None and group_names is not None:
+            if added or removed or snapshot is None:
+                self.save_tree_snapshot(name, topic_names, group_names)
+        elif (added or removed) and snapshot is not None:
+            # 只刷新了一项时，另一项沿用快照中的列表
+            self.save_tree_snapshot(
+                name,
+                topic_names if topic_names is not None else snapshot[0],
+                group_names if group_names is not None else snapshot[1]
+            )
+        return added, removed
+    
+    def apply_names_to_tree(self, cluster_item: QTreeWidgetItem, name: str, topic_names: Optional[List[str]],
+                            group_names: Optional[List[tuple]], stale: bool = False) -> Tuple[int, int]:
+        """把名称列表同步到树中，返回 (新增, 移除) 的节点数
+
+        为 None 的列表保持不变；stale 表示数据来自本地快照。
+        """
+        suffix = "（上次的列表）" if stale else ""
+        added = removed = 0
+        
         # Topics文件夹
-        topics_item = QTreeWidgetItem(cluster_item)
-        topics_item.setText(0, f"📋 Topics ({len(topic_names)})")
-        topics_item.setData(0, Qt.ItemDataRole.UserRole, {"type": "topics_folder", "connection": name})
-        
-        for topic_name in topic_names:
-            topic_item = QTreeWidgetItem(topics_item)
-            icon = "🔒" if topic_name.startswith('__') else "📄"
-            topic_item.setText(0, f"{icon} {topic_name}")
-            topic_item.setData(0, Qt.ItemDataRole.UserRole, {
-                "type": "topic",
-                "connection": name,
-                "topic": topic_name
-            })
+        if topic_names is not None:
+            topics_item = self._tree_folder(cluster_item, "topics_folder")
+            topics_item.setText(0, f"📋 Topics ({len(topic_names)}){suffix}")
+            changes = self._sync_folder_children(
+                topics_item, name, "topic", topic_names,
+                lambda topic_name: self._create_topic_tree_item(name, topic_name)
+            )
+            added, removed = added + changes[0], removed + changes[1]
+            # 有搜索词时新节点也要按搜索词过滤
+            if changes[0] and self.search_edit.text().strip():
+                self.filter_topics(self.search_edit.text())
         
         # Consumer Groups文件夹
-        groups_item = QTreeWidgetItem(cluster_item)
-        groups_item.setText(0, f"👥 Consumer Groups ({len(group_names)})")
-        groups_item.setData(0, Qt.ItemDataRole.UserRole, {"type": "groups_folder", "connection": name})
-        
-        for group_id, protocol_type in group_names:
-            group_item = QTreeWidgetItem(groups_item)
-            # 名称列表模式下不获取状态，使用默认图标
-            group_item.setText(0, f"👤 {group_id}")
-            group_item.setData(0, Qt.ItemDataRole.UserRole, {
-                "type": "consumer_group",
-                "connection": name,
-                "group": group_id
-            })
-        
+        if group_names is not None:
+            groups_item = self._tree_folder(cluster_item, "groups_folder")
+            groups_item.setText(0, f"👥 Consumer Groups ({len(group_names)}){suffix}")
+            changes = self._sync_folder_children(
+                groups_item, name, "group", [group_id for group_id, _ in group_names],
+                lambda group_id: self._create_group_tree_item(name, group_id)
+            )
+            added, removed = added + changes[0], removed + changes[1]
+        return added, removed
+    
+    def _tree_folder(self, cluster_item: QTreeWidgetItem, folder_type: str) -> QTreeWidgetItem:
+        """获取（必要时创建）集群下的 Topics / Consumer Groups 文件夹"""
+        for i in range(cluster_item.childCount()):
+            child = cluster_item.child(i)
+            data = child.data(0, Qt.ItemDataRole.UserRole)
+            if data and data.get("type") == folder_type:
+                return child
+        folder = QTreeWidgetItem(cluster_item)
+        folder.setData(0, Qt.ItemDataRole.UserRole, {
+            "type": folder_type,
+            "connection": cluster_item.data(0, Qt.ItemDataRole.UserRole).get("name")
+        })
+        return folder
+    
+    def _sync_folder_children(self, folder: QTreeWidgetItem, connection: str, key: str, names: List[str],
+                              create_item) -> Tuple[int, int]:
+        """按名称差异增删子节点（names 已排序），未变化的节点保持不动
+
+        每个文件夹的 名称 -> 节点 索引保存在 self.tree_index 中，刷新时不需要遍历已有节点，
+        树的改动量只和变化的名称数成正比。
+        """
+        index_key = (connection, key)
+        index = self.tree_index.get(index_key)
+        if index is None or len(index[1]) != folder.childCount():
+            # 首次同步或节点被外部清空过，从现有子节点重建索引
+            index = self._build_folder_index(folder, key)
+            self.tree_index[index_key] = index
+        sorted_names, items = index
+        
+        wanted = set(names)
+        stale = [n for n in items if n not in wanted]
+        new_names = [n for n in names if n not in items]
+        
+        for n in stale:
+            folder.removeChild(items.pop(n))
+            del sorted_names[bisect.bisect_left(sorted_names, n)]
+        
+        if not items:
+            new_items = [create_item(n) for n in new_names]
+            folder.addChildren(new_items)
+            items.update(zip(new_names, new_items))
+            sorted_names.extend(new_names)
+        else:
+            # 按名称顺序插入到对应位置
+            for n in new_names:
+                position = bisect.bisect_left(sorted_names, n)
+                item = create_item(n)
+                folder.insertChild(position, item)
+                sorted_names.insert(position, n)
+                items[n] = item
+        return len(new_names), len(stale)
+    
+    @staticmethod
+    def _build_folder_index(folder: QTreeWidgetItem, key: str) -> Tuple[List[str], Dict[str, QTreeWidgetItem]]:
+        """从现有子节点建立 (有序名称列表, 名称 -> 节点) 索引，丢弃重复或乱序的节点"""
+        sorted_names: List[str] = []
+        items: Dict[str, QTreeWidgetItem] = {}
+        for i in range(folder.childCount() - 1, -1, -1):
+            value = folder.child(i).data(0, Qt.ItemDataRole.UserRole).get(key)
+            if value in items or (sorted_names and value >= sorted_names[-1]):
+                folder.takeChild(i)
+                continue
+            items[value] = folder.child(i)
+            sorted_names.append(value)
+        sorted_names.reverse()
+        return sorted_names, items
+    
+    def _create_topic_tree_item(self, connection: str, topic_name: str) -> QTreeWidgetItem:
+        topic_item = QTreeWidgetItem()
+        icon = "🔒" if topic_name.startswith('__') else "📄"
+        topic_item.setText(0, f"{icon} {topic_name}")
+        topic_item.setData(0, Qt.ItemDataRole.UserRole, {
+            "type": "topic",
+            "connection": connection,
+            "topic": topic_name
+        })
+        throughput = self.throughput.topic_rate(connection, topic_name)
+        if throughput is not None:
+            self._apply_topic_throughput(topic_item, topic_name, throughput)
+        return topic_item
+    
+    @staticmethod
+    def _apply_topic_throughput(topic_item: QTreeWidgetItem, topic_name: str, throughput: TopicThroughput):
+        """在 Topic 节点上显示生产速率与最近的趋势（没有写入时只显示名称）"""
+        icon = "🔒" if topic_name.startswith('__') else "📄"
+        rates = [rate for _, rate in throughput.history]
+        if throughput.span > 0 and (throughput.rate > 0 or any(rates)):
+            text = f"{icon} {topic_name}  ·  {format_rate(throughput.rate)}/s {sparkline(rates, 20)}"
+        else:
+            text = f"{icon} {topic_name}"
+        if topic_item.text(0) != text:
+            topic_item.setText(0, text)
+    
+    def _create_group_tree_item(self, connection: str, group_id: str) -> QTreeWidgetItem:
+        group_item = QTreeWidgetItem()
+        # 名称列表模式下不获取状态，使用默认图标
+        group_item.setText(0, f"👤 {group_id}")
+        group_item.setData(0, Qt.ItemDataRole.UserRole, {
+            "type": "consumer_group",
+            "connection": connection,
+            "group": group_id
+        })
+        rate = self.lag_rates.group_rate(connection, group_id)
+        if rate is not None:
+            self._apply_group_rate(group_item, group_id, rate)
+        return group_item
+    
+    @staticmethod
+    def _apply_group_rate(group_item: QTreeWidgetItem, group_id: str, rate: GroupLagRate):
+        """在消费者组节点上显示消费速率与预计追平时间"""
+        if rate.span <= 0:
+            return
+        eta = rate.eta_seconds
+        eta_text = format_eta(rate) if eta is None or eta == 0 else f"{format_eta(rate)}后追平"
+        text = f"👤 {group_id}  ·  消费 {format_rate(rate.consume_rate)}/s，{eta_text}"
+        if group_item.text(0) != text:
+            group_item.setText(0, text)
+            group_item.setToolTip(0, f"Lag {rate.lag:,}\n{describe_rate(rate)}")
+            if eta is None:
+                group_item.setForeground(0, QColor("#f44336"))
+            else:
+                group_item.setForeground(0, QBrush())
+    
+    # ---- 导航树快照 ----
+    
+    def _tree_snapshot_path(self, name: str) -> Path:
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:16]
+        return self.config_path.parent / "snapshots" / f"{digest}.json"
+    
+    def load_tree_snapshot(self, name: str) -> Optional[Tuple[List[str], List[tuple]]]:
+        """读取上次保存的 Topic / 消费者组列表，连接地址已变更时忽略"""
+        path = self._tree_snapshot_path(name)
+        conn = self.connections.get(name)
+        if conn is None or not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取列表快照失败: {e}")
+            return None
+        if data.get("name") != name or data.get("bootstrap_servers") != conn.bootstrap_servers:
+            return None
+        return data.get("topics", []), [tuple(g) for g in data.get("groups", [])]
+    
+    def save_tree_snapshot(self, name: str, topic_names: List[str], group_names: List[tuple]):
+        """保存 Topic / 消费者组列表，下次连接时先展示"""
+        conn = self.connections.get(name)
+        if conn is None:
+            return
+        path = self._tree_snapshot_path(name)
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "name": name,
+                    "bootstrap_servers": conn.bootstrap_servers,
+                    "saved_at": datetime.now().isoformat(timespec='seconds'),
+                    "topics": topic_names,
+                    "groups": [list(g) for g in group_names],
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"保存列表快照失败: {e}")
+    
+    def delete_tree_snapshot(self, name: str):
+        try:
+            self._tree_snapshot_path(name).unlink()
+        except OSError:
+            pass
+    
+    def render_tree_snapshot(self, name: str) -> bool:
+        """在树中展示上次保存的列表，没有快照时返回 False"""
+        snapshot = self.load_tree_snapshot(name)
+        cluster_item = self.find_cluster_item(name)
+        if snapshot is None or cluster_item is None:
+            return False
+        topic_names, group_names = snapshot
+        self.apply_names_to_tree(cluster_item, name, topic_names, group_names, stale=True)
         cluster_item.setExpanded(True)
-        topics_item.setExpanded(True)  # 展开 Topics，便于看到 Topic 列表（如增加分区后）
+        self._tree_folder(cluster_item, "topics_folder").setExpanded(True)
+        return True
     
     def on_data_load_error(self, error: str):
         """数据加载失败"""
@@ -571,6 +1093,9 @@ class MainWindow(QMainWindow):
             send_action = menu.addAction("发送消息")
             send_action.triggered.connect(lambda: self.show_producer_dialog(data["topic"]))
             
+            export_action = menu.addAction("导出消息...")
+            export_action.triggered.connect(lambda: self.export_topic_messages(data["connection"], data["topic"]))
+            
             add_partitions_action = menu.addAction("增加分区")
             add_partitions_action.triggered.connect(
                 lambda: self.add_partitions(data["connection"], data["topic"], current_count=None)
@@ -587,6 +1112,8 @@ class MainWindow(QMainWindow):
             delete_action.triggered.connect(lambda: self.delete_topic(data["connection"], data["topic"]))
         
         elif data["type"] == "groups_folder":
+            dashboard_action = menu.addAction("Lag 总览")
+            dashboard_action.triggered.connect(lambda: self.show_lag_dashboard(data["connection"]))
             create_action = menu.addAction("创建消费者组")
             create_action.triggered.connect(lambda: self.create_consumer_group(data["connection"]))
             menu.addSeparator()
@@ -623,32 +1150,35 @@ class MainWindow(QMainWindow):
             return
         
         client = self.clients[connection]
-        self.current_client = client
-        self.current_connection_name = connection
+        self.set_current_connection(connection)
         
         self.loading_overlay.show_loading("正在加载Topic信息...")
         
         def on_finished(topic):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.on_topic_loaded(topic)
         
         def on_error(e):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.on_load_error("Topic", e)
         
-        self.worker = WorkerThread(client.get_topic_detail, topic_name)
-        self.worker.finished.connect(on_finished)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        worker = WorkerThread(client.get_topic_detail, topic_name)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
     
     def on_topic_loaded(self, topic: TopicInfo):
         """Topic加载完成"""
         self.loading_overlay.hide_loading()
         if topic:
             self.topic_panel.load_topic(topic)
+            name = self.current_connection_name
+            if name:
+                self.topic_panel.set_throughput(self.throughput.topic_rate(name, topic.name))
+                self._watch_topic(name, topic.name)
             self.content_stack.setCurrentWidget(self.topic_panel)
     
     def show_consumer_group_detail(self, connection: str, group_id: str):
@@ -658,32 +1188,34 @@ class MainWindow(QMainWindow):
             return
         
         client = self.clients[connection]
-        self.current_client = client
-        self.current_connection_name = connection
+        self.set_current_connection(connection)
         
         self.loading_overlay.show_loading("正在加载消费者组信息...")
         
         def on_finished(group):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.on_group_loaded(group)
         
         def on_error(e):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.on_load_error("消费者组", e)
         
-        self.worker = WorkerThread(client.get_consumer_group_detail, group_id)
-        self.worker.finished.connect(on_finished)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        with_time_lag = self.consumer_panel.time_lag_check.isChecked()
+        worker = WorkerThread(client.get_consumer_group_detail, group_id, with_time_lag)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
     
     def on_group_loaded(self, group: ConsumerGroupInfo):
         """消费者组加载完成"""
         self.loading_overlay.hide_loading()
         if group:
             self.consumer_panel.load_group(group)
+            if self.current_connection_name:
+                self.consumer_panel.set_rate(self.lag_rates.group_rate(self.current_connection_name, group.group_id))
             self.content_stack.setCurrentWidget(self.consumer_panel)
 
     def on_reset_offsets_requested(self):
@@ -719,23 +1251,23 @@ class MainWindow(QMainWindow):
             self.current_client.reset_consumer_group_offsets(group.group_id, topic_partitions, target)
 
         def on_finished(_):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.loading_overlay.hide_loading()
             QMessageBox.information(self, "成功", f"已将该组 {len(topic_partitions)} 个分区重置到「{target}」")
             self.show_consumer_group_detail(self.current_connection_name, group.group_id)
 
         def on_error(e):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.loading_overlay.hide_loading()
             QMessageBox.critical(self, "错误", f"重置消费点失败:\n{e}")
 
-        self.worker = WorkerThread(do_reset)
-        self.worker.finished.connect(on_finished)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        worker = WorkerThread(do_reset)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
 
     def on_load_error(self, type_name: str, error: str):
         """加载错误处理"""
@@ -751,6 +1283,332 @@ class MainWindow(QMainWindow):
         if self.current_client:
             self.fetch_messages(topic, partition, -1, 100)
 
+    def _message_cache_dir(self) -> Optional[str]:
+        if self.settings.value("cache/disk_enabled", False, type=bool):
+            return str(get_app_dir() / "cache" / "messages")
+        return None
+    
+    def toggle_disk_cache(self, enabled: bool):
+        """切换消息缓存是否写入磁盘"""
+        self.settings.setValue("cache/disk_enabled", enabled)
+        self.message_cache.disk_dir = self._message_cache_dir()
+    
+    def clear_message_cache(self):
+        """清空消息缓存"""
+        stats = self.message_cache.stats()
+        self.message_cache.clear()
+        self.status_bar.showMessage(
+            f"已清空消息缓存 ({format_bytes(stats['bytes'] + stats['disk_bytes'])})", 5000
+        )
+    
+    def on_ui_stall(self, event: StallEvent):
+        """界面卡顿后在状态栏提示"""
+        self.status_bar.showMessage(
+            f"界面卡顿 {event.duration * 1000:.0f}ms: {event.location}（详见 工具 > 诊断信息）", 5000
+        )
+    
+    def profile_next_task(self):
+        """分析下一个后台任务，结果在诊断信息中查看"""
+        TASK_PROFILER.arm(1)
+        self.status_bar.showMessage("下一个后台任务将在性能分析器下运行", 5000)
+    
+    def register_memory_sources(self):
+        """登记各组件持有的内存，供诊断信息展示和预算回收"""
+        cache = self.message_cache
+        
+        def cache_usage():
+            stats = cache.stats()
+            return stats['bytes'], stats['ranges']
+        
+        # 消息浏览器尚未创建时不占用内存，统计时不强制创建
+        self.memory.register(
+            "消息浏览器", "面板",
+            lambda: self._message_panel.memory_usage() if self._message_panel else (0, 0),
+            evict=lambda amount: self._message_panel.release_messages(amount) if self._message_panel else 0,
+            last_used=lambda: self._message_panel.last_used if self._message_panel else 0.0
+        )
+        self.memory.register(
+            "消息区间缓存", "缓存", cache_usage,
+            evict=cache.evict_bytes, last_used=lambda: cache.last_access
+        )
+        self.memory.register("集群客户端", "客户端", lambda: (-1, len(self.clients)))
+        self.memory.register("对话框", "对话框", lambda: (-1, len(self.findChildren(QDialog))))
+        self.memory.register("后台线程", "线程", lambda: (-1, len(self.active_threads)))
+        # 定期检查预算（导出、缓存写入等不经过消息加载的路径）
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.memory.enforce)
+        self.memory_timer.start(30000)
+    
+    def start_lag_history(self):
+        """打开 lag 历史数据库并开始定期采集"""
+        budget_mb = int(self.settings.value("lag/history_budget_mb", 512))
+        try:
+            self.lag_history = LagHistoryStore(
+                str(get_app_dir() / "history" / "lag_history.sqlite3"), budget_bytes=budget_mb * 1024 * 1024
+            )
+            self.offset_sampler.add_listener(self.lag_history.record)
+        except Exception as e:
+            logger.warning(f"打开 lag 历史数据库失败，不记录历史: {e}")
+        self.offset_sampler.start()
+    
+    def _on_offsets_sampled(self, cluster: str, snapshot: GroupOffsetsSnapshot):
+        """采集线程中调用：更新速率后通知主线程刷新显示"""
+        self.lag_rates.record(cluster, snapshot)
+        self.latest_snapshots[cluster] = snapshot
+        self.lag_rates_updated.emit(cluster)
+        events = self.alerts.evaluate(cluster, snapshot)
+        if events:
+            self.alert_log.append(events)
+            self.alerts_changed.emit(events)
+    
+    def on_lag_rates_updated(self, cluster: str):
+        """刷新导航树中各消费者组的速率，以及当前打开的组详情"""
+        rates = self.lag_rates.rates(cluster)
+        index = self.tree_index.get((cluster, "group"))
+        if index is not None:
+            items = index[1]
+            for group_id, rate in rates.items():
+                item = items.get(group_id)
+                if item is not None:
+                    self._apply_group_rate(item, group_id, rate)
+        panel = self._consumer_panel
+        if panel is not None and panel.current_group and cluster == self.current_connection_name:
+            panel.set_rate(rates.get(panel.current_group.group_id))
+        dashboard = self._dashboard_panel
+        if dashboard is not None and dashboard.cluster == cluster and self.content_stack.currentWidget() is dashboard:
+            # 信号排队期间集群可能已被移除
+            snapshot = self.latest_snapshots.get(cluster)
+            if snapshot is None:
+                return
+            dashboard.update_snapshot(snapshot, rates)
+    
+    def _start_throughput(self, name: str, client: KafkaClusterClient):
+        """开始采集集群的 Topic 生产速率"""
+        if not self.all_topics_throughput_action.isChecked():
+            self.throughput_sampler.set_topics(name, self.watched_topics.get(name, set()))
+        self.throughput_sampler.set_client(name, client)
+    
+    def _watch_topic(self, name: str, topic: str):
+        """只采集打开过详情的 Topic 时，把 topic 加入采集范围"""
+        watched = self.watched_topics.setdefault(name, set())
+        if topic in watched:
+            return
+        watched.add(topic)
+        if not self.all_topics_throughput_action.isChecked():
+            self.throughput_sampler.set_topics(name, watched)
+    
+    def toggle_all_topics_throughput(self, enabled: bool):
+        """切换采集所有 Topic 还是只采集打开过详情的 Topic"""
+        self.settings.setValue("throughput/all_topics", enabled)
+        for name in self.clients:
+            self.throughput_sampler.set_topics(name, None if enabled else self.watched_topics.get(name, set()))
+    
+    def _on_topic_offsets_sampled(self, cluster: str, snapshot: TopicOffsetsSnapshot):
+        """采集线程中调用：更新生产速率后通知主线程刷新显示"""
+        self.throughput.record(cluster, snapshot)
+        self.throughput_updated.emit(cluster)
+    
+    def on_throughput_updated(self, cluster: str):
+        """刷新导航树中各 Topic 的生产速率，以及当前打开的 Topic 详情"""
+        rates = self.throughput.rates(cluster)
+        index = self.tree_index.get((cluster, "topic"))
+        if index is not None:
+            items = index[1]
+            for topic_name, item in items.items():
+                throughput = rates.get(topic_name)
+                if throughput is not None:
+                    self._apply_topic_throughput(item, topic_name, throughput)
+        panel = self._topic_panel
+        if panel is not None and panel.current_topic and cluster == self.current_connection_name:
+            panel.set_throughput(rates.get(panel.current_topic.name))
+    
+    def on_alerts_changed(self, events: list):
+        """告警触发或恢复：更新状态栏，并通过托盘弹出通知"""
+        self._update_alert_button()
+        self.status_bar.showMessage(events[-1].message(), 10000)
+        if self.tray_icon is None:
+            return
+        fired = [event for event in events if event.firing]
+        if fired:
+            lines = [event.message() for event in fired[:5]]
+            if len(fired) > 5:
+                lines.append(f"另有 {len(fired) - 5} 个告警，详见告警规则")
+            self.tray_icon.showMessage(
+                "Kafka Explorer 告警", "\n".join(lines), QSystemTrayIcon.MessageIcon.Warning, 10000
+            )
+    
+    def _update_alert_button(self):
+        count = len(self.alerts.firing())
+        self.alert_button.setText(f"🔔 {count} 个告警")
+        self.alert_button.setVisible(count > 0)
+    
+    def show_alert_rules_dialog(self):
+        """编辑告警规则，保存后从下一次采集开始按新规则评估"""
+        dialog = AlertRulesDialog(self, self.alerts.rules, self.alerts.firing())
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        rules = dialog.get_rules()
+        try:
+            save_alert_rules(rules)
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"保存告警规则失败:\n{e}")
+            return
+        self.alerts.set_rules(rules)
+        self._update_alert_button()
+        self.offset_sampler.sample_now()
+        self.status_bar.showMessage(f"已保存 {len(rules)} 条告警规则")
+    
+    def show_lag_dashboard(self, connection: Optional[str]):
+        """显示集群所有消费者组的 Lag 总览（随后台采集自动刷新）"""
+        if not connection:
+            QMessageBox.warning(self, "警告", "请先连接到 Kafka 集群")
+            return
+        if connection not in self.clients:
+            self.connect_to_cluster(connection)
+            return
+        self.set_current_connection(connection)
+        panel = self.dashboard_panel
+        panel.set_cluster(connection)
+        self.content_stack.setCurrentWidget(panel)
+        snapshot = self.latest_snapshots.get(connection)
+        if snapshot is not None:
+            panel.update_snapshot(snapshot, self.lag_rates.rates(connection))
+        else:
+            self.refresh_lag_dashboard()
+    
+    def refresh_lag_dashboard(self):
+        """立即对总览中的集群采集一次（结果经采集监听器更新总览、速率与历史）"""
+        name = self.dashboard_panel.cluster
+        client = self.clients.get(name)
+        if client is None:
+            return
+        panel = self.dashboard_panel
+        panel.refresh_btn.setEnabled(False)
+        
+        def on_finished(snapshot):
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            panel.refresh_btn.setEnabled(True)
+            if snapshot is None:
+                self.status_bar.showMessage(f"采集集群 {name} 的消费者组位点失败，详见日志", 5000)
+        
+        def on_error(e):
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            panel.refresh_btn.setEnabled(True)
+            self.status_bar.showMessage(f"采集消费者组位点失败: {e}", 5000)
+        
+        worker = WorkerThread(self.offset_sampler.sample_cluster, name, client)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
+    
+    def compute_dashboard_time_lags(self, group_ids: List[str]):
+        """按消息时间戳并发计算总览中各组的时间延迟
+
+        组可能有数百上千个，经 AsyncRunner 在事件循环中并发，只占用集群异步客户端的小线程池。
+        """
+        panel = self.dashboard_panel
+        name = panel.cluster
+        client = self.clients.get(name)
+        if client is None:
+            return
+        panel.time_lag_btn.setEnabled(False)
+        self.status_bar.showMessage(f"正在计算 {len(group_ids)} 个消费者组的时间延迟...")
+        
+        def on_finished(details):
+            panel.time_lag_btn.setEnabled(True)
+            if panel.cluster != name:
+                return
+            time_lags = {}
+            for group_id, group in details.items():
+                if group is not None and group.max_time_lag is not None:
+                    time_lags[group_id] = group.max_time_lag
+            panel.set_exact_time_lags(time_lags)
+            failed = sum(1 for group in details.values() if group is None)
+            message = f"已计算 {len(time_lags)} 个消费者组的时间延迟"
+            if failed:
+                message += f"，{failed} 个组获取失败，详见日志"
+            self.status_bar.showMessage(message, 5000)
+        
+        def on_error(e):
+            panel.time_lag_btn.setEnabled(True)
+            self.status_bar.showMessage(f"计算时间延迟失败: {e}", 5000)
+        
+        self.async_runner.submit(
+            self.async_runner.client_for(client).get_consumer_group_details(group_ids, with_time_lag=True),
+            on_finished, on_error
+        )
+    
+    def load_group_history(self, group_id: str, seconds: int):
+        """在后台查询消费者组最近一段时间的 lag 历史"""
+        panel = self.consumer_panel
+        if self.lag_history is None or not self.current_connection_name:
+            panel.show_history(group_id, [])
+            return
+        
+        def on_finished(points):
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            panel.show_history(group_id, points)
+        
+        def on_error(e):
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            logger.warning(f"查询 lag 历史失败: {e}")
+            panel.show_history(group_id, [])
+        
+        worker = WorkerThread(
+            self.lag_history.history, self.current_connection_name, group_id, time.time() - seconds
+        )
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
+    
+    def load_topic_histogram(self, topic: str, seconds: int, bucket_seconds: int):
+        """在后台按时间桶统计 Topic 最近一段时间的消息数"""
+        panel = self.topic_panel
+        client = self.current_client
+        if client is None:
+            panel.show_histogram(None, "未连接")
+            return
+        
+        def on_finished(histogram):
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            panel.show_histogram(histogram, "" if histogram is not None else f"Topic 不存在: {topic}")
+        
+        def on_error(e):
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            logger.warning(f"统计 Topic {topic} 的消息分布失败: {e}")
+            panel.show_histogram(None, f"统计失败: {e}")
+        
+        worker = WorkerThread(
+            client.get_message_histogram, topic, time.time() - seconds, None, bucket_seconds
+        )
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
+    
+    def show_diagnostics(self):
+        """打开诊断信息窗口（非模态）"""
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = DiagnosticsDialog(
+                self, watchdog=self.watchdog, profiler=TASK_PROFILER, memory=self.memory
+            )
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+        self.diagnostics_dialog.activateWindow()
+    
+    def open_segment_file(self):
+        """离线浏览导出的段文件"""
+        self.content_stack.setCurrentWidget(self.message_panel)
+        self.message_panel.on_open_file_clicked()
+
     def show_consume_messages_dialog(self):
         """消费消息：拉取 Topic/消费者组列表后弹窗，确定后打开消息浏览器并拉取。"""
         if not self.current_client or not self.current_connection_name:
@@ -765,8 +1623,8 @@ class MainWindow(QMainWindow):
             return topics, [g[0] for g in groups]
 
         def on_loaded(result):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.loading_overlay.hide_loading()
             topic_names, group_names = result
             dialog = ConsumeMessagesDialog(self, topic_names=topic_names, group_names=group_names)
@@ -780,16 +1638,16 @@ class MainWindow(QMainWindow):
             self.fetch_messages(topic, partition, -1, 100, from_beginning=False, sort_field="offset", group_id=group_id)
 
         def on_error(e):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.loading_overlay.hide_loading()
             QMessageBox.warning(self, "错误", f"加载列表失败:\n{e}")
 
-        self.worker = WorkerThread(load_data)
-        self.worker.finished.connect(on_loaded)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        worker = WorkerThread(load_data)
+        worker.finished.connect(on_loaded)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
 
     def fetch_messages(self, topic: str, partition: int, offset: int, limit: int, from_beginning: bool = False, sort_field: str = "offset", group_id: Optional[str] = None):
         """获取消息。group_id 不为空时从该消费者组的提交位点开始拉取。"""
@@ -803,29 +1661,30 @@ class MainWindow(QMainWindow):
         off = offset if offset >= 0 else None
         
         def on_finished(messages):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.on_messages_loaded(messages)
         
         def on_error(e):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.on_load_error("消息", e)
         
-        self.worker = WorkerThread(
+        worker = WorkerThread(
             self.current_client.consume_messages,
             topic, part, off, limit, from_beginning=from_beginning, sort_field=sort_field, group_id=group_id
         )
-        self.worker.finished.connect(on_finished)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
     
     def on_messages_loaded(self, messages: List[KafkaMessage]):
         """消息加载完成"""
         self.loading_overlay.hide_loading()
         self.message_panel.load_messages(messages)
         self.status_bar.showMessage(f"已加载 {len(messages)} 条消息", 3000)
+        self.memory.enforce()
     
     def show_producer_dialog(self, topic=None):
         """显示消息发送对话框"""
@@ -855,8 +1714,9 @@ class MainWindow(QMainWindow):
                 # 若当前正在查看该 Topic 详情，重新加载以更新消息总数和分区信息
                 sent_topic = data['topic']
                 if (self.current_connection_name
-                        and self.topic_panel.current_topic
-                        and self.topic_panel.current_topic.name == sent_topic):
+                        and self._topic_panel is not None
+                        and self._topic_panel.current_topic
+                        and self._topic_panel.current_topic.name == sent_topic):
                     self.show_topic_detail(self.current_connection_name, sent_topic)
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"消息发送失败:\n{str(e)}")
@@ -879,8 +1739,9 @@ class MainWindow(QMainWindow):
             self.message_panel.on_fetch_clicked()
             # 若当前正在查看该 Topic 详情，重新加载以更新消息总数
             if (self.current_connection_name
-                    and self.topic_panel.current_topic
-                    and self.topic_panel.current_topic.name == topic):
+                    and self._topic_panel is not None
+                    and self._topic_panel.current_topic
+                    and self._topic_panel.current_topic.name == topic):
                 self.show_topic_detail(self.current_connection_name, topic)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"消息发送失败:\n{str(e)}")
@@ -912,6 +1773,87 @@ class MainWindow(QMainWindow):
         # 保持引用防止被回收
         self._consumption_check_worker = worker
     
+    def export_topic_messages(self, connection: Optional[str], topic: str, partition: int = -1):
+        """导出Topic消息到文件"""
+        client = self.clients.get(connection) if connection else None
+        if not client or not client.is_connected:
+            QMessageBox.warning(self, "警告", "请先连接到 Kafka 集群")
+            return
+        
+        dialog = ExportMessagesDialog(self, topic, partition)
+        if not dialog.exec():
+            return
+        options = dialog.get_export_options()
+        
+        stop_event = threading.Event()
+        exporter = MessageExporter(client, topic, stop_event=stop_event, **options)
+        
+        progress_dialog = QProgressDialog(f"正在导出 {topic}...", "停止", 0, 1000, self)
+        progress_dialog.setWindowTitle("导出消息")
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+        progress_dialog.canceled.connect(stop_event.set)
+        
+        worker = WorkerThread(exporter.run)
+        exporter.progress_callback = worker.progress.emit
+        
+        def on_progress(progress: ExportProgress):
+            if progress.total_messages:
+                progress_dialog.setValue(min(1000, progress.messages * 1000 // progress.total_messages))
+            text = (
+                f"已导出 {progress.messages:,} / {progress.total_messages:,} 条\n"
+                f"已写入 {format_bytes(progress.bytes_written)}，"
+                f"{format_bytes(progress.bytes_per_second)}/s"
+            )
+            if progress.partition is not None:
+                text += f"\n分区 {progress.partition} @ Offset {progress.offset}"
+            progress_dialog.setLabelText(text)
+            self.status_bar.showMessage(
+                f"导出 {topic}: {progress.messages:,} 条，{format_bytes(progress.bytes_per_second)}/s"
+            )
+        
+        def on_finished(progress: ExportProgress):
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            progress_dialog.close()
+            if progress.completed:
+                self.status_bar.showMessage(f"导出完成: {progress.messages:,} 条", 5000)
+                QMessageBox.information(
+                    self, "导出完成",
+                    f"已导出 {progress.messages:,} 条消息 ({format_bytes(progress.bytes_written)})\n"
+                    f"{progress.path}"
+                )
+            elif progress.incomplete:
+                self.status_bar.showMessage("导出未完成", 5000)
+                partitions = ", ".join(map(str, sorted(progress.incomplete)))
+                QMessageBox.warning(
+                    self, "导出未完成",
+                    f"已写入 {progress.messages:,} 条消息，但分区 {partitions} 没有读到区间末尾"
+                    f"（Broker 不可达或数据已被清理）。\n"
+                    f"断点已保留，再次导出到同一文件并勾选断点续传即可继续。"
+                )
+            else:
+                self.status_bar.showMessage("导出已停止", 5000)
+                QMessageBox.information(
+                    self, "导出已停止",
+                    f"已写入 {progress.messages:,} 条消息。\n"
+                    f"再次导出到同一文件并勾选断点续传即可继续。"
+                )
+        
+        def on_error(e):
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
+            progress_dialog.close()
+            QMessageBox.critical(self, "错误", f"导出失败:\n{e}")
+        
+        worker.progress.connect(on_progress)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
+    
     def on_add_partitions_from_panel(self, topic_name: str, current_count: int):
         """从 Topic 详情面板发起增加分区"""
         if not self.current_connection_name:
@@ -927,8 +1869,8 @@ class MainWindow(QMainWindow):
         
         def do_show_dialog_and_apply(topic_info: Optional[TopicInfo]):
             self.loading_overlay.hide_loading()
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             if not topic_info:
                 QMessageBox.warning(self, "错误", "无法获取 Topic 信息")
                 return
@@ -945,8 +1887,9 @@ class MainWindow(QMainWindow):
                 )
                 self.refresh_topics(connection)
                 if (self.current_connection_name == connection
-                        and self.topic_panel.current_topic
-                        and self.topic_panel.current_topic.name == topic_info.name):
+                        and self._topic_panel is not None
+                        and self._topic_panel.current_topic
+                        and self._topic_panel.current_topic.name == topic_info.name):
                     self.show_topic_detail(connection, topic_info.name)
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"增加分区失败:\n{str(e)}")
@@ -964,8 +1907,9 @@ class MainWindow(QMainWindow):
                 )
                 self.refresh_topics(connection)
                 if (self.current_connection_name == connection
-                        and self.topic_panel.current_topic
-                        and self.topic_panel.current_topic.name == topic_name):
+                        and self._topic_panel is not None
+                        and self._topic_panel.current_topic
+                        and self._topic_panel.current_topic.name == topic_name):
                     self.show_topic_detail(connection, topic_name)
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"增加分区失败:\n{str(e)}")
@@ -974,16 +1918,16 @@ class MainWindow(QMainWindow):
         self.loading_overlay.show_loading("正在获取 Topic 信息...")
         
         def on_error(e):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.loading_overlay.hide_loading()
             QMessageBox.warning(self, "错误", f"无法获取 Topic 信息:\n{e}")
         
-        self.worker = WorkerThread(self.clients[connection].get_topic_detail, topic_name)
-        self.worker.finished.connect(do_show_dialog_and_apply)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        worker = WorkerThread(self.clients[connection].get_topic_detail, topic_name)
+        worker.finished.connect(do_show_dialog_and_apply)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
     
     def create_topic(self, connection: str):
         """创建Topic"""
@@ -1015,8 +1959,8 @@ class MainWindow(QMainWindow):
         self.loading_overlay.show_loading("正在获取 Topic 列表...")
 
         def on_topic_names_loaded(topic_names):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.loading_overlay.hide_loading()
             dialog = CreateConsumerGroupDialog(self, topic_names=topic_names)
             if not dialog.exec():
@@ -1030,8 +1974,8 @@ class MainWindow(QMainWindow):
                 client.create_consumer_group(group_id, topics, target)
 
             def on_created(_):
-                if self.worker in self.active_threads:
-                    self.active_threads.remove(self.worker)
+                if create_worker in self.active_threads:
+                    self.active_threads.remove(create_worker)
                 self.loading_overlay.hide_loading()
                 QMessageBox.information(
                     self, "成功",
@@ -1040,28 +1984,28 @@ class MainWindow(QMainWindow):
                 self.refresh_groups(connection)
 
             def on_create_error(e):
-                if self.worker in self.active_threads:
-                    self.active_threads.remove(self.worker)
+                if create_worker in self.active_threads:
+                    self.active_threads.remove(create_worker)
                 self.loading_overlay.hide_loading()
                 QMessageBox.critical(self, "错误", f"创建消费者组失败:\n{e}")
 
-            self.worker = WorkerThread(do_create)
-            self.worker.finished.connect(on_created)
-            self.worker.error.connect(on_create_error)
-            self.active_threads.append(self.worker)
-            self.worker.start()
+            create_worker = WorkerThread(do_create)
+            create_worker.finished.connect(on_created)
+            create_worker.error.connect(on_create_error)
+            self.active_threads.append(create_worker)
+            create_worker.start()
 
         def on_error(e):
-            if self.worker in self.active_threads:
-                self.active_threads.remove(self.worker)
+            if worker in self.active_threads:
+                self.active_threads.remove(worker)
             self.loading_overlay.hide_loading()
             QMessageBox.warning(self, "错误", f"获取 Topic 列表失败:\n{e}")
 
-        self.worker = WorkerThread(client.get_topic_names)
-        self.worker.finished.connect(on_topic_names_loaded)
-        self.worker.error.connect(on_error)
-        self.active_threads.append(self.worker)
-        self.worker.start()
+        worker = WorkerThread(client.get_topic_names)
+        worker.finished.connect(on_topic_names_loaded)
+        worker.error.connect(on_error)
+        self.active_threads.append(worker)
+        worker.start()
 
     def copy_topic_name(self, topic_name: str):
         """复制Topic名称到剪贴板"""
@@ -1095,8 +2039,7 @@ class MainWindow(QMainWindow):
             return
         
         try:
-            self.clients[name].disconnect()
-            del self.clients[name]
+            self._forget_cluster(name)
             
             if self.current_connection_name == name:
                 self.current_client = None
@@ -1111,6 +2054,21 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"断开连接失败:\n{str(e)}")
     
+    def _forget_cluster(self, name: str):
+        """断开集群的客户端，并停止 / 清除它的后台采集、速率、告警等状态"""
+        client = self.clients[name]
+        client.disconnect()
+        self.async_runner.forget(client)
+        del self.clients[name]
+        self.offset_sampler.remove_client(name)
+        self.lag_rates.remove_cluster(name)
+        self.latest_snapshots.pop(name, None)
+        self.throughput_sampler.remove_client(name)
+        self.throughput.remove_cluster(name)
+        self.watched_topics.pop(name, None)
+        self.alerts.remove_cluster(name)
+        self._update_alert_button()
+    
     def update_connection_tree_status(self, name: str, connected: bool):
         """更新连接在树中的显示状态"""
         for i in range(self.nav_tree.topLevelItemCount()):
@@ -1121,11 +2079,11 @@ class MainWindow(QMainWindow):
                     item.setText(0, f"🟢 {name}")
                 else:
                     item.setText(0, f"📡 {name}")
+                    self.tree_index.pop((name, "topic"), None)
+                    self.tree_index.pop((name, "group"), None)
                     # 清空子节点内容（保留文件夹节点但移除 topic 和 group 列表）
                     for j in range(item.childCount()):
-                        child = item.child(j)
-                        while child.childCount() > 0:
-                            child.removeChild(child.child(0))
+                        item.child(j).takeChildren()
                     # 收起节点
                     item.setExpanded(False)
                 break
@@ -1133,6 +2091,7 @@ class MainWindow(QMainWindow):
     def refresh_tree(self):
         """刷新导航树"""
         self.nav_tree.clear()
+        self.tree_index.clear()
         for conn in self.connections.values():
             self.add_connection_to_tree(conn)
     
@@ -1177,25 +2136,23 @@ class MainWindow(QMainWindow):
     
     def refresh_topics(self, connection: str):
         """刷新Topics"""
-        if connection in self.clients:
-            for i in range(self.nav_tree.topLevelItemCount()):
-                item = self.nav_tree.topLevelItem(i)
-                data = item.data(0, Qt.ItemDataRole.UserRole)
-                if data and data.get("name") == connection:
-                    self.update_cluster_tree(item, self.clients[connection])
-                    break
+        cluster_item = self.find_cluster_item(connection)
+        if connection in self.clients and cluster_item is not None:
+            self.update_cluster_tree(cluster_item, self.clients[connection], groups=False)
     
     def refresh_groups(self, connection: str):
         """刷新Consumer Groups"""
-        self.refresh_topics(connection)  # 使用相同的刷新逻辑
+        cluster_item = self.find_cluster_item(connection)
+        if connection in self.clients and cluster_item is not None:
+            self.update_cluster_tree(cluster_item, self.clients[connection], topics=False)
     
     def refresh_current(self):
         """刷新当前视图"""
         current = self.content_stack.currentWidget()
         
-        if current == self.topic_panel and self.topic_panel.current_topic:
+        if current is self._topic_panel and self.topic_panel.current_topic:
             self.refresh_current_topic()
-        elif current == self.consumer_panel and self.consumer_panel.current_group:
+        elif current is self._consumer_panel and self.consumer_panel.current_group:
             self.refresh_current_group()
     
     def refresh_current_topic(self):
@@ -1204,6 +2161,11 @@ class MainWindow(QMainWindow):
             topic_name = self.topic_panel.current_topic.name
             self.show_topic_detail(self.current_connection_name, topic_name)
     
+    def on_time_lag_toggled(self, checked: bool):
+        """切换是否计算时间延迟，并重新加载当前组"""
+        self.settings.setValue("lag/time_lag", checked)
+        self.refresh_current_group()
+    
     def refresh_current_group(self):
         """刷新当前消费者组"""
         if self.consumer_panel.current_group and self.current_client:
@@ -1263,6 +2225,14 @@ class MainWindow(QMainWindow):
         # 保存窗口状态
         self.settings.setValue("geometry", self.saveGeometry())
         self.settings.setValue("windowState", self.saveState())
+        self.watchdog.stop()
+        self.async_runner.stop()
+        self.offset_sampler.stop()
+        self.throughput_sampler.stop()
+        if self.lag_history is not None:
+            self.lag_history.close()
+        if self.tray_icon is not None:
+            self.tray_icon.hide()
         
         # 停止所有活动线程
         for thread in self.active_threads[:]:  # 使用切片复制列表，避免迭代时修改
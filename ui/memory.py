@@ -0,0 +1,158 @@
+"""内存统计与预算
+
+各组件（消息浏览器、消息缓存等）注册自己持有的内存估算方法，诊断信息中按来源展示。
+设置了全局预算时，超出部分按最近使用时间从旧到新回收可释放的消息缓冲区。
+另外支持按需开启 tracemalloc，对比两次快照之间按代码行分配的内存变化。
+"""
+
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MemoryUsage:
+    """一个内存来源的统计"""
+    name: str
+    category: str
+    bytes: int
+    items: int
+    evictable: bool
+    last_used: float
+
+
+@dataclass
+class _Source:
+    category: str
+    # 返回 (字节数, 条目数)，字节数未知时为 -1
+    measure: Callable[[], Tuple[int, int]]
+    # 尝试释放指定字节数，返回实际释放的字节数
+    evict: Optional[Callable[[int], int]] = None
+    last_used: Optional[Callable[[], float]] = None
+
+
+def process_memory() -> Dict[str, int]:
+    """进程内存（字节）：rss 为当前常驻内存，peak 为峰值，取不到时为 0"""
+    result = {'rss': 0, 'peak': 0}
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            result['rss'] = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 上单位为 KB，macOS 上为字节
+        result['peak'] = peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+    return result
+
+
+class MemoryAccountant:
+    """内存来源注册表"""
+
+    def __init__(self, budget_bytes: int = 0):
+        # 0 表示不限制
+        self.budget_bytes = budget_bytes
+        self._sources: Dict[str, _Source] = {}
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def register(self, name: str, category: str, measure: Callable[[], Tuple[int, int]],
+                 evict: Optional[Callable[[int], int]] = None,
+                 last_used: Optional[Callable[[], float]] = None):
+        self._sources[name] = _Source(category, measure, evict, last_used)
+
+    def unregister(self, name: str):
+        self._sources.pop(name, None)
+
+    def report(self) -> List[MemoryUsage]:
+        usages = []
+        for name, source in self._sources.items():
+            try:
+                size, items = source.measure()
+            except Exception as e:
+                logger.debug(f"统计内存失败 {name}: {e}")
+                continue
+            usages.append(MemoryUsage(
+                name=name, category=source.category, bytes=size, items=items,
+                evictable=source.evict is not None,
+                last_used=source.last_used() if source.last_used else 0.0
+            ))
+        return usages
+
+    def total_bytes(self) -> int:
+        return sum(u.bytes for u in self.report() if u.bytes > 0)
+
+    def enforce(self) -> int:
+        """超出预算时按最近使用时间从旧到新回收，返回释放的字节数"""
+        if self.budget_bytes <= 0:
+            return 0
+        usages = self.report()
+        excess = sum(u.bytes for u in usages if u.bytes > 0) - self.budget_bytes
+        if excess <= 0:
+            return 0
+        freed = 0
+        for usage in sorted((u for u in usages if u.evictable and u.bytes > 0), key=lambda u: u.last_used):
+            if freed >= excess:
+                break
+            released = self._sources[usage.name].evict(excess - freed)
+            if released:
+                logger.info(f"内存超出预算，已释放 {usage.name}: {released} 字节")
+            freed += released
+        if freed:
+            gc.collect()
+        return freed
+
+    # ---- tracemalloc ----
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self, frames: int = 1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._snapshot = None
+
+    def stop_tracing(self):
+        tracemalloc.stop()
+        self._snapshot = None
+
+    def snapshot_diff(self, limit: int = 50) -> List[dict]:
+        """拍摄快照，与上一次快照对比（首次返回当前分配最多的代码行）"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("未开启内存跟踪")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        if self._snapshot is None:
+            stats = snapshot.statistics('lineno')
+        else:
+            stats = snapshot.compare_to(self._snapshot, 'lineno')
+        self._snapshot = snapshot
+        rows = []
+        for stat in stats[:limit]:
+            frame = stat.traceback[0]
+            rows.append({
+                'location': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                'path': frame.filename,
+                'size': stat.size,
+                'size_diff': getattr(stat, 'size_diff', stat.size),
+                'count': stat.count,
+                'count_diff': getattr(stat, 'count_diff', stat.count),
+            })
+        return rows
+
+    def traced_memory(self) -> Tuple[int, int]:
+        """(当前, 峰值) tracemalloc 跟踪到的内存"""
+        return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
@@ -5,15 +5,26 @@ from PyQt6.QtWidgets import (
     QTableWidgetItem, QHeaderView, QSplitter, QTextEdit,
     QPushButton, QSpinBox, QComboBox, QLineEdit, QGroupBox,
     QProgressBar, QFrame, QTabWidget, QTreeWidget, QTreeWidgetItem,
-    QMessageBox, QMenu
+    QMessageBox, QMenu, QFileDialog, QDateTimeEdit, QCheckBox, QTableView
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QThread
-from PyQt6.QtGui import QFont, QColor, QAction
+from PyQt6.QtCore import (
+    Qt, pyqtSignal, QThread, QDateTime, QPointF, QRectF, QAbstractTableModel, QModelIndex
+)
+from PyQt6.QtGui import QFont, QColor, QAction, QPainter, QPen, QPolygonF
 
-from typing import List, Optional, Tuple
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from kafka_client.models import (
-    TopicInfo, PartitionInfo, ConsumerGroupInfo, KafkaMessage
+    TopicInfo, PartitionInfo, ConsumerGroupInfo, KafkaMessage, GroupLagRate, GroupOffsetsSnapshot,
+    TopicThroughput, MessageHistogram
 )
+from kafka_client.client import KafkaClusterClient
+from kafka_client.lag import describe_rate, format_duration, format_eta, format_rate
+from kafka_client.segment import SegmentReader
+from kafka_client.cache import estimate_message_size
 
 
 class LoadingOverlay(QWidget):
@@ -79,16 +90,172 @@ class StatsCard(QFrame):
         self.value_label.setText(value)
 
 
+class SortKeyItem(QTableWidgetItem):
+    """显示文本与排序键分开的表格项（排序键存放在 UserRole 中）"""
+    
+    def __init__(self, text: str, key):
+        super().__init__(text)
+        self.setData(Qt.ItemDataRole.UserRole, key)
+    
+    def __lt__(self, other):
+        key = self.data(Qt.ItemDataRole.UserRole)
+        other_key = other.data(Qt.ItemDataRole.UserRole)
+        if key is None or other_key is None:
+            return super().__lt__(other)
+        return key < other_key
+
+
+class LagHistoryChart(QWidget):
+    """lag 折线图（横轴为时间）"""
+    
+    LINE_COLOR = "#42a5f5"
+    # 至少需要的点数
+    MIN_POINTS = 2
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.points: List[Tuple[float, float]] = []
+        self.placeholder = ""
+        self.setMinimumHeight(220)
+    
+    def set_points(self, points: List[Tuple[float, float]], placeholder: str = ""):
+        """points 为 (Unix 时间, 数值) 列表"""
+        self.points = points
+        self.placeholder = placeholder
+        self.update()
+    
+    @staticmethod
+    def _format_time(ts: float, span: float) -> str:
+        fmt = '%H:%M' if span <= 86400 else '%m-%d %H:%M'
+        return datetime.fromtimestamp(ts).strftime(fmt)
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        text_color = self.palette().color(self.foregroundRole())
+        rect = self.rect().adjusted(64, 12, -16, -28)
+        
+        if len(self.points) < self.MIN_POINTS:
+            painter.setPen(text_color)
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.placeholder)
+            return
+        
+        t0, t1 = self._time_range()
+        top = max(v for _, v in self.points) or 1
+        span = max(t1 - t0, 1)
+        
+        grid = QColor(text_color)
+        grid.setAlpha(40)
+        painter.setPen(QPen(grid, 1))
+        for i in range(5):
+            y = rect.top() + rect.height() * i / 4
+            painter.drawLine(QPointF(rect.left(), y), QPointF(rect.right(), y))
+        
+        painter.setPen(text_color)
+        for i in range(5):
+            y = rect.top() + rect.height() * i / 4
+            painter.drawText(0, int(y) - 8, rect.left() - 8, 16,
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                             f"{top * (4 - i) / 4:,.0f}")
+        painter.drawText(rect.left(), rect.bottom() + 6, 160, 18, Qt.AlignmentFlag.AlignLeft,
+                         self._format_time(t0, span))
+        painter.drawText(rect.right() - 160, rect.bottom() + 6, 160, 18, Qt.AlignmentFlag.AlignRight,
+                         self._format_time(t1, span))
+        
+        self._draw_series(painter, rect, t0, span, top)
+    
+    def _time_range(self) -> Tuple[float, float]:
+        return self.points[0][0], self.points[-1][0]
+    
+    def _draw_series(self, painter: QPainter, rect, t0: float, span: float, top: float):
+        polygon = QPolygonF([
+            QPointF(rect.left() + rect.width() * (t - t0) / span,
+                    rect.bottom() - rect.height() * v / top)
+            for t, v in self.points
+        ])
+        painter.setPen(QPen(QColor(self.LINE_COLOR), 2))
+        painter.drawPolyline(polygon)
+
+
+class HistogramChart(LagHistoryChart):
+    """按时间桶的柱状图，points 为 (桶起始时间, 数量)"""
+    
+    LINE_COLOR = "#66bb6a"
+    MIN_POINTS = 1
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.bucket_seconds = 3600
+    
+    def set_buckets(self, points: List[Tuple[float, float]], bucket_seconds: int, placeholder: str = ""):
+        self.bucket_seconds = bucket_seconds
+        self.set_points(points, placeholder)
+    
+    def _time_range(self) -> Tuple[float, float]:
+        return self.points[0][0], self.points[-1][0] + self.bucket_seconds
+    
+    def _draw_series(self, painter: QPainter, rect, t0: float, span: float, top: float):
+        width = rect.width() * self.bucket_seconds / span
+        # 柱子之间留出间隙，桶很多时不留
+        gap = 1 if width >= 4 else 0
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(self.LINE_COLOR))
+        for t, v in self.points:
+            height = rect.height() * v / top
+            painter.drawRect(QRectF(
+                rect.left() + rect.width() * (t - t0) / span, rect.bottom() - height,
+                max(width - gap, 1), height
+            ))
+
+
+class Sparkline(QWidget):
+    """迷你趋势图（只画折线，不带坐标轴）"""
+    
+    LINE_COLOR = "#66bb6a"
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.values: List[float] = []
+        self.setFixedHeight(28)
+    
+    def set_values(self, values: List[float]):
+        self.values = values
+        self.update()
+    
+    def paintEvent(self, event):
+        if len(self.values) < 2:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = self.rect().adjusted(1, 2, -1, -2)
+        top = max(self.values) or 1
+        step = rect.width() / (len(self.values) - 1)
+        polygon = QPolygonF([
+            QPointF(rect.left() + i * step, rect.bottom() - rect.height() * v / top)
+            for i, v in enumerate(self.values)
+        ])
+        painter.setPen(QPen(QColor(self.LINE_COLOR), 1.5))
+        painter.drawPolyline(polygon)
+
+
 class TopicDetailPanel(QWidget):
     """Topic详情面板"""
     
     message_browse_requested = pyqtSignal(str, int)  # topic, partition
     send_message_requested = pyqtSignal(str)  # topic
     add_partitions_requested = pyqtSignal(str, int)  # topic_name, current_partition_count
+    histogram_requested = pyqtSignal(str, int, int)  # topic, 时间范围秒数, 桶宽秒数
+    
+    HISTOGRAM_RANGES = [
+        ("最近 1 小时", 3600), ("最近 6 小时", 6 * 3600), ("最近 24 小时", 86400), ("最近 7 天", 7 * 86400),
+    ]
+    HISTOGRAM_BUCKETS = [("每分钟", 60), ("每 5 分钟", 300), ("每小时", 3600), ("每天", 86400)]
+    HISTOGRAM_PLACEHOLDER = "选择时间范围后点击“统计”（按桶边界查询 offset，不读取消息）"
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_topic: Optional[TopicInfo] = None
+        self.current_throughput: Optional[TopicThroughput] = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -136,6 +303,11 @@ class TopicDetailPanel(QWidget):
         self.replication_card = StatsCard("副本因子")
         stats_layout.addWidget(self.replication_card)
         
+        self.rate_card = StatsCard("生产速率", "-")
+        self.rate_sparkline = Sparkline()
+        self.rate_card.layout().addWidget(self.rate_sparkline)
+        stats_layout.addWidget(self.rate_card)
+        
         layout.addLayout(stats_layout)
         
         # 标签页
@@ -148,9 +320,9 @@ class TopicDetailPanel(QWidget):
         partitions_layout.setContentsMargins(0, 16, 0, 0)
         
         self.partitions_table = QTableWidget()
-        self.partitions_table.setColumnCount(6)
+        self.partitions_table.setColumnCount(7)
         self.partitions_table.setHorizontalHeaderLabels([
-            "分区ID", "Leader", "副本", "ISR", "起始Offset", "结束Offset"
+            "分区ID", "Leader", "副本", "ISR", "起始Offset", "结束Offset", "生产/秒"
         ])
         self.partitions_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.partitions_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
@@ -173,6 +345,41 @@ class TopicDetailPanel(QWidget):
         
         tab_widget.addTab(config_tab, "配置信息")
         
+        # 消息数按时间分布（按桶边界查询 offset，不读取消息）
+        histogram_tab = QWidget()
+        histogram_layout = QVBoxLayout(histogram_tab)
+        histogram_layout.setContentsMargins(0, 8, 0, 0)
+        
+        histogram_header = QHBoxLayout()
+        self.histogram_range_combo = QComboBox()
+        for label, seconds in self.HISTOGRAM_RANGES:
+            self.histogram_range_combo.addItem(label, seconds)
+        self.histogram_range_combo.setCurrentIndex(2)
+        histogram_header.addWidget(self.histogram_range_combo)
+        
+        self.histogram_bucket_combo = QComboBox()
+        for label, seconds in self.HISTOGRAM_BUCKETS:
+            self.histogram_bucket_combo.addItem(label, seconds)
+        self.histogram_bucket_combo.setCurrentIndex(2)
+        histogram_header.addWidget(self.histogram_bucket_combo)
+        
+        self.histogram_btn = QPushButton("统计")
+        self.histogram_btn.setProperty("secondary", True)
+        self.histogram_btn.clicked.connect(self.request_histogram)
+        histogram_header.addWidget(self.histogram_btn)
+        
+        self.histogram_summary_label = QLabel("")
+        self.histogram_summary_label.setObjectName("statsCardTitle")
+        histogram_header.addWidget(self.histogram_summary_label)
+        histogram_header.addStretch()
+        histogram_layout.addLayout(histogram_header)
+        
+        self.histogram_chart = HistogramChart()
+        self.histogram_chart.set_points([], self.HISTOGRAM_PLACEHOLDER)
+        histogram_layout.addWidget(self.histogram_chart, 1)
+        
+        tab_widget.addTab(histogram_tab, "消息分布")
+        
         # 连接发送消息按钮
         self.send_message_btn.clicked.connect(self.on_send_message_clicked)
         self.add_partitions_btn.clicked.connect(self.on_add_partitions_clicked)
@@ -210,6 +417,10 @@ class TopicDetailPanel(QWidget):
     
     def load_topic(self, topic: TopicInfo):
         """加载Topic信息"""
+        if self.current_topic is None or self.current_topic.name != topic.name:
+            self.set_throughput(None)
+            self.histogram_chart.set_points([], self.HISTOGRAM_PLACEHOLDER)
+            self.histogram_summary_label.setText("")
         self.current_topic = topic
         self.title_label.setText(f"Topic: {topic.name}")
         
@@ -231,6 +442,7 @@ class TopicDetailPanel(QWidget):
             self.partitions_table.setItem(i, 3, QTableWidgetItem(_fmt_list(partition.isr)))
             self.partitions_table.setItem(i, 4, QTableWidgetItem(f"{partition.beginning_offset:,}"))
             self.partitions_table.setItem(i, 5, QTableWidgetItem(f"{partition.end_offset:,}"))
+            self._set_rate_cell(i, partition.partition_id)
             # 设置行高
             self.partitions_table.setRowHeight(i, 40)
         
@@ -242,13 +454,75 @@ class TopicDetailPanel(QWidget):
             # 设置行高
             self.config_table.setRowHeight(i, 40)
     
+    def set_throughput(self, throughput: Optional[TopicThroughput]):
+        """更新当前 Topic 的生产速率与趋势（分区列原地更新，不重建表格）"""
+        self.current_throughput = throughput
+        if throughput is None or throughput.span <= 0:
+            self.rate_card.set_value("-" if throughput is None else "采集中...")
+            self.rate_sparkline.set_values([])
+        else:
+            self.rate_card.set_value(f"{format_rate(throughput.rate)} 条/秒")
+            self.rate_sparkline.set_values([rate for _, rate in throughput.history])
+            if throughput.history:
+                self.rate_sparkline.setToolTip(
+                    f"最近 {len(throughput.history)} 次采集，"
+                    f"最高 {format_rate(max(rate for _, rate in throughput.history))} 条/秒"
+                )
+        if self.current_topic is not None:
+            for row, partition in enumerate(self.current_topic.partitions):
+                self._set_rate_cell(row, partition.partition_id)
+    
+    def request_histogram(self):
+        """按选择的时间范围与桶宽请求消息数分布"""
+        if not self.current_topic:
+            return
+        seconds = self.histogram_range_combo.currentData()
+        bucket = self.histogram_bucket_combo.currentData()
+        if seconds // bucket > KafkaClusterClient.HISTOGRAM_MAX_BUCKETS:
+            QMessageBox.warning(
+                self, "警告", f"桶数不能超过 {KafkaClusterClient.HISTOGRAM_MAX_BUCKETS}，请缩小时间范围或增大桶宽"
+            )
+            return
+        self.histogram_btn.setEnabled(False)
+        self.histogram_summary_label.setText("正在统计...")
+        self.histogram_requested.emit(self.current_topic.name, seconds, bucket)
+    
+    def show_histogram(self, histogram: Optional[MessageHistogram], error: str = ""):
+        """显示消息数分布，失败时 histogram 为 None"""
+        self.histogram_btn.setEnabled(True)
+        if histogram is None or not self.current_topic or histogram.topic != self.current_topic.name:
+            self.histogram_summary_label.setText(error)
+            return
+        self.histogram_chart.set_buckets(
+            [(ts, count) for ts, count in histogram.buckets], histogram.bucket_seconds, "所选时间范围内没有数据"
+        )
+        if not histogram.buckets:
+            self.histogram_summary_label.setText("")
+            return
+        peak_ts, peak = max(histogram.buckets, key=lambda bucket: bucket[1])
+        fmt = '%m-%d %H:%M' if histogram.bucket_seconds < 86400 else '%Y-%m-%d'
+        self.histogram_summary_label.setText(
+            f"共 {histogram.total:,} 条，峰值 {peak:,} 条（{datetime.fromtimestamp(peak_ts).strftime(fmt)}），"
+            f"{len(histogram.buckets)} 个桶，查询 {histogram.requests} 次"
+        )
+    
+    def _set_rate_cell(self, row: int, partition_id: int):
+        throughput = self.current_throughput
+        rate = throughput.partitions.get(partition_id) if throughput and throughput.span > 0 else None
+        self.partitions_table.setItem(row, 6, QTableWidgetItem("-" if rate is None else format_rate(rate)))
+    
     def clear(self):
         """清空面板"""
         self.current_topic = None
+        self.current_throughput = None
         self.title_label.setText("Topic 详情")
         self.partitions_card.set_value("0")
         self.messages_card.set_value("0")
         self.replication_card.set_value("0")
+        self.rate_card.set_value("-")
+        self.rate_sparkline.set_values([])
+        self.histogram_chart.set_points([], "")
+        self.histogram_summary_label.setText("")
         self.partitions_table.setRowCount(0)
         self.config_table.setRowCount(0)
 
@@ -257,11 +531,24 @@ class ConsumerGroupPanel(QWidget):
     """消费者组面板"""
 
     reset_offsets_requested = pyqtSignal()  # 请求打开重置消费点（由 main_window 弹窗并执行）
+    history_requested = pyqtSignal(str, int)  # (group_id, 最近多少秒) 请求加载 lag 历史
+
+    # lag 历史时间范围（显示名称, 秒数）
+    HISTORY_RANGES = [
+        ("最近 1 小时", 3600),
+        ("最近 6 小时", 6 * 3600),
+        ("最近 24 小时", 86400),
+        ("最近 7 天", 7 * 86400),
+        ("最近 30 天", 30 * 86400),
+    ]
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_group: Optional[ConsumerGroupInfo] = None
         self.all_offsets = []  # 保存所有offset用于过滤
+        self.current_rate: Optional[GroupLagRate] = None
+        # 后台采集间隔（秒），0 表示未开启，用于历史为空时的提示
+        self.sample_interval = 0.0
         self.setup_ui()
 
     def setup_ui(self):
@@ -305,8 +592,16 @@ class ConsumerGroupPanel(QWidget):
         self.topics_card = StatsCard("Topics")
         stats_layout.addWidget(self.topics_card)
         
+        self.time_lag_card = StatsCard("最大时间延迟")
+        stats_layout.addWidget(self.time_lag_card)
+        
         layout.addLayout(stats_layout)
         
+        # 速率与预计追平时间（由后台采集的快照计算）
+        self.rate_label = QLabel("")
+        self.rate_label.setObjectName("statsCardTitle")
+        layout.addWidget(self.rate_label)
+        
         # 标签页
         tab_widget = QTabWidget()
         layout.addWidget(tab_widget)
@@ -330,12 +625,16 @@ class ConsumerGroupPanel(QWidget):
         filter_layout.addWidget(self.offset_count_label)
         
         filter_layout.addStretch()
+        
+        # 勾选后刷新时读取提交位点与最新位置处消息的时间戳（有 lag 的分区各读两条）
+        self.time_lag_check = QCheckBox("计算时间延迟")
+        filter_layout.addWidget(self.time_lag_check)
         offsets_layout.addLayout(filter_layout)
         
         self.offsets_table = QTableWidget()
-        self.offsets_table.setColumnCount(7)
+        self.offsets_table.setColumnCount(11)
         self.offsets_table.setHorizontalHeaderLabels([
-            "Topic", "分区", "Start", "End", "Offset", "Lag", "Lag%"
+            "Topic", "分区", "Start", "End", "Offset", "Lag", "Lag%", "时间延迟", "消费/秒", "生产/秒", "预计追平"
         ])
         self.offsets_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.offsets_table.horizontalHeader().setStretchLastSection(True)
@@ -360,9 +659,94 @@ class ConsumerGroupPanel(QWidget):
         members_layout.addWidget(self.members_table)
         
         tab_widget.addTab(members_tab, "成员信息")
+        
+        # lag 历史
+        history_tab = QWidget()
+        history_layout = QVBoxLayout(history_tab)
+        history_layout.setContentsMargins(0, 8, 0, 0)
+        
+        history_header = QHBoxLayout()
+        self.history_range_combo = QComboBox()
+        for label, seconds in self.HISTORY_RANGES:
+            self.history_range_combo.addItem(label, seconds)
+        self.history_range_combo.currentIndexChanged.connect(self.request_history)
+        history_header.addWidget(self.history_range_combo)
+        
+        self.history_summary_label = QLabel("")
+        self.history_summary_label.setObjectName("statsCardTitle")
+        history_header.addWidget(self.history_summary_label)
+        history_header.addStretch()
+        history_layout.addLayout(history_header)
+        
+        self.history_chart = LagHistoryChart()
+        history_layout.addWidget(self.history_chart, 1)
+        
+        tab_widget.addTab(history_tab, "Lag 历史")
+    
+    def request_history(self):
+        """按当前选择的时间范围请求 lag 历史"""
+        if self.current_group:
+            self.history_requested.emit(self.current_group.group_id, self.history_range_combo.currentData())
+    
+    def show_history(self, group_id: str, points):
+        """显示 lag 历史，points 为 LagPoint 列表"""
+        if not self.current_group or self.current_group.group_id != group_id:
+            return
+        if len(points) < 2:
+            if self.sample_interval > 0:
+                placeholder = f"暂无足够的历史数据（后台每 {self.sample_interval:g} 秒采集一次）"
+            else:
+                placeholder = "未开启 lag 历史采集"
+            self.history_chart.set_points([], placeholder)
+            self.history_summary_label.setText("")
+            return
+        self.history_chart.set_points([(p.ts, p.lag) for p in points])
+        first, last = points[0], points[-1]
+        change = last.lag - first.lag
+        if change < 0:
+            trend = f"减少 {-change:,}，正在追赶"
+        elif change > 0:
+            trend = f"增加 {change:,}，积压在增长"
+        else:
+            trend = "持平"
+        self.history_summary_label.setText(
+            f"lag 从 {first.lag:,} 变为 {last.lag:,}（{trend}），共 {len(points)} 个采样点"
+        )
+    
+    def set_rate(self, rate: Optional[GroupLagRate]):
+        """更新当前组的速率与预计追平时间（分区列原地更新，不重建表格）"""
+        self.current_rate = rate
+        if rate is None:
+            self.rate_label.setText("")
+        else:
+            self.rate_label.setText(describe_rate(rate))
+        self.offsets_table.setSortingEnabled(False)
+        for row in range(self.offsets_table.rowCount()):
+            topic_item = self.offsets_table.item(row, 0)
+            partition_item = self.offsets_table.item(row, 1)
+            if topic_item is not None and partition_item is not None:
+                self._set_rate_cells(row, (topic_item.text(), partition_item.data(Qt.ItemDataRole.DisplayRole)))
+        self.offsets_table.setSortingEnabled(True)
+    
+    def _set_rate_cells(self, row: int, tp: Tuple[str, int]):
+        rate = self.current_rate.partitions.get(tp) if self.current_rate else None
+        if rate is None or rate.span <= 0:
+            for column in (8, 9, 10):
+                self.offsets_table.setItem(row, column, SortKeyItem("-", -1.0))
+            return
+        self.offsets_table.setItem(row, 8, SortKeyItem(format_rate(rate.consume_rate), rate.consume_rate))
+        self.offsets_table.setItem(row, 9, SortKeyItem(format_rate(rate.produce_rate), rate.produce_rate))
+        eta = rate.eta_seconds
+        eta_item = SortKeyItem(format_eta(rate), float('inf') if eta is None else eta)
+        if eta is None:
+            eta_item.setForeground(QColor("#f44336"))
+        self.offsets_table.setItem(row, 10, eta_item)
     
     def load_group(self, group: ConsumerGroupInfo):
         """加载消费者组信息"""
+        if not self.current_group or self.current_group.group_id != group.group_id:
+            self.current_rate = None
+            self.rate_label.setText("")
         self.current_group = group
         self.all_offsets = group.offsets
         self.title_label.setText(f"Consumer Group: {group.group_id}")
@@ -382,6 +766,9 @@ class ConsumerGroupPanel(QWidget):
         topics = set(o.topic for o in group.offsets)
         self.topics_card.set_value(str(len(topics)))
         
+        max_time_lag = group.max_time_lag
+        self.time_lag_card.set_value("-" if max_time_lag is None else format_duration(max_time_lag))
+        
         # 清空过滤器并显示所有数据
         self.offset_filter_edit.clear()
         self.display_offsets(group.offsets)
@@ -399,6 +786,8 @@ class ConsumerGroupPanel(QWidget):
             self.members_table.setItem(i, 3, QTableWidgetItem(partitions_str))
             # 设置行高
             self.members_table.setRowHeight(i, 40)
+        
+        self.request_history()
     
     def _on_reset_offsets_clicked(self):
         if self.current_group:
@@ -477,6 +866,13 @@ class ConsumerGroupPanel(QWidget):
             else:
                 lag_percent_str = "0%"
             self.offsets_table.setItem(i, 6, QTableWidgetItem(lag_percent_str))
+            
+            # 时间延迟
+            if offset.time_lag is None:
+                self.offsets_table.setItem(i, 7, SortKeyItem("-", -1.0))
+            else:
+                self.offsets_table.setItem(i, 7, SortKeyItem(format_duration(offset.time_lag), offset.time_lag))
+            self._set_rate_cells(i, (offset.topic, offset.partition))
             # 设置行高
             self.offsets_table.setRowHeight(i, 40)
         
@@ -495,13 +891,281 @@ class ConsumerGroupPanel(QWidget):
         """清空面板"""
         self.current_group = None
         self.all_offsets = []
+        self.current_rate = None
+        self.rate_label.setText("")
         self.title_label.setText("Consumer Group 详情")
         self.state_card.set_value("-")
         self.members_card.set_value("0")
         self.lag_card.set_value("0")
         self.topics_card.set_value("0")
+        self.time_lag_card.set_value("-")
         self.offsets_table.setRowCount(0)
         self.members_table.setRowCount(0)
+        self.history_chart.set_points([])
+        self.history_summary_label.setText("")
+
+
+class DashboardRow(NamedTuple):
+    """Lag 总览中的一行，速率未知时为 None"""
+    group_id: str
+    state: str
+    members: Optional[int]
+    lag: int
+    consume_rate: Optional[float]
+    produce_rate: Optional[float]
+    eta: Optional[float]  # 预计追平秒数，追不上时为 inf
+    time_lag: Optional[float]  # 时间延迟（秒），未精确计算时为估算值
+
+
+class LagDashboardModel(QAbstractTableModel):
+    """Lag 总览表格模型
+
+    排序与过滤在模型内用 Python 列表完成（数千行时比逐次回调 data() 的 QSortFilterProxyModel 快得多），
+    组集合不变时只重排并通知数据变化，选中行随组移动。
+    """
+    
+    COLUMNS = ["消费者组", "状态", "成员数", "总 Lag", "消费/秒", "生产/秒", "预计追平", "时间延迟(估)"]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.all_rows: List[DashboardRow] = []
+        self.rows: List[DashboardRow] = []  # 过滤、排序后显示的行
+        self.sort_column = 3
+        self.sort_order = Qt.SortOrder.DescendingOrder
+        self.filter_text = ""
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self.COLUMNS[section]
+            if role == Qt.ItemDataRole.ToolTipRole and section == 7:
+                return "按最近的生产速率估算：Lag / 生产速率；点击“计算时间延迟”后为按消息时间戳计算的精确值"
+        return None
+    
+    def set_rows(self, rows: List[DashboardRow]):
+        self.all_rows = rows
+        self._refresh()
+    
+    def set_filter(self, text: str):
+        self.filter_text = text.strip().lower()
+        self._refresh()
+    
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        self.sort_column, self.sort_order = column, order
+        self._refresh()
+    
+    def _sort_key(self, row: DashboardRow):
+        value = row[self.sort_column]
+        if self.sort_column <= 1:
+            return value
+        return -1.0 if value is None else value
+    
+    def _refresh(self):
+        rows = self.all_rows
+        if self.filter_text:
+            rows = [r for r in rows if self.filter_text in r.group_id.lower()]
+        else:
+            rows = list(rows)
+        rows.sort(key=self._sort_key, reverse=self.sort_order == Qt.SortOrder.DescendingOrder)
+        
+        if len(rows) != len(self.rows) or {r.group_id for r in rows} != {r.group_id for r in self.rows}:
+            self.beginResetModel()
+            self.rows = rows
+            self.endResetModel()
+            return
+        
+        # 行集合不变：重排并把选中 / 当前行映射到组的新位置
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_ids = [self.rows[index.row()].group_id for index in old_indexes]
+        self.rows = rows
+        positions = {r.group_id: i for i, r in enumerate(rows)}
+        self.changePersistentIndexList(
+            old_indexes, [self.index(positions[group_id], index.column()) for group_id, index in zip(old_ids, old_indexes)]
+        )
+        self.layoutChanged.emit()
+        if rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(rows) - 1, len(self.COLUMNS) - 1))
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._display(row, column)
+        if role == Qt.ItemDataRole.TextAlignmentRole and column >= 2:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if column == 3:
+                return QColor("#f44336" if row.lag > 10000 else "#ff9800" if row.lag > 1000 else "#4caf50")
+            if column == 6 and row.eta == float('inf'):
+                return QColor("#f44336")
+            if column == 1 and row.state not in ("Stable", "-"):
+                return QColor("#ff9800")
+        return None
+    
+    @staticmethod
+    def _display(row: DashboardRow, column: int) -> str:
+        if column == 0:
+            return row.group_id
+        if column == 1:
+            return row.state
+        if column == 2:
+            return "-" if row.members is None else str(row.members)
+        if column == 3:
+            return f"{row.lag:,}"
+        if column in (4, 5):
+            value = row[column]
+            return "-" if value is None else format_rate(value)
+        if column == 6:
+            if row.eta is None:
+                return "-"
+            if row.eta == float('inf'):
+                return "追不上"
+            return "已追平" if row.eta == 0 else format_duration(row.eta)
+        if column == 7:
+            return "-" if row.time_lag is None else format_duration(row.time_lag)
+        return ""
+
+
+class LagDashboardPanel(QWidget):
+    """集群内所有消费者组的 Lag 总览，随后台采集自动刷新"""
+    
+    refresh_requested = pyqtSignal()  # 立即采集一次
+    group_activated = pyqtSignal(str)  # 双击打开组详情
+    time_lag_requested = pyqtSignal(list)  # 精确计算这些组的时间延迟
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cluster: Optional[str] = None
+        self.exact_time_lags: Dict[str, float] = {}  # 按消息时间戳计算的时间延迟，覆盖估算值
+        self._snapshot: Optional[GroupOffsetsSnapshot] = None
+        self._rates: Dict[str, GroupLagRate] = {}
+        self.setup_ui()
+    
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(16)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        header = QHBoxLayout()
+        self.title_label = QLabel("消费者组 Lag 总览")
+        self.title_label.setObjectName("statsCardValue")
+        header.addWidget(self.title_label)
+        header.addStretch()
+        
+        self.time_lag_btn = QPushButton("⏱ 计算时间延迟")
+        self.time_lag_btn.setProperty("secondary", True)
+        self.time_lag_btn.setToolTip("按消息时间戳计算当前显示的有 lag 的组的时间延迟")
+        self.time_lag_btn.clicked.connect(self._on_time_lag_clicked)
+        header.addWidget(self.time_lag_btn)
+        
+        self.refresh_btn = QPushButton("🔄 立即刷新")
+        self.refresh_btn.setProperty("secondary", True)
+        self.refresh_btn.clicked.connect(self.refresh_requested)
+        header.addWidget(self.refresh_btn)
+        layout.addLayout(header)
+        
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("🔍 过滤:"))
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("输入消费者组名称过滤...")
+        self.filter_edit.setMaximumWidth(300)
+        filter_layout.addWidget(self.filter_edit)
+        
+        self.summary_label = QLabel("")
+        self.summary_label.setObjectName("statsCardTitle")
+        filter_layout.addWidget(self.summary_label)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+        
+        self.model = LagDashboardModel(self)
+        self.filter_edit.textChanged.connect(self.model.set_filter)
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        # 先设置排序指示器，启用排序时按它排序（默认按总 Lag 降序）
+        self.table.horizontalHeader().setSortIndicator(self.model.sort_column, self.model.sort_order)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        # 固定行高，数千行时不需要逐行计算尺寸
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(32)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setColumnWidth(0, 320)
+        self.table.doubleClicked.connect(self._on_double_clicked)
+        layout.addWidget(self.table)
+    
+    def set_cluster(self, cluster: str):
+        if cluster != self.cluster:
+            self.cluster = cluster
+            self.exact_time_lags = {}
+            self._snapshot = None
+            self.model.set_rows([])
+            self.summary_label.setText("正在采集...")
+        self.title_label.setText(f"消费者组 Lag 总览: {cluster}")
+    
+    def update_snapshot(self, snapshot: GroupOffsetsSnapshot, rates: Dict[str, GroupLagRate]):
+        """用一次批量快照（及滚动速率）刷新整个表格"""
+        self._snapshot, self._rates = snapshot, rates
+        rows = []
+        stalled = 0
+        for group_id in sorted(set(snapshot.committed) | set(snapshot.states)):
+            rate = rates.get(group_id)
+            lag = rate.lag if rate is not None else snapshot.group_lag(group_id)
+            consume = produce = eta = time_lag = None
+            if rate is not None and rate.span > 0:
+                consume, produce = rate.consume_rate, rate.produce_rate
+                eta = rate.eta_seconds
+                if eta is None:
+                    eta = float('inf')
+                    stalled += 1
+                if lag == 0:
+                    time_lag = 0.0
+                elif produce > 0:
+                    time_lag = lag / produce
+            if lag == 0:
+                self.exact_time_lags.pop(group_id, None)
+            elif group_id in self.exact_time_lags:
+                time_lag = self.exact_time_lags[group_id]
+            rows.append(DashboardRow(
+                group_id, snapshot.states.get(group_id, "-"), snapshot.member_counts.get(group_id),
+                lag, consume, produce, eta, time_lag
+            ))
+        self.model.set_rows(rows)
+        
+        taken = datetime.fromtimestamp(snapshot.taken_at).strftime('%H:%M:%S')
+        summary = f"共 {len(rows)} 个组，总 Lag {sum(r.lag for r in rows):,}"
+        if stalled:
+            summary += f"，{stalled} 个组追不上"
+        if snapshot.errors:
+            summary += f"，{len(snapshot.errors)} 个组采集失败"
+        self.summary_label.setText(f"{summary}（{taken} 采集）")
+    
+    def set_exact_time_lags(self, time_lags: Dict[str, float]):
+        """填入按消息时间戳计算的时间延迟，并用最近一次快照重绘表格"""
+        self.exact_time_lags.update(time_lags)
+        if self._snapshot is not None:
+            self.update_snapshot(self._snapshot, self._rates)
+    
+    def _on_time_lag_clicked(self):
+        group_ids = [row.group_id for row in self.model.rows if row.lag > 0]
+        if group_ids:
+            self.time_lag_requested.emit(group_ids)
+    
+    def _on_double_clicked(self, index):
+        if 0 <= index.row() < len(self.model.rows):
+            self.group_activated.emit(self.model.rows[index.row()].group_id)
 
 
 class MessageBrowserPanel(QWidget):
@@ -510,11 +1174,16 @@ class MessageBrowserPanel(QWidget):
     refresh_requested = pyqtSignal(str, int, int, int, bool, str)  # topic, partition, offset, limit, from_beginning, sort_field
     resend_message_requested = pyqtSignal(str, object, object, object)  # topic, key, value, headers
     check_consumption_requested = pyqtSignal(str, int, int, object)  # topic, partition, offset, callback
+    export_requested = pyqtSignal(str, int)  # topic, partition
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.messages: List[KafkaMessage] = []
         self.filtered_messages: List[KafkaMessage] = []
+        # 最近一次加载消息的时间，内存超出预算时按此回收
+        self.last_used = time.monotonic()
+        # 离线打开的段文件，为 None 时从集群获取消息
+        self.segment: Optional[SegmentReader] = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -569,10 +1238,61 @@ class MessageBrowserPanel(QWidget):
         self.fetch_btn.clicked.connect(self.on_fetch_clicked)
         filter_layout.addWidget(self.fetch_btn)
         
+        self.export_btn = QPushButton("💾 导出")
+        self.export_btn.setProperty("secondary", True)
+        self.export_btn.setToolTip("按范围把消息流式导出到文件")
+        self.export_btn.clicked.connect(self.on_export_clicked)
+        filter_layout.addWidget(self.export_btn)
+        
+        self.open_file_btn = QPushButton("📂 打开文件")
+        self.open_file_btn.setProperty("secondary", True)
+        self.open_file_btn.setToolTip("离线打开导出的索引段文件 (.kseg)")
+        self.open_file_btn.clicked.connect(self.on_open_file_clicked)
+        filter_layout.addWidget(self.open_file_btn)
+        
         filter_layout.addStretch()
         
         layout.addLayout(filter_layout)
         
+        # 离线段文件定位
+        self.segment_bar = QWidget()
+        segment_layout = QHBoxLayout(self.segment_bar)
+        segment_layout.setContentsMargins(0, 0, 0, 0)
+        segment_layout.setSpacing(12)
+        
+        self.segment_info_label = QLabel("")
+        self.segment_info_label.setObjectName("statsCardTitle")
+        segment_layout.addWidget(self.segment_info_label)
+        
+        segment_layout.addWidget(QLabel("Offset:"))
+        self.jump_offset_spin = QSpinBox()
+        self.jump_offset_spin.setRange(0, 2**31 - 1)
+        segment_layout.addWidget(self.jump_offset_spin)
+        jump_offset_btn = QPushButton("跳转")
+        jump_offset_btn.setProperty("secondary", True)
+        jump_offset_btn.clicked.connect(self.jump_to_offset)
+        segment_layout.addWidget(jump_offset_btn)
+        
+        segment_layout.addWidget(QLabel("时间:"))
+        self.jump_time_edit = QDateTimeEdit(QDateTime.currentDateTime())
+        self.jump_time_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.jump_time_edit.setCalendarPopup(True)
+        segment_layout.addWidget(self.jump_time_edit)
+        jump_time_btn = QPushButton("跳转")
+        jump_time_btn.setProperty("secondary", True)
+        jump_time_btn.clicked.connect(self.jump_to_time)
+        segment_layout.addWidget(jump_time_btn)
+        
+        segment_layout.addStretch()
+        
+        close_file_btn = QPushButton("关闭文件")
+        close_file_btn.setProperty("secondary", True)
+        close_file_btn.clicked.connect(self.close_segment)
+        segment_layout.addWidget(close_file_btn)
+        
+        self.segment_bar.setVisible(False)
+        layout.addWidget(self.segment_bar)
+        
         # 消息内容过滤器
         search_layout = QHBoxLayout()
         search_layout.setSpacing(12)
@@ -633,6 +1353,7 @@ class MessageBrowserPanel(QWidget):
     
     def set_topic(self, topic: str, partition: int = -1):
         """设置Topic"""
+        self.close_segment()
         self.topic_edit.setText(topic)
         self.partition_spin.setValue(partition)
         self.title_label.setText(f"消息浏览器 - {topic}")
@@ -649,12 +1370,94 @@ class MessageBrowserPanel(QWidget):
         from_beginning = self.sort_combo.currentIndex() == 1  # "最旧" = True
         sort_field = "offset" if self.sort_field_combo.currentIndex() == 0 else "timestamp"
         
+        if self.segment:
+            self.load_messages(self.segment.read_messages(partition, limit=limit, latest=not from_beginning))
+            return
+        
         self.refresh_requested.emit(topic, partition, -1, limit, from_beginning, sort_field)
     
+    def on_open_file_clicked(self):
+        """选择段文件"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "打开消息段文件", "", "消息段文件 (*.kseg);;所有文件 (*)"
+        )
+        if path:
+            self.open_segment(path)
+    
+    def open_segment(self, path: str):
+        """离线打开段文件"""
+        try:
+            reader = SegmentReader(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "无法打开文件", str(e))
+            return
+        
+        self.close_segment()
+        self.segment = reader
+        self.topic_edit.setText(reader.topic)
+        self.topic_edit.setReadOnly(True)
+        self.partition_spin.setValue(-1)
+        self.title_label.setText(f"消息浏览器 - {reader.topic} (文件: {os.path.basename(path)})")
+        
+        partitions = ", ".join(
+            f"{p.partition}: {p.first_offset}-{p.last_offset}"
+            for p in sorted(reader.partitions.values(), key=lambda p: p.partition)
+        )
+        self.segment_info_label.setText(f"共 {reader.record_count:,} 条 | 分区 {partitions}")
+        self.segment_info_label.setToolTip(partitions)
+        self.segment_bar.setVisible(True)
+        
+        self.load_messages(reader.read_messages(-1, limit=self.limit_spin.value()))
+    
+    def close_segment(self):
+        """关闭段文件，回到在线浏览"""
+        if not self.segment:
+            return
+        self.segment.close()
+        self.segment = None
+        self.segment_bar.setVisible(False)
+        self.topic_edit.setReadOnly(False)
+        self.title_label.setText("消息浏览器")
+        self.load_messages([])
+    
+    def _segment_partition(self) -> Optional[int]:
+        partition = self.partition_spin.value()
+        if partition >= 0 and partition not in self.segment.partitions:
+            QMessageBox.warning(self, "警告", f"文件中没有分区 {partition}")
+            return None
+        return partition
+    
+    def jump_to_offset(self):
+        """跳转到 Offset（全部分区时对每个分区分别定位）"""
+        partition = self._segment_partition() if self.segment else None
+        if partition is None:
+            return
+        self.load_messages(self.segment.read_messages(
+            partition, start_offset=self.jump_offset_spin.value(), limit=self.limit_spin.value()
+        ))
+    
+    def jump_to_time(self):
+        """跳转到时间"""
+        partition = self._segment_partition() if self.segment else None
+        if partition is None:
+            return
+        self.load_messages(self.segment.read_messages(
+            partition, start_time=self.jump_time_edit.dateTime().toPyDateTime(), limit=self.limit_spin.value()
+        ))
+    
+    def on_export_clicked(self):
+        """导出消息"""
+        topic = self.topic_edit.text().strip()
+        if not topic:
+            QMessageBox.warning(self, "警告", "请输入Topic名称")
+            return
+        self.export_requested.emit(topic, self.partition_spin.value())
+    
     def load_messages(self, messages: List[KafkaMessage]):
         """加载消息列表"""
         self.messages = messages
         self.filtered_messages = messages.copy()
+        self.last_used = time.monotonic()
         
         # 清空过滤条件
         self.search_key_edit.clear()
@@ -750,6 +1553,9 @@ Offset: {msg.offset}
             # 连接信号后再请求检查消费状态
             self._current_dialog.request_consumption_check()
             self._current_dialog.exec()
+            # 对话框以面板为父对象，不释放会一直留在内存中
+            self._current_dialog.deleteLater()
+            self._current_dialog = None
     
     def on_resend_requested(self, topic, key, value, headers):
         """转发重新发送请求"""
@@ -767,9 +1573,28 @@ Offset: {msg.offset}
     def clear(self):
         """清空面板"""
         self.messages = []
+        self.filtered_messages = []
         self.messages_table.setRowCount(0)
         self.detail_text.clear()
 
+    # 表格每个单元格（QTableWidgetItem + 文本）的估算字节数
+    _TABLE_CELL_BYTES = 160
+
+    def memory_usage(self) -> Tuple[int, int]:
+        """(估算字节数, 消息条数)；过滤结果与消息列表共享消息对象，只计列表本身"""
+        size = sum(estimate_message_size(m) for m in self.messages)
+        size += sys.getsizeof(self.messages) + sys.getsizeof(self.filtered_messages)
+        size += self.messages_table.rowCount() * self.messages_table.columnCount() * self._TABLE_CELL_BYTES
+        return size, len(self.messages)
+
+    def release_messages(self, amount: int = 0) -> int:
+        """释放消息缓冲区（正在显示时不释放），返回释放的估算字节数"""
+        if self.isVisible() or not self.messages:
+            return 0
+        size, _ = self.memory_usage()
+        self.clear()
+        return size
+
 
 class WelcomePanel(QWidget):
     """欢迎面板 - Clash Verge 风格"""
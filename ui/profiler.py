@@ -0,0 +1,165 @@
+"""后台任务性能分析
+
+开启后接下来的 N 个 WorkerThread 任务会在 cProfile 下运行，同时由采样线程定期抓取任务线程的调用栈。
+每个任务保存两个文件（以操作名命名）：
+    <时间>-<操作>.pstats      cProfile 统计，可用 pstats / snakeviz 打开
+    <时间>-<操作>.collapsed   折叠调用栈（每行 "外层;...;内层 次数"），可直接生成火焰图
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProfileResult:
+    """一次任务的分析结果"""
+    name: str
+    started_at: datetime
+    duration: float
+    pstats_path: str
+    collapsed_path: str
+    samples: int = 0
+    error: Optional[str] = None
+
+    def top_functions(self, limit: int = 50, sort: str = 'tottime') -> List[dict]:
+        """按自身耗时（或累计耗时）排序的函数列表"""
+        stats = pstats.Stats(self.pstats_path).stats
+        rows = []
+        for (filename, lineno, func), (_, ncalls, tottime, cumtime, _) in stats.items():
+            location = func if filename == '~' else f"{func} ({os.path.basename(filename)}:{lineno})"
+            rows.append({'function': location, 'calls': ncalls, 'tottime': tottime, 'cumtime': cumtime})
+        rows.sort(key=lambda r: r[sort], reverse=True)
+        return rows[:limit]
+
+
+class _StackSampler:
+    """定期抓取指定线程的调用栈并按折叠格式计数（只保留 root_code 以下的帧）"""
+
+    def __init__(self, thread_id: int, interval: float, root_code):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="task-profiler-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and frame.f_code is not self.root_code:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names and not self._stop.is_set():
+                self.stacks[";".join(reversed(names))] += 1
+
+
+class TaskProfiler:
+    """按需分析后台任务，线程安全"""
+
+    def __init__(self, output_dir: Optional[str] = None, sample_interval: float = 0.005, history: int = 50):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.results: deque = deque(maxlen=history)
+        self._remaining = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        """还会被分析的任务数"""
+        return self._remaining
+
+    def arm(self, count: int = 1):
+        """分析接下来的 count 个任务（0 表示取消）"""
+        with self._lock:
+            self._remaining = max(0, count)
+
+    def take(self) -> bool:
+        """占用一个分析名额，返回当前任务是否需要分析"""
+        if not self._remaining:
+            return False
+        with self._lock:
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            return True
+
+    def recent_results(self) -> List[ProfileResult]:
+        with self._lock:
+            return list(self.results)
+
+    @staticmethod
+    def task_name(func, args) -> str:
+        """用函数名和第一个字符串参数（Topic、消费者组等）作为操作名"""
+        name = getattr(func, '__name__', None) or type(func).__name__
+        label = next((a for a in args if isinstance(a, str)), None)
+        if label:
+            name = f"{name}-{label}"
+        return re.sub(r'[^\w.-]+', '_', name).strip('_')[:80] or "task"
+
+    def run(self, func, *args, **kwargs):
+        """在分析器下执行任务并保存结果，异常照常抛出"""
+        name = self.task_name(func, args)
+        started_at = datetime.now()
+        sampler = _StackSampler(threading.get_ident(), self.sample_interval, TaskProfiler.run.__code__)
+        profile = cProfile.Profile()
+        error = None
+        started = time.perf_counter()
+        sampler.start()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            profile.disable()
+            duration = time.perf_counter() - started
+            sampler.stop()
+            self._save(name, started_at, duration, profile, sampler, error)
+
+    def _save(self, name: str, started_at: datetime, duration: float,
+              profile: cProfile.Profile, sampler: _StackSampler, error: Optional[str]):
+        output_dir = self.output_dir or os.getcwd()
+        base = os.path.join(output_dir, f"{started_at:%Y%m%d-%H%M%S}-{started_at.microsecond // 1000:03d}-{name}")
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            profile.dump_stats(base + '.pstats')
+            with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+                for stack, count in sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            logger.warning(f"保存性能分析结果失败: {e}")
+            return
+        result = ProfileResult(
+            name=name, started_at=started_at, duration=duration,
+            pstats_path=base + '.pstats', collapsed_path=base + '.collapsed',
+            samples=sum(sampler.stacks.values()), error=error
+        )
+        with self._lock:
+            self.results.append(result)
+        logger.info(f"性能分析 {name}: {duration:.3f}s, 结果已保存到 {base}.pstats")
+
+
+# 进程内共享的任务分析器，WorkerThread 执行任务前检查
+TASK_PROFILER = TaskProfiler()
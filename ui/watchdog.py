@@ -0,0 +1,147 @@
+"""界面卡顿监控
+
+主线程用定时器持续更新心跳时间，后台线程检查心跳：超过阈值未更新即认为界面被阻塞，
+立即从后台线程抓取主线程当前的 Python 调用栈。卡顿结束后记录时长与调用栈到环形缓冲区。
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from kafka_client.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# 项目根目录，用于在调用栈中定位项目自身的代码
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class StallEvent:
+    """一次界面卡顿"""
+    started_at: datetime
+    duration: float = 0.0
+    # (文件, 行号, 函数, 源码) 列表，由外到内
+    stack: List[Tuple[str, int, str, str]] = field(default_factory=list)
+
+    @property
+    def location(self) -> str:
+        """调用栈中最内层的项目代码位置"""
+        for filename, lineno, name, _ in reversed(self.stack):
+            if os.path.abspath(filename).startswith(_PROJECT_ROOT) and 'site-packages' not in filename:
+                return f"{name} ({os.path.basename(filename)}:{lineno})"
+        if self.stack:
+            filename, lineno, name, _ = self.stack[-1]
+            return f"{name} ({os.path.basename(filename)}:{lineno})"
+        return "未知"
+
+    def format_stack(self) -> str:
+        return "".join(traceback.format_list(self.stack))
+
+
+class UIWatchdog(QObject):
+    """主线程卡顿监控"""
+
+    stall_detected = pyqtSignal(object)  # StallEvent
+
+    def __init__(self, parent=None, threshold_ms: int = 250, heartbeat_ms: int = 50, history: int = 100):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_interval = heartbeat_ms / 1000
+        self.events: deque = deque(maxlen=history)
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lag_total = 0.0
+        self._lag_count = 0
+        self._last_beat = time.monotonic()
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._beat)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._last_beat = time.monotonic()
+        self._timer.start(int(self.heartbeat_interval * 1000))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ui-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1)
+            self._thread = None
+
+    def _beat(self):
+        """主线程心跳，同时统计事件循环延迟"""
+        now = time.monotonic()
+        lag = max(0.0, now - self._last_beat - self.heartbeat_interval)
+        self._last_beat = now
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self._lag_total += lag
+        self._lag_count += 1
+        METRICS.observe('kafka_explorer_ui_event_loop_lag_seconds', lag)
+
+    def latency_stats(self) -> dict:
+        """事件循环延迟（毫秒）"""
+        return {
+            'last_ms': self.last_lag * 1000,
+            'max_ms': self.max_lag * 1000,
+            'avg_ms': self._lag_total / self._lag_count * 1000 if self._lag_count else 0.0,
+        }
+
+    def recent_events(self) -> List[StallEvent]:
+        with self._lock:
+            return list(self.events)
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+        self.max_lag = 0.0
+        self._lag_total = 0.0
+        self._lag_count = 0
+
+    def _capture_main_stack(self) -> List[Tuple[str, int, str, str]]:
+        frame = sys._current_frames().get(threading.main_thread().ident)
+        if frame is None:
+            return []
+        return [(f.filename, f.lineno, f.name, f.line or "") for f in traceback.extract_stack(frame)]
+
+    def _run(self):
+        current: Optional[StallEvent] = None
+        stalled_beat = 0.0
+        poll_interval = min(self.threshold / 2, 0.05)
+        while not self._stop.wait(poll_interval):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat
+            if current is None:
+                if blocked >= self.threshold:
+                    # 卡顿中，立即抓取主线程调用栈（此时栈顶就是阻塞的代码）
+                    current = StallEvent(
+                        started_at=datetime.fromtimestamp(time.time() - blocked),
+                        stack=self._capture_main_stack()
+                    )
+                    stalled_beat = beat
+            elif beat != stalled_beat:
+                # 心跳恢复，卡顿结束
+                current.duration = max(0.0, beat - stalled_beat - self.heartbeat_interval)
+                with self._lock:
+                    self.events.append(current)
+                METRICS.inc('kafka_explorer_ui_stalls_total')
+                logger.warning(f"界面卡顿 {current.duration * 1000:.0f}ms: {current.location}")
+                self.stall_detected.emit(current)
+                current = None